@@ -17,6 +17,11 @@ resource "aws_s3_object" "analytics_ohlc_daily" {
   key    = "analytics/ohlc_daily/"
 }
 
+resource "aws_s3_object" "analytics_ohlc_daily_parquet" {
+  bucket = aws_s3_bucket.raw_bucket.bucket
+  key    = "analytics/ohlc_daily_parquet/"
+}
+
 resource "aws_s3_object" "quarantine_batch_ohlc_daily" {
   bucket = aws_s3_bucket.raw_bucket.bucket
   key    = "quarantine/batch/ohlc_daily/"
@@ -13,6 +13,19 @@ resource "aws_cloudwatch_log_group" "lambda_streaming_ingest" {
   }
 }
 
+resource "aws_cloudwatch_log_group" "lambda_streaming_coordinator" {
+  name              = "/aws/lambda/${aws_lambda_function.streaming_coordinator.function_name}"
+  retention_in_days = 7
+
+  depends_on = [aws_lambda_function.streaming_coordinator]
+
+  tags = {
+    Name        = "${var.project_name}-streaming-coordinator-logs"
+    Environment = var.environment
+    Project     = var.project_name
+  }
+}
+
 # Monitors our Lambda for errors and triggers an alert/alarm if any errors occur.
 resource "aws_cloudwatch_metric_alarm" "lambda_streaming_errors" {
   alarm_name          = "${var.project_name}-${var.environment}-streaming-lambda-errors"
@@ -36,6 +49,29 @@ resource "aws_cloudwatch_metric_alarm" "lambda_streaming_errors" {
   }
 }
 
+# Coordinator errors (timeouts included): it is not retried, so each one is a lost tick
+resource "aws_cloudwatch_metric_alarm" "lambda_coordinator_errors" {
+  alarm_name          = "${var.project_name}-${var.environment}-streaming-coordinator-errors"
+  alarm_description   = "Triggers if the fan-out coordinator Lambda reports any errors."
+  namespace           = "AWS/Lambda"
+  metric_name         = "Errors"
+  statistic           = "Sum"
+  period              = 300
+  evaluation_periods  = 1
+  threshold           = 0
+  comparison_operator = "GreaterThanThreshold"
+  treat_missing_data  = "notBreaching"
+
+  dimensions = {
+    FunctionName = aws_lambda_function.streaming_coordinator.function_name
+  }
+
+  tags = {
+    Environment = var.environment
+    Project     = var.project_name
+  }
+}
+
 #  Monitors if our Lambda is being throttled (hitting concurrency/burst limits) and alerts us.
 resource "aws_cloudwatch_metric_alarm" "lambda_streaming_throttles" {
   alarm_name          = "${var.project_name}-${var.environment}-streaming-lambda-throttles"
@@ -13,4 +13,29 @@ resource "aws_dynamodb_table" "latest_prices" {
     Environment = var.environment
     Project     = var.project_name
   }
-}
\ No newline at end of file
+}
+
+# Shared tier of the streaming Lambda's quote cache: last GLOBAL_QUOTE per symbol, so
+# concurrent and freshly started containers don't re-fetch quotes another one just got.
+resource "aws_dynamodb_table" "quote_cache" {
+  name         = "quote_cache"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "symbol"
+
+  attribute {
+    name = "symbol"
+    type = "S"
+  }
+
+  # Expired entries are purged lazily by DynamoDB; the Lambda also checks expires_at on read
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
+
+  tags = {
+    Name        = "Quote Cache Table"
+    Environment = var.environment
+    Project     = var.project_name
+  }
+}
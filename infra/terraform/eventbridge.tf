@@ -9,7 +9,7 @@ resource "aws_lambda_permission" "allow_eventbridge" {
   count         = var.schedule_enabled ? 1 : 0
   statement_id  = "AllowExecutionFromEventBridge"
   action        = "lambda:InvokeFunction"
-  function_name = aws_lambda_function.streaming_ingest.function_name
+  function_name = aws_lambda_function.streaming_coordinator.function_name
   principal     = "events.amazonaws.com"
   source_arn    = aws_cloudwatch_event_rule.streaming_schedule[0].arn
 }
@@ -17,7 +17,9 @@ resource "aws_lambda_permission" "allow_eventbridge" {
 resource "aws_cloudwatch_event_target" "streaming_lambda_target" {
   count = var.schedule_enabled ? 1 : 0
   rule  = aws_cloudwatch_event_rule.streaming_schedule[0].name
-  arn   = aws_lambda_function.streaming_ingest.arn
+  arn   = aws_lambda_function.streaming_coordinator.arn
+  # The scheduled run is the fan-out coordinator; it invokes the ingest workers itself
+  input = jsonencode({ mode = "coordinator" })
 }
 
 
@@ -91,4 +91,97 @@ resource "aws_glue_catalog_table" "ohlc_daily" {
       type = "string"
     }
   }
-}
\ No newline at end of file
+}
+
+# ----------------------------------------
+# Glue table for analytics/ohlc_daily_parquet
+# (Hive-partitioned Parquet; partitions registered with the DDL the batch run emits)
+# ----------------------------------------
+
+resource "aws_glue_catalog_table" "ohlc_daily_parquet" {
+  name          = "ohlc_daily_parquet"
+  database_name = aws_glue_catalog_database.market_data.name
+  table_type    = "EXTERNAL_TABLE"
+
+  parameters = {
+    EXTERNAL              = "TRUE"
+    classification        = "parquet"
+    "parquet.compression" = "SNAPPY"
+  }
+
+  partition_keys {
+    name = "symbol"
+    type = "string"
+  }
+
+  partition_keys {
+    name = "year"
+    type = "string"
+  }
+
+  partition_keys {
+    name = "month"
+    type = "string"
+  }
+
+  storage_descriptor {
+    location      = "s3://${aws_s3_bucket.raw_bucket.bucket}/analytics/ohlc_daily_parquet/"
+    input_format  = "org.apache.hadoop.hive.ql.io.parquet.MapredParquetInputFormat"
+    output_format = "org.apache.hadoop.hive.ql.io.parquet.MapredParquetOutputFormat"
+
+    ser_de_info {
+      name                  = "ohlc_daily_parquet"
+      serialization_library = "org.apache.hadoop.hive.ql.io.parquet.serde.ParquetHiveSerDe"
+    }
+
+    columns {
+      name = "date"
+      type = "date"
+    }
+
+    columns {
+      name = "open"
+      type = "double"
+    }
+
+    columns {
+      name = "high"
+      type = "double"
+    }
+
+    columns {
+      name = "low"
+      type = "double"
+    }
+
+    columns {
+      name = "close"
+      type = "double"
+    }
+
+    columns {
+      name = "volume"
+      type = "bigint"
+    }
+
+    columns {
+      name = "currency"
+      type = "string"
+    }
+
+    columns {
+      name = "ts_market"
+      type = "timestamp"
+    }
+
+    columns {
+      name = "ts_ingest"
+      type = "timestamp"
+    }
+
+    columns {
+      name = "source"
+      type = "string"
+    }
+  }
+}
@@ -23,7 +23,8 @@ resource "aws_iam_role_policy" "lambda_policy" {
     Version = "2012-10-17"
     Statement = [
       {
-        Action = ["s3:GetObject", "s3:PutObject"]
+        # PutObject also covers multipart uploads; Abort lets failed writes clean up their parts
+        Action = ["s3:GetObject", "s3:PutObject", "s3:AbortMultipartUpload"]
         Effect = "Allow"
         Resource = [
           "${aws_s3_bucket.raw_bucket.arn}/raw/*",
@@ -32,10 +33,34 @@ resource "aws_iam_role_policy" "lambda_policy" {
         ]
       },
       {
-        Action   = ["dynamodb:PutItem"]
+        # Symbol universe read by the fan-out coordinator (SYMBOL_UNIVERSE_KEY)
+        Action   = ["s3:GetObject"]
+        Effect   = "Allow"
+        Resource = "${aws_s3_bucket.raw_bucket.arn}/config/*"
+      },
+      {
+        # Anomaly-check state snapshots (ANOMALY_SNAPSHOT_KEY), restored by cold containers
+        Action   = ["s3:GetObject", "s3:PutObject"]
+        Effect   = "Allow"
+        Resource = "${aws_s3_bucket.raw_bucket.arn}/state/*"
+      },
+      {
+        # Fan-out coordinator invokes the ingest (worker) function once per shard
+        Action   = ["lambda:InvokeFunction"]
+        Effect   = "Allow"
+        Resource = aws_lambda_function.streaming_ingest.arn
+      },
+      {
+        Action   = ["dynamodb:PutItem", "dynamodb:BatchWriteItem"]
         Effect   = "Allow"
         Resource = aws_dynamodb_table.latest_prices.arn
       },
+      {
+        # Shared quote cache: batched reads before fetching, batched writes after landing
+        Action   = ["dynamodb:BatchGetItem", "dynamodb:BatchWriteItem"]
+        Effect   = "Allow"
+        Resource = aws_dynamodb_table.quote_cache.arn
+      },
       {
         # Allow publishing custom CloudWatch metrics (PutMetricData has no resource-level ARNs)
         Action   = ["cloudwatch:PutMetricData"]
@@ -56,4 +81,22 @@ resource "aws_iam_role_policy" "lambda_policy" {
       }
     ]
   })
-}
\ No newline at end of file
+}
+
+# Read access to the serving table for consumers of pipelines/serving/latest_prices.py
+# (dashboards, APIs): attach to their role instead of granting table-wide access.
+resource "aws_iam_policy" "latest_prices_read" {
+  name        = "latest-prices-read"
+  description = "Batched reads of the latest_prices serving table"
+
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Action   = ["dynamodb:BatchGetItem", "dynamodb:GetItem"]
+        Effect   = "Allow"
+        Resource = aws_dynamodb_table.latest_prices.arn
+      }
+    ]
+  })
+}
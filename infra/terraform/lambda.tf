@@ -1,3 +1,5 @@
+# Ingest function; also the fan-out worker: streaming_coordinator invokes it once per
+# shard with its own slice of the provider quota
 resource "aws_lambda_function" "streaming_ingest" {
   function_name = "${var.project_name}-${var.environment}-streaming-ingest"
   role          = aws_iam_role.lambda_role.arn
@@ -12,6 +14,11 @@ resource "aws_lambda_function" "streaming_ingest" {
       S3_BUCKET_NAME          = aws_s3_bucket.raw_bucket.bucket
       DDB_TABLE_LATEST_PRICES = aws_dynamodb_table.latest_prices.name
       PROVIDER_SECRET_ID      = "mdp/market-data/${var.environment}/provider_api_key"
+      QUOTE_CACHE_TABLE       = aws_dynamodb_table.quote_cache.name
+      QUOTE_CACHE_TTL_SECONDS = "60"
+      METRICS_MODE            = "emf"
+      # Last-price index behind the anomaly checks, snapshotted per shard for cold starts
+      ANOMALY_SNAPSHOT_KEY = "state/anomaly/last_prices.npz"
     }
   }
 
@@ -25,6 +32,48 @@ resource "aws_lambda_function" "streaming_ingest" {
   depends_on = [aws_ecr_repository.streaming_ingest]
 }
 
+# Fan-out coordinator: same image, invoked by the schedule with {"mode": "coordinator"}.
+# It waits for one wave of synchronous worker invokes (shards <= FANOUT_MAX_CONCURRENCY),
+# so its timeout must outlast a worker's; the handler refuses to dispatch otherwise.
+resource "aws_lambda_function" "streaming_coordinator" {
+  function_name = "${var.project_name}-${var.environment}-streaming-coordinator"
+  role          = aws_iam_role.lambda_role.arn
+  package_type  = "Image"
+  image_uri     = "${aws_ecr_repository.streaming_ingest.repository_url}:${var.lambda_image_tag}"
+
+  timeout     = 180
+  memory_size = 256
+
+  environment {
+    variables = {
+      S3_BUCKET_NAME          = aws_s3_bucket.raw_bucket.bucket
+      DDB_TABLE_LATEST_PRICES = aws_dynamodb_table.latest_prices.name
+      METRICS_MODE            = "emf"
+      SYMBOL_UNIVERSE_KEY     = var.symbol_universe_key
+      FANOUT_WORKER_FUNCTION  = aws_lambda_function.streaming_ingest.function_name
+      FANOUT_TIMEOUT_SECONDS  = tostring(aws_lambda_function.streaming_ingest.timeout)
+      FANOUT_MAX_CONCURRENCY  = tostring(var.fanout_max_concurrency)
+      # Split across the workers of one wave, i.e. at most FANOUT_MAX_CONCURRENCY
+      FANOUT_RATE_PER_MINUTE = tostring(var.provider_rate_per_minute)
+    }
+  }
+
+  tags = {
+    Name        = "${var.project_name}-streaming-coordinator"
+    Environment = var.environment
+    Project     = var.project_name
+  }
+
+  depends_on = [aws_ecr_repository.streaming_ingest]
+}
+
+# A retried coordinator would dispatch every shard of the tick again (double ingest and
+# provider quota); the next scheduled tick is the retry
+resource "aws_lambda_function_event_invoke_config" "streaming_coordinator" {
+  function_name          = aws_lambda_function.streaming_coordinator.function_name
+  maximum_retry_attempts = 0
+}
+
 # chain of responsibility can be seen here as : eventbridge gets activated and points to lambda ARN, 
 # then this file points to the ecr_image and then lambda services pulls from ecr when needed. 
 
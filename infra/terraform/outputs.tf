@@ -11,4 +11,8 @@ output "dynamodb_table_name" {
 output "lambda_role_arn" {
   value       = aws_iam_role.lambda_role.arn
   description = "The IAM role ARN for Lambda"
-}
\ No newline at end of file
+}
+output "latest_prices_read_policy_arn" {
+  value       = aws_iam_policy.latest_prices_read.arn
+  description = "IAM policy for consumers reading the latest_prices table"
+}
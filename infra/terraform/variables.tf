@@ -32,4 +32,21 @@ variable "lambda_image_tag" {
   type        = string
   description = "ECR image tag for the streaming ingest Lambda container image"
   default     = "v2"
-}
\ No newline at end of file
+}
+variable "symbol_universe_key" {
+  type        = string
+  description = "S3 key (in the raw bucket, under config/) of the symbol universe the fan-out coordinator reads; empty uses SYMBOLS"
+  default     = ""
+}
+
+variable "provider_rate_per_minute" {
+  type        = number
+  description = "Provider quota (requests/minute) shared by all fan-out workers of a tick"
+  default     = 5
+}
+
+variable "fanout_max_concurrency" {
+  type        = number
+  description = "Most fan-out workers per tick; shards are capped to it so they run in one wave"
+  default     = 20
+}
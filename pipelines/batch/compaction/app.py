@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import os
+from datetime import timedelta
+
+from dotenv import load_dotenv
+
+from pipelines.batch.compaction.compactor import (
+    FORMATS,
+    GRANULARITIES,
+    ZONE_SCHEMAS,
+    LocalStore,
+    S3Store,
+    compact_zone,
+)
+from pipelines.common.metrics import get_metrics
+
+load_dotenv()
+
+NAMESPACE = "MDP/Compaction"  # objects merged, duplicates dropped, bytes written per zone
+
+ALLOWED_BACKENDS = {"local", "s3"}
+
+
+def _store():
+    backend = os.getenv("COMPACTION_BACKEND", "local").strip().lower()
+    if backend not in ALLOWED_BACKENDS:
+        raise ValueError(
+            f"COMPACTION_BACKEND must be one of {sorted(ALLOWED_BACKENDS)}. Got: {backend!r}"
+        )
+    if backend == "local":
+        # Same layout as the local streaming run: data/raw/prices, data/curated/prices
+        return LocalStore(os.getenv("COMPACTION_ROOT", "data"))
+    from pipelines.common.aws import get_client
+
+    return S3Store(get_client("s3"), os.environ["S3_BUCKET_NAME"])
+
+
+def run(store=None) -> None:
+    zones = [z.strip() for z in os.getenv("COMPACTION_ZONES", ",".join(ZONE_SCHEMAS)).split(",")]
+    granularity = os.getenv("COMPACTION_GRANULARITY", "hour").strip().lower()
+    output_format = os.getenv("COMPACTION_FORMAT", "jsonl").strip().lower()
+    compression = os.getenv("COMPACTION_JSONL_COMPRESSION", "gzip").strip().lower()
+    grace = timedelta(minutes=float(os.getenv("COMPACTION_GRACE_MINUTES", "5")))
+    if granularity not in GRANULARITIES:
+        raise ValueError(
+            f"COMPACTION_GRANULARITY must be one of {sorted(GRANULARITIES)}. Got: {granularity!r}"
+        )
+    if output_format not in FORMATS:
+        raise ValueError(
+            f"COMPACTION_FORMAT must be one of {sorted(FORMATS)}. Got: {output_format!r}"
+        )
+
+    store = store or _store()
+    metrics = get_metrics()
+    try:
+        for zone in filter(None, zones):
+            # Parquet only where the zone has a record contract; raw stays JSONL
+            fmt = output_format if ZONE_SCHEMAS.get(zone.strip("/")) else "jsonl"
+            dataset = zone.split("/")[0]  # raw | curated
+            with metrics.timer(NAMESPACE, "ZoneLatency", Dataset=dataset):
+                result = compact_zone(
+                    store,
+                    zone,
+                    granularity=granularity,
+                    fmt=fmt,
+                    compression=compression,
+                    grace=grace,
+                )
+            for m in result.manifests:
+                print(
+                    f"COMPACTED {m.zone} {m.granularity}={m.period}: {len(m.inputs)} objects "
+                    f"-> {m.output} records={m.records_out} duplicates={m.duplicates} "
+                    f"bytes={m.bytes_in}->{m.bytes_out}"
+                )
+            if result.cleaned:
+                print(f"CLEANUP {zone}: removed {result.cleaned} leftover objects")
+            if not result.manifests:
+                print(f"Nothing to compact in {zone}")
+            metrics.count(NAMESPACE, "PeriodsCompacted", len(result.manifests), Dataset=dataset)
+            metrics.count(NAMESPACE, "ObjectsCompacted", result.objects_in, Dataset=dataset)
+            metrics.count(NAMESPACE, "DuplicatesDropped", result.duplicates, Dataset=dataset)
+            metrics.bytes(NAMESPACE, "BytesWritten", result.bytes_out, Dataset=dataset)
+    finally:
+        metrics.flush()
+
+
+if __name__ == "__main__":
+    run()
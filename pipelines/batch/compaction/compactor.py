@@ -0,0 +1,475 @@
+from __future__ import annotations
+
+import json
+import re
+import shutil
+import tempfile
+from contextlib import closing
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from pipelines.common.storage import (
+    MIB,
+    JsonlWriter,
+    LocalSink,
+    S3Sink,
+    WriteStats,
+    compression_for,
+    iter_jsonl_stream,
+    jsonl_name,
+)
+
+# Small-file compaction for the streaming zones. The Lambda lands one tiny
+# `<zone>/prices_<ts>[_<shard_id>].jsonl[.gz|.zst]` object per tick (per fan-out shard);
+# this job merges the objects of every closed hour (or day) into one file, deduplicated on
+# (symbol, ts_market, ts_ingest):
+#
+#   <zone>/compacted/<granularity>=<period>/prices_<period>_<run_id>.jsonl.gz | .parquet
+#   <zone>/_manifests/<granularity>=<period>.json   -> Manifest (output + the inputs it replaces)
+#
+# The manifest is the commit point. Outputs are written whole (temp file + rename locally,
+# a single put / completed multipart upload on S3) before their manifest, and inputs are
+# deleted only after it. Readers go through live_keys(): manifest outputs plus any source
+# no manifest has consumed, so they see either the small objects or the compacted file,
+# never both and never a partial one. Assumes one compaction run per zone at a time.
+
+SOURCE_NAME = re.compile(r"^prices_(\d{8}T\d{6}Z)(_shard-\d{4}-of-\d{4})?\.jsonl(\.gz|\.zst)?$")
+GRANULARITIES = {"hour": "%Y%m%d%H", "day": "%Y%m%d"}
+PERIOD_LENGTH = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+DEDUPE_KEY = ("symbol", "ts_market", "ts_ingest")
+FORMATS = {"jsonl", "parquet"}
+
+# Record contract per zone (schemas/<name>.schema.json). Parquet needs one for typed
+# columns; raw stays JSONL so it keeps exactly what the provider returned.
+ZONE_SCHEMAS: Dict[str, Optional[str]] = {"raw/prices": None, "curated/prices": "price_event"}
+
+_ARROW_TYPES = {"string": "string", "number": "float64", "integer": "int64"}
+
+
+class LocalStore:
+    """Zone objects as files under `root`; keys are POSIX paths relative to it."""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def list(self, prefix: str) -> Dict[str, int]:
+        base = self.root / prefix
+        if not base.exists():
+            return {}
+        return {
+            p.relative_to(self.root).as_posix(): p.stat().st_size
+            for p in base.rglob("*")
+            if p.is_file() and not p.name.endswith(".tmp")  # LocalSink's in-flight files
+        }
+
+    def open(self, key: str):
+        return (self.root / key).open("rb")
+
+    def sink(self, key: str) -> LocalSink:
+        return LocalSink(self.root / key)
+
+    def put(self, key: str, data: bytes) -> None:
+        sink = self.sink(key)
+        sink.write(data)
+        sink.close()
+
+    def delete(self, keys: List[str]) -> None:
+        for key in keys:
+            (self.root / key).unlink(missing_ok=True)
+
+
+class S3Store:
+    """Zone objects in an S3 bucket (a boto3 client or pipelines.local.aws.FakeS3Client)."""
+
+    def __init__(self, client, bucket: str, part_size: int = 8 * MIB, max_keys: int = 1000):
+        self.client = client
+        self.bucket = bucket
+        self.part_size = part_size
+        self.max_keys = max_keys
+
+    def list(self, prefix: str) -> Dict[str, int]:
+        out: Dict[str, int] = {}
+        kwargs: Dict[str, Any] = {
+            "Bucket": self.bucket,
+            "Prefix": prefix.rstrip("/") + "/",
+            "MaxKeys": self.max_keys,
+        }
+        while True:
+            resp = self.client.list_objects_v2(**kwargs)
+            for o in resp.get("Contents", []):
+                out[o["Key"]] = o["Size"]
+            if not resp.get("IsTruncated"):
+                return out
+            kwargs["ContinuationToken"] = resp["NextContinuationToken"]
+
+    def open(self, key: str):
+        return self.client.get_object(Bucket=self.bucket, Key=key)["Body"]
+
+    def sink(self, key: str) -> S3Sink:
+        return S3Sink(
+            self.client,
+            self.bucket,
+            key,
+            part_size=self.part_size,
+            multipart_threshold=self.part_size,
+        )
+
+    def put(self, key: str, data: bytes) -> None:
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data)
+
+    def delete(self, keys: List[str]) -> None:
+        for i in range(0, len(keys), 1000):  # DeleteObjects takes at most 1000 keys
+            objects = [{"Key": k} for k in keys[i : i + 1000]]
+            resp = self.client.delete_objects(
+                Bucket=self.bucket, Delete={"Objects": objects, "Quiet": True}
+            )
+            if resp.get("Errors"):
+                first = resp["Errors"][0]
+                raise RuntimeError(
+                    f"DeleteObjects failed for {len(resp['Errors'])} keys "
+                    f"(first: {first.get('Key')} {first.get('Code')})"
+                )
+
+
+@dataclass
+class Manifest:
+    zone: str
+    granularity: str  # hour | day
+    period: str  # YYYYMMDDHH | YYYYMMDD (UTC)
+    output: str  # compacted object key
+    format: str  # jsonl | parquet
+    inputs: List[str]  # keys merged into `output` (deleted after the manifest lands)
+    records_in: int
+    records_out: int
+    duplicates: int
+    bytes_in: int
+    bytes_out: int
+    run_id: str
+    created_at: str  # UTC ISO timestamp
+
+
+@dataclass
+class ZoneListing:
+    sources: Dict[str, int] = field(default_factory=dict)  # prices_<ts> objects -> size
+    outputs: Dict[str, int] = field(default_factory=dict)  # compacted/ objects -> size
+    manifests: Dict[str, Manifest] = field(default_factory=dict)  # manifest key -> manifest
+
+    def consumed(self) -> Set[str]:
+        return {k for m in self.manifests.values() for k in m.inputs}
+
+    def live(self) -> List[str]:
+        consumed = self.consumed()
+        committed = {m.output for m in self.manifests.values()}
+        sources = [k for k in self.sources if k not in consumed]
+        outputs = [k for k in self.outputs if k in committed and k not in consumed]
+        return sorted(outputs + sources)
+
+
+@dataclass
+class CompactionResult:
+    zone: str
+    manifests: List[Manifest] = field(default_factory=list)
+    cleaned: int = 0  # leftover inputs, uncommitted outputs and stale manifests removed
+
+    @property
+    def objects_in(self) -> int:
+        return sum(len(m.inputs) for m in self.manifests)
+
+    @property
+    def duplicates(self) -> int:
+        return sum(m.duplicates for m in self.manifests)
+
+    @property
+    def bytes_out(self) -> int:
+        return sum(m.bytes_out for m in self.manifests)
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _period_start(period: str, granularity: str) -> datetime:
+    return datetime.strptime(period, GRANULARITIES[granularity]).replace(tzinfo=timezone.utc)
+
+
+def _manifest_key(zone: str, granularity: str, period: str) -> str:
+    return f"{zone}/_manifests/{granularity}={period}.json"
+
+
+def read_listing(store, zone: str) -> ZoneListing:
+    """One listing of the zone, split into sources, compacted outputs and manifests."""
+    listing = ZoneListing()
+    for key, size in store.list(zone).items():
+        rel = key[len(zone) + 1 :]
+        if rel.startswith("_manifests/") and rel.endswith(".json"):
+            with closing(store.open(key)) as f:
+                listing.manifests[key] = Manifest(**json.loads(f.read()))
+        elif rel.startswith("compacted/"):
+            listing.outputs[key] = size
+        elif SOURCE_NAME.match(rel):
+            listing.sources[key] = size
+    return listing
+
+
+def live_keys(store, zone: str) -> List[str]:
+    """The objects a reader should scan: committed outputs + sources not yet compacted."""
+    return read_listing(store, zone).live()
+
+
+def _pyarrow():
+    # Optional dependency shared with the OHLC Parquet writer; only the Parquet paths need it
+    from pipelines.batch.ohlc_daily.storage import _pyarrow as pyarrow_modules
+
+    return pyarrow_modules()
+
+
+def iter_records(store, key: str, batch_size: int = 65_536) -> Iterator[Dict[str, Any]]:
+    """Stream the records of one zone object (JSONL, any compression, or Parquet)."""
+    if not key.endswith(".parquet"):
+        with closing(store.open(key)) as f:
+            yield from iter_jsonl_stream(f, compression_for(key))
+        return
+    _, pq = _pyarrow()
+    # Parquet needs a seekable file: S3 bodies are spooled to local disk first
+    with closing(store.open(key)) as body, tempfile.TemporaryFile() as tmp:
+        shutil.copyfileobj(body, tmp, MIB)
+        tmp.seek(0)
+        for batch in pq.ParquetFile(tmp).iter_batches(batch_size=batch_size):
+            yield from batch.to_pylist()
+
+
+def iter_zone_records(store, zone: str) -> Iterator[Dict[str, Any]]:
+    for key in live_keys(store, zone):
+        yield from iter_records(store, key)
+
+
+class ParquetRecordWriter:
+    """
+    JsonlWriter's interface for Parquet: columns typed from the zone's record contract,
+    one row group per `row_group_size` records. The file is built in a local temp file
+    and copied to the sink on close, so the object still appears whole or not at all.
+    """
+
+    def __init__(
+        self, sink, schema_name: str, compression: str = "snappy", row_group_size: int = 65_536
+    ):
+        from pipelines.common.schema import load_schema
+
+        pa, pq = _pyarrow()
+        contract = load_schema(schema_name)
+        self.sink = sink
+        self.fields = contract.field_names
+        self.schema = pa.schema(
+            [(f, getattr(pa, _ARROW_TYPES[spec["type"]])()) for f, spec in contract.fields.items()]
+        )
+        self.row_group_size = row_group_size
+        self.stats = WriteStats()
+        self._pa = pa
+        self._rows: List[Dict[str, Any]] = []
+        self._tmp = tempfile.TemporaryFile()
+        self._writer = pq.ParquetWriter(self._tmp, self.schema, compression=compression)
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self._rows.append(record)
+        self.stats.records += 1
+        if len(self._rows) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._rows:
+            columns = {f: [r.get(f) for r in self._rows] for f in self.fields}
+            self._writer.write_table(self._pa.table(columns, schema=self.schema))
+            self._rows.clear()
+
+    def close(self) -> WriteStats:
+        self._flush()
+        self._writer.close()
+        self.stats.bytes_written = self._tmp.tell()
+        self._tmp.seek(0)
+        while chunk := self._tmp.read(8 * MIB):
+            self.sink.write(chunk)
+        self._tmp.close()
+        self.sink.close()
+        return self.stats
+
+    def abort(self) -> None:
+        self._rows.clear()
+        self._tmp.close()
+        self.sink.abort()
+
+    def __enter__(self) -> "ParquetRecordWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def _cleanup(store, listing: ZoneListing) -> int:
+    """
+    Finish what an interrupted run left behind: inputs a manifest already consumed, outputs
+    no manifest committed, then manifests whose output was itself compacted away. Data goes
+    before manifests so no consumed input ever becomes visible again.
+    """
+    consumed = listing.consumed()
+    committed = {m.output for m in listing.manifests.values()}
+    data = [k for k in listing.sources if k in consumed]
+    data += [k for k in listing.outputs if k in consumed or k not in committed]
+    store.delete(data)
+    for k in data:
+        listing.sources.pop(k, None)
+        listing.outputs.pop(k, None)
+
+    stale = [k for k, m in listing.manifests.items() if m.output not in listing.outputs]
+    store.delete(stale)
+    for k in stale:
+        del listing.manifests[k]
+    return len(data) + len(stale)
+
+
+def _plan(
+    listing: ZoneListing, granularity: str, cutoff: datetime
+) -> Dict[str, Dict[str, List[str]]]:
+    """period -> {"outputs": [...], "sources": [...]} for every closed period with work to do."""
+    fmt = GRANULARITIES[granularity]
+    groups: Dict[str, Dict[str, List[str]]] = {}
+    finer: Set[str] = set()  # periods holding an hourly output that a daily run rolls up
+
+    for key in listing.sources:
+        ts = datetime.strptime(SOURCE_NAME.match(key.rsplit("/", 1)[-1]).group(1), "%Y%m%dT%H%M%SZ")
+        groups.setdefault(ts.strftime(fmt), {"outputs": [], "sources": []})["sources"].append(key)
+    for m in listing.manifests.values():
+        if m.granularity == granularity:
+            period = m.period
+        elif m.granularity == "hour" and granularity == "day":
+            period = m.period[:8]
+            finer.add(period)
+        else:
+            continue  # a daily file is never split back into hours
+        groups.setdefault(period, {"outputs": [], "sources": []})["outputs"].append(m.output)
+
+    plan = {}
+    for period, g in sorted(groups.items()):
+        if _period_start(period, granularity) + PERIOD_LENGTH[granularity] > cutoff:
+            continue  # still open: the Lambda may land more objects in it
+        if g["sources"] or len(g["outputs"]) > 1 or period in finer:
+            plan[period] = {"outputs": sorted(g["outputs"]), "sources": sorted(g["sources"])}
+    return plan
+
+
+def _open_writer(store, key: str, fmt: str, compression: str, schema_name: Optional[str]):
+    if fmt == "parquet":
+        return ParquetRecordWriter(store.sink(key), schema_name)
+    return JsonlWriter(store.sink(key), compression=compression)
+
+
+def _output_key(zone: str, granularity: str, period: str, run_id: str, fmt: str, compression: str):
+    stem = f"prices_{period}_{run_id}"
+    name = f"{stem}.parquet" if fmt == "parquet" else jsonl_name(stem, compression)
+    return f"{zone}/compacted/{granularity}={period}/{name}"
+
+
+def _compact_period(
+    store,
+    listing: ZoneListing,
+    zone: str,
+    granularity: str,
+    period: str,
+    inputs: List[str],
+    fmt: str,
+    compression: str,
+    run_id: str,
+) -> Manifest:
+    output = _output_key(zone, granularity, period, run_id, fmt, compression)
+    if output in inputs:
+        raise RuntimeError(f"run_id {run_id!r} collides with committed output {output}")
+
+    # Only the dedupe keys of one period are held in memory; records stream through
+    seen: Set[tuple] = set()
+    records_in = duplicates = 0
+    writer = _open_writer(store, output, fmt, compression, ZONE_SCHEMAS.get(zone))
+    with writer:
+        for key in inputs:
+            for r in iter_records(store, key):
+                records_in += 1
+                k = tuple(r.get(f) for f in DEDUPE_KEY)
+                if k in seen:
+                    duplicates += 1
+                    continue
+                seen.add(k)
+                writer.write(r)
+
+    manifest = Manifest(
+        zone=zone,
+        granularity=granularity,
+        period=period,
+        output=output,
+        format=fmt,
+        inputs=inputs,
+        records_in=records_in,
+        records_out=writer.stats.records,
+        duplicates=duplicates,
+        bytes_in=sum(listing.sources.get(k, listing.outputs.get(k, 0)) for k in inputs),
+        bytes_out=writer.stats.bytes_written,
+        run_id=run_id,
+        created_at=_utc_now().isoformat().replace("+00:00", "Z"),
+    )
+    key = _manifest_key(zone, granularity, period)
+    store.put(key, json.dumps(manifest.__dict__, indent=2).encode("utf-8"))  # commit
+
+    superseded = [k for k, m in listing.manifests.items() if m.output in inputs and k != key]
+    store.delete(inputs)
+    store.delete(superseded)  # after the inputs, like _cleanup
+    for k in inputs:
+        listing.sources.pop(k, None)
+        listing.outputs.pop(k, None)
+    for k in superseded:
+        del listing.manifests[k]
+    listing.outputs[output] = manifest.bytes_out
+    listing.manifests[key] = manifest
+    return manifest
+
+
+def compact_zone(
+    store,
+    zone: str,
+    granularity: str = "hour",
+    fmt: str = "jsonl",
+    compression: str = "gzip",
+    grace: timedelta = timedelta(minutes=5),
+    now: Optional[datetime] = None,
+    run_id: Optional[str] = None,
+) -> CompactionResult:
+    """
+    Compact every closed period of `zone` (e.g. "curated/prices") into one object per
+    period. `grace` keeps a just-closed period open a little longer for late writes.
+    Rerunning is safe: committed periods without new inputs are left alone, and a
+    period that gained late objects (or hourly files, for a daily run) is re-merged.
+    """
+    zone = zone.strip("/")
+    if granularity not in GRANULARITIES:
+        raise ValueError(
+            f"granularity must be one of {sorted(GRANULARITIES)}. Got: {granularity!r}"
+        )
+    if fmt not in FORMATS:
+        raise ValueError(f"fmt must be one of {sorted(FORMATS)}. Got: {fmt!r}")
+    if fmt == "parquet" and not ZONE_SCHEMAS.get(zone):
+        raise ValueError(f"{zone} has no record contract in ZONE_SCHEMAS; compact it as jsonl")
+
+    now = now or _utc_now()
+    run_id = run_id or now.strftime("%Y%m%dT%H%M%SZ")
+    listing = read_listing(store, zone)
+    result = CompactionResult(zone=zone, cleaned=_cleanup(store, listing))
+
+    for period, g in _plan(listing, granularity, now - grace).items():
+        inputs = g["outputs"] + g["sources"]  # earlier compactions win ties
+        result.manifests.append(
+            _compact_period(
+                store, listing, zone, granularity, period, inputs, fmt, compression, run_id
+            )
+        )
+    return result
@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from pipelines.common.ratelimit import TokenBucket, backoff_delay
+from pipelines.common.trading_calendar import get_trading_calendar
+from pipelines.streaming.ingest_lambda.provider import ProviderThrottled, _get_api_key
+
+# Alpha Vantage TIME_SERIES_DAILY for batch backfills. Every response is kept in an on-disk,
+# content-addressed cache: payloads are stored once under their sha256, and a small ref per
+# (endpoint, symbol, as-of date) points at the payload plus the date range it covers.
+# A later request reuses any cached payload that already covers its window, so reruns and
+# incremental windows cost no API calls.
+
+ALPHAVANTAGE_BASE_URL = os.getenv("ALPHAVANTAGE_BASE_URL", "https://www.alphavantage.co/query")
+AV_CACHE_DIR = os.getenv("AV_CACHE_DIR", "data/cache/alphavantage")
+# Quota per worker process: shards run in parallel processes, each with its own limiter
+AV_RATE_PER_MINUTE = float(os.getenv("PROVIDER_RATE_PER_MINUTE", "5"))
+AV_MAX_WORKERS = int(os.getenv("PROVIDER_MAX_WORKERS", "4"))
+AV_MAX_RETRIES = int(os.getenv("PROVIDER_MAX_RETRIES", "3"))
+
+FUNCTION = "TIME_SERIES_DAILY"
+SERIES_KEY = "Time Series (Daily)"
+COMPACT_POINTS = 100  # outputsize=compact returns the latest 100 data points
+
+
+@dataclass
+class CacheRef:
+    sha256: str
+    outputsize: str  # compact | full
+    first_date: str  # earliest bar in the payload (YYYY-MM-DD)
+    last_date: str  # latest bar in the payload
+    fetched_at: str  # UTC ISO timestamp
+
+    def covers(self, start: date, end: date) -> bool:
+        """True when the payload holds every bar the provider will ever have in [start, end]."""
+        has_start = self.outputsize == "full" or self.first_date <= start.isoformat()
+        # No bar for `end` yet is only final once the payload was fetched after that day
+        has_end = self.last_date >= end.isoformat() or self.fetched_at[:10] > end.isoformat()
+        return has_start and has_end
+
+
+class ResponseCache:
+    """
+    <root>/objects/<sha[:2]>/<sha>.json.gz   payload bytes (gzip), named by content hash
+    <root>/refs/<function>/<SYMBOL>/<as_of>.<outputsize>.json   -> CacheRef
+    Writes go through a temp file + rename, so concurrent workers never see partial files.
+    """
+
+    def __init__(self, root: str = AV_CACHE_DIR):
+        self.root = Path(root)
+
+    def _object_path(self, sha: str) -> Path:
+        return self.root / "objects" / sha[:2] / f"{sha}.json.gz"
+
+    def _ref_dir(self, function: str, symbol: str) -> Path:
+        return self.root / "refs" / function / symbol
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    def refs(self, function: str, symbol: str) -> List[CacheRef]:
+        directory = self._ref_dir(function, symbol)
+        if not directory.exists():
+            return []
+        return [CacheRef(**json.loads(p.read_text())) for p in sorted(directory.glob("*.json"))]
+
+    def lookup(self, function: str, symbol: str, start: date, end: date) -> Optional[Dict]:
+        """Newest cached payload covering [start, end], or None."""
+        for ref in sorted(self.refs(function, symbol), key=lambda r: r.fetched_at, reverse=True):
+            path = self._object_path(ref.sha256)
+            if ref.covers(start, end) and path.exists():
+                return json.loads(gzip.decompress(path.read_bytes()))
+        return None
+
+    def store(
+        self, function: str, symbol: str, as_of: date, outputsize: str, body: bytes, series: Dict
+    ) -> CacheRef:
+        sha = hashlib.sha256(body).hexdigest()
+        path = self._object_path(sha)
+        if not path.exists():  # identical payloads are stored once
+            self._write_atomic(path, gzip.compress(body, mtime=0))
+        days = sorted(series)
+        ref = CacheRef(
+            sha256=sha,
+            outputsize=outputsize,
+            first_date=days[0] if days else "",
+            last_date=days[-1] if days else "",
+            fetched_at=datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+        )
+        ref_path = self._ref_dir(function, symbol) / f"{as_of.isoformat()}.{outputsize}.json"
+        self._write_atomic(ref_path, json.dumps(ref.__dict__).encode("utf-8"))
+        return ref
+
+
+@dataclass
+class DailyFetchResult:
+    rows: List[Dict] = field(default_factory=list)
+    failures: Dict[str, str] = field(default_factory=dict)  # symbol -> last error
+    cache_hits: int = 0
+    api_calls: int = 0
+    retries: int = 0
+
+
+_session: Optional[requests.Session] = None
+_limiter: Optional[TokenBucket] = None
+_lock = threading.Lock()
+
+
+def _get_session() -> requests.Session:
+    """One pooled session per worker process."""
+    global _session
+    with _lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(AV_MAX_WORKERS, 1))
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def _get_limiter() -> TokenBucket:
+    global _limiter
+    with _lock:
+        if _limiter is None:
+            _limiter = TokenBucket.per_minute(AV_RATE_PER_MINUTE)
+        return _limiter
+
+
+def _outputsize(start: date, today: date) -> str:
+    # Compact is the last 100 data points, i.e. the last 100 exchange sessions
+    sessions = get_trading_calendar().count_sessions(start, today)
+    return "compact" if sessions <= COMPACT_POINTS else "full"
+
+
+def _get_series(
+    symbol: str,
+    outputsize: str,
+    api_key: str,
+    session: requests.Session,
+    limiter: TokenBucket,
+    base_url: Optional[str],
+    max_retries: int,
+) -> Tuple[bytes, Dict, int]:
+    """One TIME_SERIES_DAILY call with rate limiting and jittered backoff on throttles."""
+    params = {"function": FUNCTION, "symbol": symbol, "outputsize": outputsize, "apikey": api_key}
+    attempt = 0
+    while True:
+        limiter.acquire()
+        try:
+            r = session.get(base_url or ALPHAVANTAGE_BASE_URL, params=params, timeout=30)
+            r.raise_for_status()
+            data = r.json()
+            if "Note" in data or "Information" in data:
+                raise ProviderThrottled(
+                    f"Alpha Vantage throttled: {data.get('Note') or data.get('Information')}"
+                )
+            if "Error Message" in data:
+                raise RuntimeError(f"Alpha Vantage error: {data['Error Message']}")
+            if SERIES_KEY not in data:
+                raise RuntimeError(f"Alpha Vantage payload without {SERIES_KEY!r}")
+            return r.content, data, attempt
+        except (ProviderThrottled, requests.ConnectionError, requests.Timeout):
+            if attempt >= max_retries:
+                raise
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code < 500 or attempt >= max_retries:
+                raise
+        time.sleep(backoff_delay(attempt))
+        attempt += 1
+
+
+def _series_rows(
+    symbol: str,
+    series: Dict[str, Dict[str, str]],
+    start: date,
+    end: date,
+    ts_ingest: str,
+    source: str,
+) -> List[Dict]:
+    lo, hi = start.isoformat(), end.isoformat()
+    rows = []
+    for day in sorted(d for d in series if lo <= d <= hi):
+        bar = series[day]
+        rows.append(
+            {
+                "symbol": symbol,
+                "date": day,
+                "open": float(bar["1. open"]),
+                "high": float(bar["2. high"]),
+                "low": float(bar["3. low"]),
+                "close": float(bar["4. close"]),
+                "volume": int(float(bar["5. volume"])),
+                "currency": "USD",
+                "ts_market": f"{day}T21:00:00Z",  # close-ish UTC, like the stub
+                "ts_ingest": ts_ingest,
+                "source": source,
+            }
+        )
+    return rows
+
+
+def fetch_daily_series(
+    windows: Dict[str, Tuple[date, date]],
+    source: str = "alphavantage",
+    cache: Optional[ResponseCache] = None,
+    max_workers: int = AV_MAX_WORKERS,
+    max_retries: int = AV_MAX_RETRIES,
+    limiter: Optional[TokenBucket] = None,
+    base_url: Optional[str] = None,
+    api_key: Optional[str] = None,
+    today: Optional[date] = None,
+) -> DailyFetchResult:
+    """
+    Provider-shaped daily rows for each symbol's inclusive (start, end) window.
+    Cached payloads that cover a window are reused; otherwise one compact or full
+    TIME_SERIES_DAILY call is made (compact when the window fits in its 100 points).
+    Per-symbol failures are returned next to the rows instead of raised.
+    """
+    cache = cache or ResponseCache()
+    today = today or date.today()
+    ts_ingest = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    result = DailyFetchResult()
+    keys = {"api_key": api_key}
+
+    def _call(symbol: str, size: str) -> Tuple[bytes, Dict, int]:
+        with _lock:
+            if not keys["api_key"]:
+                keys["api_key"] = _get_api_key()
+        session, bucket = _get_session(), limiter or _get_limiter()
+        return _get_series(symbol, size, keys["api_key"], session, bucket, base_url, max_retries)
+
+    def _one(item: Tuple[str, Tuple[date, date]]) -> Tuple[List[Dict], Optional[str], int, int]:
+        # -> (rows, error, api calls, retries); zero calls means a cache hit
+        symbol, (start, end) = item
+        cached = cache.lookup(FUNCTION, symbol, start, end)
+        if cached is not None:
+            return (
+                _series_rows(symbol, cached[SERIES_KEY], start, end, ts_ingest, source),
+                None,
+                0,
+                0,
+            )
+        calls = retries = 0
+        try:
+            size = _outputsize(start, today)
+            body, data, n = _call(symbol, size)
+            calls, retries = calls + 1 + n, retries + n
+            ref = cache.store(FUNCTION, symbol, end, size, body, data[SERIES_KEY])
+            if not ref.covers(start, end) and size == "compact":
+                # Fewer points than expected (new listing or long halt): take the full history
+                body, data, n = _call(symbol, "full")
+                calls, retries = calls + 1 + n, retries + n
+                cache.store(FUNCTION, symbol, end, "full", body, data[SERIES_KEY])
+        except Exception as e:  # noqa: BLE001 - provider errors / bad payloads are per symbol
+            return [], str(e), calls + 1, retries  # the failed call counts too
+        rows = _series_rows(symbol, data[SERIES_KEY], start, end, ts_ingest, source)
+        return rows, None, calls, retries
+
+    items = sorted(windows.items())
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items) or 1))) as pool:
+        for (symbol, _), (rows, error, calls, retries) in zip(
+            items, pool.map(_one, items), strict=True
+        ):
+            result.api_calls += calls
+            result.retries += retries
+            if error:
+                result.failures[symbol] = error
+                continue
+            result.rows.extend(rows)
+            result.cache_hits += calls == 0
+    return result
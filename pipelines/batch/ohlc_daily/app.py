@@ -2,66 +2,118 @@ from __future__ import annotations
 
 import os
 from datetime import datetime, timezone
+from pathlib import Path
 
 from dotenv import load_dotenv
 
-from pipelines.batch.ohlc_daily.provider import DailyPricesRequest, fetch_daily_prices
-from pipelines.batch.ohlc_daily.quality import validate_ohlc_daily
-from pipelines.batch.ohlc_daily.storage import write_jsonl
-from pipelines.batch.ohlc_daily.transform import to_curated_prices_daily, to_ohlc_daily
+from pipelines.batch.ohlc_daily.config import settings
+from pipelines.batch.ohlc_daily.executor import (
+    ANALYTICS_ROOTS,
+    NAMESPACE,
+    ShardJob,
+    combine_results,
+    record_shard_metrics,
+    run_shards,
+)
+from pipelines.batch.ohlc_daily.storage import partition_ddl
+from pipelines.batch.ohlc_daily.watermark import get_watermark_store
+from pipelines.common.metrics import MetricsBuffer, get_metrics
+from pipelines.common.shards import plan_shards
 
 load_dotenv()
 
 ALLOWED_MODES = {"backfill", "incremental"}
+ALLOWED_OUTPUT_FORMATS = {"jsonl", "parquet"}
 
 
 def _ts() -> str:
     return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
 
 
+def _write_catalog_ddl(partitions, ts: str) -> None:
+    # DDL that registers the Parquet partitions with the Glue table
+    root = ANALYTICS_ROOTS["parquet"]
+    location = f"s3://{settings.s3_bucket_name or '<bucket>'}/analytics/ohlc_daily_parquet"
+    ddl = partition_ddl("ohlc_daily_parquet", location, partitions)
+    ddl_path = Path(root) / "_catalog" / f"partitions_{ts}.sql"
+    ddl_path.parent.mkdir(parents=True, exist_ok=True)
+    ddl_path.write_text(ddl, encoding="utf-8")
+    print(f"Wrote CATALOG DDL: {ddl_path}")
+
+
 def run_local() -> None:
-    # Local pipeline runner (single-process). In AWS, we’ll decouple/orchestrate.
+    # Local pipeline runner: symbol shards on a process pool. In AWS, each shard is a Glue run.
+    metrics = get_metrics(settings.metrics_mode)
+    try:
+        _run(metrics)
+    finally:
+        metrics.flush()
+
+
+def _run(metrics: MetricsBuffer) -> None:
     mode = os.getenv("BATCH_MODE", "backfill").strip().lower()
     if mode not in ALLOWED_MODES:
         raise ValueError(f"BATCH_MODE must be one of {sorted(ALLOWED_MODES)}. Got: {mode!r}")
 
+    output_format = settings.output_format.strip().lower()
+    if output_format not in ALLOWED_OUTPUT_FORMATS:
+        raise ValueError(
+            f"BATCH_OUTPUT_FORMAT must be one of {sorted(ALLOWED_OUTPUT_FORMATS)}. "
+            f"Got: {output_format!r}"
+        )
+
     ts = _ts()
+    shards = plan_shards(settings.symbols.split(","), settings.shard_size)
+    symbols = [s for shard in shards for s in shard.symbols]
+    watermarks = get_watermark_store()
 
-    # 1) Extract (stubbed provider for now)
-    req = DailyPricesRequest(
+    # 1) Plan: one job for the run, split into symbol shards
+    job = ShardJob(
         mode=mode,
-        symbols=["AAPL", "MSFT"],
+        output_format=output_format,
+        run_id=ts,
+        source=settings.source,
+        seed=settings.seed,
         backfill_days=252,  # used when mode="backfill"
-        lookback_days=10,   # used when mode="incremental"
+        lookback_days=10,   # used when mode="incremental" (symbols without a watermark)
+        watermarks=watermarks.get(symbols) if mode == "incremental" else None,
+        chunk_rows=settings.chunk_rows,
+        checkpoint_dir=settings.checkpoint_dir,
+        indicator_state_dir=settings.indicator_state_dir if settings.indicators else None,
+    )
+    print(
+        f"PLAN: mode={mode} symbols={len(symbols)} shards={len(shards)} "
+        f"workers={settings.max_workers} chunk_rows={settings.chunk_rows or 'off'}"
     )
-    raw_rows = fetch_daily_prices(req)
-
-    # 2) Land RAW
-    raw_path = f"data/raw/prices_daily/prices_daily_{ts}.jsonl"
-    write_jsonl(raw_path, raw_rows)
-    print(f"Wrote RAW: {raw_path} rows={len(raw_rows)}")
-
-    # 3) Curate
-    curated_rows = to_curated_prices_daily(raw_rows)
-    curated_path = f"data/curated/prices_daily/prices_daily_{ts}.jsonl"
-    write_jsonl(curated_path, curated_rows)
-    print(f"Wrote CURATED: {curated_path} rows={len(curated_rows)}")
-
-    # 4) Analytics output (OHLC)
-    ohlc_rows = to_ohlc_daily(curated_rows)
-    analytics_path = f"data/analytics/ohlc_daily/ohlc_daily_{ts}.jsonl"
-    write_jsonl(analytics_path, ohlc_rows)
-    print(f"Wrote ANALYTICS: {analytics_path} rows={len(ohlc_rows)}")
-
-    # 5) Quality gate (GE)
-    ok, msg = validate_ohlc_daily(ohlc_rows)
+
+    # 2) Extract -> curate -> validate -> write, per shard
+    with metrics.timer(NAMESPACE, "RunLatency"):
+        results = run_shards(shards, job, settings.max_workers)
+    record_shard_metrics(metrics, results)
+    for r in results:
+        status = "PASS" if r.ok else "FAIL"
+        print(f"  {r.shard_id}: {status} rows={r.rows} {r.seconds:.2f}s - {r.message}")
+        if r.quarantine_path:
+            print(f"  Wrote QUARANTINE: {r.quarantine_path} rows={r.quarantined}")
+
+    if all(r.ok and r.rows == 0 for r in results):
+        print("Nothing to fetch: all symbols are up to date with their watermarks")
+        return
+
+    # 3) Run verdict
+    ok, msg = combine_results(results)
     print(f"QUALITY: {'PASS' if ok else 'FAIL'} - {msg}")
 
-    if not ok:
-        quarantine_path = f"data/quarantine/batch/ohlc_daily/ohlc_daily_{ts}.jsonl"
-        write_jsonl(quarantine_path, ohlc_rows)
-        print(f"Wrote QUARANTINE: {quarantine_path} rows={len(ohlc_rows)}")
+    # 4) Catalog DDL for every Parquet partition written (passing rows of every shard)
+    partitions = [p for r in results for p in r.partitions]
+    if output_format == "parquet" and partitions:
+        _write_catalog_ddl(partitions, ts)
+
+    # 5) Advance watermarks only for symbols with no quarantined rows (those get re-fetched)
+    landed = {s: d for r in results for s, d in r.landed.items()}
+    watermarks.advance(landed)
+    print(f"WATERMARKS: advanced {len(landed)} symbols")
 
 
 if __name__ == "__main__":
-    run_local()
\ No newline at end of file
+    run_local()
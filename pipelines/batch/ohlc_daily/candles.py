@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from pipelines.common.storage import iter_jsonl_local
+
+# Tick -> candle aggregation over curated PriceEvent records (curated/prices/).
+# Open candles are kept as per-(symbol, bucket) state, so every micro-batch only touches
+# the candles it has events for. Event time drives everything: a candle closes once the
+# watermark (max ts_market seen) passes its end plus the allowed lateness, and events
+# for an already-closed candle are dropped as late.
+
+INTERVALS = {"1m": 60, "5m": 300, "15m": 900, "1h": 3600, "1d": 86400}
+
+_NS = 1_000_000_000
+
+# Layout of an open candle's state slot
+_OPEN, _OPEN_TS, _HIGH, _LOW, _CLOSE, _CLOSE_TS, _COUNT, _VOLUME, _PV, _CURRENCY = range(10)
+
+
+def interval_seconds(interval: str) -> int:
+    if interval not in INTERVALS:
+        raise ValueError(f"interval must be one of {list(INTERVALS)}. Got: {interval!r}")
+    return INTERVALS[interval]
+
+
+def _iso_z(ns: int) -> str:
+    # Integer split keeps microsecond precision (ns / 1e9 as a float does not)
+    sec, rem = divmod(int(ns), _NS)
+    dt = datetime.fromtimestamp(sec, tz=timezone.utc) + timedelta(microseconds=rem // 1000)
+    return dt.isoformat().replace("+00:00", "Z")
+
+
+@dataclass
+class UpdateStats:
+    accepted: int = 0
+    late_dropped: int = 0
+    invalid: int = 0
+    candles_touched: int = 0
+
+
+def _frame(events: Sequence[Dict[str, Any]]) -> pd.DataFrame:
+    # Column-wise construction: much cheaper than pd.DataFrame(list_of_dicts)
+    ts = pd.to_datetime(
+        pd.Series([e.get("ts_market") for e in events]), utc=True, format="ISO8601", errors="coerce"
+    )
+    price = pd.to_numeric(pd.Series([e.get("price") for e in events]), errors="coerce")
+    volume = pd.to_numeric(pd.Series([e.get("volume") for e in events]), errors="coerce")
+    return pd.DataFrame(
+        {
+            "symbol": [str(e.get("symbol", "")).upper().strip() for e in events],
+            # A null currency counts as missing (str(None) would be "NONE", not a currency)
+            "currency": [str(e.get("currency") or "USD").upper().strip() for e in events],
+            "ts_ok": ts.notna().to_numpy(),
+            "ts": ts.dt.tz_convert(None).to_numpy(dtype="datetime64[ns]").view("int64"),
+            "price": price.to_numpy(dtype=float),
+            "volume": volume.to_numpy(dtype=float),
+        }
+    )
+
+
+class CandleAggregator:
+    """
+    Incremental OHLC candles (plus tick count, volume and VWAP when events carry volume).
+
+    - interval: 1m | 5m | 15m | 1h | 1d (UTC-aligned buckets)
+    - allowed_lateness_s: how long after a bucket ends its candle stays open for late or
+      out-of-order events; None keeps every candle open until flush()
+    """
+
+    def __init__(
+        self,
+        interval: str = "1m",
+        allowed_lateness_s: Optional[float] = 0.0,
+        source: str = "candles",
+    ):
+        self.interval = interval
+        self.step_ns = interval_seconds(interval) * _NS
+        self.allowed_lateness_s = allowed_lateness_s
+        self.lateness_ns = None if allowed_lateness_s is None else int(allowed_lateness_s * _NS)
+        self.source = source
+        self.watermark_ns: Optional[int] = None
+        self._open: Dict[Tuple[str, int], List[Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._open)
+
+    def _closed_before(self, bucket: np.ndarray) -> np.ndarray:
+        # True where the candle starting at `bucket` has already been closed
+        if self.watermark_ns is None or self.lateness_ns is None:
+            return np.zeros(len(bucket), dtype=bool)
+        return bucket + self.step_ns + self.lateness_ns <= self.watermark_ns
+
+    def update(self, events: Sequence[Dict[str, Any]]) -> UpdateStats:
+        """Fold one micro-batch into the open candles. Cost is O(len(events))."""
+        stats = UpdateStats()
+        if not events:
+            return stats
+
+        df = _frame(events)
+        valid = df["ts_ok"].to_numpy() & np.isfinite(df["price"].to_numpy())
+        valid &= df["price"].to_numpy() > 0
+        stats.invalid = int((~valid).sum())
+        df = df[valid]
+        if df.empty:
+            return stats
+
+        ts = df["ts"].to_numpy()
+        bucket = ts - ts % self.step_ns
+        late = self._closed_before(bucket)
+        stats.late_dropped = int(late.sum())
+        df = df.assign(bucket=bucket)[~late]
+        if df.empty:
+            return stats
+        stats.accepted = len(df)
+
+        # Per (symbol, bucket) partial candle for this batch, in event-time order
+        df = df.assign(pv=df["price"] * df["volume"])
+        df = df.sort_values(["symbol", "bucket", "ts"], kind="stable")
+        g = df.groupby(["symbol", "bucket"], sort=False)
+        part = g.agg(
+            open=("price", "first"),
+            open_ts=("ts", "first"),
+            high=("price", "max"),
+            low=("price", "min"),
+            close=("price", "last"),
+            close_ts=("ts", "last"),
+            count=("price", "size"),
+            volume=("volume", "sum"),  # NaN volumes sum as 0
+            pv=("pv", "sum"),
+            currency=("currency", "first"),
+        )
+        stats.candles_touched = len(part)
+
+        # Merge into state: O(candles touched by this batch)
+        cols = [part[c].tolist() for c in part.columns]
+        for (sym, b), o, ots, h, lo, c, cts, n, v, pv, cur in zip(
+            part.index.tolist(), *cols, strict=True
+        ):
+            st = self._open.get((sym, b))
+            if st is None:
+                self._open[(sym, b)] = [o, ots, h, lo, c, cts, n, v, pv, cur]
+                continue
+            if ots < st[_OPEN_TS]:
+                st[_OPEN], st[_OPEN_TS] = o, ots
+            if cts >= st[_CLOSE_TS]:
+                st[_CLOSE], st[_CLOSE_TS] = c, cts
+            st[_HIGH] = max(st[_HIGH], h)
+            st[_LOW] = min(st[_LOW], lo)
+            st[_COUNT] += n
+            st[_VOLUME] += v
+            st[_PV] += pv
+
+        batch_max = int(ts.max())
+        self.watermark_ns = (
+            batch_max if self.watermark_ns is None else max(self.watermark_ns, batch_max)
+        )
+        return stats
+
+    def _candle(self, key: Tuple[str, int], st: List[Any], final: bool) -> Dict[str, Any]:
+        sym, b = key
+        volume = st[_VOLUME]
+        return {
+            "symbol": sym,
+            "interval": self.interval,
+            "date": _iso_z(b)[:10],
+            "bucket_start": _iso_z(b),
+            "bucket_end": _iso_z(b + self.step_ns),
+            "open": st[_OPEN],
+            "high": st[_HIGH],
+            "low": st[_LOW],
+            "close": st[_CLOSE],
+            "volume": int(volume),
+            "count": int(st[_COUNT]),
+            "vwap": st[_PV] / volume if volume > 0 else None,
+            "currency": st[_CURRENCY],
+            "final": final,
+            "ts_market": _iso_z(st[_CLOSE_TS]),
+            "ts_ingest": _iso_z(int(datetime.now(timezone.utc).timestamp() * _NS)),
+            "source": self.source,
+        }
+
+    def emit_closed(self) -> List[Dict[str, Any]]:
+        """Pop and return candles that can no longer change (end + lateness <= watermark)."""
+        if self.watermark_ns is None or self.lateness_ns is None:
+            return []
+        cutoff = self.watermark_ns - self.lateness_ns - self.step_ns
+        keys = sorted(k for k in self._open if k[1] <= cutoff)
+        return [self._candle(k, self._open.pop(k), final=True) for k in keys]
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Provisional view of every open candle (state is kept)."""
+        return [self._candle(k, self._open[k], final=False) for k in sorted(self._open)]
+
+    def flush(self) -> List[Dict[str, Any]]:
+        """Close everything (end of input)."""
+        keys = sorted(self._open)
+        return [self._candle(k, self._open.pop(k), final=True) for k in keys]
+
+    # ---- Checkpointing between runs ----
+
+    def to_state(self) -> Dict[str, Any]:
+        return {
+            "interval": self.interval,
+            "allowed_lateness_s": self.allowed_lateness_s,
+            "watermark_ns": self.watermark_ns,
+            "open": [[sym, b, *st] for (sym, b), st in self._open.items()],
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any], source: str = "candles") -> "CandleAggregator":
+        agg = cls(state["interval"], state["allowed_lateness_s"], source=source)
+        agg.watermark_ns = state["watermark_ns"]
+        agg._open = {(row[0], int(row[1])): list(row[2:]) for row in state["open"]}
+        return agg
+
+
+def aggregate_candles(
+    events: Sequence[Dict[str, Any]], interval: str = "1m"
+) -> List[Dict[str, Any]]:
+    """One-shot aggregation of a complete set of events (nothing is late)."""
+    agg = CandleAggregator(interval, allowed_lateness_s=None)
+    agg.update(events)
+    return agg.flush()
+
+
+def aggregate_files(
+    agg: CandleAggregator, paths: Iterable[str], batch_size: int = 50_000
+) -> List[Dict[str, Any]]:
+    """
+    Feed curated JSONL files (e.g. curated/prices/prices_<ts>.jsonl[.gz]) through the
+    aggregator in micro-batches; returns the candles closed along the way.
+    """
+    closed: List[Dict[str, Any]] = []
+    batch: List[Dict[str, Any]] = []
+    for path in paths:
+        for e in iter_jsonl_local(path):
+            batch.append(e)
+            if len(batch) >= batch_size:
+                agg.update(batch)
+                closed.extend(agg.emit_closed())
+                batch = []
+    if batch:
+        agg.update(batch)
+        closed.extend(agg.emit_closed())
+    return closed
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class ShardCheckpoint:
+    """
+    Progress of one chunked shard run: chunks [0, done) are fully written, and the
+    running totals below cover exactly those chunks. A resumed run reuses `run_id` and
+    `as_of`, so it fetches the same window and re-writing an interrupted chunk overwrites
+    its partial files instead of duplicating them.
+    """
+
+    key: str
+    run_id: str
+    as_of: str  # ISO end date of the fetch window, fixed for the whole run
+    chunks: int
+    done: int = 0
+    totals: Dict[str, Any] = field(default_factory=dict)  # ValidationTotals fields
+    landed: Dict[str, str] = field(default_factory=dict)  # symbol -> last ISO date landed
+    partitions: List[Dict[str, Any]] = field(default_factory=list)
+    bytes_written: int = 0
+    missing_sessions: int = 0
+
+
+def checkpoint_key(payload: Dict[str, Any]) -> str:
+    """Stable id for a unit of work: same shard + same job settings -> same checkpoint."""
+    blob = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()[:16]
+
+
+class LocalCheckpointStore:
+    """One JSON file per in-flight shard under `directory`; rewritten atomically."""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def load(self, key: str) -> Optional[ShardCheckpoint]:
+        path = self._path(key)
+        if not path.exists():
+            return None
+        return ShardCheckpoint(**json.loads(path.read_text(encoding="utf-8")))
+
+    def save(self, checkpoint: ShardCheckpoint) -> None:
+        path = self._path(checkpoint.key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(json.dumps(asdict(checkpoint)), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def clear(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
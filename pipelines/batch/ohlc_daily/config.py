@@ -0,0 +1,53 @@
+import os
+
+from dotenv import load_dotenv
+from pydantic import BaseModel
+
+load_dotenv()
+
+
+class Settings(BaseModel):
+    # Analytics output: "jsonl" or "parquet", both Hive-partitioned by symbol/year/month
+    output_format: str = os.getenv("BATCH_OUTPUT_FORMAT", "jsonl")
+    parquet_compression: str = os.getenv("PARQUET_COMPRESSION", "snappy")
+    parquet_row_group_size: int = int(os.getenv("PARQUET_ROW_GROUP_SIZE", "131072"))
+
+    # Provider: "stub" (random.uniform walk), "synthetic" (seeded NumPy generator) or
+    # "alphavantage" (TIME_SERIES_DAILY, responses cached under AV_CACHE_DIR)
+    source: str = os.getenv("BATCH_SOURCE", "stub")
+    seed: int = int(os.getenv("BATCH_SEED", "0"))
+
+    # raw/curated/quarantine JSONL compression: none | gzip | zstd
+    jsonl_compression: str = os.getenv("BATCH_JSONL_COMPRESSION", "none")
+
+    # Symbol universe and sharded execution (see executor.py)
+    symbols: str = os.getenv("BATCH_SYMBOLS", "AAPL,MSFT")
+    shard_size: int = int(os.getenv("BATCH_SHARD_SIZE", "50"))
+    max_workers: int = int(os.getenv("BATCH_MAX_WORKERS", str(os.cpu_count() or 1)))
+
+    # Chunked shards for very large backfills: stream each shard in chunks of about this
+    # many rows (0 = whole shard at once), resuming from the last checkpointed chunk
+    chunk_rows: int = int(os.getenv("BATCH_CHUNK_ROWS", "0"))
+    checkpoint_dir: str = os.getenv("BATCH_CHECKPOINT_DIR", "data/state/checkpoints/ohlc_daily")
+
+    # Technical indicators over the landed rows (analytics/indicators), continued from
+    # per-symbol rolling state so incremental runs only compute the new days
+    indicators: bool = os.getenv("BATCH_INDICATORS", "true").strip().lower() == "true"
+    indicator_state_dir: str = os.getenv(
+        "BATCH_INDICATOR_STATE_DIR", "data/state/indicators/ohlc_daily"
+    )
+
+    # Used to point catalog partition locations at the S3 analytics zone
+    s3_bucket_name: str = os.getenv("S3_BUCKET_NAME", "")
+
+    # Incremental watermarks (last date landed per symbol)
+    watermark_backend: str = os.getenv("WATERMARK_BACKEND", "local")
+    watermark_path: str = os.getenv("WATERMARK_PATH", "data/state/watermarks/ohlc_daily.json")
+    watermark_key: str = os.getenv("WATERMARK_KEY", "state/watermarks/ohlc_daily.json")
+    watermark_table: str = os.getenv("WATERMARK_TABLE", "batch_watermarks")
+
+    # Run metrics (stage latency, rows, bytes), flushed once per run: emf | api | off
+    metrics_mode: str = os.getenv("METRICS_MODE", "emf")
+
+
+settings = Settings()
@@ -0,0 +1,389 @@
+from __future__ import annotations
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from pipelines.batch.ohlc_daily.checkpoint import (
+    LocalCheckpointStore,
+    ShardCheckpoint,
+    checkpoint_key,
+)
+from pipelines.batch.ohlc_daily.config import settings
+from pipelines.batch.ohlc_daily.indicators import (
+    LocalIndicatorStateStore,
+    compute_indicators,
+    indicator_records,
+    write_indicators_parquet,
+)
+from pipelines.batch.ohlc_daily.provider import DailyPricesRequest, fetch_daily_prices_batch
+from pipelines.batch.ohlc_daily.quality import session_gaps, validate_ohlc_daily_rows
+from pipelines.batch.ohlc_daily.storage import (
+    merge_partitions,
+    write_jsonl,
+    write_jsonl_partitioned,
+    write_parquet_partitioned,
+)
+from pipelines.batch.ohlc_daily.transform import to_curated_prices_daily, to_ohlc_daily
+from pipelines.common.metrics import MetricsBuffer
+from pipelines.common.shards import Shard
+from pipelines.common.storage import jsonl_name
+from pipelines.common.timing import StageTimer
+from pipelines.common.validation import ValidationTotals
+
+ANALYTICS_ROOTS = {
+    "jsonl": "data/analytics/ohlc_daily",
+    "parquet": "data/analytics/ohlc_daily_parquet",
+}
+
+INDICATOR_ROOTS = {
+    "jsonl": "data/analytics/indicators",
+    "parquet": "data/analytics/indicators_parquet",
+}
+
+NAMESPACE = "MDP/Batch"  # run metrics: stage latency, rows, bytes
+
+
+@dataclass(frozen=True)
+class ShardJob:
+    """Run-level settings shared by every shard (must stay picklable)."""
+
+    mode: str
+    output_format: str
+    run_id: str
+    source: str = "stub"
+    seed: int = 0
+    backfill_days: int = 252
+    lookback_days: int = 10
+    as_of: Optional[date] = None
+    # incremental: last landed date per symbol; None means "no watermark store"
+    watermarks: Optional[Dict[str, date]] = None
+    # > 0: stream the shard through the pipeline in chunks of about this many rows,
+    # checkpointing after each chunk under `checkpoint_dir` (see run_shard)
+    chunk_rows: int = 0
+    checkpoint_dir: Optional[str] = None
+    # set: compute indicators for the landed rows, keeping per-symbol state here
+    indicator_state_dir: Optional[str] = None
+
+
+@dataclass
+class ShardResult:
+    shard_id: str
+    symbols: int
+    rows: int = 0
+    quarantined: int = 0
+    ok: bool = True
+    message: str = ""
+    quarantine_path: Optional[str] = None
+    partitions: List[Dict[str, Any]] = field(default_factory=list)
+    landed: Dict[str, date] = field(default_factory=dict)
+    seconds: float = 0.0
+    stage_seconds: Dict[str, float] = field(default_factory=dict)
+    bytes_written: int = 0
+    missing_sessions: int = 0  # trading days absent between landed bars / watermarks
+
+
+def _write_analytics(ohlc_rows, job: ShardJob, suffix: str) -> List[Dict[str, Any]]:
+    root = ANALYTICS_ROOTS[job.output_format]
+    if job.mode == "incremental":
+        # Upsert into symbol/year/month partitions keyed on (symbol, date)
+        return merge_partitions(root, ohlc_rows.to_records(), fmt=job.output_format)
+    if job.output_format == "parquet":
+        return write_parquet_partitioned(
+            root,
+            ohlc_rows,
+            run_id=job.run_id,
+            compression=settings.parquet_compression,
+            row_group_size=settings.parquet_row_group_size,
+        )
+    # Same symbol/year/month layout the incremental upsert merges into
+    return write_jsonl_partitioned(root, ohlc_rows, run_id=f"{job.run_id}{suffix}")
+
+
+def _write_indicators(ohlc_rows, job: ShardJob, suffix: str) -> int:
+    """
+    Indicator rows for the landed days -> <indicators root>, then the new per-symbol
+    state. Backfill recomputes from the start of its window; incremental continues
+    from the stored state. Returns bytes written.
+    """
+    store = LocalIndicatorStateStore(job.indicator_state_dir)
+    states = store.load(ohlc_rows.symbol.unique()) if job.mode == "incremental" else {}
+    frame, new_states = compute_indicators(ohlc_rows, states)
+    if frame.empty:
+        return 0
+    root = INDICATOR_ROOTS[job.output_format]
+    if job.output_format == "parquet":
+        path = f"{root}/part-{job.run_id}{suffix}.parquet"
+        written = write_indicators_parquet(path, frame, settings.parquet_compression)
+    else:
+        stats = write_jsonl(
+            f"{root}/indicators_{job.run_id}{suffix}.jsonl", indicator_records(frame)
+        )
+        written = stats.bytes_written
+    # State last: if the run dies before this, the next run recomputes the same days
+    store.save(new_states)
+    return written
+
+
+def _request(symbols: List[str], job: ShardJob) -> DailyPricesRequest:
+    return DailyPricesRequest(
+        mode=job.mode,
+        symbols=symbols,
+        source=job.source,
+        seed=job.seed,
+        backfill_days=job.backfill_days,
+        lookback_days=job.lookback_days,
+        as_of=job.as_of,
+        watermarks=job.watermarks,
+    )
+
+
+def _land_rows(
+    raw_rows, job: ShardJob, tag: str, timer: StageTimer, result: ShardResult, totals
+) -> Optional[str]:
+    """
+    RAW -> curate -> validate -> write for one set of provider rows (a whole shard or one
+    chunk). Adds the verdict to `totals` and the written partitions, landed dates and
+    bytes to `result`; returns the quarantine file written, if any.
+    Rows stay in one columnar OhlcBatch throughout; dicts only exist chunk-wise in the
+    JSONL writers.
+    """
+    # 2) Land RAW
+    compression = settings.jsonl_compression
+    name = jsonl_name(f"prices_daily_{job.run_id}{tag}", compression)
+    with timer.stage("write"):
+        stats = write_jsonl(f"data/raw/prices_daily/{name}", raw_rows, compression=compression)
+    result.bytes_written += stats.bytes_written
+
+    # 3) Curate
+    with timer.stage("normalize"):
+        curated_rows = to_curated_prices_daily(raw_rows)
+    with timer.stage("write"):
+        stats = write_jsonl(
+            f"data/curated/prices_daily/{name}", curated_rows, compression=compression
+        )
+    result.bytes_written += stats.bytes_written
+
+    # 4) Quality gate on the analytics rows
+    with timer.stage("normalize"):
+        ohlc_rows = to_ohlc_daily(curated_rows)
+    with timer.stage("validate"):
+        verdict = validate_ohlc_daily_rows(ohlc_rows)
+        passed, failed = verdict.split(ohlc_rows)  # batch of passing rows, failing dicts
+    totals.add(verdict)
+
+    # 5) Passing rows -> analytics; failing rows -> quarantine
+    if len(passed):
+        with timer.stage("write"):
+            result.partitions.extend(_write_analytics(passed, job, tag))
+        with timer.stage("validate"):
+            gaps = session_gaps(passed, job.watermarks)
+        if gaps:
+            result.missing_sessions += sum(gaps.values())
+            sample = ", ".join(f"{s}={n}" for s, n in sorted(gaps.items())[:5])
+            print(
+                f"GAP_WARN run={job.run_id}{tag} symbols={len(gaps)} "
+                f"sessions={sum(gaps.values())} ({sample})"
+            )
+        # A symbol with any failed day keeps its watermark, so that day is re-fetched
+        bad_symbols = {r["symbol"] for r in failed}
+        landed = passed.take(~passed.symbol.isin(bad_symbols))
+        result.landed.update(landed.latest_dates())
+        if job.indicator_state_dir and len(landed):
+            # Same symbols as the watermarks: a gap day would corrupt every window after it
+            with timer.stage("indicators"):
+                result.bytes_written += _write_indicators(landed, job, tag)
+    if not failed:
+        return None
+    name = jsonl_name(f"ohlc_daily_{job.run_id}{tag}", compression)
+    path = f"data/quarantine/batch/ohlc_daily/{name}"
+    with timer.stage("write"):
+        stats = write_jsonl(path, failed, compression=compression)
+    result.bytes_written += stats.bytes_written
+    return path
+
+
+def run_shard(shard: Shard, job: ShardJob) -> ShardResult:
+    """
+    extract -> curate -> validate -> write for one shard.
+    Validation is row-level: passing rows go to analytics, failing rows (with their
+    reasons) go to quarantine, so one bad bar never holds back the rest of the shard.
+    With job.chunk_rows set, the shard is streamed in chunks instead (_run_chunked).
+    """
+    if job.chunk_rows > 0:
+        return _run_chunked(shard, job)
+
+    t0 = time.perf_counter()
+    timer = StageTimer()
+    result = ShardResult(shard_id=shard.shard_id, symbols=len(shard.symbols))
+    suffix = "" if shard.count == 1 else f"_{shard.shard_id}"
+
+    # 1) Extract (stubbed provider for now)
+    with timer.stage("fetch"):
+        raw_rows = fetch_daily_prices_batch(_request(list(shard.symbols), job))
+    if not len(raw_rows):
+        result.message = "up to date"
+    else:
+        totals = ValidationTotals()
+        result.quarantine_path = _land_rows(raw_rows, job, suffix, timer, result, totals)
+        result.rows, result.quarantined = totals.total, totals.failed
+        result.ok, result.message = totals.ok, totals.message
+
+    result.seconds = time.perf_counter() - t0
+    result.stage_seconds = dict(timer.seconds)
+    return result
+
+
+def plan_chunks(symbols: List[str], job: ShardJob) -> List[List[str]]:
+    """
+    Symbol groups of about job.chunk_rows rows each (at least one symbol per chunk).
+    Chunks never share a symbol, so they never share an analytics partition either.
+    """
+    days = job.backfill_days if job.mode == "backfill" else job.lookback_days
+    per_chunk = max(1, job.chunk_rows // max(days, 1))
+    return [symbols[i : i + per_chunk] for i in range(0, len(symbols), per_chunk)]
+
+
+def _checkpoint_key(shard: Shard, job: ShardJob) -> str:
+    wm = {s: d.isoformat() for s, d in (job.watermarks or {}).items()}
+    return checkpoint_key(
+        {
+            "symbols": list(shard.symbols),
+            "shard": shard.shard_id,
+            "job": {k: v for k, v in vars(job).items() if k not in ("run_id", "watermarks")},
+            "watermarks": wm if job.watermarks is not None else None,
+        }
+    )
+
+
+def _run_chunked(shard: Shard, job: ShardJob) -> ShardResult:
+    """
+    The same pipeline as run_shard, one chunk of symbols at a time: each chunk is fetched,
+    written and validated before the next is fetched, so peak memory is one chunk however
+    many rows the shard has. Verdicts are accumulated in ValidationTotals (the shard's
+    message matches an unchunked run). After every chunk the progress is checkpointed;
+    rerunning the same job resumes after the last completed chunk.
+    """
+    t0 = time.perf_counter()
+    timer = StageTimer()
+    result = ShardResult(shard_id=shard.shard_id, symbols=len(shard.symbols))
+    suffix = "" if shard.count == 1 else f"_{shard.shard_id}"
+
+    chunks = plan_chunks(list(shard.symbols), job)
+    store = LocalCheckpointStore(job.checkpoint_dir) if job.checkpoint_dir else None
+    key = _checkpoint_key(shard, job)
+    cp = store.load(key) if store else None
+    if cp is None or cp.chunks != len(chunks):
+        # Pin the window: every chunk, and a resume on a later day, fetches the same days
+        as_of = (job.as_of or date.today()).isoformat()
+        cp = ShardCheckpoint(key=key, run_id=job.run_id, as_of=as_of, chunks=len(chunks))
+    elif cp.done:
+        print(f"RESUME {shard.shard_id}: chunk {cp.done + 1}/{cp.chunks} of run {cp.run_id}")
+    job = replace(job, run_id=cp.run_id, as_of=date.fromisoformat(cp.as_of))
+
+    totals = ValidationTotals(**cp.totals)
+    result.partitions = cp.partitions  # shared: chunks append, checkpoints save it
+    result.landed = {s: date.fromisoformat(d) for s, d in cp.landed.items()}
+    result.bytes_written = cp.bytes_written
+    result.missing_sessions = cp.missing_sessions
+
+    for i in range(cp.done, len(chunks)):
+        with timer.stage("fetch"):
+            raw_rows = fetch_daily_prices_batch(_request(chunks[i], job))
+        if len(raw_rows):
+            _land_rows(raw_rows, job, f"{suffix}_c{i:05d}", timer, result, totals)
+        del raw_rows  # release this chunk before the next one is fetched
+
+        if store:
+            cp.done = i + 1
+            cp.totals = vars(totals)
+            cp.landed = {s: d.isoformat() for s, d in result.landed.items()}
+            cp.bytes_written = result.bytes_written
+            cp.missing_sessions = result.missing_sessions
+            store.save(cp)
+    if store:
+        store.clear(key)
+
+    result.rows, result.quarantined = totals.total, totals.failed
+    if totals.total:
+        result.ok, result.message = totals.ok, totals.message
+    else:
+        result.message = "up to date"
+    if totals.failed:
+        result.quarantine_path = (
+            f"data/quarantine/batch/ohlc_daily/ohlc_daily_{job.run_id}{suffix}_c*.jsonl*"
+        )
+    result.seconds = time.perf_counter() - t0
+    result.stage_seconds = dict(timer.seconds)
+    return result
+
+
+def _job_for(shard: Shard, job: ShardJob) -> ShardJob:
+    # Ship each worker only its own symbols' watermarks
+    if job.watermarks is None:
+        return job
+    wm = {s: job.watermarks[s] for s in shard.symbols if s in job.watermarks}
+    return replace(job, watermarks=wm)
+
+
+def _failed(shard: Shard, exc: BaseException) -> ShardResult:
+    return ShardResult(
+        shard_id=shard.shard_id,
+        symbols=len(shard.symbols),
+        ok=False,
+        message=f"ERROR: {type(exc).__name__}: {exc}",
+    )
+
+
+def run_shards(shards: List[Shard], job: ShardJob, max_workers: int) -> List[ShardResult]:
+    """
+    Run shards on a process pool (inline when max_workers <= 1 or there is one shard).
+    Results come back in shard order; a shard that raises becomes a failed result.
+    """
+    if max_workers <= 1 or len(shards) <= 1:
+        out = []
+        for s in shards:
+            try:
+                out.append(run_shard(s, _job_for(s, job)))
+            except Exception as e:
+                out.append(_failed(s, e))
+        return out
+
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(shards))) as pool:
+        futures = [pool.submit(run_shard, s, _job_for(s, job)) for s in shards]
+        out = []
+        for s, f in zip(shards, futures, strict=True):
+            try:
+                out.append(f.result())
+            except Exception as e:
+                out.append(_failed(s, e))
+        return out
+
+
+def combine_results(results: List[ShardResult]) -> Tuple[bool, str]:
+    """One run verdict from per-shard quality results."""
+    failed = [r for r in results if not r.ok]
+    if not failed:
+        return True, f"PASS ({len(results)} shards)"
+    ids = ", ".join(r.shard_id for r in failed)
+    quarantined = sum(r.quarantined for r in results)
+    rows = sum(r.rows for r in results)
+    return False, (
+        f"FAIL: {len(failed)}/{len(results)} shards had failures ({ids}); "
+        f"{quarantined} of {rows} rows quarantined"
+    )
+
+
+def record_shard_metrics(metrics: MetricsBuffer, results: List[ShardResult]) -> None:
+    """One value per shard, so CloudWatch percentiles describe the shard distribution."""
+    for r in results:
+        metrics.add_stages(NAMESPACE, r.stage_seconds)
+        metrics.millis(NAMESPACE, "ShardLatency", r.seconds * 1000.0)
+        metrics.count(NAMESPACE, "RowsProcessed", r.rows)
+        metrics.count(NAMESPACE, "RowsQuarantined", r.quarantined)
+        metrics.bytes(NAMESPACE, "BytesWritten", r.bytes_written)
+        metrics.count(NAMESPACE, "MissingSessions", r.missing_sessions)
+        if not r.ok:
+            metrics.count(NAMESPACE, "ShardFailCount")
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from pipelines.batch.ohlc_daily.config import settings
+from pipelines.batch.ohlc_daily.executor import ShardJob, record_shard_metrics, run_shard
+from pipelines.batch.ohlc_daily.watermark import get_watermark_store
+from pipelines.common.metrics import get_metrics
+from pipelines.common.shards import Shard
+
+# Glue entrypoint: one job run processes exactly one shard, the same unit of work
+# run_local fans out over its process pool. An orchestrator (Step Functions Map state)
+# plans the shards with plan_shards() and passes each one as --shard '<json>'.
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shard", required=True, help="Shard.to_json() payload")
+    parser.add_argument("--mode", default="backfill", choices=["backfill", "incremental"])
+    parser.add_argument("--run-id", default="")
+    parser.add_argument("--output-format", default=settings.output_format)
+    # Glue does not turn EMF log lines into metrics, so publish through the API by default
+    parser.add_argument("--metrics-mode", default="api", choices=["emf", "api", "off"])
+    # Glue appends its own arguments (--JOB_NAME, --job-bookmark-option, ...)
+    args, _ = parser.parse_known_args(argv)
+
+    shard = Shard.from_json(args.shard)
+    run_id = args.run_id or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    watermarks = get_watermark_store()
+
+    job = ShardJob(
+        mode=args.mode,
+        output_format=args.output_format.strip().lower(),
+        run_id=run_id,
+        source=settings.source,
+        seed=settings.seed,
+        watermarks=watermarks.get(shard.symbols) if args.mode == "incremental" else None,
+        chunk_rows=settings.chunk_rows,
+        checkpoint_dir=settings.checkpoint_dir,
+        indicator_state_dir=settings.indicator_state_dir if settings.indicators else None,
+    )
+    result = run_shard(shard, job)
+    watermarks.advance(result.landed)  # only symbols whose rows all passed
+
+    metrics = get_metrics(args.metrics_mode)
+    record_shard_metrics(metrics, [result])
+    metrics.flush()
+
+    print(
+        json.dumps(
+            {
+                "shard_id": result.shard_id,
+                "ok": result.ok,
+                "rows": result.rows,
+                "quarantined": result.quarantined,
+                "missing_sessions": result.missing_sessions,
+                "message": result.message,
+                "quarantine_path": result.quarantine_path,
+                "partitions": len(result.partitions),
+                "seconds": round(result.seconds, 3),
+            }
+        )
+    )
+    return 0 if result.ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
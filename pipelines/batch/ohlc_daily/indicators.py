@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from pipelines.batch.ohlc_daily.storage import _pyarrow
+from pipelines.common.batches import OhlcBatch
+
+# Per-symbol technical indicators over the daily OHLC rows (analytics/indicators).
+# Every column is a pure function of the symbol's history up to that day, so a run only
+# needs the new days plus a small per-symbol state: the last CONTEXT bars (enough for
+# every rolling window) and the running EMA/ATR values. Rolling windows are summed
+# term by term in a fixed order, and the recursions replay the same float operations,
+# so an incremental run reproduces a full recompute bit for bit.
+
+SMA_WINDOWS = (20, 50)
+EMA_SPANS = (12, 26)
+VOLATILITY_WINDOW = 20  # sample stdev of daily returns
+ATR_WINDOW = 14  # Wilder's average true range
+VWAP_WINDOW = 20  # typical price (h + l + c) / 3 weighted by volume
+
+# Bars kept per symbol: the longest lookback any column needs for the next day
+CONTEXT = max(max(SMA_WINDOWS) - 1, VOLATILITY_WINDOW, ATR_WINDOW, VWAP_WINDOW - 1)
+
+TAIL_FIELDS = ("high", "low", "close", "volume")
+
+INDICATOR_COLUMNS = (
+    "return_1d",
+    *(f"sma_{n}" for n in SMA_WINDOWS),
+    *(f"ema_{n}" for n in EMA_SPANS),
+    f"volatility_{VOLATILITY_WINDOW}",
+    f"atr_{ATR_WINDOW}",
+    f"vwap_{VWAP_WINDOW}",
+)
+COLUMNS = ("symbol", "date", "close") + INDICATOR_COLUMNS
+
+
+def indicators_parquet_schema():
+    """Typed columns for the Parquet indicators zone (nulls where a window is not full)."""
+    pa, _ = _pyarrow()
+    return pa.schema(
+        [("symbol", pa.string()), ("date", pa.date32()), ("close", pa.float64())]
+        + [(c, pa.float64()) for c in INDICATOR_COLUMNS]
+    )
+
+
+@dataclass
+class IndicatorState:
+    """What the next run needs for one symbol (floats round-trip exactly through JSON)."""
+
+    symbol: str
+    date: str  # last ISO date computed
+    rows: int  # days computed so far (the next day's position in the history)
+    tail: Dict[str, List[float]] = field(default_factory=dict)  # last CONTEXT bars
+    ema: Dict[str, float] = field(default_factory=dict)  # "ema_<span>" -> last value
+    atr: Optional[float] = None  # None until ATR_WINDOW days are seen
+
+
+class LocalIndicatorStateStore:
+    """
+    One JSON file per symbol under `directory`, rewritten atomically. Shards (and chunks)
+    never share a symbol, so parallel workers never write the same file.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+
+    def _path(self, symbol: str) -> Path:
+        return self.directory / f"{symbol}.json"
+
+    def load(self, symbols: Iterable[str]) -> Dict[str, IndicatorState]:
+        out: Dict[str, IndicatorState] = {}
+        for s in symbols:
+            path = self._path(s)
+            if path.exists():
+                out[s] = IndicatorState(**json.loads(path.read_text(encoding="utf-8")))
+        return out
+
+    def save(self, states: Dict[str, IndicatorState]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for s, state in states.items():
+            path = self._path(s)
+            tmp = path.with_suffix(".json.tmp")
+            tmp.write_text(json.dumps(asdict(state)), encoding="utf-8")
+            os.replace(tmp, path)
+
+
+def _window_sum(w: np.ndarray) -> np.ndarray:
+    # Left to right, one column at a time: the order (and so the rounding) only depends
+    # on the window's values, never on where the window sits in the array
+    acc = w[:, 0].copy()
+    for k in range(1, w.shape[1]):
+        acc += w[:, k]
+    return acc
+
+
+def _rolling(x: np.ndarray, n: int, local: np.ndarray, reduce) -> np.ndarray:
+    """reduce() over each row's trailing n values; NaN where the window leaves the symbol."""
+    out = np.full(len(x), np.nan)
+    if len(x) >= n:
+        out[n - 1 :] = reduce(sliding_window_view(x, n))
+    out[local < n - 1] = np.nan
+    return out
+
+
+def _mean(w: np.ndarray) -> np.ndarray:
+    return _window_sum(w) / w.shape[1]
+
+
+def _stdev(w: np.ndarray) -> np.ndarray:
+    n = w.shape[1]
+    mean = _window_sum(w) / n
+    return np.sqrt(_window_sum((w - mean[:, None]) ** 2) / (n - 1))
+
+
+def _recurse(
+    x: np.ndarray, seed: np.ndarray, prev: np.ndarray, starts: np.ndarray, step
+) -> np.ndarray:
+    """
+    out[i] = step(out[i-1], x[i]) along each symbol's rows (`starts` = first row of each
+    symbol, `prev` = its value before that row, NaN if none). Where the previous value
+    is NaN the row takes seed[i] instead. Vectorized across symbols: one step per day.
+    """
+    out = np.full(len(x), np.nan)
+    ends = np.append(starts[1:], len(x))
+    last = prev.astype(float)
+    for k in range(int((ends - starts).max(initial=0))):
+        live = starts + k < ends
+        i = starts[live] + k
+        p = last[live]
+        out[i] = np.where(np.isnan(p), seed[i], step(p, x[i]))
+        last[live] = out[i]
+    return out
+
+
+def _ema_step(alpha: float):
+    return lambda prev, x: alpha * x + (1.0 - alpha) * prev
+
+
+def _atr_step(prev: np.ndarray, tr: np.ndarray) -> np.ndarray:
+    return (prev * (ATR_WINDOW - 1) + tr) / ATR_WINDOW
+
+
+def compute_indicators(
+    batch: OhlcBatch, states: Dict[str, IndicatorState]
+) -> Tuple[pd.DataFrame, Dict[str, IndicatorState]]:
+    """
+    Indicator rows (COLUMNS, NaN until a window fills) for the days in `batch` that come
+    after each symbol's state, plus the symbols' new states. Rows at or before a state's
+    date were computed by an earlier run and are skipped. With no states this is the full
+    recompute over the batch's history.
+    """
+    df = batch.sort_by("symbol", "date").to_frame()
+    df = pd.DataFrame(
+        {
+            "symbol": np.asarray(df["symbol"], dtype=object),
+            "date": np.asarray(df["date"], dtype=object),
+            **{c: df[c].to_numpy(dtype=float) for c in TAIL_FIELDS},
+        }
+    )
+    seen = df["symbol"].map({s: st.date for s, st in states.items()})
+    df = df[seen.isna() | (df["date"] > seen.fillna(""))].reset_index(drop=True)
+    if df.empty:
+        return pd.DataFrame(columns=list(COLUMNS)), {}
+
+    # Prepend each symbol's stored bars (context only: windows use them, output doesn't)
+    kept = [states[s] for s in pd.unique(df["symbol"]) if s in states]
+    ctx = pd.DataFrame(
+        {
+            "symbol": [st.symbol for st in kept for _ in st.tail["close"]],
+            **{
+                c: np.array([x for st in kept for x in st.tail[c]], dtype=float)
+                for c in TAIL_FIELDS
+            },
+            "new": False,
+        }
+    )
+    ext = pd.concat([ctx, df.assign(new=True)], ignore_index=True)
+    ext["seq"] = np.arange(len(ext))
+    ext = ext.sort_values(["symbol", "new", "seq"], kind="stable").reset_index(drop=True)
+
+    sym = ext["symbol"].to_numpy()
+    starts = np.flatnonzero(np.r_[True, sym[1:] != sym[:-1]])
+    sizes = np.diff(np.append(starts, len(ext)))
+    local = np.arange(len(ext)) - np.repeat(starts, sizes)  # index within the symbol
+    n_ctx = ext["symbol"].map({s: len(st.tail["close"]) for s, st in states.items()})
+    n_seen = ext["symbol"].map({s: st.rows for s, st in states.items()})
+    pos = (local + n_seen.fillna(0).to_numpy() - n_ctx.fillna(0).to_numpy()).astype(np.int64)
+
+    high, low, close = (ext[c].to_numpy() for c in ("high", "low", "close"))
+    volume = ext["volume"].to_numpy()
+    prev_close = np.r_[np.nan, close[:-1]]
+    prev_close[local == 0] = np.nan
+
+    # Rolling columns are computed over the context rows too, then kept for new rows
+    new = ext["new"].to_numpy()
+    out = ext.loc[new, ["symbol", "date", "close"]].reset_index(drop=True)
+    ret = close / prev_close - 1.0
+    out["return_1d"] = ret[new]
+    for n in SMA_WINDOWS:
+        out[f"sma_{n}"] = _rolling(close, n, local, _mean)[new]
+    # n returns need n + 1 closes: the first window ends one row later
+    vol = _rolling(ret, VOLATILITY_WINDOW, local - 1, _stdev)
+    out[f"volatility_{VOLATILITY_WINDOW}"] = vol[new]
+    tp = (high + low + close) / 3.0
+    pv = _rolling(tp * volume, VWAP_WINDOW, local, _window_sum)
+    v = _rolling(volume, VWAP_WINDOW, local, _window_sum)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out[f"vwap_{VWAP_WINDOW}"] = np.where(v > 0, pv / v, np.nan)[new]
+
+    # Recursions run over the new rows only, seeded from the stored values
+    new_starts = np.flatnonzero(np.r_[True, sym[new][1:] != sym[new][:-1]])
+    new_symbols = sym[new][new_starts]
+
+    def _prev(values: Dict[str, Optional[float]]) -> np.ndarray:
+        # Stored value per symbol, in new-row group order (NaN: no state / not seeded)
+        return np.array([values.get(s, np.nan) for s in new_symbols], dtype=float)
+
+    closes = close[new]
+    for span in EMA_SPANS:
+        name = f"ema_{span}"
+        prev = _prev({s: st.ema.get(name, np.nan) for s, st in states.items()})
+        step = _ema_step(2.0 / (span + 1))
+        out[name] = _recurse(closes, closes, prev, new_starts, step)  # first day: EMA = close
+
+    # True range; the first day of a history has no previous close
+    tr = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+    tr = np.where(pos == 0, high - low, tr)
+    seed = _rolling(tr, ATR_WINDOW, pos, _mean)[new]  # first ATR: mean of the first n TRs
+    prev = _prev({s: st.atr for s, st in states.items() if st.atr is not None})
+    out[f"atr_{ATR_WINDOW}"] = _recurse(tr[new], seed, prev, new_starts, _atr_step)
+    out = out[list(COLUMNS)]
+
+    # Next states: last CONTEXT bars, last recursion values, position after these rows
+    ends = np.append(starts[1:], len(ext))
+    last = out.iloc[np.append(new_starts[1:], len(out)) - 1]
+    bars = {c: ext[c].to_numpy() for c in TAIL_FIELDS}
+    emas = {f"ema_{n}": last[f"ema_{n}"].tolist() for n in EMA_SPANS}
+    atrs = last[f"atr_{ATR_WINDOW}"].tolist()
+    new_states: Dict[str, IndicatorState] = {}
+    for j, (s, d) in enumerate(zip(new_symbols, last["date"], strict=True)):
+        begin, end = max(starts[j], ends[j] - CONTEXT), ends[j]
+        new_states[s] = IndicatorState(
+            symbol=s,
+            date=d,
+            rows=int(pos[end - 1]) + 1,
+            tail={c: v[begin:end].tolist() for c, v in bars.items()},
+            ema={k: v[j] for k, v in emas.items()},
+            atr=None if np.isnan(atrs[j]) else atrs[j],
+        )
+    return out, new_states
+
+
+def indicator_records(frame: pd.DataFrame) -> Iterable[Dict[str, object]]:
+    """Rows as dicts with null (not NaN) for windows that have not filled yet."""
+    for row in frame.itertuples(index=False, name=None):
+        yield {
+            k: (None if isinstance(v, float) and np.isnan(v) else v)
+            for k, v in zip(COLUMNS, row, strict=True)
+        }
+
+
+def write_indicators_parquet(path: str, frame: pd.DataFrame, compression: str = "snappy") -> int:
+    """One Parquet file of indicator rows; returns its size in bytes."""
+    pa, pq = _pyarrow()
+    out = Path(path)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    frame = frame.assign(date=pd.to_datetime(frame["date"], format="%Y-%m-%d").dt.date)
+    table = pa.Table.from_pandas(frame, schema=indicators_parquet_schema(), preserve_index=False)
+    pq.write_table(table.replace_schema_metadata(None), out, compression=compression)
+    return out.stat().st_size
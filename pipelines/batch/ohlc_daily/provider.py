@@ -5,6 +5,7 @@ from datetime import date, datetime, timedelta, timezone
 from typing import Dict, Iterable, List, Literal, Optional
 import random
 
+from pipelines.common.trading_calendar import get_trading_calendar
 
 BatchMode = Literal["backfill", "incremental"]
 
@@ -13,35 +14,14 @@ def _iso_z(dt: datetime) -> str:
     return dt.isoformat().replace("+00:00", "Z")
 
 
-def _is_weekday(d: date) -> bool:
-    return d.weekday() < 5
-
-
 def _trading_days_between(start: date, end: date) -> List[date]:
-    """Inclusive range of weekdays only."""
-    out: List[date] = []
-    d = start
-    while d <= end:
-        if _is_weekday(d):
-            out.append(d)
-        d += timedelta(days=1)
-    return out
+    """Inclusive range of exchange sessions (holidays excluded)."""
+    return get_trading_calendar().sessions_between(start, end)
 
 
 def _last_n_trading_days(end: date, n: int) -> List[date]:
-    """Return last n weekdays ending at `end` (inclusive if weekday)."""
-    if n < 1:
-        raise ValueError("n must be >= 1")
-
-    out: List[date] = []
-    d = end
-    while len(out) < n:
-        if _is_weekday(d):
-            out.append(d)
-        d -= timedelta(days=1)
-
-    out.reverse()
-    return out
+    """Return the last n sessions ending at `end` (inclusive if a session)."""
+    return get_trading_calendar().last_n_sessions(end, n)
 
 
 @dataclass(frozen=True)
@@ -59,22 +39,38 @@ class DailyPricesRequest:
     # optional override for deterministic tests
     as_of: Optional[date] = None
 
+    # source="synthetic": seeded NumPy generator (reproducible, fast at load-test scale)
+    seed: int = 0
+
+    # incremental: last date already landed per symbol (from the watermark store).
+    # When set, only trading days after each watermark are fetched; symbols without a
+    # watermark fall back to the `lookback_days` window.
+    watermarks: Optional[Dict[str, date]] = None
+
 
 def fetch_daily_prices(req: DailyPricesRequest) -> List[Dict]:
     """
     Unified provider interface.
 
     backfill:
-      - generates `backfill_days` trading days (weekday-only) up to as_of (or today)
+      - generates the last `backfill_days` NYSE sessions (holidays excluded) up to as_of (or today)
 
     incremental:
-      - generates last `lookback_days` trading days up to as_of (or today)
-      - intended for overwrite/merge refresh of recent partitions
+      - with watermarks: only the NYSE sessions after each symbol's watermark (re-runs are no-ops)
+      - without: last `lookback_days` NYSE sessions up to as_of (or today)
+      - intended for upsert/merge into recent partitions
 
-    For now this uses the stub generator; later you’ll switch internals to Alpha Vantage.
+    source="alphavantage" fetches TIME_SERIES_DAILY through the response cache
+    (see alphavantage.py); "synthetic" uses the seeded generator; anything else the stub.
     """
     end = req.as_of or date.today()
 
+    if req.source == "synthetic":
+        return _fetch_synthetic(req, end)
+
+    if req.source == "alphavantage":
+        return _fetch_alphavantage(req, end)
+
     if req.mode == "backfill":
         return fetch_daily_prices_stub(
             symbols=req.symbols,
@@ -83,6 +79,14 @@ def fetch_daily_prices(req: DailyPricesRequest) -> List[Dict]:
             end=end,
         )
 
+    if req.mode == "incremental" and req.watermarks is not None:
+        plan = missing_trading_days(req.symbols, req.watermarks, end, req.lookback_days)
+        rows: List[Dict] = []
+        for sym, days in plan.items():
+            rows.extend(_stub_rows(sym, days, req.source))
+        rows.sort(key=lambda r: (r["symbol"], r["date"]))
+        return rows
+
     if req.mode == "incremental":
         return fetch_daily_prices_stub(
             symbols=req.symbols,
@@ -94,6 +98,137 @@ def fetch_daily_prices(req: DailyPricesRequest) -> List[Dict]:
     raise ValueError(f"Unsupported mode: {req.mode}")
 
 
+def fetch_daily_prices_batch(req: DailyPricesRequest):
+    """
+    Same rows as fetch_daily_prices, as an OhlcBatch. source="synthetic" fills the columns
+    straight from the generator's arrays; other sources are converted from their rows.
+    """
+    from pipelines.common.batches import OhlcBatch
+
+    if req.source == "synthetic":
+        return _fetch_synthetic_batch(req, req.as_of or date.today())
+    return OhlcBatch.from_records(fetch_daily_prices(req))
+
+
+def _fetch_alphavantage(req: DailyPricesRequest, end: date) -> List[Dict]:
+    from pipelines.batch.ohlc_daily.alphavantage import fetch_daily_series
+
+    if req.mode == "incremental" and req.watermarks is not None:
+        plan = missing_trading_days(req.symbols, req.watermarks, end, req.lookback_days)
+    else:
+        days = req.backfill_days if req.mode == "backfill" else req.lookback_days
+        window = _last_n_trading_days(end, days)
+        plan = {sym: window for sym in req.symbols}
+    if not plan:
+        return []
+
+    result = fetch_daily_series({sym: (d[0], d[-1]) for sym, d in plan.items()}, source=req.source)
+    for symbol, error in result.failures.items():
+        print(f"PROVIDER_FAIL symbol={symbol} error={error}")
+    print(
+        f"PROVIDER_CACHE symbols={len(plan)} hits={result.cache_hits} "
+        f"api_calls={result.api_calls} retries={result.retries}"
+    )
+    return result.rows
+
+
+def _fetch_synthetic(req: DailyPricesRequest, end: date) -> List[Dict]:
+    return _fetch_synthetic_batch(req, end).to_records()
+
+
+def _fetch_synthetic_batch(req: DailyPricesRequest, end: date):
+    import numpy as np
+
+    from pipelines.batch.ohlc_daily.synthetic import generate_daily_bars
+    from pipelines.common.batches import OhlcBatch
+
+    if req.mode == "incremental" and req.watermarks is not None:
+        plan = missing_trading_days(req.symbols, req.watermarks, end, req.lookback_days)
+        if not plan:
+            return OhlcBatch.empty()
+        # Missing days are always the tail of the generated window: keep date >= first
+        first = {sym: days[0].isoformat() for sym, days in plan.items()}
+        days = max(len(v) for v in plan.values())
+        symbols = list(plan)
+    else:
+        first = None
+        days = req.backfill_days if req.mode == "backfill" else req.lookback_days
+        symbols = list(req.symbols)
+
+    ts_ingest = _iso_z(datetime.now(timezone.utc))
+    batches = []
+    for bars in generate_daily_bars(symbols, days, seed=req.seed, end=end):
+        batch = OhlcBatch.from_daily_bars(bars, req.source, ts_ingest)
+        if first is not None:
+            # Sorted categories: compare date codes against each symbol's first wanted day
+            starts = [first[s] for s in batch.symbol.categories]
+            start_codes = np.searchsorted(np.asarray(batch.date.categories), starts)
+            batch = batch.take(batch.date.codes >= start_codes[batch.symbol.codes])
+        batches.append(batch)
+    return OhlcBatch.concat(batches).sort_by("symbol", "date")
+
+
+def missing_trading_days(
+    symbols: Iterable[str],
+    watermarks: Dict[str, date],
+    end: date,
+    lookback_days: int,
+) -> Dict[str, List[date]]:
+    """
+    Trading days each symbol still needs, up to `end`.
+    Symbols that are already current are left out entirely.
+    """
+    plan: Dict[str, List[date]] = {}
+    by_watermark: Dict[Optional[date], List[date]] = {}  # many symbols share a watermark
+    for sym in symbols:
+        wm = watermarks.get(sym)
+        if wm not in by_watermark:
+            if wm is None:
+                by_watermark[wm] = _last_n_trading_days(end, lookback_days)
+            else:
+                by_watermark[wm] = _trading_days_between(wm + timedelta(days=1), end)
+        if by_watermark[wm]:
+            plan[sym] = by_watermark[wm]
+    return plan
+
+
+def _stub_rows(sym: str, trading_days: List[date], source: str) -> List[Dict]:
+    rows: List[Dict] = []
+    px = random.uniform(80, 300)  # start price
+
+    for d in trading_days:
+        # random walk
+        drift = random.uniform(-0.03, 0.03)
+        close = max(1.0, px * (1.0 + drift))
+        open_ = px
+        high = max(open_, close) * (1.0 + random.uniform(0.0, 0.02))
+        low = min(open_, close) * (1.0 - random.uniform(0.0, 0.02))
+        volume = int(random.uniform(1_000_000, 20_000_000))
+
+        ts_market = datetime(d.year, d.month, d.day, 21, 0, tzinfo=timezone.utc)  # close-ish UTC
+        ts_ingest = datetime.now(timezone.utc)
+
+        rows.append(
+            {
+                "symbol": sym,
+                "date": d.isoformat(),  # YYYY-MM-DD
+                "open": round(open_, 2),
+                "high": round(high, 2),
+                "low": round(low, 2),
+                "close": round(close, 2),
+                "volume": volume,
+                "currency": "USD",
+                "ts_market": _iso_z(ts_market),
+                "ts_ingest": _iso_z(ts_ingest),
+                "source": source,
+            }
+        )
+
+        px = close
+
+    return rows
+
+
 def fetch_daily_prices_stub(
     symbols: Iterable[str],
     days: int = 30,
@@ -104,7 +239,7 @@ def fetch_daily_prices_stub(
     Stub "daily prices" for N trading days for each symbol.
     Output is provider-like, not curated yet.
 
-    - days = number of TRADING days (weekdays) to emit per symbol
+    - days = number of TRADING days (exchange sessions) to emit per symbol
     - end = last date to consider (defaults to today)
     """
     if days < 2:
@@ -117,37 +252,7 @@ def fetch_daily_prices_stub(
 
     rows: List[Dict] = []
     for sym in symbols:
-        px = random.uniform(80, 300)  # start price
-
-        for d in trading_days:
-            # random walk
-            drift = random.uniform(-0.03, 0.03)
-            close = max(1.0, px * (1.0 + drift))
-            open_ = px
-            high = max(open_, close) * (1.0 + random.uniform(0.0, 0.02))
-            low = min(open_, close) * (1.0 - random.uniform(0.0, 0.02))
-            volume = int(random.uniform(1_000_000, 20_000_000))
-
-            ts_market = datetime(d.year, d.month, d.day, 21, 0, tzinfo=timezone.utc)  # close-ish UTC
-            ts_ingest = datetime.now(timezone.utc)
-
-            rows.append(
-                {
-                    "symbol": sym,
-                    "date": d.isoformat(),  # YYYY-MM-DD
-                    "open": round(open_, 2),
-                    "high": round(high, 2),
-                    "low": round(low, 2),
-                    "close": round(close, 2),
-                    "volume": volume,
-                    "currency": "USD",
-                    "ts_market": _iso_z(ts_market),
-                    "ts_ingest": _iso_z(ts_ingest),
-                    "source": source,
-                }
-            )
-
-            px = close
+        rows.extend(_stub_rows(sym, trading_days, source))
 
     # stable ordering
     rows.sort(key=lambda r: (r["symbol"], r["date"]))
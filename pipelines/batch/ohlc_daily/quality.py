@@ -1,71 +1,82 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Tuple
-
-import pandas as pd
-import great_expectations as gx
-
-
-def validate_ohlc_daily(records: List[Dict[str, Any]]) -> Tuple[bool, str]:
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from pipelines.common.trading_calendar import get_trading_calendar
+from pipelines.common.validation import (
+    Guard,
+    Records,
+    RowValidation,
+    Suite,
+    between,
+    compile_suite,
+    match_regex,
+    not_null,
+)
+
+OHLC_COLS = ("open", "high", "low", "close")
+
+OHLC_DAILY_SUITE = Suite(
+    name="ohlc_daily",
+    guards=(
+        # ---- Pandas guards for OHLC invariants (more reliable than GE expectation names) ----
+        Guard("required_columns", ("symbol", "date") + OHLC_COLS, "Missing columns: {missing}"),
+        Guard("numeric", OHLC_COLS, "OHLC contains non-numeric values"),
+        # low <= open/close <= high, and low <= high
+        Guard("ohlc_invariants", OHLC_COLS, "OHLC invariant failed for {count} rows"),
+        Guard("timestamp", ("date",), "date contains unparseable timestamps"),
+        # Bars on weekends / exchange holidays are phantom rows
+        Guard("trading_session", ("date",), "date is not a trading session for {count} rows"),
+    ),
+    expectations=(
+        # ---- Schema + simple constraints ----
+        not_null("symbol"),
+        match_regex("symbol", r"^[A-Z.\-]{1,10}$"),
+        not_null("date"),
+        *(e for c in OHLC_COLS for e in (not_null(c), between(c, min_value=0, strict_min=True))),
+    ),
+    # Contract constraints (lengths, formats, bounds) from schemas/ohlc_daily.schema.json
+    schema="ohlc_daily",
+)
+
+
+def validate_ohlc_daily(
+    records: List[Dict[str, Any]], crosscheck: Optional[bool] = None
+) -> Tuple[bool, str]:
     """
-    GE 1.11-compatible validation for OHLC daily analytics output.
+    Validation for OHLC daily analytics output (compiled once per process, GE-equivalent).
+    Set crosscheck=True (or VALIDATION_CROSSCHECK=1) to also run the suite through GE.
     Returns (ok, message).
     """
-    if not records:
-        return False, "No records to validate"
-
-    df = pd.DataFrame(records)
-
-    # ---- Pandas guards for OHLC invariants (more reliable than hunting GE expectation names) ----
-    required_cols = ["symbol", "date", "open", "high", "low", "close"]
-    missing = [c for c in required_cols if c not in df.columns]
-    if missing:
-        return False, f"Missing columns: {missing}"
-
-    # numeric coercion + NaN check
-    for c in ["open", "high", "low", "close"]:
-        df[c] = pd.to_numeric(df[c], errors="coerce")
-    if df[["open", "high", "low", "close"]].isna().any().any():
-        return False, "OHLC contains non-numeric values"
-
-    # OHLC relationships:
-    # low <= open/close <= high, and low <= high
-    bad = df[
-        (df["low"] > df["high"])
-        | (df["open"] < df["low"]) | (df["open"] > df["high"])
-        | (df["close"] < df["low"]) | (df["close"] > df["high"])
-    ]
-    if not bad.empty:
-        return False, f"OHLC invariant failed for {len(bad)} rows"
-
-    # Date parseability
-    parsed = pd.to_datetime(df["date"], errors="coerce", utc=True)
-    if parsed.isna().any():
-        return False, "date contains unparseable timestamps"
-
-    # ---- GE checks (schema + simple constraints) ----
-    context = gx.get_context(mode="ephemeral")
+    return compile_suite(OHLC_DAILY_SUITE).validate(records, crosscheck=crosscheck)
 
-    datasource = context.data_sources.add_pandas(name="pandas_src_batch")
-    asset = datasource.add_dataframe_asset(name="ohlc_daily")
 
-    batch_def = asset.add_batch_definition_whole_dataframe("batch")
-    batch = batch_def.get_batch(batch_parameters={"dataframe": df})
-
-    validator = context.get_validator(batch=batch)
-
-    validator.expect_column_values_to_not_be_null("symbol")
-    validator.expect_column_values_to_match_regex("symbol", r"^[A-Z.\-]{1,10}$")
-
-    validator.expect_column_values_to_not_be_null("date")
-
-    for c in ["open", "high", "low", "close"]:
-        validator.expect_column_values_to_not_be_null(c)
-        validator.expect_column_values_to_be_between(c, min_value=0, strict_min=True)
+def validate_ohlc_daily_rows(records: Records, crosscheck: Optional[bool] = None) -> RowValidation:
+    """
+    Row-level variant: pass mask + failure reasons per row, so one bad bar only
+    quarantines itself. `.split(records)` -> (passing, failing-with-reasons).
+    Accepts dict rows or an OhlcBatch (split then returns a batch of passing rows).
+    """
+    return compile_suite(OHLC_DAILY_SUITE).validate_rows(records, crosscheck=crosscheck)
 
-    result = validator.validate()
-    if result.success:
-        return True, "PASS"
 
-    failed = [r for r in result.results if not r.success]
-    return False, f"FAIL: {len(failed)} expectations failed"
\ No newline at end of file
+def session_gaps(batch, watermarks: Optional[Dict[str, date]] = None) -> Dict[str, int]:
+    """
+    Trading sessions missing per symbol in an OhlcBatch: between consecutive dates of a
+    symbol, and between its watermark (if any) and its first date. Symbols with no gap
+    are left out. One searchsorted over the calendar for the whole batch.
+    """
+    if not len(batch):
+        return {}
+    symbols = batch.symbol.categories
+    codes = batch.symbol.codes
+    days = np.asarray(batch.date.categories, dtype="datetime64[D]")[batch.date.codes]
+    order = np.lexsort((days, codes))
+    wm = watermarks or {}
+    after = np.array([wm.get(s) for s in symbols], dtype="datetime64[D]")
+    gaps = get_trading_calendar().session_gaps(days[order], codes[order], after)
+    per_symbol = np.bincount(codes[order], weights=gaps, minlength=len(symbols))
+    return {symbols[i]: int(per_symbol[i]) for i in np.flatnonzero(per_symbol)}
@@ -1,13 +1,241 @@
 from __future__ import annotations
 
 import json
+import os
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List, Sequence, Union
 
+import pandas as pd
 
-def write_jsonl(path: str, records: List[Dict[str, Any]]) -> None:
-    p = Path(path)
-    p.parent.mkdir(parents=True, exist_ok=True)
-    with p.open("w", encoding="utf-8") as f:
-        for r in records:
-            f.write(json.dumps(r) + "\n")
\ No newline at end of file
+from pipelines.common.batches import OhlcBatch, as_records
+from pipelines.common.storage import WriteStats, write_jsonl_local
+
+# Hive-style partition columns for the Parquet analytics zone (path only, not in the files)
+PARTITION_COLS = ("symbol", "year", "month")
+
+
+def write_jsonl(
+    path: str, records: Union[Iterable[Dict[str, Any]], OhlcBatch], compression: str = "none"
+) -> WriteStats:
+    return write_jsonl_local(path, as_records(records), compression=compression)
+
+
+def _pyarrow():
+    # Optional dependency: only the Parquet output path needs it (kept out of the Lambda image)
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("Parquet output requires pyarrow (pip install pyarrow)") from e
+    return pa, pq
+
+
+def ohlc_parquet_schema():
+    """Typed columns for the curated OHLC contract (partition columns excluded)."""
+    pa, _ = _pyarrow()
+    return pa.schema(
+        [
+            ("date", pa.date32()),
+            ("open", pa.float64()),
+            ("high", pa.float64()),
+            ("low", pa.float64()),
+            ("close", pa.float64()),
+            ("volume", pa.int64()),
+            ("currency", pa.string()),
+            ("ts_market", pa.timestamp("us", tz="UTC")),
+            ("ts_ingest", pa.timestamp("us", tz="UTC")),
+            ("source", pa.string()),
+        ]
+    )
+
+
+def partition_path(values: Dict[str, str]) -> str:
+    return "/".join(f"{k}={v}" for k, v in values.items())
+
+
+def _to_datetime(s: pd.Series, **kwargs: Any) -> pd.Series:
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        # Parse each distinct value once, then expand by code
+        parsed = pd.to_datetime(s.cat.categories, **kwargs)
+        return pd.Series(parsed.take(s.cat.codes), index=s.index)
+    return pd.to_datetime(s, **kwargs)
+
+
+def _typed_frame(records: Union[List[Dict[str, Any]], OhlcBatch]) -> pd.DataFrame:
+    """Curated rows -> DataFrame with Parquet-ready types + year/month partition columns."""
+    # A batch converts without per-row dicts (its string columns stay categorical)
+    df = records.to_frame() if isinstance(records, OhlcBatch) else pd.DataFrame(records)
+    dates = _to_datetime(df["date"], format="%Y-%m-%d")
+    df["year"] = dates.dt.strftime("%Y")
+    df["month"] = dates.dt.strftime("%m")
+    df["date"] = dates.dt.date
+    for c in ("ts_market", "ts_ingest"):
+        df[c] = _to_datetime(df[c], utc=True, format="ISO8601")
+    return df
+
+
+def write_parquet_partitioned(
+    root: str,
+    records: Union[List[Dict[str, Any]], OhlcBatch],
+    run_id: str,
+    compression: str = "snappy",
+    row_group_size: int = 131_072,
+    partition_cols: Sequence[str] = PARTITION_COLS,
+) -> List[Dict[str, Any]]:
+    """
+    Write OHLC rows as Parquet under <root>/symbol=<S>/year=<YYYY>/month=<MM>/part-<run_id>.parquet.
+    `partition_cols` may drop trailing levels (e.g. symbol/year) for sparse daily data.
+    Returns one entry per partition written: {"values", "path", "rows"}.
+    """
+    pa, pq = _pyarrow()
+    if not len(records):
+        return []
+
+    schema = ohlc_parquet_schema()
+    df = _typed_frame(records)
+
+    # Convert once, sort by partition, then write zero-copy slices per partition.
+    cols = list(partition_cols)
+    df = df.sort_values(cols + ["date"], kind="stable").reset_index(drop=True)
+    table = pa.Table.from_pandas(df[schema.names], schema=schema, preserve_index=False)
+    table = table.replace_schema_metadata(None)  # drop the pandas blob from every file footer
+
+    keys = df[cols]
+    starts = keys.ne(keys.shift()).any(axis=1).to_numpy().nonzero()[0].tolist() + [len(df)]
+
+    written: List[Dict[str, Any]] = []
+    for start, stop in zip(starts[:-1], starts[1:], strict=True):
+        values = {k: str(keys.at[start, k]) for k in cols}
+        directory = Path(root) / partition_path(values)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"part-{run_id}.parquet"
+
+        pq.write_table(
+            table.slice(start, stop - start),
+            path,
+            compression=compression,
+            row_group_size=row_group_size,
+        )
+        written.append({"values": values, "path": str(path), "rows": stop - start})
+
+    return written
+
+
+def write_jsonl_partitioned(
+    root: str,
+    records: Union[List[Dict[str, Any]], OhlcBatch],
+    run_id: str,
+) -> List[Dict[str, Any]]:
+    """
+    Write OHLC rows as JSONL under <root>/symbol=<S>/year=<YYYY>/month=<MM>/part-<run_id>.jsonl,
+    the layout merge_partitions upserts into, so later incremental runs see these rows.
+    Returns one entry per partition written: {"values", "path", "rows"}.
+    """
+    groups: Dict[str, Dict[str, Any]] = {}
+    for r in as_records(records):
+        values = _partition_values(r)
+        g = groups.setdefault(partition_path(values), {"values": values, "rows": []})
+        g["rows"].append(r)
+
+    written: List[Dict[str, Any]] = []
+    for path, g in sorted(groups.items()):
+        rows = sorted(g["rows"], key=lambda r: str(r["date"]))
+        target = Path(root) / path / f"part-{run_id}.jsonl"
+        write_jsonl(str(target), rows)
+        written.append({"values": g["values"], "path": str(target), "rows": len(rows)})
+    return written
+
+
+def partition_ddl(table: str, location: str, partitions: List[Dict[str, Any]]) -> str:
+    """
+    Idempotent Athena/Glue DDL that registers written partitions in the catalog.
+    `location` is the table root (e.g. s3://bucket/analytics/ohlc_daily_parquet).
+    """
+    seen = {partition_path(p["values"]): p["values"] for p in partitions}
+    if not seen:
+        return ""
+
+    lines = [f"ALTER TABLE {table} ADD IF NOT EXISTS"]
+    for path, values in sorted(seen.items()):
+        spec = ", ".join(f"{k} = '{v}'" for k, v in values.items())
+        lines.append(f"  PARTITION ({spec}) LOCATION '{location.rstrip('/')}/{path}/'")
+    return "\n".join(lines) + ";\n"
+
+
+def _partition_values(record: Dict[str, Any]) -> Dict[str, str]:
+    d = str(record["date"])  # YYYY-MM-DD
+    return {"symbol": record["symbol"], "year": d[:4], "month": d[5:7]}
+
+
+def _replace_partition(directory: Path, final_name: str, write_tmp) -> None:
+    """
+    Write via a temp file + os.replace, then drop the part files it supersedes.
+    A reader sees either the old part set or the merged file (briefly both during cleanup,
+    which the (symbol, date) key makes easy to dedupe), never a half-written file.
+    """
+    existing = [p for p in directory.glob("part-*") if p.name != final_name]
+    tmp = directory / f".{final_name}.tmp"
+    write_tmp(tmp)
+    os.replace(tmp, directory / final_name)
+    for p in existing:
+        p.unlink()
+
+
+def merge_partitions(
+    root: str, records: List[Dict[str, Any]], fmt: str = "jsonl"
+) -> List[Dict[str, Any]]:
+    """
+    Upsert OHLC rows into <root>/symbol=/year=/month=/ partitions keyed on (symbol, date).
+    Incoming rows replace existing rows for the same day; every touched partition is
+    compacted into a single part-00000.<fmt> file. Re-merging the same rows is a no-op
+    for the data (only the touched partitions are rewritten).
+    """
+    if fmt not in ("jsonl", "parquet"):
+        raise ValueError(f"fmt must be 'jsonl' or 'parquet'. Got: {fmt!r}")
+
+    groups: Dict[str, Dict[str, Any]] = {}
+    for r in records:
+        values = _partition_values(r)
+        g = groups.setdefault(partition_path(values), {"values": values, "rows": []})
+        g["rows"].append(r)
+
+    if fmt == "parquet":
+        pa, pq = _pyarrow()
+        schema = ohlc_parquet_schema()
+
+    final_name = f"part-00000.{fmt}"
+    merged_out: List[Dict[str, Any]] = []
+    for path, g in sorted(groups.items()):
+        directory = Path(root) / path
+        directory.mkdir(parents=True, exist_ok=True)
+        existing_files = sorted(directory.glob(f"part-*.{fmt}"))
+
+        if fmt == "jsonl":
+            by_key: Dict[tuple, Dict[str, Any]] = {}
+            for f in existing_files:
+                with f.open(encoding="utf-8") as fh:
+                    for line in fh:
+                        if line.strip():
+                            row = json.loads(line)
+                            by_key[(row["symbol"], row["date"])] = row
+            for row in g["rows"]:
+                by_key[(row["symbol"], row["date"])] = row
+            rows = [by_key[k] for k in sorted(by_key)]
+            _replace_partition(directory, final_name, lambda tmp, rows=rows: write_jsonl(tmp, rows))
+            n = len(rows)
+        else:
+            frames = [pq.read_table(f).to_pandas() for f in existing_files]
+            frames.append(_typed_frame(g["rows"])[schema.names])
+            df = (
+                pd.concat(frames, ignore_index=True)
+                .drop_duplicates(subset=["date"], keep="last")  # one symbol per partition
+                .sort_values("date", kind="stable")
+            )
+            table = pa.Table.from_pandas(df[schema.names], schema=schema, preserve_index=False)
+            table = table.replace_schema_metadata(None)
+            _replace_partition(directory, final_name, lambda tmp, t=table: pq.write_table(t, tmp))
+            n = len(df)
+
+        merged_out.append({"values": g["values"], "path": str(directory / final_name), "rows": n})
+
+    return merged_out
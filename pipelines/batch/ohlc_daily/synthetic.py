@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import zlib
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from pipelines.batch.ohlc_daily.provider import _last_n_trading_days
+
+# Seeded, vectorized market data for load tests. Every chunk of symbols is one set of
+# (symbols x days) NumPy arrays; nothing is built row by row until a caller asks for dicts.
+# Each symbol draws from its own RNG, derived from (seed, symbol), so a symbol's series is
+# the same whatever chunk or shard it lands in, and different symbols never share a path.
+
+
+def _iso_z(dt: datetime) -> str:
+    return dt.isoformat().replace("+00:00", "Z")
+
+
+def _rngs(seed: int, symbols: Sequence[str]) -> List[np.random.Generator]:
+    return [np.random.default_rng([seed, zlib.crc32(s.encode("utf-8"))]) for s in symbols]
+
+
+def _draw(rngs: Sequence[np.random.Generator], method: str, *args, size: int) -> np.ndarray:
+    """One row of `size` draws per symbol, each from that symbol's own stream."""
+    return np.stack([getattr(r, method)(*args, size=size) for r in rngs])
+
+
+@dataclass(frozen=True)
+class DailyBars:
+    """Column arrays for a chunk of daily OHLCV rows (symbol-major, date ascending)."""
+
+    symbol: np.ndarray  # str
+    date: np.ndarray  # datetime64[D]
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray  # int64
+
+    def __len__(self) -> int:
+        return len(self.symbol)
+
+    def to_records(self, source: str = "synthetic", ts_ingest: Optional[str] = None) -> List[Dict]:
+        """Provider-shaped rows (same keys as fetch_daily_prices_stub)."""
+        ts_ingest = ts_ingest or _iso_z(datetime.now(timezone.utc))
+        dates = self.date.astype(str).tolist()
+        return [
+            {
+                "symbol": s,
+                "date": d,
+                "open": o,
+                "high": h,
+                "low": lo,
+                "close": c,
+                "volume": v,
+                "currency": "USD",
+                "ts_market": f"{d}T21:00:00Z",  # close-ish UTC
+                "ts_ingest": ts_ingest,
+                "source": source,
+            }
+            for s, d, o, h, lo, c, v in zip(
+                self.symbol.tolist(),
+                dates,
+                self.open.tolist(),
+                self.high.tolist(),
+                self.low.tolist(),
+                self.close.tolist(),
+                self.volume.tolist(),
+                strict=True,
+            )
+        ]
+
+
+def _daily_chunk(
+    symbols: Sequence[str], trading_days: np.ndarray, seed: int, daily_vol: float
+) -> DailyBars:
+    rngs = _rngs(seed, symbols)
+    n_sym, n_days = len(symbols), len(trading_days)
+
+    # Geometric random walk: close_t = p0 * exp(cumsum(r)); open_t = close_{t-1} * small gap
+    p0 = _draw(rngs, "uniform", 20.0, 500.0, size=1)
+    returns = _draw(rngs, "normal", 0.0, daily_vol, size=n_days)
+    close = p0 * np.exp(np.cumsum(returns, axis=1))
+    prev_close = np.concatenate([p0, close[:, :-1]], axis=1)
+    open_ = prev_close * np.exp(_draw(rngs, "normal", 0.0, daily_vol / 4, size=n_days))
+
+    body_hi = np.maximum(open_, close)
+    body_lo = np.minimum(open_, close)
+    high = body_hi * (1.0 + np.abs(_draw(rngs, "normal", 0.0, daily_vol / 2, size=n_days)))
+    low = body_lo * (1.0 - np.abs(_draw(rngs, "normal", 0.0, daily_vol / 2, size=n_days)))
+
+    # Round to cents, then re-enforce low <= open/close <= high (rounding can cross them)
+    open_, close = np.round(open_, 2), np.round(close, 2)
+    np.maximum(open_, 0.01, out=open_)
+    np.maximum(close, 0.01, out=close)
+    high = np.maximum(np.round(high, 2), np.maximum(open_, close))
+    low = np.minimum(np.maximum(np.round(low, 2), 0.01), np.minimum(open_, close))
+    volume = _draw(rngs, "lognormal", 15.0, 0.6, size=n_days).astype(np.int64)
+
+    return DailyBars(
+        symbol=np.repeat(np.asarray(symbols, dtype=object), n_days),
+        date=np.tile(trading_days, n_sym),
+        open=open_.ravel(),
+        high=high.ravel(),
+        low=low.ravel(),
+        close=close.ravel(),
+        volume=volume.ravel(),
+    )
+
+
+def generate_daily_bars(
+    symbols: Iterable[str],
+    days: int,
+    seed: int = 0,
+    end: Optional[date] = None,
+    chunk_symbols: int = 250,
+    daily_vol: float = 0.02,
+) -> Iterator[DailyBars]:
+    """
+    Random-walk daily OHLCV for `days` trading days (exchange sessions) up to `end`, yielded as one
+    DailyBars per `chunk_symbols` symbols so memory stays bounded at any universe size.
+    """
+    if days < 1:
+        raise ValueError("days must be >= 1")
+    if chunk_symbols < 1:
+        raise ValueError("chunk_symbols must be >= 1")
+
+    trading_days = np.array(_last_n_trading_days(end or date.today(), days), dtype="datetime64[D]")
+    universe = [s.strip().upper() for s in symbols]
+    for i in range(0, len(universe), chunk_symbols):
+        yield _daily_chunk(universe[i : i + chunk_symbols], trading_days, seed, daily_vol)
+
+
+def iter_daily_rows(
+    symbols: Iterable[str],
+    days: int,
+    seed: int = 0,
+    end: Optional[date] = None,
+    source: str = "synthetic",
+    chunk_symbols: int = 250,
+) -> Iterator[List[Dict]]:
+    """Same data as generate_daily_bars, as chunks of provider-shaped row dicts."""
+    ts_ingest = _iso_z(datetime.now(timezone.utc))
+    for bars in generate_daily_bars(symbols, days, seed=seed, end=end, chunk_symbols=chunk_symbols):
+        yield bars.to_records(source=source, ts_ingest=ts_ingest)
+
+
+def generate_ticks(
+    symbols: Sequence[str],
+    n_ticks: int,
+    seed: int = 0,
+    start: Optional[datetime] = None,
+    interval_s: float = 1.0,
+    chunk_ticks: int = 1_000,
+    tick_vol: float = 0.0005,
+    source: str = "synthetic",
+) -> Iterator[List[Dict]]:
+    """
+    Intraday PriceEvent dicts (streaming contract: symbol/price/currency/ts_market/
+    ts_ingest/source). One tick per symbol every `interval_s`, time-ordered, yielded in
+    chunks of `chunk_ticks` time steps (chunk_ticks * len(symbols) events).
+    """
+    if n_ticks < 1:
+        raise ValueError("n_ticks must be >= 1")
+
+    universe = [s.strip().upper() for s in symbols]
+    rngs = _rngs(seed, universe)
+    t0 = start or datetime.now(timezone.utc).replace(microsecond=0)
+    price = _draw(rngs, "uniform", 20.0, 500.0, size=1)[:, 0]
+    ts_ingest = _iso_z(datetime.now(timezone.utc))
+
+    for offset in range(0, n_ticks, chunk_ticks):
+        steps = min(chunk_ticks, n_ticks - offset)
+        walk = price * np.exp(np.cumsum(_draw(rngs, "normal", 0.0, tick_vol, size=steps).T, axis=0))
+        price = walk[-1]
+        prices = np.maximum(np.round(walk, 4), 0.0001).tolist()
+
+        events: List[Dict] = []
+        for i, row in enumerate(prices):
+            ts_market = _iso_z(t0 + timedelta(seconds=(offset + i) * interval_s))
+            events.extend(
+                {
+                    "symbol": sym,
+                    "price": px,
+                    "currency": "USD",
+                    "ts_market": ts_market,
+                    "ts_ingest": ts_ingest,
+                    "source": source,
+                }
+                for sym, px in zip(universe, row, strict=True)
+            )
+        yield events
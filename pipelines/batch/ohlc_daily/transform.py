@@ -1,34 +1,47 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
-
-
-def to_curated_prices_daily(raw_rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    curated: List[Dict[str, Any]] = []
-    for r in raw_rows:
-        curated.append(
-            {
-                "symbol": str(r["symbol"]).upper().strip(),
-                "date": str(r["date"]),  # YYYY-MM-DD
-                "open": float(r["open"]),
-                "high": float(r["high"]),
-                "low": float(r["low"]),
-                "close": float(r["close"]),
-                "volume": int(r["volume"]),
-                "currency": str(r.get("currency", "USD")).upper().strip(),
-                "ts_market": str(r["ts_market"]),
-                "ts_ingest": str(r["ts_ingest"]),
-                "source": str(r.get("source", "unknown")),
-            }
-        )
-    return curated
-
-
-def to_ohlc_daily(curated_daily: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+from typing import Any, Dict, List, Union
+
+from pipelines.common.batches import OhlcBatch
+from pipelines.common.schema import load_schema
+
+Rows = Union[List[Dict[str, Any]], OhlcBatch]
+
+# Compiled once at import from schemas/ohlc_daily.schema.json
+_OHLC_DAILY = load_schema("ohlc_daily")
+
+
+def to_curated_prices_daily(raw_rows: Rows) -> Rows:
+    """
+    Provider rows -> curated contract, both through the compiled ohlc_daily schema:
+    an OhlcBatch column-wise (once per distinct symbol/currency/...), dict rows per row.
+    """
+    if isinstance(raw_rows, OhlcBatch):
+        return raw_rows.normalized()
+    return _OHLC_DAILY.normalize_many(raw_rows)
+
+
+def to_ohlc_daily(curated_daily: Rows) -> Rows:
     """
     Analytics output. For now it's 1:1 daily OHLC rows (already daily).
-    Later you can aggregate intraday ticks into daily candles.
+    Intraday ticks go through ticks_to_ohlc_daily instead.
     """
     # In this simplified version, curated_daily is already daily OHLC.
     # We keep a separate function to preserve the "analytics layer" concept.
-    return list(curated_daily)
\ No newline at end of file
+    if isinstance(curated_daily, OhlcBatch):
+        return curated_daily
+    return list(curated_daily)
+
+
+OHLC_DAILY_FIELDS = _OHLC_DAILY.field_names
+
+
+def ticks_to_ohlc_daily(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Daily candles from curated streaming PriceEvents, in the same shape as to_ohlc_daily.
+    For incremental/late-aware aggregation use candles.CandleAggregator directly.
+    Library only: the daily job lands provider bars, nothing reads curated/prices/ yet.
+    """
+    from pipelines.batch.ohlc_daily.candles import aggregate_candles
+
+    return [{k: c[k] for k in OHLC_DAILY_FIELDS} for c in aggregate_candles(events, "1d")]
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import json
+import os
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterable, Protocol
+
+from botocore.exceptions import ClientError
+
+from pipelines.batch.ohlc_daily.config import settings
+from pipelines.common.aws import get_client
+
+
+class WatermarkStore(Protocol):
+    """
+    Per-symbol "last date landed" for the batch pipeline.
+    Watermarks only move forward: advancing to an older date is a no-op.
+    """
+
+    def get(self, symbols: Iterable[str]) -> Dict[str, date]: ...
+
+    def advance(self, latest: Dict[str, date]) -> None: ...
+
+
+def latest_dates(rows: Iterable[Dict]) -> Dict[str, date]:
+    """Max `date` per symbol in a set of rows (what a successful run has landed)."""
+    out: Dict[str, str] = {}
+    for r in rows:
+        sym, d = r["symbol"], r["date"]
+        if d > out.get(sym, ""):
+            out[sym] = d
+    return {s: date.fromisoformat(d) for s, d in out.items()}
+
+
+def _merge_forward(current: Dict[str, str], latest: Dict[str, date]) -> bool:
+    changed = False
+    for sym, d in latest.items():
+        iso = d.isoformat()
+        if iso > current.get(sym, ""):
+            current[sym] = iso
+            changed = True
+    return changed
+
+
+class LocalWatermarkStore:
+    """JSON file {"AAPL": "2026-01-16", ...}; rewritten atomically."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+
+    def _load(self) -> Dict[str, str]:
+        if not self.path.exists():
+            return {}
+        return json.loads(self.path.read_text(encoding="utf-8"))
+
+    def get(self, symbols: Iterable[str]) -> Dict[str, date]:
+        data = self._load()
+        return {s: date.fromisoformat(data[s]) for s in symbols if s in data}
+
+    def advance(self, latest: Dict[str, date]) -> None:
+        data = self._load()
+        if not _merge_forward(data, latest):
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps(data, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+class S3WatermarkStore:
+    """Same JSON document as the local store, kept in one S3 object."""
+
+    def __init__(self, client, bucket: str, key: str):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+
+    def _load(self) -> Dict[str, str]:
+        try:
+            resp = self.client.get_object(Bucket=self.bucket, Key=self.key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+                return {}
+            raise
+        return json.loads(resp["Body"].read())
+
+    def get(self, symbols: Iterable[str]) -> Dict[str, date]:
+        data = self._load()
+        return {s: date.fromisoformat(data[s]) for s in symbols if s in data}
+
+    def advance(self, latest: Dict[str, date]) -> None:
+        data = self._load()
+        if _merge_forward(data, latest):
+            body = json.dumps(data, sort_keys=True).encode("utf-8")
+            self.client.put_object(Bucket=self.bucket, Key=self.key, Body=body)
+
+
+class DynamoDBWatermarkStore:
+    """
+    One item per symbol: {"symbol": S, "last_date": S}.
+    Writes are conditional so concurrent runs can never move a watermark backwards.
+    """
+
+    def __init__(self, client, table_name: str):
+        self.client = client
+        self.table_name = table_name
+
+    def get(self, symbols: Iterable[str]) -> Dict[str, date]:
+        keys = [{"symbol": {"S": s}} for s in dict.fromkeys(symbols)]
+        out: Dict[str, date] = {}
+        for i in range(0, len(keys), 100):  # BatchGetItem limit
+            pending = {self.table_name: {"Keys": keys[i : i + 100]}}
+            while pending:
+                resp = self.client.batch_get_item(RequestItems=pending)
+                for item in resp.get("Responses", {}).get(self.table_name, []):
+                    out[item["symbol"]["S"]] = date.fromisoformat(item["last_date"]["S"])
+                pending = resp.get("UnprocessedKeys") or {}
+        return out
+
+    def advance(self, latest: Dict[str, date]) -> None:
+        for sym, d in latest.items():
+            try:
+                self.client.put_item(
+                    TableName=self.table_name,
+                    Item={"symbol": {"S": sym}, "last_date": {"S": d.isoformat()}},
+                    ConditionExpression="attribute_not_exists(#s) OR #d < :d",
+                    ExpressionAttributeNames={"#s": "symbol", "#d": "last_date"},
+                    ExpressionAttributeValues={":d": {"S": d.isoformat()}},
+                )
+            except ClientError as e:
+                if e.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+                    raise
+
+
+def get_watermark_store() -> WatermarkStore:
+    """Backend chosen by WATERMARK_BACKEND: local (default) | s3 | dynamodb."""
+    backend = settings.watermark_backend.strip().lower()
+    if backend == "local":
+        return LocalWatermarkStore(settings.watermark_path)
+    if backend == "s3":
+        if not settings.s3_bucket_name:
+            raise ValueError("WATERMARK_BACKEND=s3 requires S3_BUCKET_NAME")
+        return S3WatermarkStore(get_client("s3"), settings.s3_bucket_name, settings.watermark_key)
+    if backend == "dynamodb":
+        return DynamoDBWatermarkStore(get_client("dynamodb"), settings.watermark_table)
+    raise ValueError(
+        f"WATERMARK_BACKEND must be one of ['dynamodb', 'local', 's3']. Got: {backend!r}"
+    )
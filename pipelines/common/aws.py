@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import os
+import threading
+from typing import Any, Dict, Optional
+
+import boto3
+
+# One boto3 client per (service, region) per process. In Lambda, module state survives
+# warm invocations, so clients (and their connection pools) are built once per container.
+_clients: Dict[tuple, Any] = {}
+_lock = threading.Lock()
+
+
+def get_client(service: str, region: Optional[str] = None, config: Optional[Any] = None) -> Any:
+    # `config` (botocore Config) applies when the client is first built; an injected or
+    # already built client is returned as is
+    region = region or os.getenv("AWS_REGION") or None
+    key = (service, region)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = boto3.client(service, region_name=region, config=config)
+                _clients[key] = client
+    return client
+
+
+def set_client(service: str, client: Any, region: Optional[str] = None) -> None:
+    """Inject a client (e.g. a local stand-in) for benchmarks and local runs."""
+    with _lock:
+        _clients[(service, region or os.getenv("AWS_REGION") or None)] = client
+
+
+def reset_clients() -> None:
+    with _lock:
+        _clients.clear()
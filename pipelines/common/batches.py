@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+import sys
+from dataclasses import dataclass, fields
+from datetime import date
+from functools import partial
+from typing import Any, Callable, ClassVar, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from pipelines.common.schema import load_schema
+
+# Columnar record batches: one NumPy array per numeric field and one dictionary-encoded
+# (pd.Categorical) column per string field. Symbols, dates, currencies, sources and
+# timestamps repeat heavily, so each distinct string is stored - and normalized - once.
+# Categories are kept sorted, so category codes order the same way as the strings.
+# Dicts/DataFrames are only built at the edges (to_records / iter_records / to_frame).
+
+
+def _encode(values: Any) -> pd.Categorical:
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object), sort=True)
+    return pd.Categorical.from_codes(codes, categories=pd.Index(uniques, dtype=object))
+
+
+_MISSING = object()  # absent key: the schema default applies (an explicit null is a value)
+
+
+def _record(name: str, value: Any) -> Dict[str, Any]:
+    return {} if value is _MISSING else {name: value}
+
+
+def _column(records: Sequence[Dict[str, Any]], name: str) -> List[Any]:
+    return [r.get(name, _MISSING) for r in records]
+
+
+def _coerce(coerce: Callable[[Dict[str, Any]], Any], title: str, name: str, value: Any) -> Any:
+    try:
+        return coerce(_record(name, value))
+    except KeyError:
+        raise ValueError(f"{title}: {name} is required") from None
+
+
+def _coerce_strings(
+    codes: np.ndarray, uniques: Sequence[Any], coerce: Callable[[Any], Any]
+) -> pd.Categorical:
+    """Schema coercion once per distinct value; code -1 (null) stands for None."""
+    if len(codes) and codes.min() < 0:
+        codes = np.where(codes < 0, len(uniques), codes)
+        uniques = [*uniques, None]
+    out = [coerce(u) for u in uniques]
+    # Distinct raw values may collapse ("aapl", "AAPL ") -> re-encode on the normalized set
+    new_codes, cats = pd.factorize(np.asarray(out, dtype=object), sort=True)
+    return pd.Categorical.from_codes(new_codes[codes], categories=pd.Index(cats, dtype=object))
+
+
+def _coerce_numbers(
+    values: List[Any], dtype: Any, coerce: Callable[[Any], Any], vectorize: bool
+) -> np.ndarray:
+    """One NumPy conversion when every value is present and non-null, else per row."""
+    if vectorize and None not in values and _MISSING not in values:
+        try:
+            return np.asarray(values, dtype=dtype)
+        except (TypeError, ValueError):
+            pass  # the per-row path raises the error normalize() would
+    return np.asarray([coerce(v) for v in values], dtype=dtype)
+
+
+def _layout(schema: str) -> Tuple[Tuple[str, ...], ...]:
+    """(string, number, integer) fields of a schema: categorical / float64 / int64 columns."""
+    fields = load_schema(schema).fields
+    return tuple(
+        tuple(f for f, spec in fields.items() if spec["type"] == t)
+        for t in ("string", "number", "integer")
+    )
+
+
+class ColumnBatch:
+    """
+    Base for the columnar batches. Subclasses are dataclasses whose fields are the record
+    contract in order. SCHEMA names the compiled contract (schemas/<SCHEMA>.schema.json)
+    that every coercion, default and constraint comes from; STRINGS lists the
+    dictionary-encoded fields.
+    """
+
+    SCHEMA: ClassVar[str] = ""
+    STRINGS: ClassVar[Tuple[str, ...]] = ()
+    FLOATS: ClassVar[Tuple[str, ...]] = ()
+    INTS: ClassVar[Tuple[str, ...]] = ()
+
+    @classmethod
+    def field_names(cls) -> Tuple[str, ...]:
+        return tuple(f.name for f in fields(cls))
+
+    def __len__(self) -> int:
+        return len(getattr(self, self.field_names()[0]))
+
+    @property
+    def columns(self) -> Dict[str, Any]:
+        return {k: getattr(self, k) for k in self.field_names()}
+
+    @property
+    def nbytes(self) -> int:
+        """Array bytes plus the distinct strings behind the categorical columns."""
+        total = 0
+        for v in self.columns.values():
+            if isinstance(v, pd.Categorical):
+                total += v.codes.nbytes + sum(sys.getsizeof(s) for s in v.categories)
+            else:
+                total += v.nbytes
+        return total
+
+    # ---- Construction ----
+
+    @classmethod
+    def from_records(cls, records: Sequence[Dict[str, Any]]) -> "ColumnBatch":
+        """
+        Provider-shaped dicts -> curated batch: the schema's normalize(), column-wise.
+        Same defaults and errors (ValueError when a required field is absent).
+        """
+        schema = load_schema(cls.SCHEMA)
+        cols: Dict[str, Any] = {}
+        for name in cls.field_names():
+            values = _column(records, name)
+            coerce = partial(_coerce, schema.values[name], schema.title, name)
+            if name in cls.STRINGS:
+                codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+                cols[name] = _coerce_strings(codes, uniques, coerce)
+            else:
+                dtype = float if name in cls.FLOATS else np.int64
+                # x-default replaces falsy values (0 too), so only the per-row path applies it
+                vectorize = "x-default" not in schema.fields[name]
+                cols[name] = _coerce_numbers(values, dtype, coerce, vectorize)
+        return cls(**cols)
+
+    def normalized(self) -> "ColumnBatch":
+        """String columns through the schema's coercions, once per distinct value."""
+        schema = load_schema(self.SCHEMA)
+        cols = dict(self.columns)
+        for name in self.STRINGS:
+            cat = cols[name]
+            coerce = partial(_coerce, schema.values[name], schema.title, name)
+            cols[name] = _coerce_strings(cat.codes, list(cat.categories), coerce)
+        return type(self)(**cols)
+
+    def schema_errors(self) -> Dict[int, List[str]]:
+        """
+        Rows breaking the schema's constraints -> their '<keyword>:<field>' labels, as
+        CompiledSchema.check() reports them. String checks run once per distinct value,
+        numeric ones on the whole column.
+        """
+        schema = load_schema(self.SCHEMA)
+        errors: Dict[int, List[str]] = {}
+        for name in self.field_names():
+            column = getattr(self, name)
+            if name in self.STRINGS:
+                check = schema.field_checks[name]
+                per_value = [check(v) for v in column.categories]
+                bad = [k for k, errs in enumerate(per_value) if errs]
+                codes = column.codes
+                for row in np.flatnonzero(np.isin(codes, bad)).tolist():
+                    errors.setdefault(row, []).extend(per_value[codes[row]])
+            else:
+                for label, failing in schema.column_errors(name, column).items():
+                    for row in np.flatnonzero(failing).tolist():
+                        errors.setdefault(row, []).append(label)
+        return {row: errors[row] for row in sorted(errors)}
+
+    @classmethod
+    def concat(cls, batches: Sequence["ColumnBatch"]) -> "ColumnBatch":
+        if not batches:
+            return cls.empty()
+        if len(batches) == 1:
+            return batches[0]
+        cols = {}
+        for name in cls.field_names():
+            parts = [getattr(b, name) for b in batches]
+            if name in cls.STRINGS:
+                cols[name] = union_categoricals(parts, sort_categories=True)
+            else:
+                cols[name] = np.concatenate(parts)
+        return cls(**cols)
+
+    @classmethod
+    def empty(cls) -> "ColumnBatch":
+        return cls.from_records([])
+
+    # ---- Selection ----
+
+    def take(self, index: Any) -> "ColumnBatch":
+        """Rows by boolean mask, integer positions or slice (categories are kept)."""
+        return type(self)(**{k: v[index] for k, v in self.columns.items()})
+
+    def sort_by(self, *names: str) -> "ColumnBatch":
+        # Sorted categories: ordering codes == ordering strings
+        keys = [
+            getattr(self, n).codes if n in self.STRINGS else getattr(self, n)
+            for n in reversed(names)
+        ]
+        return self.take(np.lexsort(keys))
+
+    # ---- Edges ----
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.columns, copy=False)
+
+    def iter_records(self, chunk_size: int = 65_536) -> Iterator[Dict[str, Any]]:
+        """Dict rows, materialized one chunk at a time (bounded memory for writers)."""
+        names = self.field_names()
+        for start in range(0, len(self), chunk_size):
+            stop = start + chunk_size
+            cols = []
+            for name in names:
+                v = getattr(self, name)[start:stop]
+                cols.append(
+                    np.asarray(v, dtype=object).tolist() if name in self.STRINGS else v.tolist()
+                )
+            for row in zip(*cols, strict=True):
+                yield dict(zip(names, row, strict=True))
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        return list(self.iter_records())
+
+
+@dataclass(frozen=True)
+class PriceBatch(ColumnBatch):
+    """Curated PriceEvents (schemas/price_event.schema.json), column-wise."""
+
+    symbol: pd.Categorical
+    price: np.ndarray  # float64
+    currency: pd.Categorical
+    ts_market: pd.Categorical
+    ts_ingest: pd.Categorical
+    source: pd.Categorical
+
+    SCHEMA: ClassVar[str] = "price_event"
+    STRINGS, FLOATS, INTS = _layout(SCHEMA)
+
+
+@dataclass(frozen=True)
+class OhlcBatch(ColumnBatch):
+    """Curated daily OHLCV rows (schemas/ohlc_daily.schema.json), column-wise."""
+
+    symbol: pd.Categorical
+    date: pd.Categorical  # YYYY-MM-DD
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray  # int64
+    currency: pd.Categorical
+    ts_market: pd.Categorical
+    ts_ingest: pd.Categorical
+    source: pd.Categorical
+
+    SCHEMA: ClassVar[str] = "ohlc_daily"
+    STRINGS, FLOATS, INTS = _layout(SCHEMA)
+
+    @classmethod
+    def from_daily_bars(cls, bars, source: str, ts_ingest: str) -> "OhlcBatch":
+        """Fill straight from synthetic.DailyBars arrays (no per-row dicts)."""
+        n = len(bars)
+        day_codes, days = pd.factorize(bars.date, sort=True)
+        day_strs = [str(d) for d in np.asarray(days, dtype="datetime64[D]")]
+
+        def _const(value: str) -> pd.Categorical:
+            return pd.Categorical.from_codes(np.zeros(n, dtype=np.int8), categories=[value])
+
+        def _by_day(values: List[str]) -> pd.Categorical:
+            return pd.Categorical.from_codes(day_codes, categories=pd.Index(values, dtype=object))
+
+        return cls(
+            symbol=_encode(bars.symbol),
+            date=_by_day(day_strs),
+            open=np.asarray(bars.open, dtype=float),
+            high=np.asarray(bars.high, dtype=float),
+            low=np.asarray(bars.low, dtype=float),
+            close=np.asarray(bars.close, dtype=float),
+            volume=np.asarray(bars.volume, dtype=np.int64),
+            currency=_const("USD"),
+            ts_market=_by_day([f"{d}T21:00:00Z" for d in day_strs]),  # close-ish UTC
+            ts_ingest=_const(ts_ingest),
+            source=_const(source),
+        )
+
+    def latest_dates(self) -> Dict[str, date]:
+        """Max date per symbol (what landing this batch advances the watermarks to)."""
+        if not len(self):
+            return {}
+        last = pd.Series(self.date.codes).groupby(self.symbol.codes).max()
+        symbols, days = self.symbol.categories, self.date.categories
+        return {symbols[s]: date.fromisoformat(days[d]) for s, d in last.items()}
+
+
+def as_records(rows: Iterable[Dict[str, Any]]) -> Iterable[Dict[str, Any]]:
+    """Edge helper: dict rows from either a batch or an iterable of dicts."""
+    return rows.iter_records() if isinstance(rows, ColumnBatch) else rows
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import functools
+import json
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from pipelines.common.aws import get_client
+
+# Buffered metrics: nothing leaves the process until flush(), which runs once per
+# invocation / run. Two sinks:
+#   - "emf": CloudWatch Embedded Metric Format log lines (stdout). In Lambda the log agent
+#     turns them into metrics, so publishing costs no API call on the hot path.
+#   - "api": one put_metric_data call per namespace (1000 metrics, 150 values per entry).
+# Every recorded value is kept (not pre-aggregated), so CloudWatch can compute p50/p99.
+
+METRICS_MODES = ("emf", "api", "off")
+
+_EMF_MAX_METRICS = 100  # per EMF document
+_EMF_MAX_VALUES = 100  # per metric per EMF document
+_API_MAX_METRICS = 1000  # per PutMetricData request
+_API_MAX_VALUES = 150  # distinct values per MetricDatum
+
+# (namespace, dimensions as sorted (name, value) pairs)
+_Group = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _chunks(seq: List[Any], n: int) -> Iterator[List[Any]]:
+    for i in range(0, len(seq), n):
+        yield seq[i : i + n]
+
+
+class MetricsBuffer:
+    """
+    In-memory metric values grouped by namespace + dimensions.
+
+        metrics = MetricsBuffer(mode="emf")
+        with metrics.timer("MDP/Streaming", "StageLatency", Stage="fetch"):
+            ...
+        metrics.count("MDP/Storage", "StorageRawWriteCount")
+        metrics.flush()
+    """
+
+    def __init__(self, mode: str = "emf", client=None):
+        if mode not in METRICS_MODES:
+            raise ValueError(f"metrics mode must be one of {list(METRICS_MODES)}. Got: {mode!r}")
+        self.mode = mode
+        self.client = client
+        # group -> metric name -> (unit, values)
+        self._data: Dict[_Group, Dict[str, Tuple[str, List[float]]]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(v) for m in self._data.values() for _, v in m.values())
+
+    def put(
+        self, namespace: str, name: str, value: float, unit: str = "None", **dimensions: str
+    ) -> None:
+        group = (namespace, tuple(sorted((k, str(v)) for k, v in dimensions.items())))
+        metrics = self._data.setdefault(group, {})
+        prev_unit, values = metrics.setdefault(name, (unit, []))
+        if prev_unit != unit:
+            raise ValueError(f"metric {namespace}/{name} recorded as {prev_unit} and {unit}")
+        values.append(float(value))
+
+    def count(self, namespace: str, name: str, value: float = 1, **dimensions: str) -> None:
+        self.put(namespace, name, value, "Count", **dimensions)
+
+    def bytes(self, namespace: str, name: str, value: float, **dimensions: str) -> None:
+        self.put(namespace, name, value, "Bytes", **dimensions)
+
+    def millis(self, namespace: str, name: str, value: float, **dimensions: str) -> None:
+        self.put(namespace, name, value, "Milliseconds", **dimensions)
+
+    @contextmanager
+    def timer(self, namespace: str, name: str, **dimensions: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.millis(namespace, name, (time.perf_counter() - t0) * 1000.0, **dimensions)
+
+    def timed(self, namespace: str, name: str, **dimensions: str) -> Callable:
+        """Decorator form of timer()."""
+
+        def decorator(fn: Callable) -> Callable:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.timer(namespace, name, **dimensions):
+                    return fn(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def add_stages(
+        self, namespace: str, stage_seconds: Dict[str, float], name: str = "StageLatency"
+    ) -> None:
+        """StageTimer totals (or any stage -> seconds map) as one latency value per stage."""
+        for stage, seconds in stage_seconds.items():
+            self.millis(namespace, name, seconds * 1000.0, Stage=stage)
+
+    # ---- Flush ----
+
+    def flush(self) -> int:
+        """Publish and clear everything buffered. Returns the number of values sent."""
+        data, self._data = self._data, {}
+        sent = sum(len(v) for m in data.values() for _, v in m.values())
+        if not data or self.mode == "off":
+            return 0
+        if self.mode == "emf":
+            for line in emf_lines(data):
+                print(line)
+        else:
+            self._put_metric_data(data)
+        return sent
+
+    def _put_metric_data(self, data: Dict[_Group, Dict[str, Tuple[str, List[float]]]]) -> None:
+        client = self.client or get_client("cloudwatch")
+        by_namespace: Dict[str, List[Dict[str, Any]]] = {}
+        for (namespace, dims), metrics in data.items():
+            for name, (unit, values) in metrics.items():
+                # Repeated values are sent once with a count (e.g. Count metrics of 1)
+                counts = sorted(Counter(values).items())
+                for chunk in _chunks(counts, _API_MAX_VALUES):
+                    by_namespace.setdefault(namespace, []).append(
+                        {
+                            "MetricName": name,
+                            "Dimensions": [{"Name": k, "Value": v} for k, v in dims],
+                            "Unit": unit,
+                            "Values": [v for v, _ in chunk],
+                            "Counts": [float(c) for _, c in chunk],
+                        }
+                    )
+        for namespace, datums in by_namespace.items():
+            for chunk in _chunks(datums, _API_MAX_METRICS):
+                client.put_metric_data(Namespace=namespace, MetricData=chunk)
+
+
+def emf_lines(data: Dict[_Group, Dict[str, Tuple[str, List[float]]]]) -> List[str]:
+    """One EMF JSON document per (namespace, dimensions) group, split at the EMF limits."""
+    ts = int(time.time() * 1000)
+    lines = []
+    for (namespace, dims), metrics in data.items():
+        items = list(metrics.items())
+        for chunk in _chunks(items, _EMF_MAX_METRICS):
+            # Metrics with more than 100 values spill over into further documents
+            rounds = max(len(values) for _, (_, values) in chunk)
+            for start in range(0, rounds, _EMF_MAX_VALUES):
+                present = [
+                    (name, unit, values[start : start + _EMF_MAX_VALUES])
+                    for name, (unit, values) in chunk
+                    if values[start : start + _EMF_MAX_VALUES]
+                ]
+                doc: Dict[str, Any] = {
+                    "_aws": {
+                        "Timestamp": ts,
+                        "CloudWatchMetrics": [
+                            {
+                                "Namespace": namespace,
+                                "Dimensions": [[k for k, _ in dims]],
+                                "Metrics": [{"Name": n, "Unit": u} for n, u, _ in present],
+                            }
+                        ],
+                    },
+                    **dict(dims),
+                }
+                for name, _, values in present:
+                    values = [round(v, 3) for v in values]
+                    doc[name] = values if len(values) > 1 else values[0]
+                lines.append(json.dumps(doc, separators=(",", ":")))
+    return lines
+
+
+def get_metrics(mode: Optional[str] = None, client=None) -> MetricsBuffer:
+    """A fresh buffer; `mode` defaults to METRICS_MODE (emf)."""
+    return MetricsBuffer(
+        mode=(mode or os.getenv("METRICS_MODE", "emf")).strip().lower(), client=client
+    )
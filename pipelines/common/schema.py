@@ -0,0 +1,327 @@
+from __future__ import annotations
+
+import json
+import math
+import operator
+import os
+import re
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+# Record contracts compiled from schemas/<name>.schema.json. Each schema becomes generated
+# Python: one straight-line function per schema with the field names, coercions, defaults
+# and constraints inlined, so normalizing a record is a handful of dict lookups and
+# builtin calls instead of interpreting the schema per record.
+#
+# Supported subset (anything else is rejected at compile time):
+#   object: properties, required
+#   field:  type (string | number | integer), default, enum, minLength, maxLength,
+#           pattern, format (date | date-time), minimum, maximum,
+#           exclusiveMinimum, exclusiveMaximum
+#   extensions: "x-normalize": ["upper" | "lower" | "strip", ...] (string, in order),
+#               "x-default": "now" (UTC ISO-8601 "Z" timestamp when missing or empty)
+
+SCHEMAS_DIR = Path(os.getenv("SCHEMAS_DIR", str(Path(__file__).resolve().parents[2] / "schemas")))
+
+_COERCE = {"string": "str({v})", "number": "float({v})", "integer": "int({v})"}
+_STRING_OPS = {"upper", "lower", "strip"}
+_OBJECT_KEYS = {"$schema", "$id", "title", "description", "type", "properties", "required"}
+_FIELD_KEYS = {
+    "type",
+    "description",
+    "default",
+    "enum",
+    "minLength",
+    "maxLength",
+    "pattern",
+    "format",
+    "minimum",
+    "maximum",
+    "exclusiveMinimum",
+    "exclusiveMaximum",
+    "x-normalize",
+    "x-default",
+}
+_BOUNDS = {  # keyword -> comparison that must hold
+    "minimum": ">=",
+    "maximum": "<=",
+    "exclusiveMinimum": ">",
+    "exclusiveMaximum": "<",
+}
+_OPS = {">=": operator.ge, "<=": operator.le, ">": operator.gt, "<": operator.lt}
+
+
+def _iso_z_now() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _is_date(v: str) -> bool:
+    try:
+        date.fromisoformat(v)
+    except ValueError:
+        return False
+    return len(v) == 10
+
+
+def _is_datetime(v: str) -> bool:
+    try:
+        datetime.fromisoformat(v.replace("Z", "+00:00"))
+    except ValueError:
+        return False
+    return "T" in v
+
+
+_FORMATS = {"date": "_is_date", "date-time": "_is_datetime"}
+
+
+def _check_spec(name: str, spec: Dict[str, Any]) -> None:
+    unknown = set(spec) - _FIELD_KEYS
+    if unknown:
+        raise ValueError(f"{name}: unsupported schema keywords {sorted(unknown)}")
+    if spec.get("type") not in _COERCE:
+        raise ValueError(f"{name}: type must be one of {list(_COERCE)}. Got: {spec.get('type')!r}")
+    ops = spec.get("x-normalize", [])
+    if ops and (spec["type"] != "string" or set(ops) - _STRING_OPS):
+        raise ValueError(f"{name}: x-normalize takes {sorted(_STRING_OPS)} on strings only")
+    if spec.get("x-default", "now") != "now":
+        raise ValueError(f"{name}: x-default only supports 'now'")
+    if spec.get("format", "date") not in _FORMATS:
+        raise ValueError(f"{name}: format must be one of {list(_FORMATS)}")
+
+
+def _coerce_expr(spec: Dict[str, Any], v: str) -> str:
+    expr = _COERCE[spec["type"]].format(v=v)
+    for op in spec.get("x-normalize", []):
+        expr += f".{op}()"
+    return expr
+
+
+def _constraint_lines(field: str, spec: Dict[str, Any], v: str, ns: Dict[str, Any]) -> List[str]:
+    """Checks on the coerced value `v`; each failure appends '<keyword>:<field>'."""
+    lines = []
+
+    def fail(cond: str, keyword: str) -> None:
+        lines.append(f"if {cond}: errs.append({f'{keyword}:{field}'!r})")
+
+    if spec["type"] == "number":
+        fail(f"not _isfinite({v})", "type")
+    if "minLength" in spec:
+        fail(f"len({v}) < {int(spec['minLength'])}", "minLength")
+    if "maxLength" in spec:
+        fail(f"len({v}) > {int(spec['maxLength'])}", "maxLength")
+    if "pattern" in spec:
+        ns[f"_re_{field}"] = re.compile(spec["pattern"])
+        fail(f"_re_{field}.search({v}) is None", "pattern")
+    if "format" in spec:
+        fail(f"not {_FORMATS[spec['format']]}({v})", "format")
+    if "enum" in spec:
+        ns[f"_enum_{field}"] = frozenset(spec["enum"])
+        fail(f"{v} not in _enum_{field}", "enum")
+    for keyword, op in _BOUNDS.items():
+        if keyword in spec:
+            # `not (x >= m)` also rejects NaN
+            fail(f"not ({v} {op} {spec[keyword]!r})", keyword)
+    return lines
+
+
+def _indent(lines: List[str], n: int) -> List[str]:
+    return [" " * n + line for line in lines]
+
+
+def _value_expr(field: str, spec: Dict[str, Any], required: List[str]) -> str:
+    """
+    Expression for one output field, written the way the hand-written normalizers were:
+    required -> r[k] (KeyError when absent), default -> r.get(k, default),
+    x-default now -> r.get(k) or now(), optional -> None when absent or null.
+    r.get is called in place: CPython specializes the method call, a cached
+    `get = r.get` goes through the generic call path (~15% slower per record).
+    """
+    if spec.get("x-default") == "now":
+        return _coerce_expr(spec, f"(r.get({field!r}) or _iso_z_now())")
+    if "default" in spec:
+        return _coerce_expr(spec, f"r.get({field!r}, {spec['default']!r})")
+    if field in required:
+        return _coerce_expr(spec, f"r[{field!r}]")
+    return f"(None if (x := r.get({field!r})) is None else {_coerce_expr(spec, 'x')})"
+
+
+def _generate(
+    title: str, fields: Dict[str, Dict[str, Any]], required: List[str], ns: Dict[str, Any]
+) -> str:
+    """
+    Source for normalize(record) and check(record); constants are added to `ns`.
+    check() coerces every field in one straight-line try block and only falls back to
+    the per-field _check_fields() (which collects every error) when coercion fails.
+    Per field i, _value_i(record) and _check_i(value) hold the same expression and
+    constraints on their own, for callers that work a column at a time.
+    """
+    exprs = {f: _value_expr(f, spec, required) for f, spec in fields.items()}
+    names = {f: f"v{i}" for i, f in enumerate(fields)}
+    result = "{" + ", ".join(f"{f!r}: {names[f]}" for f in fields) + "}"
+
+    def constraints(field: str) -> List[str]:
+        lines = _constraint_lines(field, fields[field], names[field], ns)
+        if lines and field not in required and "default" not in fields[field]:
+            lines = [f"if {names[field]} is not None:"] + _indent(lines, 4)
+        return lines
+
+    src = [
+        "def normalize(r):",
+        "    try:",
+        "        return {" + ", ".join(f"{f!r}: {e}" for f, e in exprs.items()) + "}",
+        "    except KeyError as e:",
+        f"        raise ValueError(f'{title}: {{e.args[0]}} is required') from None",
+        "",
+        "def check(r):",
+        "    try:",
+        *(f"        {names[f]} = {e}" for f, e in exprs.items()),
+        "    except (KeyError, TypeError, ValueError):",
+        "        return _check_fields(r)",
+        "    errs = []",
+        *(f"    {line}" for f in fields for line in constraints(f)),
+        f"    return {result}, errs",
+        "",
+        "def _check_fields(r):",
+        "    errs = []",
+    ]
+    for f in fields:
+        v = names[f]
+        body = [
+            "try:",
+            f"    {v} = {exprs[f]}",
+            "except (TypeError, ValueError):",
+            f"    errs.append({f'type:{f}'!r})",
+            f"    {v} = None",
+        ]
+        if constraints(f):
+            body += ["else:"] + _indent(constraints(f), 4)
+        if f in required and "default" not in fields[f] and "x-default" not in fields[f]:
+            missing = [f"if {f!r} not in r:", f"    errs.append({f'required:{f}'!r})"]
+            body = missing + [f"    {v} = None", "else:"] + _indent(body, 4)
+        src += _indent(body, 4)
+    src.append(f"    return {result}, errs")
+    for i, f in enumerate(fields):
+        src += ["", f"def _value_{i}(r):", f"    return {exprs[f]}", ""]
+        src += [f"def _check_{i}({names[f]}):", "    errs = []"]
+        src += _indent(constraints(f), 4) + ["    return errs"]
+    return "\n".join(src) + "\n"
+
+
+class CompiledSchema:
+    """
+    A record contract compiled to specialized functions.
+
+    - normalize(record): coerce + default every declared field (undeclared keys are
+      dropped); raises ValueError/TypeError on missing required or uncoercible values.
+    - check(record): one pass that normalizes and validates, returning
+      (normalized, errors) where errors are '<keyword>:<field>' labels.
+    - split(records): (normalized valid records, invalid originals with their errors).
+    - values[field](record) / field_checks[field](value): one field's coercion (KeyError
+      when a required field is absent) and constraint errors, for column-wise callers.
+    """
+
+    def __init__(self, name: str, schema: Dict[str, Any]):
+        if schema.get("type") != "object" or not isinstance(schema.get("properties"), dict):
+            raise ValueError(f"schema {name}: expected an object schema with properties")
+        unknown = set(schema) - _OBJECT_KEYS
+        if unknown:
+            raise ValueError(f"schema {name}: unsupported schema keywords {sorted(unknown)}")
+        self.name = name
+        self.title = schema.get("title", name)
+        self.fields: Dict[str, Dict[str, Any]] = schema["properties"]
+        self.required: Tuple[str, ...] = tuple(schema.get("required", ()))
+        missing = [f for f in self.required if f not in self.fields]
+        if missing:
+            raise ValueError(f"schema {name}: required fields not in properties: {missing}")
+
+        ns: Dict[str, Any] = {
+            "_iso_z_now": _iso_z_now,
+            "_isfinite": math.isfinite,
+            "_is_date": _is_date,
+            "_is_datetime": _is_datetime,
+        }
+        for field, spec in self.fields.items():
+            _check_spec(f"schema {name}.{field}", spec)
+
+        self.source = _generate(self.title, self.fields, list(self.required), ns)
+        exec(compile(self.source, f"<schema {name}>", "exec"), ns)
+        self.normalize: Callable[[Dict[str, Any]], Dict[str, Any]] = ns["normalize"]
+        self.check: Callable[[Dict[str, Any]], Tuple[Dict[str, Any], List[str]]] = ns["check"]
+        self.values: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+            f: ns[f"_value_{i}"] for i, f in enumerate(self.fields)
+        }
+        self.field_checks: Dict[str, Callable[[Any], List[str]]] = {
+            f: ns[f"_check_{i}"] for i, f in enumerate(self.fields)
+        }
+
+    @property
+    def field_names(self) -> Tuple[str, ...]:
+        return tuple(self.fields)
+
+    def column_errors(self, field: str, values: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        check()'s constraints for a coerced numeric column, vectorized:
+        {'<keyword>:<field>': mask of failing rows}, only for labels that fail somewhere.
+        """
+        spec = self.fields[field]
+        if spec["type"] == "string":
+            raise ValueError(f"{field}: column_errors takes numeric fields (use field_checks)")
+        failing: Dict[str, np.ndarray] = {}
+        if spec["type"] == "number":
+            failing[f"type:{field}"] = ~np.isfinite(values)
+        if "enum" in spec:
+            failing[f"enum:{field}"] = ~np.isin(values, list(spec["enum"]))
+        for keyword, op in _BOUNDS.items():
+            if keyword in spec:
+                # ~(x >= m) also rejects NaN, like the scalar check
+                failing[f"{keyword}:{field}"] = ~_OPS[op](values, spec[keyword])
+        return {label: mask for label, mask in failing.items() if mask.any()}
+
+    def normalize_many(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        normalize = self.normalize
+        return [normalize(r) for r in records]
+
+    def split(
+        self, records: List[Dict[str, Any]], reason_field: str = "schema_errors"
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        check = self.check
+        good: List[Dict[str, Any]] = []
+        bad: List[Dict[str, Any]] = []
+        for r in records:
+            out, errs = check(r)
+            if errs:
+                bad.append({**r, reason_field: errs})
+            else:
+                good.append(out)
+        return good, bad
+
+
+def schema_path(name: str) -> Path:
+    return SCHEMAS_DIR / f"{name}.schema.json"
+
+
+def schema_names() -> List[str]:
+    """Schemas with a contract defined (empty placeholder files are skipped)."""
+    return sorted(
+        p.name[: -len(".schema.json")]
+        for p in SCHEMAS_DIR.glob("*.schema.json")
+        if p.stat().st_size > 0
+    )
+
+
+@lru_cache(maxsize=None)
+def load_schema(name: str) -> CompiledSchema:
+    """Read and compile schemas/<name>.schema.json (once per process)."""
+    path = schema_path(name)
+    text = path.read_text(encoding="utf-8") if path.exists() else ""
+    if not text.strip():
+        raise ValueError(f"No schema defined for {name!r} ({path})")
+    return CompiledSchema(name, json.loads(text))
+
+
+def compile_all() -> Dict[str, CompiledSchema]:
+    return {name: load_schema(name) for name in schema_names()}
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Iterable, List, Tuple
+
+
+@dataclass(frozen=True)
+class Shard:
+    """
+    A slice of the symbol universe processed as one unit of work
+    (one process-pool task locally, one job run / task in Glue).
+    """
+
+    index: int
+    count: int
+    symbols: Tuple[str, ...]
+
+    @property
+    def shard_id(self) -> str:
+        return f"shard-{self.index:04d}-of-{self.count:04d}"
+
+    def to_json(self) -> str:
+        return json.dumps({"index": self.index, "count": self.count, "symbols": list(self.symbols)})
+
+    @classmethod
+    def from_json(cls, payload: str) -> "Shard":
+        d = json.loads(payload)
+        return cls(index=int(d["index"]), count=int(d["count"]), symbols=tuple(d["symbols"]))
+
+
+def plan_shards(symbols: Iterable[str], shard_size: int) -> List[Shard]:
+    """
+    Split symbols into contiguous shards of at most `shard_size`.
+    Symbols are de-duplicated and sorted so the same universe always yields the same plan.
+    """
+    if shard_size < 1:
+        raise ValueError("shard_size must be >= 1")
+
+    universe = sorted({s.strip().upper() for s in symbols if s and s.strip()})
+    chunks = [tuple(universe[i : i + shard_size]) for i in range(0, len(universe), shard_size)]
+    return [Shard(index=i, count=len(chunks), symbols=c) for i, c in enumerate(chunks)]
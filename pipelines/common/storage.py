@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+import json
+import os
+import zlib
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# Streaming JSONL writers shared by the Lambda and the batch pipeline. Records are encoded
+# and compressed incrementally and handed to a sink in bounded blocks, so peak memory is
+# one block (local) or one multipart part (S3) regardless of how many records are written.
+
+COMPRESSION_SUFFIXES = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+
+MIB = 1024 * 1024
+S3_MIN_PART_SIZE = 5 * MIB  # every multipart part except the last must be >= 5 MiB
+
+_BLOCK_SIZE = 256 * 1024  # encoded bytes buffered before each compress/write call
+
+
+def jsonl_name(stem: str, compression: str = "none") -> str:
+    """`prices_<ts>` -> `prices_<ts>.jsonl[.gz|.zst]`"""
+    return f"{stem}.jsonl{COMPRESSION_SUFFIXES[_check_compression(compression)]}"
+
+
+def jsonl_key(prefix: str, stem: str, compression: str = "none") -> str:
+    return str(PurePosixPath(prefix) / jsonl_name(stem, compression))
+
+
+def _check_compression(compression: str) -> str:
+    if compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(
+            f"compression must be one of {sorted(COMPRESSION_SUFFIXES)}. Got: {compression!r}"
+        )
+    return compression
+
+
+def _zstd():
+    # Optional dependency: only needed when zstd compression is selected
+    try:
+        import zstandard
+    except ImportError as e:
+        raise RuntimeError("zstd compression requires zstandard (pip install zstandard)") from e
+    return zstandard
+
+
+class _Identity:
+    def compress(self, data: bytes) -> bytes:
+        return data
+
+    def flush(self) -> bytes:
+        return b""
+
+
+def _compressor(compression: str, level: Optional[int]):
+    if compression == "gzip":
+        # wbits=31 -> gzip container, readable by gzip.open / Athena / `zcat`
+        return zlib.compressobj(6 if level is None else level, zlib.DEFLATED, 31)
+    if compression == "zstd":
+        return _zstd().ZstdCompressor(level=3 if level is None else level).compressobj()
+    return _Identity()
+
+
+class LocalSink:
+    """Writes to `<path>.tmp` and renames into place on close (readers never see a partial file)."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._tmp = self.path.with_name(self.path.name + ".tmp")
+        self._f = self._tmp.open("wb")
+
+    def write(self, data: bytes) -> None:
+        self._f.write(data)
+
+    def close(self) -> None:
+        self._f.close()
+        os.replace(self._tmp, self.path)
+
+    def abort(self) -> None:
+        self._f.close()
+        self._tmp.unlink(missing_ok=True)
+
+
+class S3Sink:
+    """
+    Single put_object for small objects; switches to multipart upload once more than
+    `multipart_threshold` bytes have been written, uploading a part each time at least
+    `part_size` bytes are pending. Pending data is kept as the written blocks and joined
+    once per part, so peak memory is about two parts.
+    """
+
+    def __init__(
+        self,
+        client,
+        bucket: str,
+        key: str,
+        part_size: int = 8 * MIB,
+        multipart_threshold: int = 8 * MIB,
+    ):
+        if part_size < S3_MIN_PART_SIZE:
+            raise ValueError(f"part_size must be >= {S3_MIN_PART_SIZE} bytes")
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size
+        self.multipart_threshold = max(multipart_threshold, part_size)
+        self._pending: List[bytes] = []
+        self._pending_size = 0
+        self._upload_id: Optional[str] = None
+        self._parts: List[Dict[str, Any]] = []
+
+    @property
+    def multipart(self) -> bool:
+        return self._upload_id is not None
+
+    def write(self, data: bytes) -> None:
+        self._pending.append(data)
+        self._pending_size += len(data)
+        if self._upload_id is None and self._pending_size > self.multipart_threshold:
+            resp = self.client.create_multipart_upload(Bucket=self.bucket, Key=self.key)
+            self._upload_id = resp["UploadId"]
+        if self._upload_id is not None and self._pending_size >= self.part_size:
+            self._upload_part(self._take())
+
+    def _take(self) -> bytes:
+        body = b"".join(self._pending)
+        self._pending.clear()
+        self._pending_size = 0
+        return body
+
+    def _upload_part(self, body: bytes) -> None:
+        n = len(self._parts) + 1
+        resp = self.client.upload_part(
+            Bucket=self.bucket, Key=self.key, UploadId=self._upload_id, PartNumber=n, Body=body
+        )
+        self._parts.append({"PartNumber": n, "ETag": resp["ETag"]})
+
+    def close(self) -> None:
+        if self._upload_id is None:
+            self.client.put_object(Bucket=self.bucket, Key=self.key, Body=self._take())
+            return
+        if self._pending or not self._parts:
+            self._upload_part(self._take())
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self._upload_id,
+            MultipartUpload={"Parts": self._parts},
+        )
+
+    def abort(self) -> None:
+        self._take()
+        if self._upload_id is not None:
+            self.client.abort_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self._upload_id
+            )
+
+
+@dataclass
+class WriteStats:
+    records: int = 0
+    bytes_raw: int = 0
+    bytes_written: int = 0
+
+
+class JsonlWriter:
+    """
+    Incremental JSONL encoder over a sink. Use as a context manager: the object is only
+    committed (renamed / put / multipart-completed) on a clean exit, and aborted on error.
+    """
+
+    def __init__(self, sink, compression: str = "none", level: Optional[int] = None):
+        self.sink = sink
+        self.compression = _check_compression(compression)
+        self.stats = WriteStats()
+        self._comp = _compressor(self.compression, level)
+        self._block = bytearray()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record).encode("utf-8") + b"\n"
+        self._block += line
+        self.stats.records += 1
+        self.stats.bytes_raw += len(line)
+        if len(self._block) >= _BLOCK_SIZE:
+            self._emit(self._comp.compress(bytes(self._block)))
+            self._block.clear()
+
+    def write_all(self, records: Iterable[Dict[str, Any]]) -> WriteStats:
+        for r in records:
+            self.write(r)
+        return self.stats
+
+    def _emit(self, data: bytes) -> None:
+        if data:
+            self.stats.bytes_written += len(data)
+            self.sink.write(data)
+
+    def close(self) -> WriteStats:
+        self._emit(self._comp.compress(bytes(self._block)))
+        self._emit(self._comp.flush())
+        self._block.clear()
+        self.sink.close()
+        return self.stats
+
+    def abort(self) -> None:
+        self.sink.abort()
+
+    def __enter__(self) -> "JsonlWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self.abort()
+            return
+        try:
+            self.close()
+        except BaseException:
+            # A failed final part / complete_multipart_upload must not leave the upload open
+            self.abort()
+            raise
+
+
+def write_jsonl_local(
+    path, records: Iterable[Dict[str, Any]], compression: str = "none"
+) -> WriteStats:
+    with JsonlWriter(LocalSink(path), compression=compression) as w:
+        w.write_all(records)
+    return w.stats
+
+
+def write_jsonl_s3(
+    client,
+    bucket: str,
+    key: str,
+    records: Iterable[Dict[str, Any]],
+    compression: str = "none",
+    part_size: int = 8 * MIB,
+    multipart_threshold: int = 8 * MIB,
+) -> WriteStats:
+    sink = S3Sink(client, bucket, key, part_size=part_size, multipart_threshold=multipart_threshold)
+    with JsonlWriter(sink, compression=compression) as w:
+        w.write_all(records)
+    return w.stats
+
+
+def compression_for(path) -> str:
+    """Infer the compression from a `.jsonl[.gz|.zst]` name."""
+    name = str(path)
+    for compression, suffix in COMPRESSION_SUFFIXES.items():
+        if suffix and name.endswith(suffix):
+            return compression
+    return "none"
+
+
+def iter_jsonl_stream(fileobj, compression: str = "none") -> Iterator[Dict[str, Any]]:
+    """Stream records from a binary file object (a local file or an S3 GetObject body)."""
+    import io
+
+    if _check_compression(compression) == "gzip":
+        import gzip
+
+        fileobj = gzip.GzipFile(fileobj=fileobj, mode="rb")
+    elif compression == "zstd":
+        fileobj = _zstd().ZstdDecompressor().stream_reader(fileobj)
+    with io.TextIOWrapper(fileobj, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_jsonl_local(path) -> Iterator[Dict[str, Any]]:
+    """Stream records back from a (possibly compressed) JSONL file."""
+    with open(path, "rb") as raw:
+        yield from iter_jsonl_stream(raw, compression_for(path))
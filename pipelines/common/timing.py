@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+
+class StageTimer:
+    """
+    Wall time per named stage. Re-entering a stage adds to its total, so a stage that
+    runs in several places (e.g. several S3 writes) is reported once.
+    """
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - t0
+
+    def as_ms(self) -> Dict[str, float]:
+        return {k: round(v * 1000.0, 3) for k, v in self.seconds.items()}
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import threading
+from datetime import date, time, timedelta
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+# NYSE trading calendar. Holidays come from the exchange's rules (with the weekend
+# shifts it observes) plus a table of one-off closures; early closes (13:00 ET) from the
+# day-before/after rules. Sessions are precomputed once per process as one sorted
+# datetime64[D] array, so every query is a searchsorted (bisect) or a vectorized lookup:
+#   is_session(d)            sessions_between(a, b)      last_n_sessions(end, n)
+#   count_sessions(a, b)     previous_session(d)         session_gaps(days, codes)
+
+CALENDAR_START = date(1990, 1, 1)
+CALENDAR_END = date(2045, 12, 31)
+REGULAR_CLOSE = time(16, 0)  # America/New_York
+EARLY_CLOSE = time(13, 0)
+
+# Unscheduled full-day closures (national days of mourning, weather, 9/11)
+SPECIAL_CLOSURES: Dict[date, str] = {
+    date(1994, 4, 27): "Nixon funeral",
+    date(2001, 9, 11): "September 11",
+    date(2001, 9, 12): "September 11",
+    date(2001, 9, 13): "September 11",
+    date(2001, 9, 14): "September 11",
+    date(2004, 6, 11): "Reagan funeral",
+    date(2007, 1, 2): "Ford funeral",
+    date(2012, 10, 29): "Hurricane Sandy",
+    date(2012, 10, 30): "Hurricane Sandy",
+    date(2018, 12, 5): "G.H.W. Bush funeral",
+    date(2025, 1, 9): "Carter funeral",
+}
+
+_D = "datetime64[D]"
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    first = date(year, month, 1)
+    return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+
+
+def _last_weekday(year: int, month: int, weekday: int) -> date:
+    last = date(year + (month == 12), month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter(year: int) -> date:
+    # Anonymous Gregorian algorithm
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = divmod(b, 4)
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l_ = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l_) // 451
+    month, day = divmod(h + l_ - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _observed(d: date) -> date:
+    # Saturday holidays are observed on Friday, Sunday holidays on Monday
+    return d + timedelta(days={5: -1, 6: 1}.get(d.weekday(), 0))
+
+
+def nyse_holidays(year: int) -> Dict[date, str]:
+    """Scheduled full-day NYSE holidays of `year` (observed dates)."""
+    out = {
+        _nth_weekday(year, 2, 0, 3): "Washington's Birthday",
+        _easter(year) - timedelta(days=2): "Good Friday",
+        _last_weekday(year, 5, 0): "Memorial Day",
+        _observed(date(year, 7, 4)): "Independence Day",
+        _nth_weekday(year, 9, 0, 1): "Labor Day",
+        _nth_weekday(year, 11, 3, 4): "Thanksgiving Day",
+        _observed(date(year, 12, 25)): "Christmas Day",
+    }
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:  # a Saturday New Year's Day is not observed on Dec 31
+        out[_observed(new_year)] = "New Year's Day"
+    if year >= 1998:
+        out[_nth_weekday(year, 1, 0, 3)] = "Martin Luther King Jr. Day"
+    if year >= 2022:
+        out[_observed(date(year, 6, 19))] = "Juneteenth"
+    return out
+
+
+def nyse_early_closes(year: int) -> List[date]:
+    """Candidate 13:00 closes: July 3, the day after Thanksgiving, Christmas Eve."""
+    return [
+        date(year, 7, 3),
+        _nth_weekday(year, 11, 3, 4) + timedelta(days=1),
+        date(year, 12, 24),
+    ]
+
+
+class TradingCalendar:
+    """
+    Sorted session dates in [start, end]. Queries outside that range raise ValueError
+    instead of silently answering with weekdays.
+    """
+
+    def __init__(
+        self,
+        start: date,
+        end: date,
+        holidays: Iterable[date],
+        early_closes: Iterable[date] = (),
+    ):
+        if end < start:
+            raise ValueError("end must be >= start")
+        self.start, self.end = start, end
+        days = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D") + 1)
+        self.holidays = np.unique(np.asarray(list(holidays), dtype=_D))
+        self.sessions = days[np.is_busday(days) & ~np.isin(days, self.holidays)]
+        early = np.unique(np.asarray(list(early_closes), dtype=_D))
+        self.early_closes = early[self._contains(early)]  # only the ones that are sessions
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    def _check(self, *days: date) -> None:
+        for d in days:
+            if not self.start <= d <= self.end:
+                raise ValueError(f"{d} is outside the calendar ({self.start}..{self.end})")
+
+    def _contains(self, days: np.ndarray) -> np.ndarray:
+        i = np.searchsorted(self.sessions, days)
+        return (i < len(self.sessions)) & (self.sessions[np.minimum(i, len(self) - 1)] == days)
+
+    def covers(self, days) -> np.ndarray:
+        """Per date: inside [start, end] (NaT -> False)."""
+        days = np.asarray(days, dtype=_D)
+        return (days >= np.datetime64(self.start, "D")) & (days <= np.datetime64(self.end, "D"))
+
+    def is_session(self, d: date) -> bool:
+        self._check(d)
+        return bool(self._contains(np.datetime64(d, "D")))
+
+    def is_session_array(self, days) -> np.ndarray:
+        """Vectorized is_session; dates outside the calendar (and NaT) come back False."""
+        days = np.asarray(days, dtype=_D)
+        return self._contains(days) & self.covers(days)
+
+    def is_early_close(self, d: date) -> bool:
+        self._check(d)
+        day = np.datetime64(d, "D")
+        i = np.searchsorted(self.early_closes, day)
+        return bool(i < len(self.early_closes) and self.early_closes[i] == day)
+
+    def close_time(self, d: date) -> Optional[time]:
+        """Local (New York) close of the session on `d`; None if `d` is not a session."""
+        if not self.is_session(d):
+            return None
+        return EARLY_CLOSE if self.is_early_close(d) else REGULAR_CLOSE
+
+    def _bounds(self, start: date, end: date):
+        self._check(start, end)
+        lo = np.searchsorted(self.sessions, np.datetime64(start, "D"), side="left")
+        hi = np.searchsorted(self.sessions, np.datetime64(end, "D"), side="right")
+        return int(lo), int(hi)
+
+    def sessions_between(self, start: date, end: date) -> List[date]:
+        """Sessions in [start, end] (empty when start > end)."""
+        if start > end:
+            return []
+        lo, hi = self._bounds(start, end)
+        return self.sessions[lo:hi].tolist()
+
+    def count_sessions(self, start: date, end: date) -> int:
+        if start > end:
+            return 0
+        lo, hi = self._bounds(start, end)
+        return hi - lo
+
+    def last_n_sessions(self, end: date, n: int) -> List[date]:
+        """The last n sessions on or before `end`."""
+        if n < 1:
+            raise ValueError("n must be >= 1")
+        self._check(end)
+        hi = int(np.searchsorted(self.sessions, np.datetime64(end, "D"), side="right"))
+        if hi < n:
+            raise ValueError(f"fewer than {n} sessions between {self.start} and {end}")
+        return self.sessions[hi - n : hi].tolist()
+
+    def previous_session(self, d: date, inclusive: bool = False) -> date:
+        """The last session before `d` (on or before with inclusive=True)."""
+        self._check(d)
+        side = "right" if inclusive else "left"
+        i = int(np.searchsorted(self.sessions, np.datetime64(d, "D"), side=side))
+        if i == 0:
+            raise ValueError(f"no session before {d} in the calendar")
+        return self.sessions[i - 1].item()
+
+    def session_gaps(self, days, groups=None, after=None) -> np.ndarray:
+        """
+        Sessions missing before each date: between it and the previous date of the same
+        group (`days` sorted by group, then date), or `after[group]` for a group's first
+        date (0 when `after` is None or NaT). One searchsorted for all the rows.
+        """
+        days = np.asarray(days, dtype=_D)
+        groups = np.zeros(len(days), dtype=np.intp) if groups is None else np.asarray(groups)
+        pos = np.searchsorted(self.sessions, days, side="left")
+        first = np.r_[True, groups[1:] != groups[:-1]] if len(days) else np.zeros(0, bool)
+        gaps = np.zeros(len(days), dtype=np.int64)
+        gaps[1:] = pos[1:] - pos[:-1] - 1
+        if after is None:
+            gaps[first] = 0
+        else:
+            base = np.asarray(after, dtype=_D)[groups[first]]
+            known = ~np.isnat(base)
+            start = np.searchsorted(self.sessions, base, side="right")
+            gaps[first] = np.where(known, pos[first] - start, 0)
+        return np.maximum(gaps, 0)
+
+
+_calendar: Optional[TradingCalendar] = None
+_lock = threading.Lock()
+
+
+def get_trading_calendar() -> TradingCalendar:
+    """Process-wide NYSE calendar over CALENDAR_START..CALENDAR_END (built once, ~ms)."""
+    global _calendar
+    with _lock:
+        if _calendar is None:
+            years = range(CALENDAR_START.year, CALENDAR_END.year + 1)
+            holidays = [d for y in years for d in nyse_holidays(y)] + list(SPECIAL_CLOSURES)
+            early = [d for y in years for d in nyse_early_closes(y)]
+            _calendar = TradingCalendar(CALENDAR_START, CALENDAR_END, holidays, early)
+        return _calendar
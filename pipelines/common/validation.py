@@ -0,0 +1,624 @@
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from pipelines.common.batches import ColumnBatch
+from pipelines.common.schema import load_schema
+from pipelines.common.trading_calendar import get_trading_calendar
+
+# GE method names for each expectation kind (used by the cross-check path only).
+_GE_METHODS = {
+    "not_null": "expect_column_values_to_not_be_null",
+    "match_regex": "expect_column_values_to_match_regex",
+    "between": "expect_column_values_to_be_between",
+    "in_set": "expect_column_values_to_be_in_set",
+}
+
+
+@dataclass(frozen=True)
+class Guard:
+    """
+    A pandas pre-check that runs before the expectations and short-circuits with `message`.
+    kind: required_columns | numeric | ohlc_invariants | timestamp | trading_session
+    """
+
+    kind: str
+    columns: Tuple[str, ...] = ()
+    message: str = ""
+
+
+@dataclass(frozen=True)
+class Expectation:
+    """A GE-style column expectation, declared as plain data."""
+
+    kind: str
+    column: str
+    kwargs: Tuple[Tuple[str, Any], ...] = ()
+
+
+@dataclass(frozen=True)
+class Suite:
+    name: str
+    guards: Tuple[Guard, ...]
+    expectations: Tuple[Expectation, ...]
+    schema: Optional[str] = None  # record contract (schemas/<schema>.schema.json) checked first
+
+
+def not_null(column: str) -> Expectation:
+    return Expectation("not_null", column)
+
+
+def match_regex(column: str, regex: str) -> Expectation:
+    return Expectation("match_regex", column, (("regex", regex),))
+
+
+def between(
+    column: str,
+    min_value: Optional[float] = None,
+    max_value: Optional[float] = None,
+    strict_min: bool = False,
+    strict_max: bool = False,
+) -> Expectation:
+    if min_value is None and max_value is None:
+        raise ValueError("min_value and max_value cannot both be None")
+    return Expectation(
+        "between",
+        column,
+        (
+            ("min_value", min_value),
+            ("max_value", max_value),
+            ("strict_min", strict_min),
+            ("strict_max", strict_max),
+        ),
+    )
+
+
+def in_set(column: str, values: Sequence[Any]) -> Expectation:
+    return Expectation("in_set", column, (("value_set", tuple(values)),))
+
+
+# ---- Compiled checks ----
+
+Check = Callable[[pd.DataFrame], bool]
+GuardCheck = Callable[[pd.DataFrame], Optional[str]]
+
+
+def _compile_expectation(exp: Expectation) -> Check:
+    col = exp.column
+    kw = dict(exp.kwargs)
+
+    # Like GE map expectations, everything except not_null ignores null values.
+    if exp.kind == "not_null":
+        return lambda df: col in df.columns and not df[col].isna().any()
+
+    if exp.kind == "match_regex":
+        pattern = re.compile(kw["regex"])
+
+        def _regex(df: pd.DataFrame) -> bool:
+            if col not in df.columns:
+                return False
+            # Symbols repeat heavily, so match each distinct value once.
+            values = pd.unique(df[col].dropna().astype(str))
+            return all(pattern.search(v) for v in values)
+
+        return _regex
+
+    if exp.kind == "between":
+        lo, hi = kw["min_value"], kw["max_value"]
+        strict_min, strict_max = kw["strict_min"], kw["strict_max"]
+
+        def _between(df: pd.DataFrame) -> bool:
+            if col not in df.columns:
+                return False
+            s = df[col].dropna()
+            values = pd.to_numeric(s, errors="coerce").to_numpy(dtype=float)
+            if np.isnan(values).any():
+                return False  # non-numeric values can't be compared
+            ok = np.ones(len(values), dtype=bool)
+            if lo is not None:
+                ok &= values > lo if strict_min else values >= lo
+            if hi is not None:
+                ok &= values < hi if strict_max else values <= hi
+            return bool(ok.all())
+
+        return _between
+
+    if exp.kind == "in_set":
+        allowed = list(kw["value_set"])
+        return lambda df: col in df.columns and bool(df[col].dropna().isin(allowed).all())
+
+    raise ValueError(f"Unsupported expectation kind: {exp.kind!r}")
+
+
+# ---- Row-level checks (pass mask per row) ----
+
+RowCheck = Callable[[pd.DataFrame], np.ndarray]
+
+
+def _label(kind: str, columns: Sequence[str]) -> str:
+    return f"{kind}:{','.join(columns)}"
+
+
+def _per_distinct(s: pd.Series, fn: Callable[[pd.Index], np.ndarray]) -> np.ndarray:
+    """
+    Evaluate `fn` once per distinct non-null value and broadcast back to the rows.
+    Categorical columns (batches) already carry their distinct values; nulls map to False.
+    """
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        codes = s.cat.codes.to_numpy()
+        # First-appearance order, like factorize: pandas infers datetime formats from the
+        # first value, so the verdicts match the dict-row path exactly
+        seen = pd.unique(codes[codes >= 0])
+        hits = np.zeros(len(s.cat.categories) + 1, dtype=bool)  # last slot: code -1 (null)
+        hits[seen] = np.asarray(fn(s.cat.categories[seen]), dtype=bool)
+        return hits[codes]
+    codes, uniques = pd.factorize(s)
+    hits = np.append(np.asarray(fn(pd.Index(uniques)), dtype=bool), False)
+    return hits[codes]
+
+
+def _on_session(values) -> np.ndarray:
+    """
+    Per value: a trading session. Unparseable dates and dates outside the calendar pass;
+    the timestamp guard reports the former.
+    """
+    parsed = pd.DatetimeIndex(pd.to_datetime(values, errors="coerce", utc=True))
+    days = parsed.tz_localize(None).to_numpy().astype("datetime64[D]")
+    calendar = get_trading_calendar()
+    return calendar.is_session_array(days) | ~calendar.covers(days)
+
+
+def _compile_row_expectation(exp: Expectation) -> RowCheck:
+    col = exp.column
+    kw = dict(exp.kwargs)
+
+    def _missing(df: pd.DataFrame) -> np.ndarray:
+        return np.zeros(len(df), dtype=bool)
+
+    if exp.kind == "not_null":
+        return lambda df: df[col].notna().to_numpy() if col in df.columns else _missing(df)
+
+    if exp.kind == "match_regex":
+        pattern = re.compile(kw["regex"])
+
+        def _regex(df: pd.DataFrame) -> np.ndarray:
+            if col not in df.columns:
+                return _missing(df)
+            s = df[col]
+            # Match each distinct value once, then broadcast back to the rows
+            hits = _per_distinct(s, lambda u: [bool(pattern.search(str(v))) for v in u])
+            return s.isna().to_numpy() | hits
+
+        return _regex
+
+    if exp.kind == "between":
+        lo, hi = kw["min_value"], kw["max_value"]
+        strict_min, strict_max = kw["strict_min"], kw["strict_max"]
+
+        def _between(df: pd.DataFrame) -> np.ndarray:
+            if col not in df.columns:
+                return _missing(df)
+            s = df[col]
+            values = pd.to_numeric(s, errors="coerce").to_numpy(dtype=float)
+            ok = ~np.isnan(values)
+            if lo is not None:
+                ok &= values > lo if strict_min else values >= lo
+            if hi is not None:
+                ok &= values < hi if strict_max else values <= hi
+            return s.isna().to_numpy() | ok
+
+        return _between
+
+    if exp.kind == "in_set":
+        allowed = list(kw["value_set"])
+
+        def _in_set(df: pd.DataFrame) -> np.ndarray:
+            if col not in df.columns:
+                return _missing(df)
+            s = df[col]
+            return (s.isna() | s.isin(allowed)).to_numpy()
+
+        return _in_set
+
+    raise ValueError(f"Unsupported expectation kind: {exp.kind!r}")
+
+
+def _compile_row_guard(guard: Guard) -> RowCheck:
+    cols = list(guard.columns)
+
+    if guard.kind == "required_columns":
+        # Schema-level: a missing column fails every row
+        return lambda df: np.full(len(df), all(c in df.columns for c in cols), dtype=bool)
+
+    if guard.kind == "numeric":
+
+        def _numeric(df: pd.DataFrame) -> np.ndarray:
+            ok = np.ones(len(df), dtype=bool)
+            for c in cols:
+                if c not in df.columns:
+                    return np.zeros(len(df), dtype=bool)
+                df[c] = pd.to_numeric(df[c], errors="coerce")
+                ok &= df[c].notna().to_numpy()
+            return ok
+
+        return _numeric
+
+    if guard.kind == "ohlc_invariants":
+
+        def _ohlc(df: pd.DataFrame) -> np.ndarray:
+            if any(k not in df.columns for k in ("open", "high", "low", "close")):
+                return np.zeros(len(df), dtype=bool)
+            o, h, lo, c = (
+                pd.to_numeric(df[k], errors="coerce").to_numpy(dtype=float)
+                for k in ("open", "high", "low", "close")
+            )
+            with np.errstate(invalid="ignore"):
+                bad = (lo > h) | (o < lo) | (o > h) | (c < lo) | (c > h)
+            return ~bad  # NaNs compare False here; the numeric guard reports them
+
+        return _ohlc
+
+    if guard.kind == "timestamp":
+        col = cols[0]
+
+        def _timestamp(df: pd.DataFrame) -> np.ndarray:
+            if col not in df.columns:
+                return np.zeros(len(df), dtype=bool)
+            s = df[col]
+            if isinstance(s.dtype, pd.CategoricalDtype):
+                # Batches: parse each distinct timestamp string once
+                return _per_distinct(
+                    s, lambda u: pd.to_datetime(u, errors="coerce", utc=True).notna()
+                )
+            return pd.to_datetime(s, errors="coerce", utc=True).notna().to_numpy()
+
+        return _timestamp
+
+    if guard.kind == "trading_session":
+        col = cols[0]
+
+        def _session(df: pd.DataFrame) -> np.ndarray:
+            if col not in df.columns:
+                return np.zeros(len(df), dtype=bool)
+            # A null date is the not_null expectation's failure, not this one's
+            return _per_distinct(df[col], _on_session) | df[col].isna().to_numpy()
+
+        return _session
+
+    raise ValueError(f"Unsupported guard kind: {guard.kind!r}")
+
+
+# Row-level validation accepts dict rows or a columnar batch (pipelines.common.batches)
+Records = Union[List[Dict[str, Any]], ColumnBatch]
+
+
+def _to_frame(records: Records) -> pd.DataFrame:
+    return records.to_frame() if isinstance(records, ColumnBatch) else pd.DataFrame(records)
+
+
+class _Verdict:
+    """Status and message from `total`, `failed` and per-check `counts`."""
+
+    total: int
+    failed: int
+    counts: Dict[str, int]
+
+    @property
+    def passed(self) -> int:
+        return self.total - self.failed
+
+    @property
+    def ok(self) -> bool:
+        return self.total > 0 and self.failed == 0
+
+    @property
+    def status(self) -> str:
+        if self.ok:
+            return "PASS"
+        return "PARTIAL" if self.passed else "FAIL"
+
+    @property
+    def message(self) -> str:
+        if self.total == 0:
+            return "No records to validate"
+        if self.failed == 0:
+            return "PASS"
+        detail = ", ".join(f"{k}={v}" for k, v in sorted(self.counts.items()))
+        return f"{self.status}: {self.failed} of {self.total} rows failed ({detail})"
+
+
+@dataclass
+class RowValidation(_Verdict):
+    """
+    Per-row verdict: `mask[i]` is True when row i passed every guard and expectation;
+    `reasons` maps each failing row index to the labels of the checks it failed.
+    """
+
+    mask: np.ndarray
+    reasons: Dict[int, List[str]] = field(default_factory=dict)
+    counts: Dict[str, int] = field(default_factory=dict)  # check label -> failing rows
+
+    @property
+    def total(self) -> int:
+        return len(self.mask)
+
+    @property
+    def failed(self) -> int:
+        return len(self.reasons)
+
+    def with_reasons(self, extra: Dict[int, List[str]]) -> "RowValidation":
+        """This verdict with more failing rows/labels (put ahead of the suite's own)."""
+        if not extra:
+            return self
+        mask = self.mask.copy()
+        mask[list(extra)] = False
+        reasons = dict(self.reasons)
+        counts = dict(self.counts)
+        for row, labels in extra.items():
+            reasons[row] = labels + reasons.get(row, [])
+            for label in labels:
+                counts[label] = counts.get(label, 0) + 1
+        return RowValidation(mask=mask, reasons=reasons, counts=counts)
+
+    def split(
+        self, records: Records, reason_field: str = "quality_reasons"
+    ) -> Tuple[Records, List[Dict[str, Any]]]:
+        """
+        (passing records, failing records annotated with their reasons).
+        A batch splits into a batch of passing rows; failing rows always come back as dicts.
+        """
+        if isinstance(records, ColumnBatch):
+            rows = sorted(self.reasons)
+            bad_rows = records.take(np.asarray(rows, dtype=np.intp)).to_records()
+            bad = [
+                {**r, reason_field: self.reasons[i]} for i, r in zip(rows, bad_rows, strict=True)
+            ]
+            return records.take(self.mask), bad
+
+        good = [r for r, keep in zip(records, self.mask.tolist(), strict=True) if keep]
+        bad = [{**records[i], reason_field: why} for i, why in sorted(self.reasons.items())]
+        return good, bad
+
+
+@dataclass
+class ValidationTotals(_Verdict):
+    """
+    Row-level verdicts accumulated chunk by chunk. After add()-ing every chunk's
+    RowValidation, status/message match one RowValidation over all the rows.
+    """
+
+    total: int = 0
+    failed: int = 0
+    counts: Dict[str, int] = field(default_factory=dict)
+
+    def add(self, verdict: RowValidation) -> None:
+        self.total += verdict.total
+        self.failed += verdict.failed
+        for label, n in verdict.counts.items():
+            self.counts[label] = self.counts.get(label, 0) + n
+
+
+def _compile_guard(guard: Guard) -> GuardCheck:
+    cols = list(guard.columns)
+
+    if guard.kind == "required_columns":
+
+        def _required(df: pd.DataFrame) -> Optional[str]:
+            missing = [c for c in cols if c not in df.columns]
+            return guard.message.format(missing=missing) if missing else None
+
+        return _required
+
+    if guard.kind == "numeric":
+
+        def _numeric(df: pd.DataFrame) -> Optional[str]:
+            # Coerces in place: the expectations (and GE) see the numeric columns.
+            for c in cols:
+                df[c] = pd.to_numeric(df[c], errors="coerce")
+            return guard.message if df[cols].isna().any().any() else None
+
+        return _numeric
+
+    if guard.kind == "ohlc_invariants":
+
+        def _ohlc(df: pd.DataFrame) -> Optional[str]:
+            o, h, lo, c = (df[k].to_numpy(dtype=float) for k in ("open", "high", "low", "close"))
+            bad = (lo > h) | (o < lo) | (o > h) | (c < lo) | (c > h)
+            count = int(bad.sum())
+            return guard.message.format(count=count) if count else None
+
+        return _ohlc
+
+    if guard.kind == "timestamp":
+        col = cols[0]
+
+        def _timestamp(df: pd.DataFrame) -> Optional[str]:
+            if col not in df.columns:
+                return guard.message
+            parsed = pd.to_datetime(df[col], errors="coerce", utc=True)
+            return guard.message if parsed.isna().any() else None
+
+        return _timestamp
+
+    if guard.kind == "trading_session":
+        col = cols[0]
+
+        def _session(df: pd.DataFrame) -> Optional[str]:
+            if col not in df.columns:
+                return guard.message.format(count=len(df))
+            count = int((~_on_session(df[col].dropna())).sum())
+            return guard.message.format(count=count) if count else None
+
+        return _session
+
+    raise ValueError(f"Unsupported guard kind: {guard.kind!r}")
+
+
+def _run_guards(guards: List[GuardCheck], df: pd.DataFrame) -> Optional[str]:
+    for g in guards:
+        failure = g(df)
+        if failure:
+            return failure
+    return None
+
+
+def _schema_errors(schema: str, records: Records) -> Dict[int, List[str]]:
+    """CompiledSchema.check() labels per failing row (column-wise for a batch)."""
+    if isinstance(records, ColumnBatch):
+        return records.schema_errors()
+    check = load_schema(schema).check
+    errors: Dict[int, List[str]] = {}
+    for i, r in enumerate(records):
+        errs = check(r)[1]
+        if errs:
+            errors[i] = errs
+    return errors
+
+
+def _schema_failure(schema: Optional[str], records: Records) -> Optional[str]:
+    if schema is None:
+        return None
+    errors = _schema_errors(schema, records)
+    if not errors:
+        return None
+    return f"{len(errors)} rows violate the {schema} schema"
+
+
+def _crosscheck_enabled() -> bool:
+    return os.getenv("VALIDATION_CROSSCHECK", "").strip().lower() in {"1", "true", "yes"}
+
+
+class CompiledSuite:
+    """
+    A suite turned into plain vectorized column checks.
+    Returns the same (ok, message) pairs as the GE path.
+    """
+
+    def __init__(self, suite: Suite):
+        self.suite = suite
+        self._guards = [_compile_guard(g) for g in suite.guards]
+        self._checks = [_compile_expectation(e) for e in suite.expectations]
+        self._row_checks = [
+            (_label(g.kind, g.columns), _compile_row_guard(g)) for g in suite.guards
+        ] + [(_label(e.kind, (e.column,)), _compile_row_expectation(e)) for e in suite.expectations]
+
+    def evaluate_rows(self, df: pd.DataFrame) -> RowValidation:
+        n = len(df)
+        labels = [label for label, _ in self._row_checks]
+        if n == 0:
+            return RowValidation(mask=np.ones(0, dtype=bool))
+
+        # (checks x rows) failure matrix; reasons are only materialized for failing rows
+        failing = np.vstack([~check(df) for _, check in self._row_checks])
+        mask = ~failing.any(axis=0)
+        reasons: Dict[int, List[str]] = {}
+        for row in np.flatnonzero(~mask).tolist():
+            reasons[row] = [labels[i] for i in np.flatnonzero(failing[:, row]).tolist()]
+        per_check = failing.sum(axis=1).tolist()
+        counts = {labels[i]: c for i, c in enumerate(per_check) if c}
+        return RowValidation(mask=mask, reasons=reasons, counts=counts)
+
+    def evaluate(self, df: pd.DataFrame) -> Tuple[bool, str]:
+        failure = _run_guards(self._guards, df)
+        if failure:
+            return False, failure
+
+        failed = sum(1 for check in self._checks if not check(df))
+        if failed == 0:
+            return True, "PASS"
+        return False, f"FAIL: {failed} expectations failed"
+
+    def validate(
+        self, records: List[Dict[str, Any]], crosscheck: Optional[bool] = None
+    ) -> Tuple[bool, str]:
+        if not records:
+            return False, "No records to validate"
+
+        failure = _schema_failure(self.suite.schema, records)
+        result = (False, failure) if failure else self.evaluate(pd.DataFrame(records))
+
+        if crosscheck is None:
+            crosscheck = _crosscheck_enabled()
+        if crosscheck:
+            expected = run_with_ge(self.suite, records)
+            if expected != result:
+                # GE stays the reference implementation while both paths coexist.
+                print(
+                    f"VALIDATION CROSSCHECK MISMATCH suite={self.suite.name} "
+                    f"compiled={result} ge={expected}"
+                )
+                return expected
+        return result
+
+    def validate_rows(self, records: Records, crosscheck: Optional[bool] = None) -> RowValidation:
+        """Row-level verdict; the batch is clean exactly when the batch-level path passes."""
+        result = self.evaluate_rows(_to_frame(records))
+        if self.suite.schema is not None:
+            result = result.with_reasons(_schema_errors(self.suite.schema, records))
+
+        if crosscheck is None:
+            crosscheck = _crosscheck_enabled()
+        if crosscheck and len(records):
+            if isinstance(records, ColumnBatch):
+                records = records.to_records()  # GE reference path works on dict rows
+            expected_ok, expected_msg = run_with_ge(self.suite, records)
+            if expected_ok != result.ok:
+                print(
+                    f"VALIDATION CROSSCHECK MISMATCH suite={self.suite.name} "
+                    f"rows={result.message} ge={(expected_ok, expected_msg)}"
+                )
+        return result
+
+
+@lru_cache(maxsize=None)
+def compile_suite(suite: Suite) -> CompiledSuite:
+    """Compile once per process; suites are frozen so they key the cache directly."""
+    return CompiledSuite(suite)
+
+
+def run_with_ge(suite: Suite, records: List[Dict[str, Any]]) -> Tuple[bool, str]:
+    """
+    Reference path: same guards, expectations run through an ephemeral GE 1.11 context.
+    """
+    if not records:
+        return False, "No records to validate"
+
+    failure = _schema_failure(suite.schema, records)
+    if failure:
+        return False, failure
+
+    df = pd.DataFrame(records)
+    failure = _run_guards([_compile_guard(g) for g in suite.guards], df)
+    if failure:
+        return False, failure
+
+    import great_expectations as gx  # heavy; only needed on this path
+
+    context = gx.get_context(mode="ephemeral")
+
+    datasource = context.data_sources.add_pandas(name=f"pandas_src_{suite.name}")
+    asset = datasource.add_dataframe_asset(name=suite.name)
+
+    batch_def = asset.add_batch_definition_whole_dataframe("batch")
+    batch = batch_def.get_batch(batch_parameters={"dataframe": df})
+
+    validator = context.get_validator(batch=batch)
+    for exp in suite.expectations:
+        kwargs = dict(exp.kwargs)
+        if "value_set" in kwargs:
+            kwargs["value_set"] = list(kwargs["value_set"])
+        getattr(validator, _GE_METHODS[exp.kind])(exp.column, **kwargs)
+
+    result = validator.validate()
+    if result.success:
+        return True, "PASS"
+
+    failed = [r for r in result.results if not r.success]
+    return False, f"FAIL: {len(failed)} expectations failed"
@@ -0,0 +1,425 @@
+from __future__ import annotations
+
+import random
+import re
+import threading
+import time
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from botocore.exceptions import ClientError
+
+# In-process stand-ins for the AWS clients the pipelines use. They speak the same low-level
+# request/response shapes as boto3 clients, keep everything in memory, and can inject
+# latency/partial failures so benchmarks exercise the retry paths.
+
+
+def _client_error(code: str, message: str, op: str) -> ClientError:
+    return ClientError({"Error": {"Code": code, "Message": message}}, op)
+
+
+# ---- Minimal DynamoDB condition-expression evaluator ----
+
+_TOKEN = re.compile(r"\s*(<>|<=|>=|=|<|>|\(|\)|,|[#:]?[A-Za-z_][A-Za-z0-9_.]*)")
+
+
+def _tokenize(expr: str) -> List[str]:
+    tokens, pos = [], 0
+    expr = expr.strip()
+    while pos < len(expr):
+        m = _TOKEN.match(expr, pos)
+        if not m:
+            raise ValueError(f"Unsupported condition expression near: {expr[pos:]!r}")
+        tokens.append(m.group(1))
+        pos = m.end()
+    return tokens
+
+
+def _scalar(av: Optional[Dict[str, Any]]) -> Any:
+    if av is None:
+        return None
+    if "N" in av:
+        return Decimal(av["N"])
+    if "S" in av:
+        return av["S"]
+    if "BOOL" in av:
+        return av["BOOL"]
+    return None
+
+
+class _Condition:
+    """
+    Supports attribute_exists/attribute_not_exists, comparisons (= <> < <= > >=),
+    AND/OR/NOT and parentheses, with #name / :value placeholders.
+    """
+
+    _OPS = {
+        "=": lambda a, b: a == b,
+        "<>": lambda a, b: a != b,
+        "<": lambda a, b: a < b,
+        "<=": lambda a, b: a <= b,
+        ">": lambda a, b: a > b,
+        ">=": lambda a, b: a >= b,
+    }
+
+    def __init__(self, expr: str, names: Dict[str, str], values: Dict[str, Dict[str, Any]]):
+        self.tokens = _tokenize(expr)
+        self.names = names or {}
+        self.values = values or {}
+        self.i = 0
+
+    def _peek(self) -> Optional[str]:
+        return self.tokens[self.i] if self.i < len(self.tokens) else None
+
+    def _next(self) -> str:
+        tok = self._peek()
+        self.i += 1
+        return tok
+
+    def evaluate(self, item: Optional[Dict[str, Any]]) -> bool:
+        self.i = 0
+        out = self._or(item or {})
+        if self._peek() is not None:
+            raise ValueError(f"Unexpected token {self._peek()!r}")
+        return out
+
+    def _or(self, item) -> bool:
+        out = self._and(item)
+        while self._peek() and self._peek().upper() == "OR":
+            self._next()
+            rhs = self._and(item)
+            out = out or rhs
+        return out
+
+    def _and(self, item) -> bool:
+        out = self._not(item)
+        while self._peek() and self._peek().upper() == "AND":
+            self._next()
+            rhs = self._not(item)
+            out = out and rhs
+        return out
+
+    def _not(self, item) -> bool:
+        if self._peek() and self._peek().upper() == "NOT":
+            self._next()
+            return not self._not(item)
+        return self._atom(item)
+
+    def _name(self, tok: str) -> str:
+        return self.names[tok] if tok.startswith("#") else tok
+
+    def _operand(self, tok: str, item) -> Any:
+        if tok.startswith(":"):
+            return _scalar(self.values[tok])
+        return _scalar(item.get(self._name(tok)))
+
+    def _atom(self, item) -> bool:
+        tok = self._next()
+        if tok == "(":
+            out = self._or(item)
+            self._next()  # ")"
+            return out
+        if tok in ("attribute_exists", "attribute_not_exists"):
+            self._next()  # "("
+            name = self._name(self._next())
+            self._next()  # ")"
+            exists = name in item
+            return exists if tok == "attribute_exists" else not exists
+
+        lhs = self._operand(tok, item)
+        op = self._next()
+        rhs = self._operand(self._next(), item)
+        if lhs is None or rhs is None:
+            return False
+        return self._OPS[op](lhs, rhs)
+
+
+class FakeDynamoDBClient:
+    """
+    Low-level DynamoDB client stand-in (put_item / get_item / batch_get_item / batch_write_item).
+
+    - latency_s: sleep per API call (simulated round-trip)
+    - unprocessed_rate: probability that each batch item comes back in UnprocessedItems
+    - key_attr: partition key name (latest_prices uses "symbol")
+    """
+
+    def __init__(
+        self,
+        latency_s: float = 0.0,
+        unprocessed_rate: float = 0.0,
+        key_attr: str = "symbol",
+        seed: Optional[int] = None,
+    ):
+        self.latency_s = latency_s
+        self.unprocessed_rate = unprocessed_rate
+        self.key_attr = key_attr
+        self.tables: Dict[str, Dict[Any, Dict[str, Any]]] = {}
+        self.calls: Dict[str, int] = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _call(self, op: str) -> None:
+        with self._lock:
+            self.calls[op] = self.calls.get(op, 0) + 1
+        if self.latency_s:
+            time.sleep(self.latency_s)
+
+    def _table(self, name: str) -> Dict[Any, Dict[str, Any]]:
+        return self.tables.setdefault(name, {})
+
+    def _key(self, item: Dict[str, Any]) -> Any:
+        return _scalar(item[self.key_attr])
+
+    def put_item(
+        self,
+        TableName: str,
+        Item: Dict[str, Any],
+        ConditionExpression: Optional[str] = None,
+        ExpressionAttributeNames: Optional[Dict[str, str]] = None,
+        ExpressionAttributeValues: Optional[Dict[str, Any]] = None,
+        **_: Any,
+    ) -> Dict[str, Any]:
+        self._call("PutItem")
+        cond = (
+            _Condition(ConditionExpression, ExpressionAttributeNames, ExpressionAttributeValues)
+            if ConditionExpression
+            else None
+        )
+        with self._lock:
+            table = self._table(TableName)
+            key = self._key(Item)
+            if cond and not cond.evaluate(table.get(key)):
+                raise _client_error(
+                    "ConditionalCheckFailedException", "The conditional request failed", "PutItem"
+                )
+            table[key] = dict(Item)
+        return {}
+
+    def get_item(self, TableName: str, Key: Dict[str, Any], **_: Any) -> Dict[str, Any]:
+        self._call("GetItem")
+        with self._lock:
+            item = self._table(TableName).get(self._key(Key))
+        return {"Item": dict(item)} if item else {}
+
+    def batch_get_item(self, RequestItems: Dict[str, Dict[str, Any]], **_: Any) -> Dict[str, Any]:
+        self._call("BatchGetItem")
+        if sum(len(v["Keys"]) for v in RequestItems.values()) > 100:
+            raise _client_error("ValidationException", "Too many items requested", "BatchGetItem")
+
+        responses: Dict[str, List[Dict]] = {}
+        unprocessed: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for table_name, req in RequestItems.items():
+                table = self._table(table_name)
+                for key in req["Keys"]:
+                    if self.unprocessed_rate and self._rng.random() < self.unprocessed_rate:
+                        unprocessed.setdefault(table_name, {"Keys": []})["Keys"].append(key)
+                        continue
+                    item = table.get(self._key(key))
+                    if item:
+                        responses.setdefault(table_name, []).append(dict(item))
+        return {"Responses": responses, "UnprocessedKeys": unprocessed}
+
+    def batch_write_item(self, RequestItems: Dict[str, List[Dict]], **_: Any) -> Dict[str, Any]:
+        self._call("BatchWriteItem")
+        if sum(len(v) for v in RequestItems.values()) > 25:
+            raise _client_error("ValidationException", "Too many items requested", "BatchWriteItem")
+
+        unprocessed: Dict[str, List[Dict]] = {}
+        with self._lock:
+            for table_name, requests in RequestItems.items():
+                table = self._table(table_name)
+                keys = [self._key(r["PutRequest"]["Item"]) for r in requests if "PutRequest" in r]
+                if len(keys) != len(set(keys)):
+                    raise _client_error(
+                        "ValidationException",
+                        "Provided list of item keys contains duplicates",
+                        "BatchWriteItem",
+                    )
+                for r in requests:
+                    if self.unprocessed_rate and self._rng.random() < self.unprocessed_rate:
+                        unprocessed.setdefault(table_name, []).append(r)
+                        continue
+                    if "PutRequest" in r:
+                        item = r["PutRequest"]["Item"]
+                        table[self._key(item)] = dict(item)
+                    elif "DeleteRequest" in r:
+                        table.pop(self._key(r["DeleteRequest"]["Key"]), None)
+        return {"UnprocessedItems": unprocessed}
+
+
+class FakeS3Client:
+    """
+    In-memory S3 client stand-in (put_object / get_object / paginated list_objects_v2 /
+    delete_objects and multipart uploads). Like S3, every part except the last must be at
+    least 5 MiB.
+    """
+
+    MIN_PART_SIZE = 5 * 1024 * 1024
+
+    def __init__(self, latency_s: float = 0.0):
+        self.latency_s = latency_s
+        self.objects: Dict[tuple, bytes] = {}
+        self.uploads: Dict[str, Dict[str, Any]] = {}
+        self.calls: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _call(self, op: str) -> None:
+        with self._lock:
+            self.calls[op] = self.calls.get(op, 0) + 1
+        if self.latency_s:
+            time.sleep(self.latency_s)
+
+    def put_object(self, Bucket: str, Key: str, Body: Any = b"", **_: Any) -> Dict[str, Any]:
+        self._call("PutObject")
+        data = Body.read() if hasattr(Body, "read") else Body
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        with self._lock:
+            self.objects[(Bucket, Key)] = bytes(data)
+        return {"ETag": f'"{hash(data) & 0xFFFFFFFF:08x}"'}
+
+    def get_object(self, Bucket: str, Key: str, **_: Any) -> Dict[str, Any]:
+        import io
+
+        self._call("GetObject")
+        with self._lock:
+            data = self.objects.get((Bucket, Key))
+        if data is None:
+            raise _client_error("NoSuchKey", "The specified key does not exist.", "GetObject")
+        return {"Body": io.BytesIO(data), "ContentLength": len(data)}
+
+    def create_multipart_upload(self, Bucket: str, Key: str, **_: Any) -> Dict[str, Any]:
+        self._call("CreateMultipartUpload")
+        with self._lock:
+            upload_id = f"upload-{len(self.uploads) + 1}"
+            self.uploads[upload_id] = {"Bucket": Bucket, "Key": Key, "Parts": {}}
+        return {"Bucket": Bucket, "Key": Key, "UploadId": upload_id}
+
+    def _upload(self, Bucket: str, Key: str, UploadId: str, op: str) -> Dict[str, Any]:
+        upload = self.uploads.get(UploadId)
+        if upload is None or (upload["Bucket"], upload["Key"]) != (Bucket, Key):
+            raise _client_error("NoSuchUpload", "The specified upload does not exist.", op)
+        return upload
+
+    def upload_part(
+        self, Bucket: str, Key: str, UploadId: str, PartNumber: int, Body: Any = b"", **_: Any
+    ) -> Dict[str, Any]:
+        self._call("UploadPart")
+        data = bytes(Body.read() if hasattr(Body, "read") else Body)
+        etag = f'"{hash(data) & 0xFFFFFFFF:08x}"'
+        with self._lock:
+            self._upload(Bucket, Key, UploadId, "UploadPart")["Parts"][PartNumber] = (etag, data)
+        return {"ETag": etag}
+
+    def complete_multipart_upload(
+        self, Bucket: str, Key: str, UploadId: str, MultipartUpload: Dict[str, Any], **_: Any
+    ) -> Dict[str, Any]:
+        op = "CompleteMultipartUpload"
+        self._call(op)
+        with self._lock:
+            stored = self._upload(Bucket, Key, UploadId, op)["Parts"]
+            requested = MultipartUpload["Parts"]
+            chunks = []
+            for i, p in enumerate(requested):
+                etag, data = stored.get(p["PartNumber"], (None, b""))
+                if etag != p["ETag"]:
+                    raise _client_error("InvalidPart", "Part not found or ETag mismatch", op)
+                if i < len(requested) - 1 and len(data) < self.MIN_PART_SIZE:
+                    raise _client_error("EntityTooSmall", "Part smaller than 5 MiB", op)
+                chunks.append(data)
+            self.objects[(Bucket, Key)] = b"".join(chunks)
+            del self.uploads[UploadId]
+        return {"Bucket": Bucket, "Key": Key}
+
+    def abort_multipart_upload(
+        self, Bucket: str, Key: str, UploadId: str, **_: Any
+    ) -> Dict[str, Any]:
+        self._call("AbortMultipartUpload")
+        with self._lock:
+            self._upload(Bucket, Key, UploadId, "AbortMultipartUpload")
+            del self.uploads[UploadId]
+        return {}
+
+    def list_objects_v2(
+        self,
+        Bucket: str,
+        Prefix: str = "",
+        MaxKeys: int = 1000,
+        ContinuationToken: str = "",
+        **_: Any,
+    ) -> Dict[str, Any]:
+        # Pages of MaxKeys keys in key order; the token is the last key of the previous page
+        self._call("ListObjectsV2")
+        with self._lock:
+            keys = sorted(
+                k
+                for b, k in self.objects
+                if b == Bucket and k.startswith(Prefix) and k > ContinuationToken
+            )
+            page = keys[:MaxKeys]
+            contents = [{"Key": k, "Size": len(self.objects[(Bucket, k)])} for k in page]
+        resp = {"Contents": contents, "KeyCount": len(contents), "IsTruncated": len(keys) > MaxKeys}
+        if resp["IsTruncated"]:
+            resp["NextContinuationToken"] = page[-1]
+        return resp
+
+    def delete_objects(self, Bucket: str, Delete: Dict[str, Any], **_: Any) -> Dict[str, Any]:
+        self._call("DeleteObjects")
+        objects = Delete["Objects"]
+        if len(objects) > 1000:
+            raise _client_error("MalformedXML", "At most 1000 keys per request", "DeleteObjects")
+        with self._lock:
+            for o in objects:
+                self.objects.pop((Bucket, o["Key"]), None)  # missing keys count as deleted
+        return {"Deleted": [{"Key": o["Key"]} for o in objects]}
+
+
+class FakeCloudWatchClient:
+    """Collects put_metric_data calls instead of sending them."""
+
+    def __init__(self, latency_s: float = 0.0):
+        self.latency_s = latency_s
+        self.metric_data: List[Dict[str, Any]] = []
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def put_metric_data(self, Namespace: str, MetricData: List[Dict[str, Any]], **_: Any):
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        with self._lock:
+            self.calls += 1
+            self.metric_data.extend({"Namespace": Namespace, **m} for m in MetricData)
+        return {}
+
+
+class FakeLambdaClient:
+    """
+    invoke() runs `handler(event, None)` in this process, on the caller's thread. Like
+    Lambda, a handler exception comes back as FunctionError="Unhandled" with an
+    errorMessage/errorType payload instead of being raised.
+    """
+
+    def __init__(self, handler, latency_s: float = 0.0):
+        self.handler = handler
+        self.latency_s = latency_s
+        self.invocations: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def invoke(self, FunctionName: str, Payload: Any = b"{}", **kwargs: Any) -> Dict[str, Any]:
+        import io
+        import json
+
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        event = json.loads(Payload.read() if hasattr(Payload, "read") else Payload)
+        with self._lock:
+            self.invocations.append({"FunctionName": FunctionName, "Event": event, **kwargs})
+        out: Dict[str, Any] = {"StatusCode": 200, "ExecutedVersion": "$LATEST"}
+        try:
+            result = self.handler(event, None)
+        except Exception as e:  # noqa: BLE001 - surfaced the way Lambda does
+            result = {"errorMessage": str(e), "errorType": type(e).__name__}
+            out["FunctionError"] = "Unhandled"
+        out["Payload"] = io.BytesIO(json.dumps(result, default=str).encode("utf-8"))
+        return out
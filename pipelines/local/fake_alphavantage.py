@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+from urllib.parse import parse_qs, urlparse
+
+from pipelines.common.trading_calendar import get_trading_calendar
+
+# Recorded-format TIME_SERIES_DAILY payloads (TIME_SERIES_DAILY_<SYMBOL>.json)
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures" / "alphavantage"
+
+
+class _Server(ThreadingHTTPServer):
+    # Default listen backlog is 5: a burst of concurrent connects would stall on SYN retries
+    request_queue_size = 128
+
+
+class FakeAlphaVantage:
+    """
+    Local stand-in for the Alpha Vantage query endpoint (GLOBAL_QUOTE, TIME_SERIES_DAILY).
+
+    - latency_s: fixed delay added to every response
+    - throttle_rate: probability that a request gets the "Note" throttle payload
+    - throttle_first: the first N requests are always throttled
+    - error_symbols: symbols answered with an "Error Message" payload
+    - fixtures_dir: TIME_SERIES_DAILY_<SYMBOL>.json payloads served as recorded; other
+      symbols get a generated weekday series of `series_days` bars ending at `series_end`
+
+    Use as a context manager; `url` points at the running server.
+    """
+
+    def __init__(
+        self,
+        latency_s: float = 0.0,
+        throttle_rate: float = 0.0,
+        throttle_first: int = 0,
+        error_symbols: Iterable[str] = (),
+        seed: Optional[int] = None,
+        fixtures_dir: Optional[str] = None,
+        series_end: date = date(2026, 1, 16),
+        series_days: int = 600,
+    ):
+        self.latency_s = latency_s
+        self.throttle_rate = throttle_rate
+        self.throttle_first = throttle_first
+        self.error_symbols = {s.upper() for s in error_symbols}
+        self.requests = 0
+        self.throttled = 0
+        self.calls: Counter = Counter()  # (function, symbol, outputsize) -> requests served
+        self.fixtures_dir = Path(fixtures_dir) if fixtures_dir else None
+        self.series_end = series_end
+        self.series_days = series_days
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/query"
+
+    def _price(self, symbol: str) -> float:
+        # Stable per-symbol price so repeated calls look like an unchanged market
+        return 50.0 + (sum(map(ord, symbol)) % 400) + 0.25
+
+    def _daily_series(self, symbol: str) -> Dict:
+        path = self.fixtures_dir / f"TIME_SERIES_DAILY_{symbol}.json" if self.fixtures_dir else None
+        if path is not None and path.exists():
+            return json.loads(path.read_text())
+        rng, calendar = random.Random(symbol), get_trading_calendar()
+        px, series, d = self._price(symbol), {}, self.series_end
+        while len(series) < self.series_days:
+            if calendar.is_session(d):
+                close = px * (1 + rng.gauss(0, 0.01))
+                series[d.isoformat()] = {
+                    "1. open": f"{px:.4f}",
+                    "2. high": f"{max(px, close) * 1.004:.4f}",
+                    "3. low": f"{min(px, close) * 0.996:.4f}",
+                    "4. close": f"{close:.4f}",
+                    "5. volume": str(rng.randint(1_000_000, 20_000_000)),
+                }
+                px = close
+            d -= timedelta(days=1)
+        return {
+            "Meta Data": {"2. Symbol": symbol, "3. Last Refreshed": self.series_end.isoformat()},
+            "Time Series (Daily)": series,  # newest first, like the real API
+        }
+
+    def respond(self, params: Dict[str, str]) -> Dict:
+        with self._lock:
+            self.requests += 1
+            n = self.requests
+            throttle = n <= self.throttle_first or self._rng.random() < self.throttle_rate
+            if throttle:
+                self.throttled += 1
+
+        if self.latency_s:
+            time.sleep(self.latency_s)
+
+        if throttle:
+            return {"Note": "Thank you for using Alpha Vantage! Our standard API rate limit is ..."}
+
+        symbol = params.get("symbol", "").upper()
+        if symbol in self.error_symbols:
+            return {"Error Message": f"Invalid API call for symbol {symbol}."}
+
+        if params.get("function") == "TIME_SERIES_DAILY":
+            outputsize = params.get("outputsize", "compact")
+            with self._lock:
+                self.calls[("TIME_SERIES_DAILY", symbol, outputsize)] += 1
+            payload = self._daily_series(symbol)
+            if outputsize == "compact":
+                series = payload["Time Series (Daily)"]
+                keep = sorted(series, reverse=True)[:100]
+                payload = {**payload, "Time Series (Daily)": {d: series[d] for d in keep}}
+            return payload
+
+        if params.get("function") == "GLOBAL_QUOTE":
+            return {
+                "Global Quote": {
+                    "01. symbol": symbol,
+                    "05. price": f"{self._price(symbol):.4f}",
+                    "07. latest trading day": "2026-01-16",
+                }
+            }
+        return {"Error Message": f"Unsupported function {params.get('function')!r}"}
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive (pooled client connections are reused), headers + body sent as one
+            # segment, and no Nagle: otherwise delayed ACKs add ~40 ms per response.
+            protocol_version = "HTTP/1.1"
+            wbufsize = 64 * 1024
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+                body = json.dumps(fake.respond(params)).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):  # keep benchmark output clean
+                pass
+
+        return Handler
+
+    def start(self) -> "FakeAlphaVantage":
+        self._server = _Server(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self) -> "FakeAlphaVantage":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main() -> None:
+    # Standalone server, so benchmarks can keep the provider out of the measured process:
+    #   python -m pipelines.local.fake_alphavantage --latency-ms 20
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    with FakeAlphaVantage(
+        latency_s=args.latency_ms / 1000, throttle_rate=args.throttle_rate, seed=args.seed
+    ) as fake:
+        print(fake.url, flush=True)
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import asdict, dataclass, field
+from decimal import Decimal
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from boto3.dynamodb.types import TypeDeserializer
+
+from pipelines.common.aws import get_client
+from pipelines.common.ratelimit import backoff_delay
+
+# Read path over the latest_prices serving table (written by the streaming Lambda).
+# get_latest() answers from an in-process TTL + LRU cache and fetches only the misses,
+# with one BatchGetItem per 100 symbols. Concurrent callers asking for a symbol that is
+# already being fetched wait for that fetch instead of issuing their own, so a burst of
+# dashboard refreshes costs one DynamoDB read per symbol per TTL.
+
+LATEST_PRICES_TABLE = os.getenv("DDB_TABLE_LATEST_PRICES", "latest_prices")
+LATEST_PRICE_CACHE_TTL_SECONDS = float(os.getenv("LATEST_PRICE_CACHE_TTL_SECONDS", "1"))
+LATEST_PRICE_CACHE_MAX_ENTRIES = int(os.getenv("LATEST_PRICE_CACHE_MAX_ENTRIES", "10000"))
+
+BATCH_GET_LIMIT = 100  # DynamoDB BatchGetItem hard limit
+LATENCY_WINDOW = 1024  # get_latest() latencies kept for the percentiles
+
+_deserializer = TypeDeserializer()
+
+
+def _plain(value: Any) -> Any:
+    # Decimals (and sets/lists/maps of them) -> floats, so callers never see Decimal
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, set, frozenset)):
+        return [_plain(v) for v in value]
+    return value
+
+
+def from_ddb_item(item: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Low-level DynamoDB item -> plain record (the inverse of ddb_writer.to_ddb_item)."""
+    out: Dict[str, Any] = {}
+    for k, v in item.items():
+        if "S" in v:
+            out[k] = v["S"]
+        elif "N" in v:
+            out[k] = float(v["N"])
+        else:
+            out[k] = _plain(_deserializer.deserialize(v))
+    return out
+
+
+@dataclass
+class ReadStats:
+    calls: int = 0  # get_latest() calls
+    requested: int = 0  # symbols asked for (deduplicated per call)
+    hits: int = 0  # answered from the cache (including cached "not found")
+    coalesced: int = 0  # waited on another caller's in-flight fetch
+    misses: int = 0  # fetched from DynamoDB by this caller
+    not_found: int = 0  # fetched, but no item in the table
+    batch_calls: int = 0  # BatchGetItem requests (retries included)
+    retried_keys: int = 0  # keys that came back in UnprocessedKeys
+    evictions: int = 0
+    latencies_ms: Deque[float] = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.requested if self.requested else 0.0
+
+    def percentile_ms(self, q: float) -> float:
+        if not self.latencies_ms:
+            return 0.0
+        ordered = sorted(self.latencies_ms)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def as_dict(self) -> Dict[str, Any]:
+        out = {k: v for k, v in asdict(self).items() if k != "latencies_ms"}
+        out["hit_rate"] = round(self.hit_rate, 4)
+        out["p50_ms"] = round(self.percentile_ms(0.50), 3)
+        out["p99_ms"] = round(self.percentile_ms(0.99), 3)
+        return out
+
+
+@dataclass
+class _Entry:
+    record: Optional[Dict[str, Any]]  # None: the table has no item for the symbol
+    expires_at: float
+
+
+class _Flight:
+    """One in-flight fetch that other callers can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.record: Optional[Dict[str, Any]] = None
+        self.error: Optional[BaseException] = None
+
+
+class LatestPriceClient:
+    """
+    get_latest(symbols) -> {symbol: record} for the symbols that have an item; numbers
+    come back as floats. Records are served from the cache for `ttl_s` seconds
+    (0 disables caching but still coalesces concurrent reads); the cache holds at most
+    `max_entries` symbols, least recently used first out.
+    """
+
+    def __init__(
+        self,
+        client,
+        table_name: str = LATEST_PRICES_TABLE,
+        ttl_s: float = LATEST_PRICE_CACHE_TTL_SECONDS,
+        max_entries: int = LATEST_PRICE_CACHE_MAX_ENTRIES,
+        max_retries: int = 8,
+        consistent_read: bool = False,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_entries < 1:
+            raise ValueError("max_entries must be >= 1")
+        self.client = client
+        self.table_name = table_name
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.max_retries = max_retries
+        self.consistent_read = consistent_read
+        self._clock = clock
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._inflight: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self.stats = ReadStats()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def invalidate(self, symbols: Optional[Iterable[str]] = None) -> None:
+        """Drop cached records (all of them when symbols is None)."""
+        with self._lock:
+            if symbols is None:
+                self._entries.clear()
+                return
+            for s in symbols:
+                self._entries.pop(str(s).upper().strip(), None)
+
+    def _install(self, symbol: str, record: Optional[Dict[str, Any]], now: float) -> None:
+        # Caller holds the lock
+        if self.ttl_s <= 0:
+            return
+        self._entries[symbol] = _Entry(record=record, expires_at=now + self.ttl_s)
+        self._entries.move_to_end(symbol)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def get_latest(self, symbols: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        t0 = time.perf_counter()
+        ordered = list(dict.fromkeys(str(s).upper().strip() for s in symbols))
+        found: Dict[str, Optional[Dict[str, Any]]] = {}
+        waiting: Dict[str, _Flight] = {}
+        mine: Dict[str, _Flight] = {}
+
+        # 1) Cache, then other callers' fetches; whatever is left this caller fetches
+        with self._lock:
+            now = self._clock()
+            for sym in ordered:
+                entry = self._entries.get(sym)
+                if entry is not None and entry.expires_at > now:
+                    self._entries.move_to_end(sym)
+                    found[sym] = entry.record
+                elif sym in self._inflight:
+                    waiting[sym] = self._inflight[sym]
+                else:
+                    mine[sym] = self._inflight[sym] = _Flight()
+            self.stats.calls += 1
+            self.stats.requested += len(ordered)
+            self.stats.hits += len(found)
+            self.stats.coalesced += len(waiting)
+            self.stats.misses += len(mine)
+
+        # 2) Fetch ours and publish the results (or the error) to anyone waiting on them
+        if mine:
+            try:
+                records, batch_calls, retried = self._batch_get(list(mine))
+            except BaseException as e:
+                with self._lock:
+                    for sym, flight in mine.items():
+                        flight.error = e
+                        self._inflight.pop(sym, None)
+                        flight.done.set()
+                raise
+            with self._lock:
+                now = self._clock()
+                for sym, flight in mine.items():
+                    flight.record = records.get(sym)
+                    self._install(sym, flight.record, now)
+                    self._inflight.pop(sym, None)
+                    flight.done.set()
+                    found[sym] = flight.record
+                self.stats.batch_calls += batch_calls
+                self.stats.retried_keys += retried
+                self.stats.not_found += len(mine) - len(records)
+
+        # 3) Wait for the fetches we joined
+        for sym, flight in waiting.items():
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            found[sym] = flight.record
+
+        out = {s: dict(found[s]) for s in ordered if found.get(s) is not None}
+        with self._lock:
+            self.stats.latencies_ms.append((time.perf_counter() - t0) * 1000.0)
+        return out
+
+    def _batch_get(self, symbols: List[str]) -> Tuple[Dict[str, Dict[str, Any]], int, int]:
+        """BatchGetItem in chunks of 100, UnprocessedKeys retried with backoff."""
+        records: Dict[str, Dict[str, Any]] = {}
+        calls = retried = 0
+        for i in range(0, len(symbols), BATCH_GET_LIMIT):
+            keys = [{"symbol": {"S": s}} for s in symbols[i : i + BATCH_GET_LIMIT]]
+            attempt = 0
+            while keys:
+                request = {"Keys": keys, "ConsistentRead": self.consistent_read}
+                resp = self.client.batch_get_item(RequestItems={self.table_name: request})
+                calls += 1
+                for item in resp.get("Responses", {}).get(self.table_name, []):
+                    record = from_ddb_item(item)
+                    records[record["symbol"]] = record
+                keys = resp.get("UnprocessedKeys", {}).get(self.table_name, {}).get("Keys", [])
+                if not keys:
+                    break
+                if attempt >= self.max_retries:
+                    raise RuntimeError(
+                        f"DynamoDB left {len(keys)} keys unprocessed after {attempt} retries"
+                    )
+                retried += len(keys)
+                time.sleep(backoff_delay(attempt, base=0.025, cap=2.0))
+                attempt += 1
+        return records, calls, retried
+
+
+_client: Optional[LatestPriceClient] = None
+_client_lock = threading.Lock()
+
+
+def get_latest_price_client() -> LatestPriceClient:
+    """Process-wide client over DDB_TABLE_LATEST_PRICES (one cache per process)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = LatestPriceClient(get_client("dynamodb"))
+        return _client
+
+
+def get_latest(symbols: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    return get_latest_price_client().get_latest(symbols)
+
+
+def reset_latest_price_client() -> None:
+    global _client
+    with _client_lock:
+        _client = None
@@ -0,0 +1,644 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from pipelines.common.batches import PriceBatch
+
+# Local, append-only tick store for curated PriceEvents (the curated/prices/ zone).
+#
+#   <root>/catalog.json                       string dictionaries + live zone objects loaded
+#   <root>/symbols/<SYMBOL>/<seq:08d>.seg     fixed-width columnar segments, one symbol each
+#
+# A segment is preallocated (as a sparse file) for `capacity` rows and laid out as
+#   header (64 B) | sparse index: ts_market of every `stride`-th row | one block per column
+# (ts_market, ts_ingest as int64 ns UTC, price as float64, currency/source as uint16 codes
+# into the catalog dictionaries). Every column is a fixed-offset view over one np.memmap,
+# so reads are zero-copy and only touch the pages a query needs. Rows in a segment are
+# sorted by ts_market: a lookup bisects the sparse index (a few KiB), then one
+# `stride`-row block (one page of timestamps at the default stride).
+#
+# Roll policy: a symbol appends to its last segment until that is full, or until a batch
+# brings ticks older than the segment's newest one; those start a new segment, so every
+# segment stays sorted (segments may then overlap; queries merge them). Compaction
+# rewrites a symbol's segments into full, non-overlapping ones and drops re-deliveries
+# (same ts_market and ts_ingest, the zone compactor's key); it is due once
+# TICK_COMPACT_MIN_SEGMENTS partially filled segments have piled up behind the last one.
+#
+# The row count in the header is the commit point of an append: a crash mid-append
+# leaves rows past the count, which are never read and get overwritten. One writer per
+# store; a reader (another process too) sees the rows committed when it opened a symbol.
+
+TICK_STORE_DIR = os.getenv("TICK_STORE_DIR", "data/ticks")
+TICK_SEGMENT_ROWS = int(os.getenv("TICK_SEGMENT_ROWS", "262144"))  # ~7 MiB per segment
+TICK_INDEX_STRIDE = int(os.getenv("TICK_INDEX_STRIDE", "512"))  # 512 x 8 B = one 4 KiB page
+TICK_COMPACT_MIN_SEGMENTS = int(os.getenv("TICK_COMPACT_MIN_SEGMENTS", "4"))
+TICK_MAX_OPEN_SEGMENTS = int(os.getenv("TICK_MAX_OPEN_SEGMENTS", "512"))  # each map holds an fd
+
+COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("ts_market", "<i8"),
+    ("ts_ingest", "<i8"),
+    ("price", "<f8"),
+    ("currency", "<u2"),
+    ("source", "<u2"),
+)
+DICTIONARY_COLUMNS = ("currency", "source")
+ROW_BYTES = sum(np.dtype(dt).itemsize for _, dt in COLUMNS)
+
+MAGIC = b"MDPTICK1"
+VERSION = 1
+_HEADER = np.dtype(
+    [
+        ("magic", "S8"),
+        ("version", "<u4"),
+        ("stride", "<u4"),
+        ("capacity", "<u8"),
+        ("count", "<u8"),
+        ("min_ts", "<i8"),
+        ("max_ts", "<i8"),
+        ("reserved", "V16"),
+    ]
+)
+_NAT = np.iinfo(np.int64).min  # NaT as int64; also "no lower bound"
+_MAX_TS = np.iinfo(np.int64).max
+_NS = 1_000_000_000
+
+TimeLike = Union[int, str, pd.Timestamp, Any]
+
+
+def _index_len(capacity: int, stride: int) -> int:
+    return -(-capacity // stride)
+
+
+def _to_ns(value: TimeLike) -> int:
+    """int (ns since epoch) | ISO string | datetime / Timestamp (naive = UTC) -> int ns."""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    ts = pd.Timestamp(value)
+    return (ts.tz_localize("UTC") if ts.tzinfo is None else ts).value
+
+
+def _parse_ns(cat: pd.Categorical) -> np.ndarray:
+    # Batches: parse each distinct timestamp string once; unparseable -> _NAT
+    parsed = pd.to_datetime(pd.Index(cat.categories), utc=True, format="ISO8601", errors="coerce")
+    ns = np.append(parsed.tz_convert(None).to_numpy(dtype="datetime64[ns]").view("int64"), _NAT)
+    return ns[cat.codes]
+
+
+def _iso_z(ns: np.ndarray) -> List[Optional[str]]:
+    """int64 ns -> ISO-8601 "Z" strings at the coarsest unit that keeps every value exact."""
+    ok = ns != _NAT
+    unit = "ns"
+    for name, step in (("s", _NS), ("ms", 1_000_000), ("us", 1_000)):
+        if not (ns[ok] % step).any():
+            unit = name
+            break
+    text = np.datetime_as_string(ns.astype("datetime64[ns]").astype(f"datetime64[{unit}]"))
+    return [f"{t}Z" if k else None for t, k in zip(text.tolist(), ok.tolist(), strict=True)]
+
+
+class Segment:
+    """
+    One segment file. Columns are mapped on first use; `count`/`min_ts`/`max_ts` mirror
+    the header, so pruning a query never touches the file.
+    """
+
+    def __init__(self, path: Path, header: np.void):
+        self.path = path
+        self.capacity = int(header["capacity"])
+        self.stride = int(header["stride"])
+        self.count = int(header["count"])
+        self.min_ts = int(header["min_ts"])
+        self.max_ts = int(header["max_ts"])
+        self._views: Optional[Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray]]] = None
+        self._mm: Optional[np.memmap] = None
+        self._writable = False
+
+    @classmethod
+    def create(cls, path: Path, capacity: int, stride: int) -> "Segment":
+        if capacity < 1 or stride < 1:
+            raise ValueError("capacity and stride must be >= 1")
+        header = np.zeros((), dtype=_HEADER)
+        header["magic"], header["version"] = MAGIC, VERSION
+        header["capacity"], header["stride"] = capacity, stride
+        header["min_ts"], header["max_ts"] = _NAT, _NAT
+        size = _HEADER.itemsize + 8 * _index_len(capacity, stride) + capacity * ROW_BYTES
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(header.tobytes())
+            f.truncate(size)  # sparse: unwritten rows take no disk
+        os.replace(tmp, path)
+        return cls(path, header)
+
+    @classmethod
+    def open(cls, path: Path) -> "Segment":
+        header = np.fromfile(path, dtype=_HEADER, count=1)
+        if len(header) != 1 or header[0]["magic"] != MAGIC:
+            raise ValueError(f"{path} is not a tick segment")
+        if int(header[0]["version"]) != VERSION:
+            raise ValueError(f"{path}: unsupported segment version {int(header[0]['version'])}")
+        return cls(path, header[0])
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.capacity
+
+    def _map(self, writable: bool = False):
+        if self._views is None or (writable and not self._writable):
+            self._mm = np.memmap(self.path, dtype=np.uint8, mode="r+" if writable else "r")
+            self._writable = writable
+            header = np.ndarray((), _HEADER, buffer=self._mm, offset=0)
+            n_index = _index_len(self.capacity, self.stride)
+            index = np.ndarray((n_index,), "<i8", buffer=self._mm, offset=_HEADER.itemsize)
+            offset = _HEADER.itemsize + 8 * n_index
+            cols = {}
+            for name, dt in COLUMNS:
+                cols[name] = np.ndarray((self.capacity,), dt, buffer=self._mm, offset=offset)
+                offset += self.capacity * np.dtype(dt).itemsize
+            self._views = (header, index, cols)
+        return self._views
+
+    def rows(self, lo: int, hi: int) -> Dict[str, np.ndarray]:
+        """Columns of rows [lo, hi) as read-only memmap views (no copy)."""
+        _, _, cols = self._map()
+        out = {}
+        for name, _ in COLUMNS:
+            view = cols[name][lo:hi]
+            view.flags.writeable = False  # the writer's map is r+; callers only read
+            out[name] = view
+        return out
+
+    def search(self, ts: int, side: str = "left") -> int:
+        """np.searchsorted(ts_market, ts, side) over the committed rows, via the index."""
+        _, index, cols = self._map()
+        n = self.count
+        b = int(np.searchsorted(index[: _index_len(n, self.stride)], ts, side=side))
+        lo, hi = max(b - 1, 0) * self.stride, min(b * self.stride, n)
+        return lo + int(np.searchsorted(cols["ts_market"][lo:hi], ts, side=side))
+
+    def append(self, cols: Dict[str, np.ndarray]) -> int:
+        """Write as many of the (ts_market-sorted) rows as fit; returns how many."""
+        n = min(len(cols["ts_market"]), self.capacity - self.count)
+        if n <= 0:
+            return 0
+        header, index, views = self._map(writable=True)
+        lo, hi = self.count, self.count + n
+        for name, _ in COLUMNS:
+            views[name][lo:hi] = cols[name][:n]
+        slots = np.arange(_index_len(lo, self.stride), _index_len(hi, self.stride))
+        index[slots] = views["ts_market"][slots * self.stride]
+        if not self.count:
+            self.min_ts = int(cols["ts_market"][0])
+        self.max_ts = int(cols["ts_market"][n - 1])
+        header["min_ts"], header["max_ts"] = self.min_ts, self.max_ts
+        header["count"] = hi  # commit point
+        self.count = hi
+        return n
+
+    def flush(self) -> None:
+        if self._mm is not None and self._writable:
+            self._mm.flush()
+
+    def release(self) -> None:
+        """Flush and drop the mapping (views already handed out stay valid)."""
+        self.flush()
+        self._views, self._mm, self._writable = None, None, False
+
+
+@dataclass(frozen=True)
+class Ticks:
+    """
+    Query result for one symbol, sorted by ts_market. Columns are read-only memmap views
+    when the rows come from a single segment, copies when segments had to be merged.
+    """
+
+    symbol: str
+    ts_market: np.ndarray  # int64 ns since epoch, UTC
+    ts_ingest: np.ndarray  # int64 ns since epoch, UTC
+    price: np.ndarray  # float64
+    currency: np.ndarray  # uint16 codes into dictionaries["currency"]
+    source: np.ndarray  # uint16 codes into dictionaries["source"]
+    dictionaries: Dict[str, List[str]]
+
+    def __len__(self) -> int:
+        return len(self.ts_market)
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """PriceEvent dicts (timestamps back as ISO-8601 "Z" strings)."""
+        if not len(self):
+            return []
+        names = {c: np.asarray(self.dictionaries[c], dtype=object) for c in DICTIONARY_COLUMNS}
+        cols = zip(
+            self.price.tolist(),
+            names["currency"][self.currency].tolist(),
+            _iso_z(self.ts_market),
+            _iso_z(self.ts_ingest),
+            names["source"][self.source].tolist(),
+            strict=True,
+        )
+        return [
+            {
+                "symbol": self.symbol,
+                "price": price,
+                "currency": currency,
+                "ts_market": ts_market,
+                "ts_ingest": ts_ingest,
+                "source": source,
+            }
+            for price, currency, ts_market, ts_ingest, source in cols
+        ]
+
+
+@dataclass
+class CompactStats:
+    segments_in: int = 0
+    segments_out: int = 0
+    rows_in: int = 0
+    rows_out: int = 0
+
+    @property
+    def duplicates(self) -> int:
+        return self.rows_in - self.rows_out
+
+
+class TickStore:
+    """
+    Append-only per-symbol tick segments under `root` (see the module comment).
+    Not thread-safe: one writer per store.
+    """
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        segment_rows: Optional[int] = None,
+        index_stride: Optional[int] = None,
+        compact_min_segments: Optional[int] = None,
+        max_open_segments: Optional[int] = None,
+        readonly: bool = False,
+    ):
+        self.root = Path(root or TICK_STORE_DIR)
+        self.segment_rows = segment_rows or TICK_SEGMENT_ROWS
+        self.index_stride = index_stride or TICK_INDEX_STRIDE
+        self.compact_min_segments = compact_min_segments or TICK_COMPACT_MIN_SEGMENTS
+        self.max_open_segments = max_open_segments or TICK_MAX_OPEN_SEGMENTS
+        self.readonly = readonly
+        self._segments: Dict[str, List[Segment]] = {}
+        self._open: "OrderedDict[int, Segment]" = OrderedDict()  # LRU of mapped segments
+        self._dirty = False  # new dictionary codes: saved before rows refer to them
+        self._loaded_dirty = False  # loaded keys: saved on flush()
+
+        path = self.root / "catalog.json"
+        catalog = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+        # Append-only lists: a code handed out (or stored in a segment) never changes
+        self.dictionaries: Dict[str, List[str]] = {
+            c: list(catalog.get("dictionaries", {}).get(c, [])) for c in DICTIONARY_COLUMNS
+        }
+        self._codes = {c: {v: i for i, v in enumerate(d)} for c, d in self.dictionaries.items()}
+        self.loaded: List[str] = list(catalog.get("loaded", []))  # zone objects filled in
+        self._loaded = set(self.loaded)
+
+    # ---- Layout ----
+
+    def _dir(self, symbol: str) -> Path:
+        if not symbol or "/" in symbol or symbol.startswith("."):
+            raise ValueError(f"invalid symbol for the tick store: {symbol!r}")
+        return self.root / "symbols" / symbol
+
+    def symbols(self) -> List[str]:
+        base = self.root / "symbols"
+        on_disk = {p.name for p in base.iterdir() if p.is_dir()} if base.exists() else set()
+        return sorted(on_disk | {s for s, segs in self._segments.items() if segs})
+
+    def segments(self, symbol: str) -> List[Segment]:
+        symbol = symbol.strip().upper()
+        if symbol not in self._segments:
+            paths = sorted(self._dir(symbol).glob("*.seg"))
+            self._segments[symbol] = [Segment.open(p) for p in paths]
+        return self._segments[symbol]
+
+    def _touch(self, seg: Segment) -> Segment:
+        self._open[id(seg)] = seg
+        self._open.move_to_end(id(seg))
+        while len(self._open) > self.max_open_segments:
+            _, old = self._open.popitem(last=False)
+            old.release()
+        return seg
+
+    def _forget(self, seg: Segment) -> None:
+        self._open.pop(id(seg), None)
+        seg.release()
+
+    def _check_writable(self) -> None:
+        if self.readonly:
+            raise RuntimeError("tick store was opened readonly")
+
+    def _new_segment(self, symbol: str, suffix: str = "") -> Segment:
+        directory = self._dir(symbol)
+        directory.mkdir(parents=True, exist_ok=True)
+        names = [p.name.split(".")[0] for p in directory.glob("*.seg*")]
+        seq = max((int(n) for n in names if n.isdigit()), default=-1) + 1
+        path = directory / f"{seq:08d}.seg{suffix}"
+        return Segment.create(path, self.segment_rows, self.index_stride)
+
+    # ---- Writes ----
+
+    def _encode(self, name: str, cat: pd.Categorical) -> np.ndarray:
+        codes, values = self._codes[name], self.dictionaries[name]
+        lut = np.zeros(len(cat.categories) + 1, dtype=np.uint16)
+        for i, value in enumerate(cat.categories):
+            if value not in codes:
+                if len(values) > np.iinfo(np.uint16).max:
+                    raise ValueError(f"more than 65536 distinct {name} values")
+                codes[value] = len(values)
+                values.append(value)
+                self._dirty = True
+            lut[i] = codes[value]
+        return lut[cat.codes]
+
+    def append(self, batch: Union[PriceBatch, Sequence[Dict[str, Any]]]) -> int:
+        """
+        Append curated PriceEvents (dict rows or a PriceBatch); returns the rows stored.
+        Rows whose ts_market does not parse are skipped.
+        """
+        self._check_writable()
+        if not isinstance(batch, PriceBatch):
+            batch = PriceBatch.from_records(batch)
+        if not len(batch):
+            return 0
+        ts_market = _parse_ns(batch.ts_market)
+        cols = {
+            "ts_market": ts_market,
+            "ts_ingest": _parse_ns(batch.ts_ingest),
+            "price": np.asarray(batch.price, dtype=np.float64),
+            "currency": self._encode("currency", batch.currency),
+            "source": self._encode("source", batch.source),
+        }
+        if self._dirty:
+            self._save_catalog()  # new codes are durable before any row refers to them
+
+        keep = np.flatnonzero(ts_market != _NAT)
+        codes = batch.symbol.codes[keep]
+        order = keep[np.lexsort((ts_market[keep], codes))]  # stable: ties keep arrival order
+        codes = batch.symbol.codes[order]
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        ends = np.r_[starts[1:], len(order)]
+        for lo, hi in zip(starts.tolist(), ends.tolist(), strict=True):
+            rows = order[lo:hi]
+            symbol = batch.symbol.categories[codes[lo]]
+            self._append_symbol(symbol, {name: col[rows] for name, col in cols.items()})
+        return len(order)
+
+    def _append_symbol(self, symbol: str, cols: Dict[str, np.ndarray]) -> None:
+        segments = self.segments(symbol)
+        ts, done = cols["ts_market"], 0
+        while done < len(ts):
+            seg = segments[-1] if segments else None
+            if seg is None or seg.full or (seg.count and ts[done] < seg.max_ts):
+                seg = self._new_segment(symbol)  # roll: full, or older ticks than it holds
+                segments.append(seg)
+            self._touch(seg)
+            done += seg.append({name: col[done:] for name, col in cols.items()})
+
+    def mark_loaded(self, keys: Sequence[str]) -> None:
+        for key in keys:
+            if key not in self._loaded:
+                self._loaded.add(key)
+                self.loaded.append(key)
+                self._loaded_dirty = True
+
+    def retain_loaded(self, live: Set[str]) -> None:
+        """
+        Forget loaded keys that left the zone. A compaction manifest consumed them and its
+        output (marked loaded in the same fill) stands for them, so the catalog tracks one
+        key per live object instead of every object ever loaded.
+        """
+        kept = [key for key in self.loaded if key in live]
+        if len(kept) != len(self.loaded):
+            self.loaded, self._loaded = kept, set(kept)
+            self._loaded_dirty = True
+
+    def _save_catalog(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.root / "catalog.json"
+        tmp = path.with_name(path.name + ".tmp")
+        payload = {"version": VERSION, "dictionaries": self.dictionaries, "loaded": self.loaded}
+        tmp.write_text(json.dumps(payload), encoding="utf-8")
+        os.replace(tmp, path)
+        self._dirty = self._loaded_dirty = False
+
+    def flush(self) -> None:
+        """msync the mapped segments, then persist the catalog."""
+        for seg in self._open.values():
+            seg.flush()
+        if (self._dirty or self._loaded_dirty) and not self.readonly:
+            self._save_catalog()
+
+    def close(self) -> None:
+        self.flush()
+        for seg in self._open.values():
+            seg.release()
+        self._open.clear()
+
+    # ---- Reads ----
+
+    def _ticks(self, symbol: str, parts: List[Dict[str, np.ndarray]]) -> Ticks:
+        if len(parts) == 1:
+            cols = parts[0]  # zero-copy
+        elif not parts:
+            cols = {name: np.zeros(0, dtype=dt) for name, dt in COLUMNS}
+        else:
+            cols = {name: np.concatenate([p[name] for p in parts]) for name, _ in COLUMNS}
+            ts = cols["ts_market"]
+            if (ts[1:] < ts[:-1]).any():  # overlapping segments (late ticks, not compacted)
+                order = np.argsort(ts, kind="stable")
+                cols = {name: col[order] for name, col in cols.items()}
+        return Ticks(symbol=symbol, dictionaries=self.dictionaries, **cols)
+
+    def range(
+        self, symbol: str, start: Optional[TimeLike] = None, end: Optional[TimeLike] = None
+    ) -> Ticks:
+        """Ticks of `symbol` with start <= ts_market < end (None leaves that side open)."""
+        symbol = symbol.strip().upper()
+        lo_ts = _NAT if start is None else _to_ns(start)
+        hi_ts = _MAX_TS if end is None else _to_ns(end)
+        parts = []
+        for seg in self.segments(symbol):
+            if not seg.count or seg.max_ts < lo_ts or seg.min_ts >= hi_ts:
+                continue  # pruned on the cached header
+            self._touch(seg)
+            lo, hi = seg.search(lo_ts, "left"), seg.search(hi_ts, "left")
+            if hi > lo:
+                parts.append(seg.rows(lo, hi))
+        return self._ticks(symbol, parts)
+
+    def as_of(self, symbol: str, ts: TimeLike) -> Optional[Dict[str, Any]]:
+        """The last tick of `symbol` at or before `ts` (point-in-time price), or None."""
+        symbol, at = symbol.strip().upper(), _to_ns(ts)
+        best: Optional[Tuple[int, Segment, int]] = None
+        for seg in self.segments(symbol):
+            if not seg.count or seg.min_ts > at:
+                continue
+            self._touch(seg)
+            i = seg.search(at, "right") - 1
+            found = int(seg.rows(i, i + 1)["ts_market"][0])
+            if best is None or found >= best[0]:  # ties: the later segment arrived later
+                best = (found, seg, i)
+        if best is None:
+            return None
+        _, seg, i = best
+        return self._ticks(symbol, [seg.rows(i, i + 1)]).to_records()[0]
+
+    # ---- Compaction ----
+
+    def needs_compaction(self, symbol: str) -> bool:
+        segments = self.segments(symbol)
+        partial = sum(1 for seg in segments[:-1] if not seg.full)
+        return partial >= self.compact_min_segments
+
+    def compact(self, symbol: str) -> CompactStats:
+        """
+        Rewrite `symbol` into full, non-overlapping segments sorted by (ts_market,
+        ts_ingest), dropping re-deliveries. New segments are staged as `.part` files and
+        renamed in before the old ones are removed; a crash in between leaves duplicates
+        that the next compaction drops.
+        """
+        self._check_writable()
+        symbol = symbol.strip().upper()
+        old = list(self.segments(symbol))
+        for stale in self._dir(symbol).glob("*.part"):
+            stale.unlink()  # staged by an interrupted compaction
+        ticks = self.range(symbol)
+        order = np.lexsort((ticks.ts_ingest, ticks.ts_market))  # stable: first copy wins
+        ts_m, ts_i = ticks.ts_market[order], ticks.ts_ingest[order]
+        dup = np.r_[False, (ts_m[1:] == ts_m[:-1]) & (ts_i[1:] == ts_i[:-1])]
+        order = order[~dup]
+        stats = CompactStats(segments_in=len(old), rows_in=len(ticks), rows_out=len(order))
+
+        new: List[Segment] = []
+        for lo in range(0, len(order), self.segment_rows):
+            rows = order[lo : lo + self.segment_rows]
+            seg = self._new_segment(symbol, suffix=".part")
+            seg.append({name: getattr(ticks, name)[rows] for name, _ in COLUMNS})
+            seg.release()
+            new.append(seg)
+        for seg in new:
+            final = seg.path.with_name(seg.path.name[: -len(".part")])
+            os.replace(seg.path, final)
+            seg.path = final
+        for seg in old:
+            self._forget(seg)
+            seg.path.unlink()
+        self._segments[symbol] = new
+        stats.segments_out = len(new)
+        return stats
+
+    def compact_due(self) -> Dict[str, CompactStats]:
+        """Compact every symbol the policy says is due."""
+        return {s: self.compact(s) for s in self.symbols() if self.needs_compaction(s)}
+
+
+@dataclass
+class FillStats:
+    objects: int = 0  # zone objects read
+    skipped: int = 0  # already loaded, or a compacted output of loaded objects
+    records: int = 0
+    stored: int = 0
+    seconds: float = 0.0
+
+
+def fill_from_zone(
+    store: TickStore,
+    zone_store=None,
+    zone: str = "curated/prices",
+    batch_size: int = 100_000,
+) -> FillStats:
+    """
+    Load a streaming zone's live objects (the small prices_<ts> JSONL files and any
+    compacted outputs, as the zone compactor lists them) into `store`, `batch_size`
+    records per append. Objects already loaded are skipped, and so are compacted outputs
+    whose inputs were all loaded, so re-running after new ticks land (or after a zone
+    compaction) only reads what is new. The loaded keys are then cut back to the live
+    listing and saved once, on the final flush; a crash before it re-reads this run's
+    objects, whose re-deliveries compaction drops.
+    """
+    from pipelines.batch.compaction.compactor import LocalStore, iter_records, read_listing
+
+    t0 = time.perf_counter()
+    zone_store = zone_store or LocalStore("data")
+    listing = read_listing(zone_store, zone)
+    replaced = {m.output: m.inputs for m in listing.manifests.values()}
+    stats = FillStats()
+    records: List[Dict[str, Any]] = []
+    pending: List[str] = []  # keys whose records are all in `records` or stored
+
+    def _append() -> None:
+        stats.stored += store.append(records)
+        stats.records += len(records)
+        records.clear()
+        store.mark_loaded(pending)
+        pending.clear()
+
+    for key in listing.live():
+        inputs = replaced.get(key)
+        if key in store._loaded or (inputs and all(k in store._loaded for k in inputs)):
+            stats.skipped += 1
+            store.mark_loaded([key])
+            continue
+        for record in iter_records(zone_store, key):
+            records.append(record)
+            if len(records) >= batch_size:
+                _append()
+        pending.append(key)
+        stats.objects += 1
+    if records or pending:
+        _append()
+    store.retain_loaded(set(listing.live()))
+    store.flush()
+    stats.seconds = time.perf_counter() - t0
+    return stats
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    from pipelines.batch.compaction.compactor import LocalStore
+
+    parser = argparse.ArgumentParser(description="Local tick store over curated/prices")
+    parser.add_argument("command", choices=["fill", "compact", "query"])
+    parser.add_argument("--root", default=TICK_STORE_DIR)
+    parser.add_argument("--zone-root", default="data", help="local root holding curated/prices")
+    parser.add_argument("--symbol")
+    parser.add_argument("--start")
+    parser.add_argument("--end")
+    args = parser.parse_args(argv)
+
+    store = TickStore(args.root, readonly=args.command == "query")
+    if args.command == "fill":
+        stats = fill_from_zone(store, LocalStore(args.zone_root))
+        print(
+            f"TICK_FILL objects={stats.objects} skipped={stats.skipped} records={stats.records} "
+            f"stored={stats.stored} seconds={stats.seconds:.2f}"
+        )
+    if args.command in ("fill", "compact"):
+        for symbol, c in store.compact_due().items():
+            print(
+                f"TICK_COMPACT {symbol}: {c.segments_in} -> {c.segments_out} segments, "
+                f"{c.duplicates} duplicates dropped"
+            )
+        store.close()
+        return
+    if not args.symbol:
+        parser.error("query needs --symbol")
+    for record in store.range(args.symbol, args.start, args.end).to_records():
+        print(json.dumps(record))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+from __future__ import annotations
+
+import io
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from botocore.exceptions import ClientError
+
+from pipelines.common.batches import PriceBatch
+from pipelines.common.validation import RowValidation
+
+# Stateful checks after the static quality suite. LastPriceIndex keeps, per symbol, the
+# last accepted price and ts_market, an EWMA variance of its log returns and a few
+# counters, in flat NumPy arrays addressed through a symbol -> slot dict. check() gathers
+# the batch's slots once and evaluates every row column-wise, so a tick costs one dict
+# lookup per distinct symbol plus a handful of array ops. Rows are flagged for:
+#   price_jump     |log return| > ANOMALY_SIGMA x EWMA volatility (a fixed
+#                  ANOMALY_MAX_JUMP_RATIO until ANOMALY_MIN_OBSERVATIONS returns are seen)
+#   ts_regression  ts_market older than the last accepted tick
+#   stale_repeat   same price on a newer ts_market more than ANOMALY_MAX_REPEATS times
+# An exact re-delivery (same price, same ts_market) passes without touching the state.
+# After ANOMALY_MAX_REJECTS jumps in a row the next tick re-anchors the symbol (a split
+# or a real gap must not be quarantined forever). The index is module state, so it
+# survives warm invocations; snapshot()/restore() round-trip it through one .npz object.
+
+ANOMALY_CHECKS_ENABLED = os.getenv("ANOMALY_CHECKS_ENABLED", "true").strip().lower() == "true"
+ANOMALY_SIGMA = float(os.getenv("ANOMALY_SIGMA", "6"))
+ANOMALY_MIN_OBSERVATIONS = int(os.getenv("ANOMALY_MIN_OBSERVATIONS", "10"))
+ANOMALY_MAX_JUMP_RATIO = float(os.getenv("ANOMALY_MAX_JUMP_RATIO", "2"))  # during warm-up
+ANOMALY_MIN_VOLATILITY = float(os.getenv("ANOMALY_MIN_VOLATILITY", "0.002"))  # per tick
+ANOMALY_EWMA_LAMBDA = float(os.getenv("ANOMALY_EWMA_LAMBDA", "0.94"))  # RiskMetrics decay
+ANOMALY_MAX_REPEATS = int(os.getenv("ANOMALY_MAX_REPEATS", "3"))
+ANOMALY_MAX_REJECTS = int(os.getenv("ANOMALY_MAX_REJECTS", "3"))
+# S3 key (in S3_BUCKET_NAME) of the snapshot a cold container restores; empty: no snapshots
+ANOMALY_SNAPSHOT_KEY = os.getenv("ANOMALY_SNAPSHOT_KEY", "").strip()
+ANOMALY_SNAPSHOT_INTERVAL_SECONDS = float(os.getenv("ANOMALY_SNAPSHOT_INTERVAL_SECONDS", "300"))
+
+JUMP = "price_jump:price"
+REGRESSION = "ts_regression:ts_market"
+STALE = "stale_repeat:price"
+
+# Per-symbol state columns (also the snapshot arrays, next to "symbols")
+STATE: Tuple[Tuple[str, type], ...] = (
+    ("price", np.float64),  # last accepted price (NaN: never seen)
+    ("ts", np.int64),  # last accepted ts_market, epoch ns
+    ("var", np.float64),  # EWMA variance of log returns
+    ("n", np.int32),  # returns folded into var
+    ("repeats", np.int32),  # accepted ticks in a row with an unchanged price
+    ("rejects", np.int32),  # price_jump flags in a row
+)
+
+
+def _ts_ns(cat: pd.Categorical) -> np.ndarray:
+    # Parse each distinct ts_market once; unparseable -> INT64 min (the static suite fails those)
+    parsed = pd.to_datetime(pd.Index(cat.categories), errors="coerce", utc=True)
+    values = np.where(parsed.isna(), np.iinfo(np.int64).min, parsed.asi8)
+    codes = np.asarray(cat.codes)
+    return np.where(codes >= 0, values[codes], np.iinfo(np.int64).min)
+
+
+@dataclass
+class AnomalyCheck:
+    """check() result: the merged verdict, plus the state update commit() applies."""
+
+    verdict: RowValidation
+    flagged: Dict[str, int] = field(default_factory=dict)  # anomaly label -> rows
+    slots: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.intp))
+    state: Dict[str, np.ndarray] = field(default_factory=dict)  # new values for `slots`
+
+
+class LastPriceIndex:
+    """Per-symbol last accepted tick and volatility estimate, in flat arrays."""
+
+    def __init__(
+        self,
+        sigma: float = ANOMALY_SIGMA,
+        min_observations: int = ANOMALY_MIN_OBSERVATIONS,
+        max_jump_ratio: float = ANOMALY_MAX_JUMP_RATIO,
+        min_volatility: float = ANOMALY_MIN_VOLATILITY,
+        ewma_lambda: float = ANOMALY_EWMA_LAMBDA,
+        max_repeats: int = ANOMALY_MAX_REPEATS,
+        max_rejects: int = ANOMALY_MAX_REJECTS,
+        capacity: int = 1024,
+    ):
+        if not 0.0 < ewma_lambda < 1.0:
+            raise ValueError("ewma_lambda must be in (0, 1)")
+        if max_jump_ratio <= 1.0:
+            raise ValueError("max_jump_ratio must be > 1")
+        self.sigma = sigma
+        self.min_observations = min_observations
+        self.max_jump = float(np.log(max_jump_ratio))
+        self.min_volatility = min_volatility
+        self.ewma_lambda = ewma_lambda
+        self.max_repeats = max_repeats
+        self.max_rejects = max_rejects
+        self._slots: Dict[str, int] = {}
+        self._symbols: List[str] = []
+        self._arrays = {name: self._blank(name, max(1, capacity)) for name, _ in STATE}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _blank(name: str, size: int) -> np.ndarray:
+        dtype = dict(STATE)[name]
+        return np.full(size, np.nan) if name == "price" else np.zeros(size, dtype=dtype)
+
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+    def get(self, symbol: str) -> Optional[Dict[str, float]]:
+        """The state of one symbol (None if it has no accepted tick yet)."""
+        slot = self._slots.get(symbol)
+        if slot is None or np.isnan(self._arrays["price"][slot]):
+            return None
+        return {name: self._arrays[name][slot].item() for name, _ in STATE}
+
+    def _slots_for(self, symbols: List[str]) -> np.ndarray:
+        # Caller holds the lock; new symbols get blank slots (arrays double when full)
+        out = np.empty(len(symbols), dtype=np.intp)
+        for i, s in enumerate(symbols):
+            slot = self._slots.get(s)
+            if slot is None:
+                slot = self._slots[s] = len(self._symbols)
+                self._symbols.append(s)
+            out[i] = slot
+        size = len(self._arrays["price"])
+        if len(self._symbols) > size:
+            grown = max(len(self._symbols), 2 * size)
+            for name, _ in STATE:
+                extended = self._blank(name, grown)
+                extended[:size] = self._arrays[name]
+                self._arrays[name] = extended
+        return out
+
+    def check(self, batch: PriceBatch, prior: Optional[RowValidation] = None) -> AnomalyCheck:
+        """
+        Flag the rows of `batch` that passed `prior` (all rows when None) and merge the
+        flags into a new RowValidation. Rows of one symbol are evaluated in batch order,
+        each against the state the previous accepted row left. Nothing is stored until
+        commit(), so a failed write leaves the index as it was.
+        """
+        total = len(batch)
+        mask = np.ones(total, dtype=bool) if prior is None else prior.mask.copy()
+        reasons = {} if prior is None else {i: list(r) for i, r in prior.reasons.items()}
+        counts = {} if prior is None else dict(prior.counts)
+        rows = np.flatnonzero(mask)
+        if not len(rows):
+            return AnomalyCheck(RowValidation(mask=mask, reasons=reasons, counts=counts))
+
+        codes = np.asarray(batch.symbol.codes)[rows]
+        used, local = np.unique(codes, return_inverse=True)
+        with self._lock:
+            slots = self._slots_for([batch.symbol.categories[c] for c in used])
+            state = {name: self._arrays[name][slots].copy() for name, _ in STATE}
+        price = np.asarray(batch.price, dtype=np.float64)[rows]
+        ts = _ts_ns(batch.ts_market)[rows]
+
+        # Occurrence rank of each row within its symbol: round k sees every symbol's
+        # k-th row at once, so the per-symbol recurrence stays vectorized
+        order = np.argsort(local, kind="stable")
+        sorted_local = local[order]
+        first = np.r_[True, sorted_local[1:] != sorted_local[:-1]]
+        rank = np.empty(len(rows), dtype=np.intp)
+        rank[order] = np.arange(len(rows)) - np.maximum.accumulate(
+            np.where(first, np.arange(len(rows)), 0)
+        )
+
+        flags = np.zeros(len(rows), dtype=np.int8)  # 0 ok, 1 jump, 2 regression, 3 stale
+        for k in range(int(rank.max()) + 1):
+            at = np.flatnonzero(rank == k)
+            flags[at] = self._step(state, local[at], price[at], ts[at])
+
+        flagged: Dict[str, int] = {}
+        for code, label in ((1, JUMP), (2, REGRESSION), (3, STALE)):
+            hit = rows[flags == code]
+            if len(hit):
+                flagged[label] = len(hit)
+                counts[label] = counts.get(label, 0) + len(hit)
+                for i in hit.tolist():
+                    reasons.setdefault(i, []).append(label)
+        mask[rows[flags > 0]] = False
+        verdict = RowValidation(mask=mask, reasons=reasons, counts=counts)
+        return AnomalyCheck(verdict=verdict, flagged=flagged, slots=slots, state=state)
+
+    def _step(
+        self, state: Dict[str, np.ndarray], k: np.ndarray, price: np.ndarray, ts: np.ndarray
+    ) -> np.ndarray:
+        """One row per symbol (`k` unique): flag codes, and the accepted rows fold into `state`."""
+        last, last_ts = state["price"][k], state["ts"][k]
+        var, n = state["var"][k], state["n"][k]
+        repeats, rejects = state["repeats"][k], state["rejects"][k]
+
+        seen = ~np.isnan(last)
+        same = seen & (price == last)
+        duplicate = same & (ts == last_ts)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = np.where(seen, np.log(price / last), 0.0)
+        limit = np.where(
+            n >= self.min_observations,
+            self.sigma * np.maximum(np.sqrt(var), self.min_volatility),
+            self.max_jump,
+        )
+        regression = seen & (ts < last_ts)
+        jump = seen & ~regression & (np.abs(r) > limit)
+        reanchor = jump & (rejects >= self.max_rejects)
+        jump &= ~reanchor
+        stale = same & ~regression & (ts > last_ts) & (repeats >= self.max_repeats)
+        codes = np.select([jump, regression, stale], [1, 2, 3], 0).astype(np.int8)
+
+        accept = (codes == 0) & ~duplicate
+        fresh = accept & (~seen | reanchor)  # first tick, or re-anchored: warm up again
+        fold = accept & ~fresh
+        lam = self.ewma_lambda
+        new_var = np.where(n == 0, r * r, lam * var + (1.0 - lam) * (r * r))
+        state["var"][k] = np.where(fold, new_var, np.where(fresh, 0.0, var))
+        state["n"][k] = np.where(fold, n + 1, np.where(fresh, 0, n))
+        state["repeats"][k] = np.where(accept, np.where(fold & same, repeats + 1, 0), repeats)
+        state["rejects"][k] = np.where(accept, 0, np.where(codes == 1, rejects + 1, rejects))
+        state["price"][k] = np.where(accept, price, last)
+        state["ts"][k] = np.where(accept, ts, last_ts)
+        return codes
+
+    def commit(self, result: AnomalyCheck) -> None:
+        """Store the state check() computed (call once the accepted rows have landed)."""
+        if not len(result.slots):
+            return
+        with self._lock:
+            for name, values in result.state.items():
+                self._arrays[name][result.slots] = values
+
+    def snapshot(self, symbols: Optional[Iterable[str]] = None) -> bytes:
+        """The index (or just `symbols`) as one uncompressed .npz document."""
+        with self._lock:
+            if symbols is None:
+                names = list(self._symbols)
+                slots = np.arange(len(names), dtype=np.intp)
+            else:
+                names = [s for s in dict.fromkeys(symbols) if s in self._slots]
+                slots = np.asarray([self._slots[s] for s in names], dtype=np.intp)
+            arrays = {name: self._arrays[name][slots] for name, _ in STATE}
+        buf = io.BytesIO()
+        np.savez(buf, symbols=np.asarray(names, dtype=str), **arrays)
+        return buf.getvalue()
+
+    def merge(self, data: bytes) -> int:
+        """Load a snapshot's symbols that this index doesn't know yet; returns how many."""
+        with np.load(io.BytesIO(data), allow_pickle=False) as doc:
+            names = doc["symbols"].tolist()
+            arrays = {name: doc[name] for name, _ in STATE}
+        with self._lock:
+            keep = [i for i, s in enumerate(names) if s not in self._slots]
+            slots = self._slots_for([names[i] for i in keep])
+            for name, _ in STATE:
+                self._arrays[name][slots] = arrays[name][keep]
+        return len(keep)
+
+    @classmethod
+    def restore(cls, data: bytes, **kwargs) -> "LastPriceIndex":
+        index = cls(**kwargs)
+        index.merge(data)
+        return index
+
+
+def snapshot_key(shard: Optional[str] = None) -> str:
+    # One snapshot per fan-out shard: each holds exactly that shard's symbols
+    if not shard:
+        return ANOMALY_SNAPSHOT_KEY
+    stem, dot, ext = ANOMALY_SNAPSHOT_KEY.rpartition(".")
+    return f"{stem}_{shard}.{ext}" if dot else f"{ANOMALY_SNAPSHOT_KEY}_{shard}"
+
+
+_index: Optional[LastPriceIndex] = None
+_index_lock = threading.Lock()
+_restored: Dict[str, bool] = {}  # snapshot key -> merged into _index
+_saved_at: Dict[str, float] = {}  # snapshot key -> time.monotonic() of the last save
+
+
+def get_last_price_index(s3=None, bucket: str = "", shard: Optional[str] = None):
+    """
+    Process-wide index (None when ANOMALY_CHECKS_ENABLED=false). With ANOMALY_SNAPSHOT_KEY
+    set, the shard's snapshot is merged in the first time this container sees the shard.
+    """
+    global _index
+    if not ANOMALY_CHECKS_ENABLED:
+        return None
+    with _index_lock:
+        if _index is None:
+            _index = LastPriceIndex()
+        index = _index
+        key = snapshot_key(shard) if ANOMALY_SNAPSHOT_KEY and s3 is not None else ""
+        if key and not _restored.get(key):
+            _restored[key] = True
+            try:
+                data = s3.get_object(Bucket=bucket, Key=key)["Body"].read()
+            except ClientError as e:
+                if e.response.get("Error", {}).get("Code") not in ("NoSuchKey", "404"):
+                    raise
+                data = b""
+            if data:
+                print(f"ANOMALY_RESTORE key={key} symbols={index.merge(data)}")
+    return index
+
+
+def save_snapshot(
+    index: LastPriceIndex, s3, bucket: str, symbols: Iterable[str], shard: Optional[str] = None
+) -> Optional[str]:
+    """Write the shard's snapshot if ANOMALY_SNAPSHOT_INTERVAL_SECONDS have passed."""
+    if not ANOMALY_SNAPSHOT_KEY:
+        return None
+    key = snapshot_key(shard)
+    now = time.monotonic()
+    with _index_lock:
+        last = _saved_at.get(key)
+        if last is not None and now - last < ANOMALY_SNAPSHOT_INTERVAL_SECONDS:
+            return None
+        _saved_at[key] = now
+    # A shard's snapshot holds its own symbols; without fan-out, the whole index
+    body = index.snapshot(symbols if shard else None)
+    s3.put_object(Bucket=bucket, Key=key, Body=body)
+    return key
+
+
+def reset_last_price_index() -> None:
+    global _index
+    with _index_lock:
+        _index = None
+        _restored.clear()
+        _saved_at.clear()
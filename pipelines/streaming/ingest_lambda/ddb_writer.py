@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from boto3.dynamodb.types import TypeSerializer
+from botocore.exceptions import ClientError
+
+from pipelines.common.ratelimit import backoff_delay
+
+BATCH_SIZE = 25  # DynamoDB BatchWriteItem hard limit
+
+# Curated PriceEvent contract -> DynamoDB attribute type (see schemas/price_event.schema.json)
+CURATED_FIELD_TYPES: Dict[str, str] = {
+    "symbol": "S",
+    "price": "N",
+    "currency": "S",
+    "ts_market": "S",
+    "ts_ingest": "S",
+    "source": "S",
+}
+
+# Only overwrite when the incoming event is strictly newer than what's being served.
+NEWER_THAN_CURRENT = (
+    "attribute_not_exists(#symbol) OR #ts_market < :ts_market "
+    "OR (#ts_market = :ts_market AND #ts_ingest < :ts_ingest)"
+)
+
+_fallback = TypeSerializer()
+
+
+def _string(v: Any) -> Dict[str, str]:
+    return {"S": str(v)}
+
+
+def _number(v: Any) -> Dict[str, str]:
+    # Same digits as Decimal(str(float)): the value users expect, no binary noise
+    return {"N": str(v)}
+
+
+_ENCODERS: Dict[str, Callable[[Any], Dict[str, str]]] = {"S": _string, "N": _number}
+_FIELD_ENCODERS = [(k, _ENCODERS[t]) for k, t in CURATED_FIELD_TYPES.items()]
+
+
+def _to_decimal(obj: Any) -> Any:
+    if isinstance(obj, float):
+        return Decimal(str(obj))
+    if isinstance(obj, dict):
+        return {k: _to_decimal(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_to_decimal(v) for v in obj]
+    return obj
+
+
+def to_ddb_item(record: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Curated record -> low-level DynamoDB item.
+    Known schema fields use precompiled encoders; anything extra falls back to boto3's
+    generic serializer.
+    """
+    item = {k: enc(record[k]) for k, enc in _FIELD_ENCODERS if record.get(k) is not None}
+    if len(record) != len(item):
+        for k, v in record.items():
+            if k not in item and v is not None:
+                item[k] = _fallback.serialize(_to_decimal(v))
+    return item
+
+
+@dataclass
+class WriteStats:
+    written: int = 0
+    skipped_stale: int = 0
+    retried: int = 0
+
+
+def _version(record: Dict[str, Any]) -> Tuple[str, str]:
+    return str(record.get("ts_market", "")), str(record.get("ts_ingest", ""))
+
+
+def _latest_per_symbol(records: Iterable[Dict[str, Any]], stats: WriteStats) -> List[Dict]:
+    # A batch may not contain the same key twice; keep the newest event per symbol.
+    latest: Dict[str, Dict[str, Any]] = {}
+    for r in records:
+        sym = r["symbol"]
+        current = latest.get(sym)
+        if current is None:
+            latest[sym] = r
+            continue
+        stats.skipped_stale += 1
+        if _version(r) > _version(current):
+            latest[sym] = r
+    return list(latest.values())
+
+
+def _write_chunk(client, table_name: str, chunk: List[Dict], max_retries: int) -> Tuple[int, int]:
+    """One BatchWriteItem call plus UnprocessedItems retries. Returns (written, retried)."""
+    requests = [{"PutRequest": {"Item": it}} for it in chunk]
+    written = retried = attempt = 0
+    while requests:
+        resp = client.batch_write_item(RequestItems={table_name: requests})
+        unprocessed = resp.get("UnprocessedItems", {}).get(table_name, [])
+        written += len(requests) - len(unprocessed)
+        if not unprocessed:
+            break
+        if attempt >= max_retries:
+            raise RuntimeError(
+                f"DynamoDB left {len(unprocessed)} items unprocessed after {attempt} retries"
+            )
+        retried += len(unprocessed)
+        time.sleep(backoff_delay(attempt, base=0.025, cap=2.0))
+        attempt += 1
+        requests = unprocessed
+    return written, retried
+
+
+def _conditional_put(client, table_name: str, item: Dict) -> bool:
+    try:
+        client.put_item(
+            TableName=table_name,
+            Item=item,
+            ConditionExpression=NEWER_THAN_CURRENT,
+            ExpressionAttributeNames={
+                "#symbol": "symbol",
+                "#ts_market": "ts_market",
+                "#ts_ingest": "ts_ingest",
+            },
+            ExpressionAttributeValues={
+                ":ts_market": item["ts_market"],
+                ":ts_ingest": item["ts_ingest"],
+            },
+        )
+        return True
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") == "ConditionalCheckFailedException":
+            return False
+        raise
+
+
+def write_latest_prices(
+    client,
+    table_name: str,
+    records: Iterable[Dict[str, Any]],
+    conditional: bool = False,
+    max_retries: int = 8,
+    max_workers: int = 8,
+) -> WriteStats:
+    """
+    Serve curated events into the latest_prices table using a low-level DynamoDB client.
+
+    default:      BatchWriteItem in chunks of 25, UnprocessedItems retried with backoff
+    conditional:  one conditional PutItem per symbol that only lands if (ts_market, ts_ingest)
+                  is newer than the stored item, so late or duplicate events never regress
+                  the serving table
+
+    Chunks / conditional puts run on a small thread pool (boto3 clients are thread-safe).
+    """
+    stats = WriteStats()
+    items = [to_ddb_item(r) for r in _latest_per_symbol(records, stats)]
+    if not items:
+        return stats
+
+    if not conditional:
+        chunks = [items[i : i + BATCH_SIZE] for i in range(0, len(items), BATCH_SIZE)]
+        workers = max(1, min(max_workers, len(chunks)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for written, retried in pool.map(
+                lambda c: _write_chunk(client, table_name, c, max_retries), chunks
+            ):
+                stats.written += written
+                stats.retried += retried
+        return stats
+
+    workers = max(1, min(max_workers, len(items)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for landed in pool.map(lambda it: _conditional_put(client, table_name, it), items):
+            if landed:
+                stats.written += 1
+            else:
+                stats.skipped_stale += 1
+    return stats
@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from pipelines.common.shards import Shard, plan_shards
+
+# Coordinator / worker fan-out for the streaming ingest. A coordinator invocation
+# ({"mode": "coordinator"}) loads the symbol universe, splits it into at most as many
+# shards as can run at once (one wave, so the coordinator waits for a single worker
+# timeout), gives each shard an equal slice of the provider quota, and runs one worker
+# invocation per shard ({"symbols": [...], "shard": ..., "rate_per_minute": ...}). The
+# workers' outputs are folded into one run summary. The coordinator runs as its own
+# function with a timeout past the workers' (see check_deadline). Dispatch goes through a
+# Dispatcher: LambdaDispatcher in AWS, LocalDispatcher (thread or process pool calling
+# lambda_handler in-process) for local runs and benchmarks.
+
+# Account-wide provider quota, shared by all workers of a tick
+FANOUT_RATE_PER_MINUTE = float(
+    os.getenv("FANOUT_RATE_PER_MINUTE", os.getenv("PROVIDER_RATE_PER_MINUTE", "5"))
+)
+FANOUT_TIMEOUT_SECONDS = float(os.getenv("FANOUT_TIMEOUT_SECONDS", "60"))  # worker timeout
+# Estimated provider round trip; with PROVIDER_MAX_WORKERS threads it caps one worker's rate
+FANOUT_REQUEST_SECONDS = float(os.getenv("FANOUT_REQUEST_SECONDS", "0.25"))
+FANOUT_MAX_SHARDS = int(os.getenv("FANOUT_MAX_SHARDS", "100"))
+FANOUT_MAX_CONCURRENCY = int(os.getenv("FANOUT_MAX_CONCURRENCY", "20"))  # caps the shards
+# Coordinator time left past the worker timeout for planning, invoke overhead and summary
+FANOUT_DEADLINE_MARGIN_SECONDS = float(os.getenv("FANOUT_DEADLINE_MARGIN_SECONDS", "15"))
+FANOUT_WORKER_FUNCTION = os.getenv("FANOUT_WORKER_FUNCTION", "").strip()  # required in AWS
+SYMBOL_UNIVERSE_KEY = os.getenv("SYMBOL_UNIVERSE_KEY", "").strip()  # S3 key in S3_BUCKET_NAME
+
+# Part of the timeout spent fetching; the rest covers landing, metrics and cold starts
+FETCH_BUDGET = 0.6
+
+OK_STATUSES = {"PASS", "SKIPPED", "UNCHANGED"}
+
+
+def _parse_symbols(text: str) -> List[str]:
+    # One symbol per line or comma-separated; blank lines and "#" comments are skipped
+    out: List[str] = []
+    for line in text.splitlines():
+        line = line.split("#", 1)[0]
+        out.extend(s.strip() for s in line.split(",") if s.strip())
+    return out
+
+
+def load_universe(event: Optional[Dict[str, Any]] = None, s3=None) -> List[str]:
+    """Event "universe" list > SYMBOL_UNIVERSE_KEY object in S3 > SYMBOLS env."""
+    if isinstance(event, dict) and event.get("universe"):
+        return [str(s) for s in event["universe"]]
+    if SYMBOL_UNIVERSE_KEY:
+        if s3 is None:
+            from pipelines.common.aws import get_client
+
+            s3 = get_client("s3")
+        bucket = os.environ["S3_BUCKET_NAME"]
+        body = s3.get_object(Bucket=bucket, Key=SYMBOL_UNIVERSE_KEY)["Body"].read()
+        return _parse_symbols(body.decode("utf-8"))
+    return _parse_symbols(os.getenv("SYMBOLS", "AAPL,MSFT"))
+
+
+@dataclass(frozen=True)
+class FanoutPlan:
+    shards: List[Shard]
+    rate_per_minute: float  # provider quota slice of each worker
+    capacity: int  # symbols the whole quota can fetch within one worker's fetch budget
+    shard_capacity: int  # symbols one worker can fetch within its fetch budget
+
+    @property
+    def over_quota(self) -> bool:
+        return sum(len(s.symbols) for s in self.shards) > self.capacity
+
+    @property
+    def over_budget(self) -> bool:
+        """Shards larger than one worker can fetch in time (the concurrency cap was hit)."""
+        return any(len(s.symbols) > self.shard_capacity for s in self.shards)
+
+
+def plan_fanout(
+    universe: List[str],
+    rate_per_minute: float = FANOUT_RATE_PER_MINUTE,
+    timeout_s: float = FANOUT_TIMEOUT_SECONDS,
+    request_s: float = FANOUT_REQUEST_SECONDS,
+    provider_workers: Optional[int] = None,
+    max_shards: int = FANOUT_MAX_SHARDS,
+    max_concurrency: int = FANOUT_MAX_CONCURRENCY,
+) -> FanoutPlan:
+    """
+    Shards small enough for one worker to fetch within FETCH_BUDGET of the timeout at its
+    own throughput (provider_workers requests in flight, request_s each), but never more
+    than `max_concurrency`: every shard runs in the same wave, so the quota is split
+    evenly across workers that really run at once and the total request rate never
+    exceeds it. A universe too large for that says so (over_quota, over_budget).
+    """
+    if provider_workers is None:
+        from pipelines.streaming.ingest_lambda.provider import PROVIDER_MAX_WORKERS
+
+        provider_workers = PROVIDER_MAX_WORKERS
+    budget_s = timeout_s * FETCH_BUDGET
+    per_worker = max(1, int(provider_workers / request_s * budget_s))
+    n = len({s.strip().upper() for s in universe if s and s.strip()})
+    count = min(max_shards, max(1, max_concurrency), max(1, math.ceil(n / per_worker)))
+    shards = plan_shards(universe, max(1, math.ceil(n / count)))
+    capacity = int(rate_per_minute / 60.0 * budget_s)
+    return FanoutPlan(
+        shards=shards,
+        rate_per_minute=rate_per_minute / max(1, len(shards)),  # len(shards) run at once
+        capacity=capacity,
+        shard_capacity=per_worker,
+    )
+
+
+def check_deadline(context, timeout_s: float = FANOUT_TIMEOUT_SECONDS) -> None:
+    """
+    Refuse to dispatch when the coordinator can't outlive one worker wave. A coordinator
+    that times out mid-wave loses its summary, and the async retry re-sends every shard.
+    """
+    remaining = getattr(context, "get_remaining_time_in_millis", None)
+    if remaining is None:
+        return  # local run
+    needed = timeout_s + FANOUT_DEADLINE_MARGIN_SECONDS
+    if remaining() / 1000.0 < needed:
+        raise RuntimeError(
+            f"Coordinator has {remaining() / 1000.0:.0f}s left, needs {needed:.0f}s "
+            "(worker timeout + margin): give the coordinator function a longer timeout"
+        )
+
+
+def lambda_client():
+    """
+    Lambda client for the synchronous worker invokes: read timeout past the worker
+    timeout and no SDK retries (the default 60s read timeout would re-send a shard that
+    is still running), one pooled connection per concurrent invoke.
+    """
+    from botocore.config import Config
+
+    from pipelines.common.aws import get_client
+
+    config = Config(
+        read_timeout=FANOUT_TIMEOUT_SECONDS + FANOUT_DEADLINE_MARGIN_SECONDS,
+        retries={"mode": "standard", "total_max_attempts": 1},
+        max_pool_connections=max(10, FANOUT_MAX_CONCURRENCY),
+    )
+    return get_client("lambda", config=config)
+
+
+def worker_event(shard: Shard, plan: FanoutPlan, run_id: str) -> Dict[str, Any]:
+    return {
+        "symbols": list(shard.symbols),
+        "shard": shard.shard_id,
+        "run_id": run_id,
+        "rate_per_minute": plan.rate_per_minute,
+    }
+
+
+def _failed(event: Dict[str, Any], error: str) -> Dict[str, Any]:
+    return {
+        "shard": event.get("shard"),
+        "quality": "ERROR",
+        "message": error,
+        "symbols_failed": list(event.get("symbols", [])),
+    }
+
+
+def _invoke_local(handler: Callable, event: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        return handler(event, None)
+    except Exception as e:  # noqa: BLE001 - one shard's crash is that shard's result
+        return _failed(event, f"{type(e).__name__}: {e}")
+
+
+def _lambda_handler(event, context):
+    # Module-level (picklable) default for process pools
+    from pipelines.streaming.ingest_lambda.lambda_handler import lambda_handler
+
+    return lambda_handler(event, context)
+
+
+class LocalDispatcher:
+    """
+    Runs each worker event through the handler in this process: on a thread pool
+    (kind="thread", shares in-memory clients) or a process pool (kind="process", one
+    container per process; `initializer` sets up its clients).
+    """
+
+    def __init__(
+        self,
+        handler: Callable = _lambda_handler,
+        kind: str = "thread",
+        max_workers: int = FANOUT_MAX_CONCURRENCY,
+        initializer: Optional[Callable[[], None]] = None,
+    ):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"kind must be 'thread' or 'process'. Got: {kind!r}")
+        self.handler = handler
+        self.kind = kind
+        self.max_workers = max_workers
+        self.initializer = initializer
+
+    @property
+    def concurrency(self) -> int:
+        return self.max_workers
+
+    def run(self, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not events:
+            return []
+        workers = max(1, min(self.max_workers, len(events)))
+        pool: Executor
+        if self.kind == "process":
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=self.initializer)
+        else:
+            if self.initializer:
+                self.initializer()
+            pool = ThreadPoolExecutor(max_workers=workers)
+        with pool:
+            futures = [pool.submit(_invoke_local, self.handler, e) for e in events]
+            out = []
+            for e, f in zip(events, futures, strict=True):
+                try:
+                    out.append(f.result())
+                except Exception as exc:  # e.g. a worker process died
+                    out.append(_failed(e, f"{type(exc).__name__}: {exc}"))
+            return out
+
+
+class LambdaDispatcher:
+    """
+    One synchronous (RequestResponse) invocation of the worker function per shard, from
+    a thread pool, so the coordinator can fold the workers' outputs into its summary.
+    Plans never have more shards than max_concurrency, so all of them run in one wave.
+    """
+
+    def __init__(self, client, function_name: str, max_concurrency: int = FANOUT_MAX_CONCURRENCY):
+        self.client = client
+        self.function_name = function_name
+        self.max_concurrency = max_concurrency
+
+    @property
+    def concurrency(self) -> int:
+        return self.max_concurrency
+
+    def _invoke(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            resp = self.client.invoke(
+                FunctionName=self.function_name,
+                InvocationType="RequestResponse",
+                Payload=json.dumps(event).encode("utf-8"),
+            )
+            payload = json.loads(resp["Payload"].read() or b"null")
+        except Exception as e:  # noqa: BLE001 - throttled / failed invoke = failed shard
+            return _failed(event, f"{type(e).__name__}: {e}")
+        if resp.get("FunctionError"):
+            message = payload.get("errorMessage") if isinstance(payload, dict) else payload
+            return _failed(event, f"{resp['FunctionError']}: {message}")
+        return payload
+
+    def run(self, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not events:
+            return []
+        workers = max(1, min(self.max_concurrency, len(events)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(self._invoke, events))
+
+
+def summarize(results: List[Dict[str, Any]], seconds: float = 0.0) -> Dict[str, Any]:
+    """One run summary from the per-shard worker outputs."""
+    failed = [r for r in results if r.get("quality") not in OK_STATUSES]
+    stage_ms: Dict[str, float] = {}
+    for r in results:
+        for stage, ms in (r.get("stage_ms") or {}).items():
+            stage_ms[stage] = max(stage_ms.get(stage, 0.0), ms)  # slowest shard per stage
+    cache = [r["cache"] for r in results if r.get("cache")]
+    return {
+        "quality": "PASS" if not failed else "FAIL",
+        "shards": len(results),
+        "shards_failed": [r.get("shard") for r in failed],
+        "symbols_failed": sorted({s for r in results for s in r.get("symbols_failed", [])}),
+        "items_written": sum(r.get("items_written", 0) for r in results),
+        "items_quarantined": sum(r.get("items_quarantined", 0) for r in results),
+        "cache_hits": sum(c.get("hits", 0) for c in cache),
+        "cache_misses": sum(c.get("misses", 0) for c in cache),
+        "messages": {r.get("shard"): r.get("message") for r in failed},
+        "max_stage_ms": stage_ms,
+        "seconds": round(seconds, 3),
+    }
+
+
+def coordinate(event: Dict[str, Any], dispatcher, universe: Optional[List[str]] = None):
+    """Plan the shards, run one worker per shard through `dispatcher`, summarize."""
+    t0 = time.perf_counter()
+    universe = universe if universe is not None else load_universe(event)
+    # No more shards than the dispatcher runs at once: one wave, one quota slice per worker
+    plan = plan_fanout(universe, max_concurrency=dispatcher.concurrency)
+    run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    symbols = sum(len(s.symbols) for s in plan.shards)
+    print(
+        f"FANOUT_PLAN run={run_id} symbols={symbols} shards={len(plan.shards)} "
+        f"rate_per_minute={plan.rate_per_minute:.2f}/shard"
+    )
+    if plan.over_quota:
+        print(
+            f"FANOUT_WARN universe={symbols} exceeds quota capacity={plan.capacity} per tick: "
+            "workers will be throttled into their timeout"
+        )
+    if plan.over_budget:
+        print(
+            f"FANOUT_WARN shards of up to {max(len(s.symbols) for s in plan.shards)} symbols "
+            f"exceed one worker's budget ({plan.shard_capacity}) at concurrency "
+            f"{dispatcher.concurrency}: raise FANOUT_MAX_CONCURRENCY"
+        )
+    results = dispatcher.run([worker_event(s, plan, run_id) for s in plan.shards])
+    summary = summarize(results, time.perf_counter() - t0)
+    summary["run_id"] = run_id
+    return summary
@@ -1,113 +1,220 @@
 from __future__ import annotations
 
-import json
 import os
+import time
 from datetime import datetime, timezone
-from decimal import Decimal
-from pathlib import PurePosixPath
 from typing import Any, Dict, List
 
-import boto3
+from pipelines.common.aws import get_client
+from pipelines.common.metrics import MetricsBuffer, get_metrics
+from pipelines.common.storage import jsonl_key, write_jsonl_s3
+from pipelines.common.timing import StageTimer
+from pipelines.streaming.ingest_lambda.ddb_writer import write_latest_prices
+from pipelines.streaming.ingest_lambda.provider import fetch_latest_quotes
+from pipelines.streaming.ingest_lambda.quote_cache import get_quote_cache
 
-from pipelines.streaming.ingest_lambda.provider import fetch_latest_prices
-from pipelines.streaming.ingest_lambda.quality import validate_curated_prices
-from pipelines.streaming.ingest_lambda.transform import normalize_price_event
+# Cold-start budget: only light modules are imported at load time. The quality gate
+# (pandas/numpy, and GE when cross-checking) is imported on first use, and AWS clients
+# come from pipelines.common.aws so warm invocations reuse them.
 
 
-def _ddb_safe(obj: Any) -> Any:
-    """
-    Convert Python types to DynamoDB-safe types.
-    DynamoDB does not accept float; use Decimal.
-    """
-    if isinstance(obj, float):
-        # Convert via string to preserve the value users expect
-        return Decimal(str(obj))
-    if isinstance(obj, dict):
-        return {k: _ddb_safe(v) for k, v in obj.items()}
-    if isinstance(obj, list):
-        return [_ddb_safe(v) for v in obj]
-    return obj
+NAMESPACE = "MDP/Streaming"  # latency, record count and byte size metrics
 
 
-def _jsonl(records: List[Dict[str, Any]]) -> bytes:
-    return ("\n".join(json.dumps(r) for r in records) + "\n").encode("utf-8")
+def _put_jsonl(
+    s3, bucket: str, prefix: str, ts: str, records: List[Dict[str, Any]], metrics: MetricsBuffer
+) -> str:
+    # Streamed + optionally compressed (S3_JSONL_COMPRESSION=none|gzip|zstd); multipart when large
+    # `ts` carries the fan-out shard id for workers, so shards of one tick don't collide
+    compression = os.getenv("S3_JSONL_COMPRESSION", "none").strip().lower()
+    key = jsonl_key(prefix, f"prices_{ts}", compression)
+    stats = write_jsonl_s3(s3, bucket, key, records, compression=compression)
+    dataset = prefix.split("/")[0]  # raw | curated | quarantine
+    metrics.bytes(NAMESPACE, "BytesWritten", stats.bytes_written, Dataset=dataset)
+    metrics.count(NAMESPACE, "RecordsWritten", stats.records, Dataset=dataset)
+    return key
 
 
-def _key(prefix: str, ts: str) -> str:
-    return str(PurePosixPath(prefix) / f"prices_{ts}.jsonl")
-
-
-def _put_metric(namespace: str, metric_name: str, value: float = 1.0) -> None:
-    """
-    Publish a lightweight custom metric to CloudWatch.
-    This is more reliable than log-based metric filters (especially for container Lambdas).
-    """
-    cw = boto3.client("cloudwatch")
-    cw.put_metric_data(
-        Namespace=namespace,
-        MetricData=[
-            {
-                "MetricName": metric_name,
-                "Value": value,
-                "Unit": "Count",
-            }
-        ],
-    )
+def _symbols(event) -> List[str]:
+    # Event override ({"symbols": [...]}) > SYMBOLS env (comma-separated) > stub list
+    if isinstance(event, dict) and event.get("symbols"):
+        return [str(s) for s in event["symbols"]]
+    return [s for s in os.getenv("SYMBOLS", "AAPL,MSFT").split(",") if s.strip()]
 
 
 def lambda_handler(event, context):
+    # Metrics are buffered for the whole invocation and flushed once (EMF log lines by
+    # default, METRICS_MODE=api for one batched PutMetricData call per namespace).
+    # {"mode": "coordinator"} fans the symbol universe out to worker invocations instead.
+    timer = StageTimer()
+    metrics = get_metrics()
+    t0 = time.perf_counter()
+    try:
+        if isinstance(event, dict) and event.get("mode") == "coordinator":
+            out = _coordinate(event, context, timer, metrics)
+        else:
+            out = _ingest(event, timer, metrics)
+    finally:
+        metrics.add_stages(NAMESPACE, timer.seconds)
+        metrics.millis(NAMESPACE, "InvocationLatency", (time.perf_counter() - t0) * 1000.0)
+        with timer.stage("metrics"):
+            metrics.flush()
+    out["stage_ms"] = timer.as_ms()
+    return out
+
+
+def _coordinate(event, context, timer: StageTimer, metrics: MetricsBuffer) -> Dict[str, Any]:
+    from pipelines.streaming.ingest_lambda import fanout
+
+    with timer.stage("plan"):
+        universe = fanout.load_universe(event)
+    if event.get("local"):
+        dispatcher = fanout.LocalDispatcher(kind=str(event["local"]))
+    else:
+        function = fanout.FANOUT_WORKER_FUNCTION
+        if not function:
+            raise RuntimeError("Coordinator needs FANOUT_WORKER_FUNCTION (the worker function)")
+        # Before any worker is invoked: a coordinator timeout mid-wave would be retried
+        fanout.check_deadline(context)
+        dispatcher = fanout.LambdaDispatcher(fanout.lambda_client(), function)
+    with timer.stage("dispatch"):
+        summary = fanout.coordinate(event, dispatcher, universe=universe)
+    print(f"FANOUT_SUMMARY {summary}")
+    metrics.count(NAMESPACE, "FanoutShards", summary["shards"])
+    metrics.count(NAMESPACE, "FanoutShardsFailed", len(summary["shards_failed"]))
+    metrics.count(NAMESPACE, "ProviderFailures", len(summary["symbols_failed"]))
+    return summary
+
+
+def _ingest(event, timer: StageTimer, metrics: MetricsBuffer) -> Dict[str, Any]:
     bucket = os.environ["S3_BUCKET_NAME"]
     table_name = os.environ["DDB_TABLE_LATEST_PRICES"]
 
-    symbols = ["AAPL", "MSFT"]  # stub list for now
-
-    raw = fetch_latest_prices(symbols)
-    curated = [normalize_price_event(e) for e in raw]
-
-    ok, msg = validate_curated_prices(curated)
-    print(f"QUALITY={'PASS' if ok else 'FAIL'}")
+    symbols = _symbols(event)
+    # Fan-out workers: their shard id and their slice of the provider quota
+    shard = event.get("shard") if isinstance(event, dict) else None
+    rate = event.get("rate_per_minute") if isinstance(event, dict) else None
+    rate = float(rate) if rate else None
+
+    # Fresh cached quotes skip the provider; unchanged quotes skip everything downstream
+    cache = get_quote_cache()
+    with timer.stage("fetch"):
+        if cache is None:
+            fetched = fetch_latest_quotes(symbols, rate_per_minute=rate)
+            raw, changed = fetched.events, fetched.events
+        else:
+            fetched = cache.fetch(symbols, rate_per_minute=rate)
+            raw, changed = fetched.raw, fetched.events
+    for symbol, error in fetched.failures.items():
+        print(f"PROVIDER_FAIL symbol={symbol} error={error}")
+    metrics.count(NAMESPACE, "RecordsFetched", len(raw))
+    metrics.count(NAMESPACE, "ProviderFailures", len(fetched.failures))
+    metrics.count(NAMESPACE, "ProviderRetries", fetched.retries)
+
+    out: Dict[str, Any] = {"symbols_failed": sorted(fetched.failures)}
+    if shard:
+        out["shard"] = shard
+    if cache is not None:
+        out["cache"] = fetched.stats.as_dict()
+        print(f"QUOTE_CACHE {out['cache']}")
+        metrics.count(NAMESPACE, "QuoteCacheHits", fetched.stats.hits)
+        metrics.count(NAMESPACE, "QuoteCacheMisses", fetched.stats.misses)
+        metrics.count(NAMESPACE, "QuoteCacheUnchanged", fetched.stats.unchanged)
+        if fetched.stats.misses == 0:
+            # Every symbol was served from the cache: no provider call, nothing to land
+            out.update(quality="SKIPPED", message="all quotes cached")
+            return out
 
     ts = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    if shard:
+        ts = f"{ts}_{shard}"
 
-    s3 = boto3.client("s3")
+    s3 = get_client("s3")
 
-    # RAW write (always)
-    raw_key = _key("raw/prices", ts)
-    s3.put_object(Bucket=bucket, Key=raw_key, Body=_jsonl(raw))
+    # RAW write (whatever the provider returned this tick, changed or not)
+    with timer.stage("s3_write"):
+        raw_key = _put_jsonl(s3, bucket, "raw/prices", ts, raw, metrics)
+    out["s3_raw_key"] = raw_key
 
     # Storage liveness metric: "did raw land?"
-    _put_metric(namespace="MDP/Storage", metric_name="StorageRawWriteCount", value=1)
-
-    if ok:
-        # CURATED write (only on PASS)
-        curated_key = _key("curated/prices", ts)
-        s3.put_object(Bucket=bucket, Key=curated_key, Body=_jsonl(curated))
-
-        # Serve latest prices to DynamoDB
-        ddb = boto3.resource("dynamodb")
-        table = ddb.Table(table_name)
-        for item in curated:
-            table.put_item(Item=_ddb_safe(item))
-
-        return {
-            "quality": "PASS",
-            "message": msg,
-            "s3_raw_key": raw_key,
-            "s3_curated_key": curated_key,
-            "items_written": len(curated),
-        }
-
-    # FAIL → quarantine
-    quarantine_key = _key("quarantine/streaming", ts)
-    s3.put_object(Bucket=bucket, Key=quarantine_key, Body=_jsonl(curated))
-
-    # Quality metric: "how often do we fail GE?"
-    _put_metric(namespace="MDP/Quality", metric_name="QualityFailCount", value=1)
-
-    return {
-        "quality": "FAIL",
-        "message": msg,
-        "s3_raw_key": raw_key,
-        "s3_quarantine_key": quarantine_key,
-        "items_quarantined": len(curated),
-    }
\ No newline at end of file
+    metrics.count("MDP/Storage", "StorageRawWriteCount")
+
+    if raw and not changed:
+        # The provider answered but no quote moved: nothing new to curate or serve
+        cache.put(raw)
+        out.update(quality="UNCHANGED", message=f"{len(raw)} quotes unchanged")
+        return out
+
+    with timer.stage("normalize"):
+        # Column-wise normalize through the price_event schema normalize_price_event uses
+        from pipelines.common.batches import PriceBatch
+
+        curated = PriceBatch.from_records(changed)
+
+    with timer.stage("validate"):
+        from pipelines.streaming.ingest_lambda.quality import validate_curated_prices_rows
+
+        verdict = validate_curated_prices_rows(curated)
+
+    with timer.stage("anomaly"):
+        # Jumps / out-of-order / stale ticks against the last accepted price per symbol
+        from pipelines.streaming.ingest_lambda import anomaly
+
+        index = anomaly.get_last_price_index(s3, bucket, shard)
+        anomalies = index.check(curated, verdict) if index is not None else None
+        if anomalies is not None:
+            verdict = anomalies.verdict
+            for label, n in anomalies.flagged.items():
+                metrics.count(NAMESPACE, "AnomalyFlagged", n, Check=label.split(":")[0])
+
+    with timer.stage("validate"):
+        passed_batch, failed = verdict.split(curated)
+        passed = passed_batch.to_records()  # dicts only for the writers
+    print(f"QUALITY={verdict.status}")
+    out.update(quality=verdict.status, message=verdict.message)
+    metrics.count(NAMESPACE, "RecordsPassed", len(passed))
+
+    if passed:
+        # CURATED write + serving, for the rows that passed (one bad symbol doesn't block the rest)
+        with timer.stage("s3_write"):
+            out["s3_curated_key"] = _put_jsonl(
+                s3, bucket, "curated/prices", ts, passed, metrics
+            )
+
+        # Serve latest prices to DynamoDB (batched; conditional mode never regresses a symbol)
+        conditional = os.getenv("DDB_CONDITIONAL_WRITES", "false").strip().lower() == "true"
+        with timer.stage("ddb_write"):
+            stats = write_latest_prices(
+                get_client("dynamodb"), table_name, passed, conditional=conditional
+            )
+        out.update(
+            items_written=stats.written,
+            items_skipped_stale=stats.skipped_stale,
+            items_retried=stats.retried,
+        )
+        metrics.count(NAMESPACE, "DdbItemsWritten", stats.written)
+        metrics.count(NAMESPACE, "DdbItemsRetried", stats.retried)
+
+    if not verdict.ok:
+        # Failing rows (with their quality_reasons) → quarantine
+        with timer.stage("s3_write"):
+            out["s3_quarantine_key"] = _put_jsonl(
+                s3, bucket, "quarantine/streaming", ts, failed, metrics
+            )
+        out["items_quarantined"] = len(failed)
+
+        # Quality metric: "how often do we fail GE?"
+        metrics.count("MDP/Quality", "QualityFailCount")
+        metrics.count("MDP/Quality", "QualityQuarantinedRecords", len(failed))
+
+    if cache is not None:
+        # Only now are the fetched quotes "seen": a failed write above leaves them uncached
+        cache.put(raw)
+
+    if anomalies is not None:
+        # Same for the anomaly state: only landed ticks become the new reference
+        index.commit(anomalies)
+        shard_symbols = [str(sym).upper().strip() for sym in symbols]
+        anomaly.save_snapshot(index, s3, bucket, shard_symbols, shard)
+
+    return out
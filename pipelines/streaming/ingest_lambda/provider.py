@@ -2,30 +2,69 @@ from __future__ import annotations
 
 import json
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import Dict, Iterable, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
-import boto3
 import requests
+from requests.adapters import HTTPAdapter
 
-ALPHAVANTAGE_BASE_URL = "https://www.alphavantage.co/query"
+from pipelines.common.aws import get_client
+from pipelines.common.ratelimit import TokenBucket, backoff_delay
+
+ALPHAVANTAGE_BASE_URL = os.getenv("ALPHAVANTAGE_BASE_URL", "https://www.alphavantage.co/query")
+
+# Provider quota (Alpha Vantage free tier is 5 req/min; premium plans go much higher).
+PROVIDER_RATE_PER_MINUTE = float(os.getenv("PROVIDER_RATE_PER_MINUTE", "5"))
+PROVIDER_MAX_WORKERS = int(os.getenv("PROVIDER_MAX_WORKERS", "8"))
+PROVIDER_MAX_RETRIES = int(os.getenv("PROVIDER_MAX_RETRIES", "3"))
+
+# Secrets Manager lookups are cached per container; rotate within this window.
+PROVIDER_SECRET_TTL_SECONDS = float(os.getenv("PROVIDER_SECRET_TTL_SECONDS", "300"))
+
+
+class ProviderThrottled(RuntimeError):
+    """Alpha Vantage answered with a "Note"/"Information" throttle message (retryable)."""
+
+
+@dataclass
+class QuoteFetchResult:
+    events: List[Dict] = field(default_factory=list)
+    failures: Dict[str, str] = field(default_factory=dict)  # symbol -> last error
+    retries: int = 0
 
 
 def _iso_z_now() -> str:
     return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
 
 
+_api_key_cache: Tuple[str, float] = ("", 0.0)  # (key, monotonic expiry)
+
+
 def _get_api_key() -> str:
     """
-    Load Alpha Vantage API key.
+    Load Alpha Vantage API key, cached for PROVIDER_SECRET_TTL_SECONDS.
     Priority:
       1) AWS Secrets Manager (PROVIDER_SECRET_ID)
       2) Local env var (ALPHAVANTAGE_API_KEY)
     """
+    global _api_key_cache
+    key, expires_at = _api_key_cache
+    if key and time.monotonic() < expires_at:
+        return key
+
+    key = _load_api_key()
+    _api_key_cache = (key, time.monotonic() + PROVIDER_SECRET_TTL_SECONDS)
+    return key
+
+
+def _load_api_key() -> str:
     secret_id = os.getenv("PROVIDER_SECRET_ID", "").strip()
     if secret_id:
-        region = os.getenv("AWS_REGION", "us-east-1")
-        sm = boto3.client("secretsmanager", region_name=region)
+        sm = get_client("secretsmanager", os.getenv("AWS_REGION", "us-east-1"))
         resp = sm.get_secret_value(SecretId=secret_id)
         payload = resp.get("SecretString") or "{}"
         data = json.loads(payload)
@@ -42,66 +81,183 @@ def _get_api_key() -> str:
     return key
 
 
-def _fetch_global_quote(symbol: str, api_key: str) -> Optional[Dict]:
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_limiter: Optional[TokenBucket] = None
+
+
+def _get_session() -> requests.Session:
+    """One pooled session per process (reused across warm Lambda invocations)."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(PROVIDER_MAX_WORKERS, 1))
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def _forget_session() -> None:
+    # A forked child (LocalDispatcher process pool) must not share the parent's sockets
+    global _session, _session_lock
+    _session, _session_lock = None, threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_session)
+
+
+def _get_limiter(rate_per_minute: Optional[float] = None) -> TokenBucket:
+    """
+    Process-wide limiter so warm invocations share the provider quota. A fan-out worker
+    passes its slice of the quota; the limiter is rebuilt only when that rate changes.
+    """
+    global _limiter
+    rate = rate_per_minute or PROVIDER_RATE_PER_MINUTE
+    with _session_lock:
+        if _limiter is None or abs(_limiter.rate * 60.0 - rate) > 1e-9:
+            _limiter = TokenBucket.per_minute(rate)
+        return _limiter
+
+
+def _fetch_global_quote(
+    symbol: str,
+    api_key: str,
+    session: Optional[requests.Session] = None,
+    base_url: Optional[str] = None,
+) -> Optional[Dict]:
     """
     Calls Alpha Vantage GLOBAL_QUOTE endpoint and returns parsed JSON or None.
     """
     params = {"function": "GLOBAL_QUOTE", "symbol": symbol, "apikey": api_key}
-    r = requests.get(ALPHAVANTAGE_BASE_URL, params=params, timeout=10)
+    url = base_url or ALPHAVANTAGE_BASE_URL
+    r = (session or _get_session()).get(url, params=params, timeout=10)
     r.raise_for_status()
     data = r.json()
 
     # Common Alpha Vantage errors / throttling messages
-    if "Note" in data:
-        raise RuntimeError(f"Alpha Vantage throttled: {data['Note']}")
+    if "Note" in data or "Information" in data:
+        note = data.get("Note") or data.get("Information")
+        raise ProviderThrottled(f"Alpha Vantage throttled: {note}")
     if "Error Message" in data:
         raise RuntimeError(f"Alpha Vantage error: {data['Error Message']}")
 
     return data.get("Global Quote")
 
 
-def fetch_latest_prices(symbols: Iterable[str], source: str = "alphavantage") -> List[Dict]:
+def _quote_to_event(symbol: str, quote: Dict, ts_ingest: str, source: str) -> Optional[Dict]:
+    # Alpha Vantage uses strings for everything
+    price_str = quote.get("05. price")
+    latest_trading_day = quote.get("07. latest trading day")  # YYYY-MM-DD typically
+
+    if not price_str:
+        return None
+
+    price = float(price_str)
+
+    # We don't get an exact market timestamp; use trading day + ingest time.
+    # Keep ts_market as ingest time for now (good enough for portfolio).
+    ts_market = ts_ingest
+    if latest_trading_day:
+        # still keep ISO format and Z; we won't fabricate a time-of-day
+        ts_market = f"{latest_trading_day}T00:00:00Z"
+
+    return {
+        "symbol": symbol,
+        "price": price,
+        "currency": "USD",
+        "ts_market": ts_market,
+        "ts_ingest": ts_ingest,
+        "source": source,
+    }
+
+
+def _fetch_with_retry(
+    symbol: str,
+    api_key: str,
+    session: requests.Session,
+    limiter: TokenBucket,
+    max_retries: int,
+    base_url: Optional[str],
+) -> Tuple[Optional[Dict], Optional[str], int]:
     """
-    Fetch latest prices from Alpha Vantage.
-    Returns a list of events compatible with normalize_price_event().
+    Rate-limited fetch with jittered backoff on throttles and transient HTTP errors.
+    Returns (quote, error, retries); never raises, so one symbol can't abort the run.
+    """
+    attempt = 0
+    while True:
+        limiter.acquire()
+        try:
+            return _fetch_global_quote(symbol, api_key, session, base_url), None, attempt
+        except (ProviderThrottled, requests.ConnectionError, requests.Timeout) as e:
+            error = str(e)
+        except requests.HTTPError as e:
+            error = str(e)
+            if e.response is None or e.response.status_code < 500:
+                return None, error, attempt
+        except Exception as e:  # noqa: BLE001 - provider errors / bad payloads are per symbol
+            return None, str(e), attempt
+
+        if attempt >= max_retries:
+            return None, error, attempt
+        time.sleep(backoff_delay(attempt))
+        attempt += 1
+
+
+def fetch_latest_quotes(
+    symbols: Iterable[str],
+    source: str = "alphavantage",
+    max_workers: int = PROVIDER_MAX_WORKERS,
+    max_retries: int = PROVIDER_MAX_RETRIES,
+    limiter: Optional[TokenBucket] = None,
+    base_url: Optional[str] = None,
+    api_key: Optional[str] = None,
+    rate_per_minute: Optional[float] = None,
+) -> QuoteFetchResult:
     """
-    api_key = _get_api_key()
+    Concurrent GLOBAL_QUOTE fetch over a pooled session and a bounded thread pool.
+    Every request goes through the token bucket; throttles are retried with backoff.
+    Per-symbol failures are returned next to the successes instead of raised.
+    `rate_per_minute` overrides PROVIDER_RATE_PER_MINUTE (a fan-out worker's quota slice).
+    """
+    api_key = api_key or _get_api_key()
     ts_ingest = _iso_z_now()
+    session = _get_session()
+    limiter = limiter or _get_limiter(rate_per_minute)
 
-    out: List[Dict] = []
-    for s in symbols:
-        symbol = str(s).upper().strip()
-        quote = _fetch_global_quote(symbol, api_key)
-
-        # If the quote is empty, skip (do not poison the pipeline)
-        if not quote:
-            continue
-
-        # Alpha Vantage uses strings for everything
-        price_str = quote.get("05. price") or quote.get("05. price".strip())
-        latest_trading_day = quote.get("07. latest trading day")  # YYYY-MM-DD typically
-
-        if not price_str:
-            continue
-
-        price = float(price_str)
-
-        # We don't get an exact market timestamp; use trading day + ingest time.
-        # Keep ts_market as ingest time for now (good enough for portfolio).
-        ts_market = ts_ingest
-        if latest_trading_day:
-            # still keep ISO format and Z; we won't fabricate a time-of-day
-            ts_market = f"{latest_trading_day}T00:00:00Z"
-
-        out.append(
-            {
-                "symbol": symbol,
-                "price": price,
-                "currency": "USD",
-                "ts_market": ts_market,
-                "ts_ingest": ts_ingest,
-                "source": source,
-            }
-        )
+    ordered = list(dict.fromkeys(str(s).upper().strip() for s in symbols))
+    result = QuoteFetchResult()
+
+    def _one(symbol: str) -> Tuple[Optional[Dict], Optional[str], int]:
+        return _fetch_with_retry(symbol, api_key, session, limiter, max_retries, base_url)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(ordered) or 1))) as pool:
+        # map() keeps input order, so output is deterministic regardless of completion order
+        for symbol, (quote, error, retries) in zip(ordered, pool.map(_one, ordered), strict=True):
+            result.retries += retries
+            if error:
+                result.failures[symbol] = error
+                continue
+
+            # If the quote is empty, skip (do not poison the pipeline)
+            try:
+                event = _quote_to_event(symbol, quote, ts_ingest, source) if quote else None
+            except (TypeError, ValueError) as e:  # non-numeric "05. price" fails this symbol only
+                result.failures[symbol] = f"bad quote payload: {e}"
+                continue
+            if event:
+                result.events.append(event)
+
+    return result
 
-    return out
\ No newline at end of file
+
+def fetch_latest_prices(symbols: Iterable[str], source: str = "alphavantage") -> List[Dict]:
+    """
+    Fetch latest prices from Alpha Vantage.
+    Returns a list of events compatible with normalize_price_event().
+    Symbols that fail after retries are logged and skipped (see fetch_latest_quotes).
+    """
+    result = fetch_latest_quotes(symbols, source=source)
+    for symbol, error in result.failures.items():
+        print(f"PROVIDER_FAIL symbol={symbol} error={error}")
+    return result.events
\ No newline at end of file
@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Protocol
+
+from pipelines.common.aws import get_client
+from pipelines.common.ratelimit import backoff_delay
+from pipelines.streaming.ingest_lambda.provider import QuoteFetchResult, fetch_latest_quotes
+
+# Quote cache in front of GLOBAL_QUOTE. Two tiers:
+#   - in-process LRU (module state, so it survives warm invocations of one container)
+#   - optional shared tier in DynamoDB, so concurrent/new containers see each other's quotes
+# A fresh entry (within its TTL) means the provider is not called at all. A stale entry is
+# still used to detect unchanged quotes: same price + trading day -> nothing goes downstream.
+
+QUOTE_CACHE_ENABLED = os.getenv("QUOTE_CACHE_ENABLED", "true").strip().lower() == "true"
+# Keep below the raw-freshness alarm window (10 min): one provider call per TTL lands raw
+QUOTE_CACHE_TTL_SECONDS = float(os.getenv("QUOTE_CACHE_TTL_SECONDS", "60"))
+QUOTE_CACHE_MAX_ENTRIES = int(os.getenv("QUOTE_CACHE_MAX_ENTRIES", "10000"))
+# Per-symbol TTLs, e.g. "AAPL=15,BRK.B=300"
+QUOTE_CACHE_TTL_OVERRIDES = os.getenv("QUOTE_CACHE_TTL_OVERRIDES", "")
+QUOTE_CACHE_TABLE = os.getenv("QUOTE_CACHE_TABLE", "").strip()  # empty: no shared tier
+
+
+def _fingerprint(event: Dict[str, Any]) -> tuple:
+    # ts_market carries "07. latest trading day"; together with price it identifies a quote
+    return (event.get("price"), event.get("ts_market"))
+
+
+def parse_ttl_overrides(spec: str) -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        symbol, sep, ttl = part.partition("=")
+        if not sep:
+            raise ValueError(f"TTL override must look like SYMBOL=SECONDS. Got: {part!r}")
+        out[symbol.strip().upper()] = float(ttl)
+    return out
+
+
+@dataclass
+class CachedQuote:
+    event: Dict[str, Any]
+    expires_at: float  # epoch seconds (comparable across containers)
+
+
+@dataclass
+class CacheStats:
+    requested: int = 0
+    local_hits: int = 0
+    shared_hits: int = 0
+    misses: int = 0  # symbols sent to the provider
+    unchanged: int = 0  # fetched, but same quote as the (stale) cached one
+    changed: int = 0  # new or moved quotes, passed downstream
+    failures: int = 0
+    evictions: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self.local_hits + self.shared_hits
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.requested if self.requested else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "hits": self.hits, "hit_rate": round(self.hit_rate, 4)}
+
+
+@dataclass
+class CachedFetchResult(QuoteFetchResult):
+    # `events` holds only changed quotes; `raw` is everything the provider returned this call
+    raw: List[Dict] = field(default_factory=list)
+    stats: CacheStats = field(default_factory=CacheStats)
+
+
+class SharedQuoteStore(Protocol):
+    def get_many(self, symbols: List[str]) -> Dict[str, CachedQuote]: ...
+
+    def put_many(self, entries: Dict[str, CachedQuote]) -> None: ...
+
+
+class DynamoDBQuoteStore:
+    """
+    One item per symbol: {"symbol": S, "event": S (JSON), "expires_at": N}.
+    `expires_at` doubles as the table's TTL attribute; since TTL deletion is lazy,
+    freshness is always checked against it on read.
+    """
+
+    def __init__(self, client, table_name: str, max_retries: int = 3):
+        self.client = client
+        self.table_name = table_name
+        self.max_retries = max_retries
+
+    def get_many(self, symbols: List[str]) -> Dict[str, CachedQuote]:
+        keys = [{"symbol": {"S": s}} for s in symbols]
+        out: Dict[str, CachedQuote] = {}
+        for i in range(0, len(keys), 100):  # BatchGetItem limit
+            pending = {self.table_name: {"Keys": keys[i : i + 100]}}
+            while pending:
+                resp = self.client.batch_get_item(RequestItems=pending)
+                for item in resp.get("Responses", {}).get(self.table_name, []):
+                    out[item["symbol"]["S"]] = CachedQuote(
+                        event=json.loads(item["event"]["S"]),
+                        expires_at=float(item["expires_at"]["N"]),
+                    )
+                pending = resp.get("UnprocessedKeys") or {}
+        return out
+
+    def put_many(self, entries: Dict[str, CachedQuote]) -> None:
+        requests = [
+            {
+                "PutRequest": {
+                    "Item": {
+                        "symbol": {"S": sym},
+                        "event": {"S": json.dumps(entry.event)},
+                        "expires_at": {"N": str(int(entry.expires_at))},
+                    }
+                }
+            }
+            for sym, entry in entries.items()
+        ]
+        for i in range(0, len(requests), 25):  # BatchWriteItem limit
+            chunk, attempt = requests[i : i + 25], 0
+            while chunk:
+                resp = self.client.batch_write_item(RequestItems={self.table_name: chunk})
+                chunk = resp.get("UnprocessedItems", {}).get(self.table_name, [])
+                if chunk and attempt >= self.max_retries:
+                    # The shared tier is an optimisation: losing a write only costs a refetch
+                    print(f"QUOTE_CACHE_WARN unprocessed={len(chunk)} table={self.table_name}")
+                    break
+                if chunk:
+                    time.sleep(backoff_delay(attempt, base=0.025, cap=2.0))
+                    attempt += 1
+
+
+class QuoteCache:
+    """
+    Per-symbol TTL + LRU bound over the latest quote per symbol.
+
+    fetch() serves fresh entries from the cache and only asks the provider for the rest;
+    put() records what was fetched once the caller has landed it, so a failed write never
+    marks a quote as already seen.
+    """
+
+    def __init__(
+        self,
+        ttl_s: float = 60.0,
+        max_entries: int = 10_000,
+        shared: Optional[SharedQuoteStore] = None,
+        ttl_overrides: Optional[Dict[str, float]] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        if max_entries < 1:
+            raise ValueError("max_entries must be >= 1")
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.shared = shared
+        self.ttl_overrides = {k.upper(): v for k, v in (ttl_overrides or {}).items()}
+        self._clock = clock
+        self._entries: "OrderedDict[str, CachedQuote]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def ttl_for(self, symbol: str) -> float:
+        return self.ttl_overrides.get(symbol, self.ttl_s)
+
+    def _install(self, symbol: str, entry: CachedQuote) -> None:
+        # Caller holds the lock
+        self._entries[symbol] = entry
+        self._entries.move_to_end(symbol)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def fetch(
+        self,
+        symbols: Iterable[str],
+        fetch: Callable[..., QuoteFetchResult] = fetch_latest_quotes,
+        **fetch_kwargs: Any,
+    ) -> CachedFetchResult:
+        ordered = list(dict.fromkeys(str(s).upper().strip() for s in symbols))
+        now = self._clock()
+        stats = CacheStats(requested=len(ordered))
+        evictions_before = self.evictions
+        stale: Dict[str, CachedQuote] = {}
+        remaining: List[str] = []
+
+        # 1) In-process tier
+        with self._lock:
+            for sym in ordered:
+                entry = self._entries.get(sym)
+                if entry is None:
+                    remaining.append(sym)
+                    continue
+                self._entries.move_to_end(sym)
+                if entry.expires_at > now:
+                    stats.local_hits += 1
+                else:
+                    stale[sym] = entry
+                    remaining.append(sym)
+
+        # 2) Shared tier (another container may have fetched these already)
+        if self.shared is not None and remaining:
+            shared = self.shared.get_many(remaining)
+            to_fetch = []
+            with self._lock:
+                for sym in remaining:
+                    entry = shared.get(sym)
+                    if entry is not None and entry.expires_at > now:
+                        stats.shared_hits += 1
+                        self._install(sym, entry)
+                        continue
+                    local = stale.get(sym)
+                    if entry is not None and (local is None or entry.expires_at > local.expires_at):
+                        stale[sym] = entry  # newest known quote, for the unchanged check
+                    to_fetch.append(sym)
+            remaining = to_fetch
+
+        # 3) Provider, for misses only; unchanged quotes are short-circuited
+        out = CachedFetchResult(stats=stats)
+        stats.misses = len(remaining)
+        if remaining:
+            fetched = fetch(remaining, **fetch_kwargs)
+            out.raw, out.failures, out.retries = fetched.events, fetched.failures, fetched.retries
+            for event in fetched.events:
+                prev = stale.get(event["symbol"])
+                if prev is not None and _fingerprint(prev.event) == _fingerprint(event):
+                    stats.unchanged += 1
+                else:
+                    stats.changed += 1
+                    out.events.append(event)
+            stats.failures = len(fetched.failures)
+
+        stats.evictions = self.evictions - evictions_before
+        return out
+
+    def put(self, events: Iterable[Dict[str, Any]]) -> None:
+        """Record fetched quotes (changed or not): refreshes their TTL in both tiers."""
+        now = self._clock()
+        entries = {
+            e["symbol"]: CachedQuote(event=e, expires_at=now + self.ttl_for(e["symbol"]))
+            for e in events
+        }
+        if not entries:
+            return
+        with self._lock:
+            for sym, entry in entries.items():
+                self._install(sym, entry)
+        if self.shared is not None:
+            self.shared.put_many(entries)
+
+
+_cache: Optional[QuoteCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_quote_cache() -> Optional[QuoteCache]:
+    """Process-wide cache (None when QUOTE_CACHE_ENABLED=false)."""
+    global _cache
+    if not QUOTE_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            shared = (
+                DynamoDBQuoteStore(get_client("dynamodb"), QUOTE_CACHE_TABLE)
+                if QUOTE_CACHE_TABLE
+                else None
+            )
+            _cache = QuoteCache(
+                ttl_s=QUOTE_CACHE_TTL_SECONDS,
+                max_entries=QUOTE_CACHE_MAX_ENTRIES,
+                shared=shared,
+                ttl_overrides=parse_ttl_overrides(QUOTE_CACHE_TTL_OVERRIDES),
+            )
+        return _cache
+
+
+def reset_quote_cache() -> None:
+    global _cache
+    with _cache_lock:
+        _cache = None
@@ -0,0 +1,273 @@
+"""
+Stateful anomaly checks (pipelines/streaming/ingest_lambda/anomaly.py): parity and cost.
+
+  1. parity: a random tick stream over --symbols symbols, with injected 10x jumps,
+     out-of-order ts_market, frozen feeds, exact re-deliveries and several ticks per
+     symbol in one batch, goes through LastPriceIndex batch by batch and through a
+     per-record Python loop; the flags must be identical and the state equal
+  2. detection: every injected 10x tick is flagged; a symbol that really moves (a split)
+     is re-anchored after ANOMALY_MAX_REJECTS flagged ticks
+  3. snapshot: the index restored from snapshot() flags the next batches exactly like
+     the original
+Then times check() + commit() on one-tick-per-symbol batches and snapshot/restore.
+
+    python scripts/bench_anomaly.py --symbols 5000 --batches 200
+"""
+
+import argparse
+import math
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add repo root to PYTHONPATH so imports work when running scripts directly
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from pipelines.common.batches import PriceBatch  # noqa: E402
+from pipelines.streaming.ingest_lambda.anomaly import (  # noqa: E402
+    JUMP,
+    REGRESSION,
+    STALE,
+    LastPriceIndex,
+)
+from pipelines.streaming.ingest_lambda.quality import (  # noqa: E402
+    validate_curated_prices_rows,
+)
+
+START = pd.Timestamp("2026-01-16T14:00:00Z")
+CODES = {JUMP: 1, REGRESSION: 2, STALE: 3}
+
+
+def _symbols(n: int):
+    out = []
+    for i in range(n):
+        s = ""
+        for _ in range(4):
+            i, r = divmod(i, 26)
+            s = chr(65 + r) + s
+        out.append(s)
+    return out
+
+
+def _iso(ts: pd.Timestamp) -> str:
+    return ts.isoformat().replace("+00:00", "Z")
+
+
+def _stream(symbols, batches, rng, sample=1.0):
+    """
+    Batches of records: a random walk per symbol (one tick per minute), with anomalies
+    injected at random. Returns the batches and the (batch, row) of every 10x tick.
+    """
+    price = dict(zip(symbols, 20 + 480 * rng.random(len(symbols)), strict=True))
+    minute = dict.fromkeys(symbols, 0)
+    frozen = set(symbols[::50])  # feeds that stop moving halfway through
+    out, spikes = [], set()
+    for b in range(batches):
+        rows = []
+        chosen = [s for s in symbols if rng.random() < sample]
+        for s in chosen:
+            for _ in range(1 + int(rng.random() < 0.05)):  # sometimes 2 ticks per batch
+                u = rng.random()
+                minute[s] += 1
+                ts, p = minute[s], price[s]
+                if u < 0.01:
+                    p = p * 10  # 10x tick; the walk continues from the old price
+                    spikes.add((b, len(rows)))
+                elif u < 0.02:
+                    ts = max(0, ts - 5)  # out of order
+                elif u < 0.05:
+                    minute[s] -= 1  # exact re-delivery of the last tick
+                    ts = minute[s]
+                elif u < 0.07 or (s in frozen and b >= batches // 2):
+                    pass  # unchanged price, newer ts
+                else:
+                    p = price[s] = round(p * math.exp(0.002 * rng.standard_normal()), 4)
+                rows.append(
+                    {
+                        "symbol": s,
+                        "price": p,
+                        "currency": "USD",
+                        "ts_market": _iso(START + pd.Timedelta(minutes=int(ts))),
+                        "ts_ingest": _iso(START),
+                        "source": "bench",
+                    }
+                )
+        out.append(rows)
+    return out, spikes
+
+
+class _Naive:
+    """The same rules, one record at a time over plain dicts."""
+
+    def __init__(self, index: LastPriceIndex):
+        self.p = index
+        self.state = {}
+
+    def check(self, rows):
+        p, flags = self.p, []
+        for row in rows:
+            s, price = row["symbol"], row["price"]
+            ts = pd.Timestamp(row["ts_market"]).value
+            st = self.state.get(s)
+            if st is None:
+                self.state[s] = dict(price=price, ts=ts, var=0.0, n=0, repeats=0, rejects=0)
+                flags.append(0)
+                continue
+            if price == st["price"] and ts == st["ts"]:
+                flags.append(0)  # re-delivery: no-op
+                continue
+            r = float(np.log(price / st["price"]))
+            if st["n"] >= p.min_observations:
+                limit = p.sigma * max(math.sqrt(st["var"]), p.min_volatility)
+            else:
+                limit = p.max_jump
+            code = 0
+            reanchor = False
+            if ts < st["ts"]:
+                code = 2
+            elif abs(r) > limit:
+                if st["rejects"] >= p.max_rejects:
+                    reanchor = True
+                else:
+                    code = 1
+            elif price == st["price"] and ts > st["ts"] and st["repeats"] >= p.max_repeats:
+                code = 3
+            flags.append(code)
+            if code == 1:
+                st["rejects"] += 1
+            if code:
+                continue
+            if reanchor:
+                st.update(var=0.0, n=0, repeats=0)
+            else:
+                lam = p.ewma_lambda
+                st["var"] = r * r if st["n"] == 0 else lam * st["var"] + (1.0 - lam) * (r * r)
+                st["n"] += 1
+                st["repeats"] = st["repeats"] + 1 if price == st["price"] else 0
+            st.update(price=price, ts=ts, rejects=0)
+        return flags
+
+
+def _flags(result, total):
+    codes = np.zeros(total, dtype=np.int8)
+    for i, labels in result.verdict.reasons.items():
+        codes[i] = CODES[labels[0]]
+    return codes
+
+
+def _run(index, batches):
+    flags = []
+    for rows in batches:
+        batch = PriceBatch.from_records(rows)
+        result = index.check(batch, validate_curated_prices_rows(batch))
+        index.commit(result)
+        flags.append(_flags(result, len(batch)))
+    return flags
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=5000)
+    parser.add_argument("--batches", type=int, default=200)
+    parser.add_argument("--parity-symbols", type=int, default=300)
+    args = parser.parse_args()
+    rng = np.random.default_rng(5)
+
+    # 1) Parity with the per-record loop
+    symbols = _symbols(args.parity_symbols)
+    batches, spikes = _stream(symbols, 120, rng, sample=0.7)
+    index = LastPriceIndex()
+    naive = _Naive(index)
+    got = _run(index, batches)
+    for b, rows in enumerate(batches):
+        want = np.asarray(naive.check(rows), dtype=np.int8)
+        if not np.array_equal(got[b], want):
+            raise SystemExit(f"MISMATCH in batch {b}: {np.flatnonzero(got[b] != want)[:5]}")
+    for s, st in naive.state.items():
+        mine = index.get(s)
+        same = all(math.isclose(mine[k], v, rel_tol=1e-12, abs_tol=1e-300) for k, v in st.items())
+        if not same:
+            raise SystemExit(f"STATE MISMATCH for {s}: {mine} vs {st}")
+    total = sum(len(r) for r in batches)
+    counts = np.bincount(np.concatenate(got), minlength=4)
+    print(
+        f"parity: {total} ticks identical (jump={counts[1]} regression={counts[2]} "
+        f"stale={counts[3]})"
+    )
+
+    # 2) Detection: every 10x tick of an already-seen symbol is flagged
+    seen, missed, detected = set(), [], 0
+    for b, rows in enumerate(batches):
+        for i, row in enumerate(rows):
+            if (b, i) in spikes and row["symbol"] in seen:
+                detected += 1
+                if got[b][i] != 1:
+                    missed.append((b, row["symbol"]))
+            seen.add(row["symbol"])
+    if missed:
+        raise SystemExit(f"10x ticks not flagged: {missed[:5]}")
+    split = LastPriceIndex()
+    walk = [
+        {
+            "symbol": "SPLT",
+            "price": 100.0 + 0.1 * k,
+            "currency": "USD",
+            "ts_market": _iso(START + pd.Timedelta(minutes=k)),
+            "ts_ingest": _iso(START),
+            "source": "bench",
+        }
+        for k in range(30)
+    ]
+    halved = [dict(r, price=r["price"] / 2) for r in walk[20:]]
+    seq = _run(split, [[r] for r in walk[:20] + halved])
+    flagged = [int(f[0]) for f in seq[20:]]
+    if flagged[: split.max_rejects] != [1] * split.max_rejects or any(flagged[split.max_rejects :]):
+        raise SystemExit(f"split not re-anchored: {flagged}")
+    print(
+        f"detection: {detected} injected 10x ticks flagged; split re-anchored after "
+        f"{split.max_rejects} flags"
+    )
+
+    # 3) Snapshot round trip
+    more, _ = _stream(symbols, 40, np.random.default_rng(9), sample=0.7)
+    more = [  # a day later than the first stream
+        [dict(r, ts_market=_iso(pd.Timestamp(r["ts_market"]) + pd.Timedelta(days=1))) for r in rows]
+        for rows in more
+    ]
+    restored = LastPriceIndex.restore(index.snapshot())
+    a, b = _run(index, more), _run(restored, more)
+    if not all(np.array_equal(x, y) for x, y in zip(a, b, strict=True)):
+        raise SystemExit("restored index flags differently")
+    print(f"snapshot: restored index flags {sum(len(r) for r in more)} ticks identically")
+
+    # Cost: one tick per symbol per batch, state warm
+    symbols = _symbols(args.symbols)
+    batches, _ = _stream(symbols, args.batches, np.random.default_rng(1))
+    frames = [PriceBatch.from_records(rows) for rows in batches]
+    verdicts = [validate_curated_prices_rows(f) for f in frames]
+    index = LastPriceIndex()
+    t0 = time.perf_counter()
+    for frame, verdict in zip(frames, verdicts, strict=True):
+        index.commit(index.check(frame, verdict))
+    elapsed = time.perf_counter() - t0
+    ticks = sum(len(f) for f in frames)
+    t0 = time.perf_counter()
+    data = index.snapshot()
+    t_snap = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    LastPriceIndex.restore(data)
+    t_restore = time.perf_counter() - t0
+    print(
+        f"{args.symbols} symbols x {args.batches} batches: {elapsed / ticks * 1e6:.2f} us/tick "
+        f"({elapsed / args.batches * 1000:.2f} ms/batch); snapshot {len(data) / 1e6:.2f} MB "
+        f"in {t_snap * 1000:.1f} ms, restore {t_restore * 1000:.1f} ms"
+    )
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
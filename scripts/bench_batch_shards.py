@@ -0,0 +1,76 @@
+"""
+Backfill throughput of the sharded batch executor vs worker count.
+
+Runs the same backfill (stub provider, parquet analytics) in a scratch directory with
+1, 2, 4, ... workers and reports wall time and speedup. Expect roughly linear scaling
+up to the number of physical cores.
+
+    python scripts/bench_batch_shards.py --symbols 2000 --days 252 --workers 1,2,4,8
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add repo root to PYTHONPATH so imports work when running scripts directly
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from pipelines.batch.ohlc_daily.executor import ShardJob, combine_results, run_shards  # noqa: E402
+from pipelines.common.shards import plan_shards  # noqa: E402
+
+
+def _symbols(n: int):
+    out = []
+    for i in range(n):
+        s = ""
+        for _ in range(4):
+            i, r = divmod(i, 26)
+            s = chr(65 + r) + s
+        out.append(s)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=252)
+    parser.add_argument("--shard-size", type=int, default=50)
+    parser.add_argument("--workers", default="1,2,4,8")
+    parser.add_argument("--format", default="parquet", choices=["jsonl", "parquet"])
+    args = parser.parse_args()
+
+    shards = plan_shards(_symbols(args.symbols), args.shard_size)
+    print(f"symbols={args.symbols} days={args.days} shards={len(shards)} cpus={os.cpu_count()}")
+    print(f"{'workers':>8}{'wall_s':>10}{'rows':>10}{'rows/s':>12}{'speedup':>9}")
+
+    cwd = os.getcwd()
+    baseline = None
+    for workers in (int(w) for w in args.workers.split(",")):
+        work = Path(tempfile.mkdtemp(prefix="bench_shards_"))
+        try:
+            os.chdir(work)  # pipeline writes under ./data
+            job = ShardJob(
+                mode="backfill", output_format=args.format, run_id="bench", backfill_days=args.days
+            )
+            t0 = time.perf_counter()
+            results = run_shards(shards, job, workers)
+            wall = time.perf_counter() - t0
+        finally:
+            os.chdir(cwd)
+            shutil.rmtree(work, ignore_errors=True)
+
+        ok, msg = combine_results(results)
+        if not ok:
+            raise RuntimeError(msg)
+        rows = sum(r.rows for r in results)
+        baseline = baseline or wall
+        print(f"{workers:>8}{wall:>10.2f}{rows:>10}{rows / wall:>12.0f}{baseline / wall:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
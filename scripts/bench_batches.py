@@ -0,0 +1,137 @@
+"""
+Columnar OhlcBatch vs. per-row dicts for a large backfill shard.
+
+Both paths start from the synthetic generator's arrays and run the same steps:
+build provider rows -> curate -> row-level validation -> split. The dict path builds one
+dict (plus boxed floats/strings) per row; the batch path fills NumPy arrays and
+dictionary-encoded string columns directly. A few rows are corrupted identically in both,
+and the verdicts and failing rows must match.
+
+Reports wall time, tracemalloc peak, and memory/blocks retained per row by the
+curated rows.
+
+    python scripts/bench_batches.py --symbols 4000 --days 252 --bad 25
+"""
+
+import argparse
+import dataclasses
+import sys
+import time
+import tracemalloc
+from datetime import date
+from pathlib import Path
+
+# Add repo root to PYTHONPATH so imports work when running scripts directly
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from pipelines.batch.ohlc_daily.quality import validate_ohlc_daily_rows  # noqa: E402
+from pipelines.batch.ohlc_daily.synthetic import generate_daily_bars  # noqa: E402
+from pipelines.batch.ohlc_daily.transform import to_curated_prices_daily  # noqa: E402
+from pipelines.common.batches import OhlcBatch  # noqa: E402
+
+TS_INGEST = "2026-01-16T22:00:00Z"
+
+
+def _symbols(n: int):
+    out = []
+    for i in range(n):
+        s = ""
+        for _ in range(4):
+            i, r = divmod(i, 26)
+            s = chr(65 + r) + s
+        out.append(s)
+    return out
+
+
+def _bad_positions(n_rows: int, n_bad: int):
+    step = max(n_rows // max(n_bad, 1), 1)
+    return list(range(step // 2, n_rows, step))[:n_bad]
+
+
+def _dict_rows(args, symbols, bad):
+    rows = []
+    for bars in generate_daily_bars(symbols, args.days, seed=args.seed, end=args.end):
+        rows.extend(bars.to_records(source="synthetic", ts_ingest=TS_INGEST))
+    for i in bad:
+        rows[i]["high"] = -1.0
+    return to_curated_prices_daily(rows)
+
+
+def _batch_rows(args, symbols, bad):
+    batches = [
+        OhlcBatch.from_daily_bars(bars, "synthetic", TS_INGEST)
+        for bars in generate_daily_bars(symbols, args.days, seed=args.seed, end=args.end)
+    ]
+    batch = OhlcBatch.concat(batches)
+    high = batch.high.copy()
+    high[bad] = -1.0
+    return to_curated_prices_daily(dataclasses.replace(batch, high=high))
+
+
+def _measure(build, args, symbols, bad):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    curated = build(args, symbols, bad)
+    t_build = time.perf_counter() - t0
+    retained, _ = tracemalloc.get_traced_memory()
+    blocks = sum(s.count for s in tracemalloc.take_snapshot().statistics("filename"))
+
+    t0 = time.perf_counter()
+    verdict = validate_ohlc_daily_rows(curated)
+    passed, failed = verdict.split(curated)
+    t_validate = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "rows": len(curated),
+        "build_s": t_build,
+        "validate_s": t_validate,
+        "retained": retained,
+        "blocks": blocks,
+        "peak": peak,
+        "verdict": (verdict.status, verdict.message, len(passed)),
+        "failed": failed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=4000)
+    parser.add_argument("--days", type=int, default=252)
+    parser.add_argument("--bad", type=int, default=25)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--end", type=date.fromisoformat, default=date(2026, 1, 16))
+    args = parser.parse_args()
+
+    symbols = _symbols(args.symbols)
+    bad = _bad_positions(args.symbols * args.days, args.bad)
+    results = {
+        "dicts": _measure(_dict_rows, args, symbols, bad),
+        "batch": _measure(_batch_rows, args, symbols, bad),
+    }
+
+    d, b = results["dicts"], results["batch"]
+    if d["verdict"] != b["verdict"] or d["failed"] != b["failed"]:
+        raise SystemExit(f"MISMATCH: dicts={d['verdict']} batch={b['verdict']}")
+    print(f"rows={d['rows']} bad={len(bad)} verdict={d['verdict'][0]} (identical)")
+    print(
+        f"{'path':<7}{'build_s':>9}{'validate_s':>12}{'retained_MB':>13}"
+        f"{'B/row':>8}{'blocks/row':>12}{'peak_MB':>10}"
+    )
+    for name, r in results.items():
+        print(
+            f"{name:<7}{r['build_s']:>9.2f}{r['validate_s']:>12.2f}"
+            f"{r['retained'] / 1e6:>13.1f}{r['retained'] / r['rows']:>8.0f}"
+            f"{r['blocks'] / r['rows']:>12.2f}{r['peak'] / 1e6:>10.1f}"
+        )
+    speedup = (d["build_s"] + d["validate_s"]) / (b["build_s"] + b["validate_s"])
+    print(
+        f"batch vs dicts: retained {d['retained'] / b['retained']:.1f}x smaller, "
+        f"peak {d['peak'] / b['peak']:.1f}x smaller, "
+        f"end-to-end {speedup:.1f}x faster"
+    )
+
+
+if __name__ == "__main__":
+    main()
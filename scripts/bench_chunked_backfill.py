@@ -0,0 +1,170 @@
+"""
+Peak memory of one large backfill shard: whole-shard vs. chunked (ShardJob.chunk_rows).
+
+Runs run_shard on the synthetic source at growing universe sizes, each run in a fresh
+process (so high-water marks don't carry over) inside a temp working directory, and
+reports how far the run raised the process's peak RSS above its post-import baseline.
+The whole-shard peak grows with the row count; the chunked peak stays flat (one chunk
+in flight). Each size also
+includes a symbol that fails the symbol regex, and the chunked verdict (rows,
+quarantined, message) and analytics rows must match the whole-shard run exactly.
+
+Then checks resume: a chunked run (--resume-chunks chunks) is interrupted while writing
+chunk --fail-at, rerun with the same job, and must fetch only the remaining chunks and
+land the same analytics rows as an uninterrupted run.
+
+    python scripts/bench_chunked_backfill.py --sizes 500,1000,2000,4000 --days 252
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from datetime import date
+from pathlib import Path
+
+# Add repo root to PYTHONPATH so imports work when running scripts directly
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from pipelines.batch.ohlc_daily import executor  # noqa: E402
+from pipelines.batch.ohlc_daily.executor import ShardJob, plan_chunks, run_shard  # noqa: E402
+from pipelines.common.shards import Shard  # noqa: E402
+
+AS_OF = date(2026, 1, 16)
+
+
+def _symbols(n: int):
+    out = []
+    for i in range(n):
+        s = ""
+        for _ in range(4):
+            i, r = divmod(i, 26)
+            s = chr(65 + r) + s
+        out.append(s)
+    return out
+
+
+def _analytics(run_id: str):
+    """Landed analytics rows (ts_ingest dropped: it is stamped per fetch)."""
+    rows = []
+    for path in sorted(Path("data/analytics/ohlc_daily").rglob(f"part-{run_id}*.jsonl")):
+        with path.open(encoding="utf-8") as f:
+            for line in f:
+                r = json.loads(line)
+                r.pop("ts_ingest")
+                rows.append(json.dumps(r, sort_keys=True))
+    return sorted(rows)
+
+
+def _run_measured(cwd, shard, job):
+    os.chdir(cwd)
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KiB on Linux
+    t0 = time.perf_counter()
+    result = run_shard(shard, job)
+    seconds = time.perf_counter() - t0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return result, seconds, (peak - baseline) * 1024
+
+
+def _measure(shard, job):
+    # forkserver: children fork from a small server process, so their RSS high-water
+    # mark starts low (spawn/fork would inherit this process's, via exec or fork)
+    ctx = multiprocessing.get_context("forkserver")
+    with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+        return pool.submit(_run_measured, os.getcwd(), shard, job).result()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="500,1000,2000,4000")
+    parser.add_argument("--days", type=int, default=252)
+    parser.add_argument("--chunk-rows", type=int, default=63_000)  # 250 symbols x 252 days
+    parser.add_argument("--resume-chunks", type=int, default=4)
+    parser.add_argument("--fail-at", type=int, default=2)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix="chunked-backfill-"))
+    base = ShardJob(
+        mode="backfill",
+        output_format="jsonl",
+        run_id="",
+        source="synthetic",
+        seed=7,
+        backfill_days=args.days,
+        as_of=AS_OF,
+    )
+    print(f"days={args.days} chunk_rows={args.chunk_rows} cwd={os.getcwd()}")
+    print(f"{'rows':>10}{'mode':>8}{'chunks':>8}{'seconds':>9}{'peak_rss_MB':>13}  verdict")
+    for n in [int(x) for x in args.sizes.split(",")]:
+        shard = Shard(index=0, count=1, symbols=tuple(sorted(_symbols(n - 1) + ["BAD1"])))
+        whole, t_whole, p_whole = _measure(shard, replace(base, run_id=f"whole{n}"))
+        chunked_job = replace(base, run_id=f"chunked{n}", chunk_rows=args.chunk_rows)
+        chunked, t_chunked, p_chunked = _measure(shard, chunked_job)
+        n_chunks = len(plan_chunks(list(shard.symbols), chunked_job))
+
+        same = (whole.rows, whole.quarantined, whole.message) == (
+            chunked.rows,
+            chunked.quarantined,
+            chunked.message,
+        )
+        if not same or _analytics(f"whole{n}") != _analytics(f"chunked{n}"):
+            raise SystemExit(f"MISMATCH at {n} symbols: {whole.message!r} vs {chunked.message!r}")
+        print(
+            f"{whole.rows:>10}{'whole':>8}{1:>8}{t_whole:>9.2f}{p_whole / 1e6:>13.1f}"
+            f"  {whole.message}"
+        )
+        print(
+            f"{chunked.rows:>10}{'chunked':>8}{n_chunks:>8}{t_chunked:>9.2f}"
+            f"{p_chunked / 1e6:>13.1f}  (identical)"
+        )
+
+    # Resume: interrupt the chunked run while it writes chunk --fail-at
+    n = int(args.sizes.split(",")[0])
+    shard = Shard(index=0, count=1, symbols=tuple(_symbols(n)))
+    per_chunk = -(-n // args.resume_chunks) * args.days
+    job = replace(base, run_id="first", chunk_rows=per_chunk, checkpoint_dir="checkpoints")
+    n_chunks = len(plan_chunks(list(shard.symbols), job))
+    if not 0 < args.fail_at < n_chunks:
+        raise SystemExit(f"--fail-at must be within 1..{n_chunks - 1}")
+
+    write = executor._write_analytics
+    fetches = []
+
+    def _interrupting(rows, job_, tag):
+        if tag.endswith(f"_c{args.fail_at:05d}"):
+            raise KeyboardInterrupt("simulated interruption")
+        return write(rows, job_, tag)
+
+    fetch = executor.fetch_daily_prices_batch
+    executor.fetch_daily_prices_batch = lambda req: fetches.append(req) or fetch(req)
+    executor._write_analytics = _interrupting
+    try:
+        run_shard(shard, job)
+    except KeyboardInterrupt:
+        pass
+    executor._write_analytics = write
+    before = len(fetches)
+    resumed = run_shard(shard, replace(job, run_id="second"))  # a new run id: resume keeps "first"
+    refetched = len(fetches) - before
+    executor.fetch_daily_prices_batch = fetch
+
+    uninterrupted = run_shard(shard, replace(job, run_id="clean", checkpoint_dir=None))
+    if refetched != n_chunks - args.fail_at or _analytics("first") != _analytics("clean"):
+        raise SystemExit(f"RESUME FAILED: refetched {refetched} of {n_chunks} chunks")
+    if resumed.rows != uninterrupted.rows or list(Path("checkpoints").glob("*.json")):
+        raise SystemExit("RESUME FAILED: totals differ or checkpoint left behind")
+    print(
+        f"resume: interrupted in chunk {args.fail_at + 1}/{n_chunks}, rerun fetched "
+        f"{refetched} chunks, {resumed.rows} rows identical to an uninterrupted run"
+    )
+
+
+if __name__ == "__main__":
+    main()
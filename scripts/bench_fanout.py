@@ -0,0 +1,180 @@
+"""
+Fan-out benchmark for the streaming ingest (pipelines/streaming/ingest_lambda/fanout.py).
+
+Runs --symbols tickers through the Lambda handler against the fake Alpha Vantage server
+(child process, --provider-latency-ms per request) and in-memory S3 / DynamoDB fakes:
+  single    one invocation with the whole universe (what the schedule does today)
+  thread    coordinator + LocalDispatcher on a thread pool
+  process   coordinator + LocalDispatcher on a process pool
+  lambda    coordinator + LambdaDispatcher over the in-process Lambda stand-in
+Shards are sized by the planner from --timeout-s and --request-ms, at most --concurrency
+of them (one wave, each with 1/shards of the quota). Each fan-out run must
+write every symbol once, land one raw object per shard under names the compactor accepts,
+and report failed shards: the last check crashes one worker and expects a FAIL summary
+that names it.
+
+    python scripts/bench_fanout.py --symbols 2000 --provider-latency-ms 20 --timeout-s 3
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Add repo root to PYTHONPATH so imports work when running scripts directly
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+BENCH_ENV = {
+    "S3_BUCKET_NAME": "bench-bucket",
+    "DDB_TABLE_LATEST_PRICES": "latest_prices",
+    "ALPHAVANTAGE_API_KEY": "bench",
+    "PROVIDER_SECRET_ID": "",
+    "AWS_REGION": "us-east-1",
+    "QUOTE_CACHE_ENABLED": "false",
+    "PROVIDER_RATE_PER_MINUTE": "1000000",
+    "FANOUT_RATE_PER_MINUTE": "1000000",
+}
+
+
+def _symbols(n: int):
+    out = []
+    for i in range(n):
+        s = ""
+        for _ in range(4):
+            i, r = divmod(i, 26)
+            s = chr(65 + r) + s
+        out.append(s)
+    return out
+
+
+def _fakes():
+    from pipelines.common.aws import set_client
+    from pipelines.local.aws import FakeCloudWatchClient, FakeDynamoDBClient, FakeS3Client
+
+    s3, ddb = FakeS3Client(), FakeDynamoDBClient()
+    set_client("s3", s3)
+    set_client("dynamodb", ddb)
+    set_client("cloudwatch", FakeCloudWatchClient())
+    return s3, ddb
+
+
+def _check(label, summary, s3, ddb, symbols):
+    from pipelines.batch.compaction.compactor import SOURCE_NAME
+
+    if summary["quality"] != "PASS" or summary["items_written"] != len(symbols):
+        raise SystemExit(f"{label}: bad summary {summary}")
+    if s3 is None:
+        return
+    raw = [k for (_, k) in s3.objects if k.startswith("raw/prices/")]
+    if len(raw) != summary["shards"] or not all(SOURCE_NAME.match(k.split("/")[-1]) for k in raw):
+        raise SystemExit(f"{label}: raw objects {sorted(raw)[:3]}... for {summary['shards']}")
+    served = set(ddb.tables.get("latest_prices", {}))
+    if served != set(symbols):
+        raise SystemExit(f"{label}: {len(served)} symbols served, {len(symbols)} expected")
+
+
+def _crash_one(event, context):
+    from pipelines.streaming.ingest_lambda.lambda_handler import lambda_handler
+
+    if event.get("shard", "").startswith("shard-0000-"):
+        raise RuntimeError("worker crashed")
+    return lambda_handler(event, context)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=2000)
+    parser.add_argument("--provider-latency-ms", type=float, default=20.0)
+    parser.add_argument("--timeout-s", type=float, default=3.0)
+    parser.add_argument("--request-ms", type=float, default=20.0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    # Env must be in place before the provider / fanout modules read it at import
+    os.environ.update(
+        BENCH_ENV,
+        FANOUT_TIMEOUT_SECONDS=str(args.timeout_s),
+        FANOUT_REQUEST_SECONDS=str(args.request_ms / 1000.0),
+    )
+
+    from pipelines.local.aws import FakeLambdaClient
+    from pipelines.streaming.ingest_lambda import provider
+    from pipelines.streaming.ingest_lambda.fanout import (
+        LambdaDispatcher,
+        LocalDispatcher,
+        coordinate,
+        plan_fanout,
+    )
+    from pipelines.streaming.ingest_lambda.lambda_handler import lambda_handler
+
+    symbols = _symbols(args.symbols)
+    plan = plan_fanout(symbols, max_concurrency=args.concurrency)
+    print(
+        f"symbols={args.symbols} provider_latency_ms={args.provider_latency_ms} "
+        f"timeout_s={args.timeout_s} -> {len(plan.shards)} shards of "
+        f"<= {max(len(s.symbols) for s in plan.shards)}"
+    )
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "pipelines.local.fake_alphavantage",
+            "--latency-ms",
+            str(args.provider_latency_ms),
+        ],
+        cwd=REPO_ROOT,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        provider.ALPHAVANTAGE_BASE_URL = server.stdout.readline().strip()
+        event = {"mode": "coordinator", "universe": symbols}
+        print(f"{'path':>8}{'shards':>8}{'wall_s':>9}{'speedup':>9}")
+
+        s3, ddb = _fakes()
+        t0 = time.perf_counter()
+        out = lambda_handler({"symbols": symbols}, None)
+        single = time.perf_counter() - t0
+        _check("single", {**out, "shards": 1}, s3, ddb, symbols)
+        print(f"{'single':>8}{1:>8}{single:>9.2f}{1.0:>9.1f}")
+
+        runs = [
+            ("thread", LocalDispatcher(kind="thread", max_workers=args.concurrency)),
+            ("process", LocalDispatcher(kind="process", max_workers=args.concurrency)),
+            (
+                "lambda",
+                LambdaDispatcher(FakeLambdaClient(lambda_handler), "ingest", args.concurrency),
+            ),
+        ]
+        for label, dispatcher in runs:
+            s3, ddb = _fakes()
+            t0 = time.perf_counter()
+            summary = coordinate(event, dispatcher)
+            wall = time.perf_counter() - t0
+            # Process workers write to their own copies of the fakes
+            _check(label, summary, None if label == "process" else s3, ddb, symbols)
+            print(f"{label:>8}{summary['shards']:>8}{wall:>9.2f}{single / wall:>9.1f}")
+
+        # A crashed worker fails its shard, not the run
+        _fakes()
+        dispatcher = LambdaDispatcher(FakeLambdaClient(_crash_one), "ingest", args.concurrency)
+        summary = coordinate(event, dispatcher)
+        failed = summary["shards_failed"]
+        if (
+            summary["quality"] != "FAIL"
+            or len(failed) != 1
+            or not failed[0].startswith("shard-0000-")
+        ):
+            raise SystemExit(f"crashed worker not reported: {summary}")
+        print(f"failure: {failed[0]} reported, {len(summary['symbols_failed'])} symbols failed")
+    finally:
+        server.terminate()
+        server.wait()
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+End-to-end throughput benchmark for the streaming Lambda handler.
+
+Runs lambda_handler in-process against local stand-ins with injected latencies: the fake
+Alpha Vantage HTTP server runs in a child process (like the real provider, it doesn't
+compete with the handler for the GIL), S3 / DynamoDB / CloudWatch are in-memory fakes.
+For each symbol count it reports:
+  - per-stage wall time (fetch, normalize, validate, anomaly, s3_write, ddb_write, metrics)
+  - end-to-end latency and invocations per second
+  - peak Python memory of one invocation (tracemalloc)
+
+Results are written as JSON (with the git commit) so runs can be compared over time.
+
+    python scripts/bench_lambda.py --symbols 10,100,1000 --invocations 5 \\
+        --provider-latency-ms 20 --ddb-latency-ms 5 --out bench_lambda.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add repo root to PYTHONPATH so imports work when running scripts directly
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+BENCH_ENV = {
+    "S3_BUCKET_NAME": "bench-bucket",
+    "DDB_TABLE_LATEST_PRICES": "latest_prices",
+    "ALPHAVANTAGE_API_KEY": "bench",
+    "PROVIDER_SECRET_ID": "",
+    "AWS_REGION": "us-east-1",
+    # Measure the full fetch -> land path on every invocation (see bench_quote_cache.py)
+    "QUOTE_CACHE_ENABLED": "false",
+    # Buffered metrics go out as one PutMetricData call per namespace to the fake client
+    "METRICS_MODE": "api",
+}
+
+STAGES = ["fetch", "normalize", "validate", "anomaly", "s3_write", "ddb_write", "metrics"]
+
+
+def _symbols(n: int):
+    out = []
+    for i in range(n):
+        s = ""
+        for _ in range(4):
+            i, r = divmod(i, 26)
+            s = chr(65 + r) + s
+        out.append(s)
+    return out
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _p95(values):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", default="10,100,1000")
+    parser.add_argument("--invocations", type=int, default=5)
+    parser.add_argument("--provider-latency-ms", type=float, default=0.0)
+    parser.add_argument("--s3-latency-ms", type=float, default=0.0)
+    parser.add_argument("--ddb-latency-ms", type=float, default=0.0)
+    parser.add_argument("--cw-latency-ms", type=float, default=0.0)
+    parser.add_argument("--rate-per-minute", type=float, default=1_000_000)
+    parser.add_argument("--out", type=str, default="")
+    args = parser.parse_args()
+
+    # Env must be in place before the provider module reads its config at import
+    os.environ.update(BENCH_ENV, PROVIDER_RATE_PER_MINUTE=str(args.rate_per_minute))
+
+    from pipelines.common.aws import set_client
+    from pipelines.local.aws import FakeCloudWatchClient, FakeDynamoDBClient, FakeS3Client
+    from pipelines.streaming.ingest_lambda import provider
+    from pipelines.streaming.ingest_lambda.lambda_handler import lambda_handler
+
+    s3 = FakeS3Client(latency_s=args.s3_latency_ms / 1000)
+    ddb = FakeDynamoDBClient(latency_s=args.ddb_latency_ms / 1000)
+    cw = FakeCloudWatchClient(latency_s=args.cw_latency_ms / 1000)
+    set_client("s3", s3)
+    set_client("dynamodb", ddb)
+    set_client("cloudwatch", cw)
+
+    results = []
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "pipelines.local.fake_alphavantage",
+            "--latency-ms",
+            str(args.provider_latency_ms),
+        ],
+        cwd=REPO_ROOT,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        provider.ALPHAVANTAGE_BASE_URL = server.stdout.readline().strip()
+
+        for n in (int(x) for x in args.symbols.split(",")):
+            event = {"symbols": _symbols(n)}
+            lambda_handler(event, None)  # warm-up: lazy imports, pools, compiled suite
+
+            walls, stage_runs = [], []
+            for _ in range(args.invocations):
+                t0 = time.perf_counter()
+                out = lambda_handler(event, None)
+                walls.append(time.perf_counter() - t0)
+                stage_runs.append(out["stage_ms"])
+                if out["quality"] != "PASS" or out["symbols_failed"]:
+                    raise RuntimeError(f"unexpected handler result: {out}")
+
+            tracemalloc.start()
+            lambda_handler(event, None)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            stage_ms = {
+                s: round(statistics.median(r.get(s, 0.0) for r in stage_runs), 3) for s in STAGES
+            }
+            results.append(
+                {
+                    "symbols": n,
+                    "invocations": args.invocations,
+                    "wall_ms_median": round(statistics.median(walls) * 1000, 3),
+                    "wall_ms_p95": round(_p95(walls) * 1000, 3),
+                    "invocations_per_s": round(len(walls) / sum(walls), 3),
+                    "symbols_per_s": round(n * len(walls) / sum(walls), 1),
+                    "peak_mem_mb": round(peak / 1e6, 3),
+                    "stage_ms_median": stage_ms,
+                }
+            )
+    finally:
+        server.terminate()
+        server.wait()
+
+    header = f"{'symbols':>8}{'wall_ms':>10}{'inv/s':>8}{'peak_MB':>9}"
+    print(header + "".join(f"{s:>11}" for s in STAGES))
+    for r in results:
+        print(
+            f"{r['symbols']:>8}{r['wall_ms_median']:>10.1f}{r['invocations_per_s']:>8.2f}"
+            f"{r['peak_mem_mb']:>9.2f}"
+            + "".join(f"{r['stage_ms_median'][s]:>11.1f}" for s in STAGES)
+        )
+
+    if args.out:
+        report = {
+            "commit": _git_commit(),
+            "python": sys.version.split()[0],
+            "params": {k: v for k, v in vars(args).items() if k != "out"},
+            "results": results,
+        }
+        Path(args.out).write_text(json.dumps(report, indent=2))
+        print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
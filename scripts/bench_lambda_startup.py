@@ -0,0 +1,115 @@
+"""
+Cold-start benchmark for the streaming Lambda handler.
+
+Each sample runs in a fresh interpreter (like a new container) and measures:
+  - import time of pipelines.streaming.ingest_lambda.lambda_handler
+  - which heavy modules were loaded by that import (should be none)
+  - first (cold) and second (warm) invocation latency against local stand-ins
+
+    python scripts/bench_lambda_startup.py --samples 5 --out startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Add repo root to PYTHONPATH so imports work when running scripts directly
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+HEAVY_MODULES = ["pandas", "numpy", "great_expectations"]
+
+
+def _child() -> None:
+    t0 = time.perf_counter()
+    from pipelines.streaming.ingest_lambda import lambda_handler as handler_mod
+
+    import_s = time.perf_counter() - t0
+    heavy_loaded = [m for m in HEAVY_MODULES if m in sys.modules]
+
+    from pipelines.common.aws import set_client
+    from pipelines.local.aws import FakeCloudWatchClient, FakeDynamoDBClient, FakeS3Client
+    from pipelines.local.fake_alphavantage import FakeAlphaVantage
+    from pipelines.streaming.ingest_lambda import provider
+
+    set_client("s3", FakeS3Client())
+    set_client("dynamodb", FakeDynamoDBClient())
+    set_client("cloudwatch", FakeCloudWatchClient())
+
+    with FakeAlphaVantage() as fake:
+        provider.ALPHAVANTAGE_BASE_URL = fake.url
+        t0 = time.perf_counter()
+        handler_mod.lambda_handler({}, None)
+        first_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        handler_mod.lambda_handler({}, None)
+        warm_s = time.perf_counter() - t0
+
+    print(
+        json.dumps(
+            {
+                "import_s": import_s,
+                "heavy_modules_at_import": heavy_loaded,
+                "first_invocation_s": first_s,
+                "warm_invocation_s": warm_s,
+            }
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--out", type=str, default="")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child()
+        return
+
+    env = dict(
+        os.environ,
+        S3_BUCKET_NAME="bench-bucket",
+        DDB_TABLE_LATEST_PRICES="latest_prices",
+        ALPHAVANTAGE_API_KEY="bench",
+        PROVIDER_SECRET_ID="",
+        PROVIDER_RATE_PER_MINUTE="6000",
+        AWS_REGION="us-east-1",
+        # A cached quote would turn the warm invocation into a SKIPPED no-op
+        QUOTE_CACHE_ENABLED="false",
+    )
+    samples = []
+    for _ in range(args.samples):
+        out = subprocess.run(
+            [sys.executable, __file__, "--child"],
+            env=env,
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        samples.append(json.loads(out.strip().splitlines()[-1]))
+
+    summary = {
+        key: statistics.median(s[key] for s in samples)
+        for key in ("import_s", "first_invocation_s", "warm_invocation_s")
+    }
+    summary["heavy_modules_at_import"] = sorted(
+        {m for s in samples for m in s["heavy_modules_at_import"]}
+    )
+    summary["samples"] = len(samples)
+
+    print(json.dumps(summary, indent=2))
+    if args.out:
+        Path(args.out).write_text(json.dumps({"summary": summary, "samples": samples}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Latest-price read path: per-symbol get_item loop vs. LatestPriceClient.
+
+--dashboards threads each refresh the same --symbols symbols every --refresh-s seconds
+for --refreshes rounds against the in-memory DynamoDB stand-in (--latency-ms per API
+call, --unprocessed-rate of batch keys bounced). Reports DynamoDB calls, wall time and
+per-refresh latency for:
+  get_item   one GetItem per symbol per refresh (what consumers do today)
+  batch      LatestPriceClient with the cache off (BatchGetItem only)
+  cached     LatestPriceClient with --ttl-s (cache + coalescing)
+and checks every read returns the written records with float prices. Then checks
+coalescing: --dashboards cold callers at once must share one fetch per symbol.
+
+    python scripts/bench_latest_prices.py --symbols 500 --dashboards 8 --refreshes 10
+"""
+
+import argparse
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add repo root to PYTHONPATH so imports work when running scripts directly
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from pipelines.local.aws import FakeDynamoDBClient  # noqa: E402
+from pipelines.serving.latest_prices import LatestPriceClient, from_ddb_item  # noqa: E402
+from pipelines.streaming.ingest_lambda.ddb_writer import write_latest_prices  # noqa: E402
+
+TABLE = "latest_prices"
+
+
+def _symbols(n: int):
+    out = []
+    for i in range(n):
+        s = ""
+        for _ in range(4):
+            i, r = divmod(i, 26)
+            s = chr(65 + r) + s
+        out.append(s)
+    return out
+
+
+def _table(symbols, args):
+    client = FakeDynamoDBClient(latency_s=args.latency_ms / 1000.0, seed=1)
+    records = [
+        {
+            "symbol": s,
+            "price": round(100 + i * 0.37, 4),
+            "currency": "USD",
+            "ts_market": "2026-01-16T00:00:00Z",
+            "ts_ingest": "2026-01-16T00:00:01Z",
+            "source": "bench",
+        }
+        for i, s in enumerate(symbols)
+    ]
+    write_latest_prices(client, TABLE, records)
+    client.unprocessed_rate = args.unprocessed_rate
+    client.calls.clear()
+    return client, {r["symbol"]: r for r in records}
+
+
+def _get_item_loop(client, symbols):
+    out = {}
+    for s in symbols:
+        item = client.get_item(TableName=TABLE, Key={"symbol": {"S": s}}).get("Item")
+        if item:
+            out[s] = from_ddb_item(item)
+    return out
+
+
+def _run(label, read, client, symbols, expected, args):
+    latencies = []
+    lock = threading.Lock()
+
+    def _dashboard(_):
+        for _ in range(args.refreshes):
+            t0 = time.perf_counter()
+            got = read(symbols + ["ZZZZZ"])  # plus one symbol with no item
+            ms = (time.perf_counter() - t0) * 1000.0
+            assert got == expected, f"{label}: wrong records"
+            assert all(type(r["price"]) is float for r in got.values())
+            with lock:
+                latencies.append(ms)
+            time.sleep(args.refresh_s)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.dashboards) as pool:
+        list(pool.map(_dashboard, range(args.dashboards)))
+    wall = time.perf_counter() - t0
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))]
+    calls = sum(client.calls.values())
+    print(f"{label:>9}{calls:>9}{wall:>9.2f}{p50:>10.1f}{p99:>10.1f}")
+    return calls
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--dashboards", type=int, default=8)
+    parser.add_argument("--refreshes", type=int, default=10)
+    parser.add_argument("--refresh-s", type=float, default=0.2)
+    parser.add_argument("--ttl-s", type=float, default=1.0)
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    parser.add_argument("--unprocessed-rate", type=float, default=0.05)
+    args = parser.parse_args()
+    symbols = _symbols(args.symbols)
+
+    print(
+        f"symbols={args.symbols} dashboards={args.dashboards} refreshes={args.refreshes} "
+        f"refresh_s={args.refresh_s} ttl_s={args.ttl_s} latency_ms={args.latency_ms}"
+    )
+    print(f"{'path':>9}{'calls':>9}{'wall_s':>9}{'p50_ms':>10}{'p99_ms':>10}")
+
+    client, expected = _table(symbols, args)
+    baseline = _run(
+        "get_item", lambda s: _get_item_loop(client, s), client, symbols, expected, args
+    )
+
+    client, _ = _table(symbols, args)
+    batch = LatestPriceClient(client, TABLE, ttl_s=0)
+    _run("batch", batch.get_latest, client, symbols, expected, args)
+
+    client, _ = _table(symbols, args)
+    cached = LatestPriceClient(client, TABLE, ttl_s=args.ttl_s)
+    calls = _run("cached", cached.get_latest, client, symbols, expected, args)
+    print(f"cached: {baseline / max(calls, 1):.0f}x fewer calls; stats {cached.stats.as_dict()}")
+
+    # Coalescing: cold cache, every dashboard asks at the same moment
+    client, _ = _table(symbols, args)
+    client.unprocessed_rate = 0.0
+    reader = LatestPriceClient(client, TABLE, ttl_s=args.ttl_s)
+    start = threading.Barrier(args.dashboards)
+
+    def _cold(_):
+        start.wait()
+        return reader.get_latest(symbols)
+
+    with ThreadPoolExecutor(max_workers=args.dashboards) as pool:
+        results = list(pool.map(_cold, range(args.dashboards)))
+    assert all(r == expected for r in results)
+    fetched = reader.stats.misses
+    if fetched != args.symbols or client.calls["BatchGetItem"] != -(-args.symbols // 100):
+        raise SystemExit(f"COALESCING FAILED: {fetched} symbols fetched, {client.calls}")
+    print(
+        f"coalescing: {args.dashboards} cold callers -> {client.calls['BatchGetItem']} "
+        f"BatchGetItem calls, {reader.stats.coalesced} symbol reads shared"
+    )
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+JSONL vs Hive-partitioned Parquet for the analytics/ohlc_daily zone.
+
+Reports on-disk size, full-scan time and single-symbol read time. Reading JSONL has to
+parse every line; Parquet reads typed columns and prunes to one symbol= partition.
+
+    python scripts/bench_parquet_output.py --symbols 200 --days 1000
+"""
+
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add repo root to PYTHONPATH so imports work when running scripts directly
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from pipelines.batch.ohlc_daily.provider import fetch_daily_prices_stub  # noqa: E402
+from pipelines.batch.ohlc_daily.storage import (  # noqa: E402
+    _pyarrow,
+    write_jsonl,
+    write_parquet_partitioned,
+)
+from pipelines.batch.ohlc_daily.transform import to_curated_prices_daily  # noqa: E402
+
+
+def _size(path: Path) -> int:
+    if path.is_file():
+        return path.stat().st_size
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return time.perf_counter() - t0, out
+
+
+def _symbols(n: int):
+    out = []
+    for i in range(n):
+        s = ""
+        for _ in range(4):
+            i, r = divmod(i, 26)
+            s = chr(65 + r) + s
+        out.append(s)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=200)
+    parser.add_argument("--days", type=int, default=1000)
+    parser.add_argument("--compression", default="snappy")
+    args = parser.parse_args()
+
+    _, pq = _pyarrow()
+    symbols = _symbols(args.symbols)
+    rows = to_curated_prices_daily(fetch_daily_prices_stub(symbols, days=args.days))
+    target = symbols[len(symbols) // 2]
+
+    work = Path(tempfile.mkdtemp(prefix="bench_parquet_"))
+    try:
+        jsonl_path = work / "ohlc_daily.jsonl"
+        parquet_root = work / "ohlc_daily_parquet"
+        yearly_root = work / "ohlc_daily_parquet_yearly"
+
+        w_jsonl, _ = _timed(lambda: write_jsonl(str(jsonl_path), rows))
+        w_parquet, _ = _timed(
+            lambda: write_parquet_partitioned(
+                str(parquet_root), rows, run_id="bench", compression=args.compression
+            )
+        )
+        w_yearly, _ = _timed(
+            lambda: write_parquet_partitioned(
+                str(yearly_root),
+                rows,
+                run_id="bench",
+                compression=args.compression,
+                partition_cols=("symbol", "year"),
+            )
+        )
+
+        def jsonl_full():
+            with jsonl_path.open(encoding="utf-8") as f:
+                return [json.loads(line) for line in f]
+
+        def jsonl_symbol():
+            # No pruning possible: every line is parsed to find one symbol
+            with jsonl_path.open(encoding="utf-8") as f:
+                return [r for r in map(json.loads, f) if r["symbol"] == target]
+
+        r_jsonl_full, full_rows = _timed(jsonl_full)
+        r_jsonl_sym, sym_rows = _timed(jsonl_symbol)
+
+        print(f"rows={len(rows)} symbols={len(symbols)} compression={args.compression}")
+        print(
+            f"{'format':<26}{'files':>7}{'size_MB':>10}{'write_s':>10}{'full_s':>9}{'symbol_s':>10}"
+        )
+        print(
+            f"{'jsonl':<26}{1:>7}{_size(jsonl_path) / 1e6:>10.2f}{w_jsonl:>10.3f}"
+            f"{r_jsonl_full:>9.3f}{r_jsonl_sym:>10.3f}"
+        )
+
+        for name, root, w_s in (
+            ("parquet symbol/year/month", parquet_root, w_parquet),
+            ("parquet symbol/year", yearly_root, w_yearly),
+        ):
+            r_full, full = _timed(lambda r=root: pq.read_table(r))
+            r_sym, one = _timed(lambda r=root: pq.read_table(r, filters=[("symbol", "=", target)]))
+            assert full.num_rows == len(full_rows) and one.num_rows == len(sym_rows)
+            files = sum(1 for _ in root.rglob("*.parquet"))
+            print(
+                f"{name:<26}{files:>7}{_size(root) / 1e6:>10.2f}{w_s:>10.3f}"
+                f"{r_full:>9.3f}{r_sym:>10.3f}"
+            )
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
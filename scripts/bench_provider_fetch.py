@@ -0,0 +1,63 @@
+"""
+Serial vs concurrent GLOBAL_QUOTE fetching against a local fake Alpha Vantage server.
+
+    python scripts/bench_provider_fetch.py --symbols 300 --latency 0.05 --throttle-rate 0.05
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add repo root to PYTHONPATH so imports work when running scripts directly
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from pipelines.common.ratelimit import TokenBucket  # noqa: E402
+from pipelines.local.fake_alphavantage import FakeAlphaVantage  # noqa: E402
+from pipelines.streaming.ingest_lambda.provider import fetch_latest_quotes  # noqa: E402
+
+
+def _symbols(n: int):
+    out = []
+    for i in range(n):
+        s = ""
+        for _ in range(3):
+            i, r = divmod(i, 26)
+            s = chr(65 + r) + s
+        out.append(s)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per response")
+    parser.add_argument("--throttle-rate", type=float, default=0.02)
+    parser.add_argument("--rate-per-minute", type=float, default=6000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+
+    symbols = _symbols(args.symbols)
+    print(f"{'workers':>8}{'seconds':>10}{'ok':>6}{'failed':>8}{'retries':>9}{'sym/s':>9}")
+    for workers in args.workers:
+        fake = FakeAlphaVantage(latency_s=args.latency, throttle_rate=args.throttle_rate, seed=7)
+        with fake:
+            limiter = TokenBucket.per_minute(args.rate_per_minute, burst=workers)
+            t0 = time.perf_counter()
+            res = fetch_latest_quotes(
+                symbols,
+                max_workers=workers,
+                limiter=limiter,
+                base_url=fake.url,
+                api_key="demo",
+            )
+            dt = time.perf_counter() - t0
+        print(
+            f"{workers:>8}{dt:>10.2f}{len(res.events):>6}{len(res.failures):>8}"
+            f"{res.retries:>9}{len(symbols) / dt:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Quote cache: provider calls saved vs. freshness lost, per TTL.
+
+Simulates EventBridge ticks against a provider whose quotes move with probability
+--move-prob per symbol per tick (0 models a closed market). Two Lambda containers take
+alternate ticks and share the DynamoDB tier (in-memory fake). For each TTL it reports
+provider calls, cache hit rate, unchanged quotes short-circuited, quotes passed
+downstream, and how stale the last landed quote could get.
+
+    python scripts/bench_quote_cache.py --symbols 500 --ticks 120 --tick-s 60 \\
+        --ttls 0,60,120,300 --move-prob 0.3
+"""
+
+import argparse
+import random
+import sys
+from pathlib import Path
+
+# Add repo root to PYTHONPATH so imports work when running scripts directly
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from pipelines.local.aws import FakeDynamoDBClient  # noqa: E402
+from pipelines.streaming.ingest_lambda.provider import QuoteFetchResult  # noqa: E402
+from pipelines.streaming.ingest_lambda.quote_cache import (  # noqa: E402
+    CacheStats,
+    DynamoDBQuoteStore,
+    QuoteCache,
+)
+
+
+def _symbols(n: int):
+    out = []
+    for i in range(n):
+        s = ""
+        for _ in range(4):
+            i, r = divmod(i, 26)
+            s = chr(65 + r) + s
+        out.append(s)
+    return out
+
+
+class _Market:
+    def __init__(self, symbols, move_prob: float, seed: int):
+        self.rng = random.Random(seed)
+        self.move_prob = move_prob
+        self.prices = {s: 100.0 for s in symbols}
+        self.moved_at = {s: 0.0 for s in symbols}
+        self.calls = 0
+
+    def tick(self, now: float) -> None:
+        for s in self.prices:
+            if self.rng.random() < self.move_prob:
+                self.prices[s] = round(self.prices[s] * (1 + self.rng.gauss(0, 0.001)), 4)
+                self.moved_at[s] = now
+
+    def fetch(self, symbols, **_):
+        self.calls += len(symbols)
+        return QuoteFetchResult(
+            events=[
+                {
+                    "symbol": s,
+                    "price": self.prices[s],
+                    "currency": "USD",
+                    "ts_market": "2026-01-16T00:00:00Z",
+                    "ts_ingest": "",
+                    "source": "bench",
+                }
+                for s in symbols
+            ]
+        )
+
+
+def _run(symbols, ttl: float, args):
+    clock = {"now": 0.0}
+    market = _Market(symbols, args.move_prob, seed=1)
+    store = DynamoDBQuoteStore(FakeDynamoDBClient(), "quote_cache")
+    containers = [QuoteCache(ttl_s=ttl, shared=store, clock=lambda: clock["now"]) for _ in range(2)]
+    total = CacheStats()
+    landed = {}
+    max_stale = 0.0
+
+    for t in range(args.ticks):
+        clock["now"] = t * args.tick_s
+        market.tick(clock["now"])
+        cache = containers[t % 2]
+        res = cache.fetch(symbols, fetch=market.fetch)
+        cache.put(res.raw)
+        for e in res.events:
+            landed[e["symbol"]] = e["price"]
+        for k in ("local_hits", "shared_hits", "misses", "unchanged", "changed"):
+            setattr(total, k, getattr(total, k) + getattr(res.stats, k))
+        total.requested += res.stats.requested
+        # Staleness: how long the landed price has lagged a move in the market
+        for s in symbols:
+            if landed.get(s) != market.prices[s]:
+                max_stale = max(max_stale, clock["now"] - market.moved_at[s])
+
+    return market.calls, total, max_stale
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--ticks", type=int, default=120)
+    parser.add_argument("--tick-s", type=float, default=60.0)
+    parser.add_argument("--ttls", default="0,60,120,300")
+    parser.add_argument("--move-prob", type=float, default=0.3)
+    args = parser.parse_args()
+
+    symbols = _symbols(args.symbols)
+    baseline = args.symbols * args.ticks
+    print(
+        f"symbols={args.symbols} ticks={args.ticks} tick_s={args.tick_s} move_prob={args.move_prob}"
+    )
+    print(
+        f"{'ttl_s':>7}{'calls':>9}{'saved':>8}{'hit_rate':>10}{'unchanged':>11}"
+        f"{'downstream':>12}{'max_stale_s':>13}"
+    )
+    for ttl in (float(x) for x in args.ttls.split(",")):
+        calls, stats, max_stale = _run(symbols, ttl, args)
+        print(
+            f"{ttl:>7.0f}{calls:>9}{1 - calls / baseline:>8.1%}{stats.hit_rate:>10.1%}"
+            f"{stats.unchanged:>11}{stats.changed:>12}{max_stale:>13.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
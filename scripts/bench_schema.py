@@ -0,0 +1,138 @@
+"""
+Schema-compiled normalizers vs. the hand-written ones they replaced.
+
+For price_event and ohlc_daily it checks that the compiled normalize() returns exactly
+what the previous hand-written function returned, then reports records/s for:
+  - hand:      the previous hand-written normalizer (kept here as the baseline)
+  - normalize: the compiled normalizer (what transform.py now calls)
+  - check:     compiled single-pass normalize + validate (with a share of bad records)
+Rates are medians over --repeat interleaved rounds.
+
+    python scripts/bench_schema.py --records 50000 --bad-every 1000 --repeat 40
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add repo root to PYTHONPATH so imports work when running scripts directly
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from pipelines.common.schema import load_schema  # noqa: E402
+
+
+def hand_price_event(e):
+    return {
+        "symbol": str(e["symbol"]).upper().strip(),
+        "price": float(e["price"]),
+        "currency": str(e.get("currency", "USD")).upper().strip(),
+        "ts_market": str(e.get("ts_market") or "now"),
+        "ts_ingest": str(e.get("ts_ingest") or "now"),
+        "source": str(e.get("source", "unknown")),
+    }
+
+
+def hand_ohlc_daily(r):
+    return {
+        "symbol": str(r["symbol"]).upper().strip(),
+        "date": str(r["date"]),
+        "open": float(r["open"]),
+        "high": float(r["high"]),
+        "low": float(r["low"]),
+        "close": float(r["close"]),
+        "volume": int(r["volume"]),
+        "currency": str(r.get("currency", "USD")).upper().strip(),
+        "ts_market": str(r["ts_market"]),
+        "ts_ingest": str(r["ts_ingest"]),
+        "source": str(r.get("source", "unknown")),
+    }
+
+
+def _price_events(n, bad_every):
+    out = []
+    for i in range(n):
+        e = {
+            "symbol": f"sym{i % 500} ",
+            "price": f"{100 + i % 97}.25",
+            "currency": "usd",
+            "ts_market": "2026-01-16",
+            "ts_ingest": "2026-01-16T21:00:05Z",
+            "source": "alphavantage",
+        }
+        if bad_every and i % bad_every == 0:
+            e["price"] = "-1"
+        out.append(e)
+    return out
+
+
+def _ohlc_rows(n, bad_every):
+    out = []
+    for i in range(n):
+        r = {
+            "symbol": f"sym{i % 500}",
+            "date": f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}",
+            "open": 100.0,
+            "high": 101.5,
+            "low": 99.0,
+            "close": 100.5,
+            "volume": 1_000_000 + i,
+            "currency": "USD",
+            "ts_market": "2025-01-02T21:00:00Z",
+            "ts_ingest": "2026-01-16T21:00:05Z",
+            "source": "synthetic",
+        }
+        if bad_every and i % bad_every == 0:
+            r["date"] = "2025-02-30"
+        out.append(r)
+    return out
+
+
+def _rates(fns, records, repeat):
+    """Median records/s per function; repeats are interleaved so machine noise hits all alike."""
+    seconds = [[] for _ in fns]
+    for _ in range(repeat):
+        for i, fn in enumerate(fns):
+            t0 = time.perf_counter()
+            fn(records)
+            seconds[i].append(time.perf_counter() - t0)
+    return [len(records) / statistics.median(s) for s in seconds]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=50_000)
+    parser.add_argument("--bad-every", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=40)
+    args = parser.parse_args()
+
+    cases = [
+        ("price_event", hand_price_event, _price_events(args.records, args.bad_every)),
+        ("ohlc_daily", hand_ohlc_daily, _ohlc_rows(args.records, args.bad_every)),
+    ]
+    print(f"records={args.records} bad_every={args.bad_every}")
+    print(
+        f"{'schema':<13}{'hand rec/s':>12}{'normalize rec/s':>17}"
+        f"{'check rec/s':>13}{'rejected':>10}"
+    )
+    for name, hand, records in cases:
+        schema = load_schema(name)
+        if [schema.normalize(r) for r in records] != [hand(r) for r in records]:
+            raise SystemExit(f"MISMATCH: compiled {name} differs from the hand-written normalizer")
+        _, rejected = schema.split(records)
+
+        hand_rate, norm_rate, check_rate = _rates(
+            [lambda rs, h=hand: [h(r) for r in rs], schema.normalize_many, schema.split],
+            records,
+            args.repeat,
+        )
+        print(
+            f"{name:<13}{hand_rate:>12,.0f}{norm_rate:>17,.0f}{check_rate:>13,.0f}"
+            f"{len(rejected):>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Whole-body JSONL (the old `_jsonl` + put_object) vs the streaming writer in
+pipelines/common/storage.py, against the in-memory S3 stand-in and the local filesystem.
+
+For each compression it checks the object round-trips to the same records, and reports
+write time, object size, upload mode and the writer's peak extra memory (tracemalloc,
+excluding the input records, which both approaches receive as the same list). Memory is
+measured against a client that discards bodies, so the stand-in's own copy of the
+object doesn't count.
+
+    python scripts/bench_storage_writer.py --records 500000
+"""
+
+import argparse
+import gzip
+import json
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add repo root to PYTHONPATH so imports work when running scripts directly
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from pipelines.batch.ohlc_daily.synthetic import generate_ticks  # noqa: E402
+from pipelines.common.storage import (  # noqa: E402
+    MIB,
+    _zstd,
+    jsonl_key,
+    write_jsonl_local,
+    write_jsonl_s3,
+)
+from pipelines.local.aws import FakeS3Client  # noqa: E402
+
+BUCKET = "bench-bucket"
+
+
+class _DiscardingS3(FakeS3Client):
+    # Same API, but keeps no object bytes: isolates the writer's own buffering
+    def put_object(self, Bucket, Key, Body=b"", **_):
+        return {"ETag": '"0"'}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body=b"", **_):
+        return {"ETag": '"0"'}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload, **_):
+        return {}
+
+
+def _decode(data: bytes, compression: str):
+    if compression == "gzip":
+        data = gzip.decompress(data)
+    elif compression == "zstd":
+        data = _zstd().ZstdDecompressor().decompressobj().decompress(data)
+    return [json.loads(line) for line in data.decode("utf-8").splitlines()]
+
+
+def _measure(fn, client):
+    t0 = time.perf_counter()
+    fn(client)
+    wall = time.perf_counter() - t0
+
+    tracemalloc.start()
+    fn(_DiscardingS3())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return wall, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=500_000)
+    parser.add_argument("--part-mb", type=int, default=8)
+    args = parser.parse_args()
+
+    symbols = [f"S{i:03d}" for i in range(500)]
+    ticks = generate_ticks(symbols, args.records // len(symbols), seed=1)
+    records = [e for chunk in ticks for e in chunk]
+    compressions = ["none", "gzip"]
+    try:
+        _zstd()
+        compressions.append("zstd")
+    except RuntimeError:
+        print("zstandard not installed: skipping zstd")
+
+    print(f"records={len(records)} part_size={args.part_mb}MiB")
+    print(f"{'writer':<22}{'compression':<13}{'size_MB':>9}{'write_s':>9}{'peak_MB':>9}  upload")
+
+    s3 = FakeS3Client()
+
+    def whole_body(client):
+        body = ("\n".join(json.dumps(r) for r in records) + "\n").encode("utf-8")
+        client.put_object(Bucket=BUCKET, Key="baseline/prices.jsonl", Body=body)
+
+    wall, peak = _measure(whole_body, s3)
+    size = len(s3.objects[(BUCKET, "baseline/prices.jsonl")])
+    print(
+        f"{'whole-body put':<22}{'none':<13}{size / 1e6:>9.2f}{wall:>9.2f}{peak / 1e6:>9.2f}"
+        "  single"
+    )
+
+    work = Path(tempfile.mkdtemp(prefix="bench_storage_"))
+    try:
+        for compression in compressions:
+            key = jsonl_key("raw/prices", "prices_bench", compression)
+
+            def streamed(client, key=key, compression=compression):
+                client.calls.clear()
+                write_jsonl_s3(
+                    client,
+                    BUCKET,
+                    key,
+                    records,
+                    compression=compression,
+                    part_size=args.part_mb * MIB,
+                    multipart_threshold=args.part_mb * MIB,
+                )
+
+            wall, peak = _measure(streamed, s3)
+            data = s3.objects[(BUCKET, key)]
+            assert _decode(data, compression) == records, f"S3 round-trip mismatch ({compression})"
+            mode = f"multipart x{s3.calls['UploadPart']}" if "UploadPart" in s3.calls else "single"
+            print(
+                f"{'streaming s3':<22}{compression:<13}{len(data) / 1e6:>9.2f}{wall:>9.2f}"
+                f"{peak / 1e6:>9.2f}  {mode}"
+            )
+
+            path = work / key
+
+            def local(_client, path=path, compression=compression):
+                write_jsonl_local(path, records, compression=compression)
+
+            wall, peak = _measure(local, None)
+            assert _decode(path.read_bytes(), compression) == records
+            print(
+                f"{'streaming local':<22}{compression:<13}{path.stat().st_size / 1e6:>9.2f}"
+                f"{wall:>9.2f}{peak / 1e6:>9.2f}  file"
+            )
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    print("round-trip: OK")
+
+
+if __name__ == "__main__":
+    main()
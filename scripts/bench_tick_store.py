@@ -0,0 +1,299 @@
+"""
+Memory-mapped tick store (pipelines/serving/tick_store.py) against scanning curated JSONL.
+
+Lands --minutes Lambda-style curated/prices/prices_<ts>.jsonl objects (one tick per
+symbol per minute) in a temp dir, hour by hour, with late objects (landing an hour after
+newer ticks were stored) and fan-out re-deliveries (prices_<ts>_<shard_id>, the same
+records again). Then:
+  1. fill: filled after every hourly wave, every record lands; another fill reads nothing
+  2. parity: random (symbol, window) range and point-in-time queries equal the same
+     queries answered by scanning the JSONL; single-segment results are read-only
+     memmap views (zero-copy)
+  3. compaction: the due symbols are rewritten into full segments, re-deliveries are
+     dropped (zone compactor key), answers equal the scan deduplicated for those
+     symbols; a reopened readonly store answers the same
+  4. zone compaction: after the hourly zone compactor replaces the small objects, a
+     fill skips its outputs (their inputs are already loaded) and the catalog keeps only
+     the live keys
+Then times point-in-time and 1h / 1d range queries on the store vs one JSONL scan each.
+
+    python scripts/bench_tick_store.py --symbols 500 --minutes 1440
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add repo root to PYTHONPATH so imports work when running scripts directly
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from pipelines.batch.compaction.compactor import (  # noqa: E402
+    LocalStore,
+    compact_zone,
+    iter_zone_records,
+    live_keys,
+)
+from pipelines.common.storage import write_jsonl_local  # noqa: E402
+from pipelines.serving.tick_store import TickStore, fill_from_zone  # noqa: E402
+
+START = datetime(2026, 1, 16, 0, 0, tzinfo=timezone.utc)
+ZONE = "curated/prices"
+
+
+def _symbols(n: int):
+    out = []
+    for i in range(n):
+        s = ""
+        for _ in range(4):
+            i, r = divmod(i, 26)
+            s = chr(65 + r) + s
+        out.append(s)
+    return out
+
+
+def _iso(dt: datetime) -> str:
+    return dt.isoformat().replace("+00:00", "Z")
+
+
+def _land(root: Path, symbols, minutes: int, rng, wave_minutes: int = 60):
+    """
+    Curated objects, one per minute, in waves of `wave_minutes`; yields the records
+    written so far after each wave. A late object (named after its tick) only lands with
+    the next wave, i.e. after newer ticks were already filled into the store.
+    """
+    price = 20 + 480 * rng.random(len(symbols))
+    written, late, held = 0, [], []
+    for m in range(minutes):
+        at = START + timedelta(minutes=m)
+        price = np.round(price * np.exp(0.001 * rng.standard_normal(len(symbols))), 4)
+        records = [
+            {
+                "symbol": s,
+                "price": p,
+                "currency": "USD",
+                "ts_market": _iso(at),
+                "ts_ingest": _iso(at + timedelta(seconds=5)),
+                "source": "alphavantage",
+            }
+            for s, p in zip(symbols, price.tolist(), strict=True)
+        ]
+        stamp = at.strftime("%Y%m%dT%H%M%SZ")
+        if rng.random() < 0.02:
+            late.append((stamp, records))
+        else:
+            write_jsonl_local(root / ZONE / f"prices_{stamp}.jsonl", records)
+            written += len(records)
+        if rng.random() < 0.02:
+            # A fan-out shard re-delivered part of this tick
+            part = records[: len(records) // 4]
+            write_jsonl_local(root / ZONE / f"prices_{stamp}_shard-0000-of-0004.jsonl", part)
+            written += len(part)
+        if (m + 1) % wave_minutes == 0 or m == minutes - 1:
+            for late_stamp, late_records in held:
+                write_jsonl_local(root / ZONE / f"prices_{late_stamp}.jsonl", late_records)
+                written += len(late_records)
+            held, late = late, []
+            yield written
+    for late_stamp, late_records in held:
+        write_jsonl_local(root / ZONE / f"prices_{late_stamp}.jsonl", late_records)
+        written += len(late_records)
+    yield written
+
+
+def _scan(zone_root: Path, symbol=None, start=None, end=None):
+    """The baseline: read and parse every live curated object, filter in Python."""
+    out = []
+    for r in iter_zone_records(LocalStore(str(zone_root)), ZONE):
+        if symbol is not None and r["symbol"] != symbol:
+            continue
+        if start is not None and not (start <= r["ts_market"] < end):
+            continue
+        out.append(r)
+    return out
+
+
+def _ns(iso: str) -> int:
+    return pd.Timestamp(iso).value
+
+
+class _Reference:
+    """Per-symbol (ts_market, ts_ingest, price) rows from one full scan."""
+
+    def __init__(self, records):
+        self.rows = defaultdict(list)
+        for r in records:
+            self.rows[r["symbol"]].append((_ns(r["ts_market"]), _ns(r["ts_ingest"]), r["price"]))
+        for rows in self.rows.values():
+            rows.sort()
+
+    def deduped(self, symbols):
+        """Re-deliveries (same ts_market, ts_ingest) dropped for `symbols`."""
+        ref = _Reference([])
+        for s, rows in self.rows.items():
+            seen = {}
+            for ts, ing, p in rows:
+                seen.setdefault((ts, ing), (ts, ing, p))
+            ref.rows[s] = sorted(seen.values()) if s in symbols else rows
+        return ref
+
+    def range(self, symbol, lo, hi):
+        return [r for r in self.rows[symbol] if lo <= r[0] < hi]
+
+    def as_of(self, symbol, at):
+        before = [r for r in self.rows[symbol] if r[0] <= at]
+        return max(r[0] for r in before) if before else None
+
+
+def _rows(ticks):
+    return sorted(
+        zip(ticks.ts_market.tolist(), ticks.ts_ingest.tolist(), ticks.price.tolist(), strict=True)
+    )
+
+
+def _parity(store, ref, symbols, minutes, rng, queries, label):
+    for _ in range(queries):
+        s = symbols[int(rng.integers(len(symbols)))]
+        a = START + timedelta(minutes=int(rng.integers(-30, minutes)))
+        b = a + timedelta(minutes=int(rng.integers(0, 240)))
+        lo, hi = _ns(_iso(a)), _ns(_iso(b))
+        got = store.range(s, a, b)
+        if _rows(got) != ref.range(s, lo, hi):
+            raise SystemExit(f"{label}: range({s}, {a}, {b}) differs from the scan")
+        if (np.diff(got.ts_market) < 0).any():
+            raise SystemExit(f"{label}: range({s}) not sorted by ts_market")
+        tick = store.as_of(s, b)
+        want = ref.as_of(s, hi)
+        if (tick and _ns(tick["ts_market"])) != want:
+            raise SystemExit(f"{label}: as_of({s}, {b}) = {tick}, scan says {want}")
+
+
+def _time(fn, n):
+    t0 = time.perf_counter()
+    for i in range(n):
+        fn(i)
+    return (time.perf_counter() - t0) / n
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--minutes", type=int, default=1440)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--scan-queries", type=int, default=2)
+    parser.add_argument("--segment-rows", type=int, default=1024)
+    parser.add_argument("--index-stride", type=int, default=64)
+    args = parser.parse_args()
+    rng = np.random.default_rng(11)
+    symbols = _symbols(args.symbols)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        zone_root, store_root = Path(tmp) / "data", Path(tmp) / "ticks"
+        zone = LocalStore(str(zone_root))
+
+        # 1) Fill after every wave, then once more (reads nothing)
+        store = TickStore(
+            str(store_root), segment_rows=args.segment_rows, index_stride=args.index_stride
+        )
+        read, stored, seconds = 0, 0, 0.0
+        for written in _land(zone_root, symbols, args.minutes, rng):
+            stats = fill_from_zone(store, zone)
+            read, stored, seconds = (
+                read + stats.objects,
+                stored + stats.stored,
+                seconds + stats.seconds,
+            )
+            if stored != written:
+                raise SystemExit(f"fill stored {stored} of {written} records")
+        objects = len(list((zone_root / ZONE).glob("*.jsonl")))
+        bytes_in = sum(p.stat().st_size for p in (zone_root / ZONE).glob("*.jsonl"))
+        if read != objects:
+            raise SystemExit(f"fill read {read} of {objects} objects")
+        again = fill_from_zone(store, zone)
+        if again.objects or again.skipped != objects:
+            raise SystemExit(f"refill read objects: {again}")
+        segments = sum(len(store.segments(s)) for s in symbols)
+        print(
+            f"fill: {objects} objects / {written} records ({bytes_in / 1e6:.1f} MB JSONL) in "
+            f"{seconds:.2f}s ({written / seconds:,.0f}/s), {segments} segments; refill read 0"
+        )
+
+        # 2) Parity with the JSONL scan, before compaction (re-deliveries included)
+        ref = _Reference(_scan(zone_root))
+        _parity(store, ref, symbols, args.minutes, rng, args.queries, "pre-compaction")
+        print(f"parity: {args.queries} range + point-in-time queries equal the scan")
+
+        # 3) Compaction
+        due = [s for s in symbols if store.needs_compaction(s)]
+        compacted = store.compact_due()
+        if sorted(compacted) != due:
+            raise SystemExit("compact_due did not compact exactly the due symbols")
+        dropped = sum(c.duplicates for c in compacted.values())
+        after = sum(len(store.segments(s)) for s in symbols)
+        deduped = ref.deduped(set(compacted))
+        _parity(store, deduped, symbols, args.minutes, rng, args.queries, "post-compaction")
+        one = store.range(symbols[0], START, START + timedelta(minutes=30))
+        if len(one) == 0 or one.price.flags.owndata or one.price.flags.writeable:
+            raise SystemExit("single-segment range is not a read-only memmap view")
+        store.close()
+        reader = TickStore(str(store_root), readonly=True)
+        _parity(reader, deduped, symbols, args.minutes, rng, args.queries // 3, "reopened")
+        print(
+            f"compaction: {len(compacted)} of {len(symbols)} symbols due, segments "
+            f"{segments} -> {after}, {dropped} re-deliveries dropped; zero-copy views, "
+            "reopened store agrees"
+        )
+
+        # 4) The zone compactor replaces the small objects; the store skips its outputs
+        now = START + timedelta(minutes=args.minutes, hours=2)
+        result = compact_zone(zone, ZONE, now=now)
+        refill = fill_from_zone(TickStore(str(store_root)), zone)
+        if refill.objects or refill.skipped != len(result.manifests):
+            raise SystemExit(f"fill after zone compaction re-read data: {refill}")
+        tracked = TickStore(str(store_root), readonly=True).loaded
+        if sorted(tracked) != live_keys(zone, ZONE):
+            raise SystemExit(f"catalog tracks {len(tracked)} keys, not the live listing")
+        print(
+            f"zone compaction: {len(result.manifests)} hourly outputs skipped by the next fill; "
+            f"catalog tracks {len(tracked)} live keys (was {objects})"
+        )
+
+        # Cost: store queries (segments already mapped) vs scanning the JSONL per query
+        picks = [symbols[int(rng.integers(len(symbols)))] for _ in range(args.queries)]
+        ats = [START + timedelta(minutes=int(rng.integers(60, args.minutes))) for _ in picks]
+        t0 = time.perf_counter()
+        for s in set(picks):
+            reader.range(s)  # first touch: header reads + mmap per segment
+        cold = (time.perf_counter() - t0) / len(set(picks))
+        print(f"{'query':>14}{'store_us':>12}{'scan_s':>10}{'speedup':>10}{'rows':>8}")
+        for label, window in (("point-in-time", None), ("range 1h", 60), ("range 1d", 1440)):
+            if window is None:
+                store_s = _time(lambda i: reader.as_of(picks[i], ats[i]), len(picks))
+                rows = 1
+            else:
+                span = timedelta(minutes=window)
+                store_s = _time(
+                    lambda i, span=span: reader.range(picks[i], ats[i] - span, ats[i]), len(picks)
+                )
+                rows = len(reader.range(picks[0], ats[0] - span, ats[0]))
+            lo = _iso(ats[0] - timedelta(minutes=window or args.minutes))
+            scan_s = _time(
+                lambda i, lo=lo: _scan(zone_root, picks[i], lo, _iso(ats[i])), args.scan_queries
+            )
+            print(
+                f"{label:>14}{store_s * 1e6:>12.1f}{scan_s:>10.2f}{scan_s / store_s:>10.0f}x"
+                f"{rows:>8}"
+            )
+        print(f"first query per symbol (maps its segments): {cold * 1e6:.0f} us")
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
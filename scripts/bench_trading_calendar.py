@@ -0,0 +1,205 @@
+"""
+Trading calendar (pipelines/common/trading_calendar.py): correctness and cost.
+
+  1. holidays: the weekdays the calendar closes in 2022-2027 are exactly the published
+     NYSE holiday lists below; early closes land on the published half days
+  2. parity: sessions_between / last_n_sessions / count_sessions / is_session_array /
+     session_gaps agree with day-by-day loops over the same holiday set on random ranges
+  3. guards: the ohlc_daily suite quarantines a bar dated on a holiday
+Then times the old weekday loops against the bisect queries, and missing_trading_days
+for --symbols symbols.
+
+    python scripts/bench_trading_calendar.py --symbols 20000 --queries 2000
+"""
+
+import argparse
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+
+# Add repo root to PYTHONPATH so imports work when running scripts directly
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from pipelines.batch.ohlc_daily.provider import missing_trading_days  # noqa: E402
+from pipelines.batch.ohlc_daily.quality import validate_ohlc_daily_rows  # noqa: E402
+from pipelines.common.trading_calendar import get_trading_calendar  # noqa: E402
+
+# Published NYSE full-day closures (weekdays only)
+NYSE_HOLIDAYS = {
+    2022: "01-17 02-21 04-15 05-30 06-20 07-04 09-05 11-24 12-26",
+    2023: "01-02 01-16 02-20 04-07 05-29 06-19 07-04 09-04 11-23 12-25",
+    2024: "01-01 01-15 02-19 03-29 05-27 06-19 07-04 09-02 11-28 12-25",
+    2025: "01-01 01-09 01-20 02-17 04-18 05-26 06-19 07-04 09-01 11-27 12-25",
+    2026: "01-01 01-19 02-16 04-03 05-25 06-19 07-03 09-07 11-26 12-25",
+    2027: "01-01 01-18 02-15 03-26 05-31 06-18 07-05 09-06 11-25 12-24",
+}
+NYSE_EARLY_CLOSES = "2024-07-03 2024-11-29 2024-12-24 2025-07-03 2025-11-28 2025-12-24"
+
+
+def _symbols(n: int):
+    out = []
+    for i in range(n):
+        s = ""
+        for _ in range(4):
+            i, r = divmod(i, 26)
+            s = chr(65 + r) + s
+        out.append(s)
+    return out
+
+
+def _weekdays_between(start: date, end: date):
+    """The pre-calendar helper: every weekday is a trading day."""
+    out, d = [], start
+    while d <= end:
+        if d.weekday() < 5:
+            out.append(d)
+        d += timedelta(days=1)
+    return out
+
+
+def _last_n_weekdays(end: date, n: int):
+    out, d = [], end
+    while len(out) < n:
+        if d.weekday() < 5:
+            out.append(d)
+        d -= timedelta(days=1)
+    return out[::-1]
+
+
+class _Loop:
+    """Day-by-day reference over the calendar's own holiday set."""
+
+    def __init__(self, holidays):
+        self.holidays = set(holidays)
+
+    def is_session(self, d):
+        return d.weekday() < 5 and d not in self.holidays
+
+    def between(self, start, end):
+        return [d for d in _weekdays_between(start, end) if d not in self.holidays]
+
+    def last_n(self, end, n):
+        out, d = [], end
+        while len(out) < n:
+            if self.is_session(d):
+                out.append(d)
+            d -= timedelta(days=1)
+        return out[::-1]
+
+    def gaps(self, days, after):
+        """Sessions strictly between each date and the one before it (or `after`)."""
+        out, prev = [], after
+        for d in days:
+            one = timedelta(days=1)
+            out.append(0 if prev is None else len(self.between(prev + one, d - one)))
+            prev = d
+        return out
+
+
+def _random_day(rng, lo=date(1994, 1, 1), hi=date(2044, 12, 31)):
+    return lo + timedelta(days=int(rng.integers(0, (hi - lo).days + 1)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+    rng = np.random.default_rng(7)
+
+    t0 = time.perf_counter()
+    calendar = get_trading_calendar()
+    t_build = time.perf_counter() - t0
+
+    # 1) Published holiday lists and half days
+    for year, days in NYSE_HOLIDAYS.items():
+        want = [date.fromisoformat(f"{year}-{d}") for d in days.split()]
+        closed = [
+            d
+            for d in _weekdays_between(date(year, 1, 1), date(year, 12, 31))
+            if not calendar.is_session(d)
+        ]
+        if closed != want:
+            extra = sorted(set(closed) - set(want))
+            missing = sorted(set(want) - set(closed))
+            raise SystemExit(f"{year}: extra closures {extra}, missing {missing}")
+    early = [date.fromisoformat(d) for d in NYSE_EARLY_CLOSES.split()]
+    if not all(calendar.is_early_close(d) for d in early) or calendar.is_early_close(
+        date(2026, 7, 3)
+    ):
+        raise SystemExit("early closes disagree with the published half days")
+    print(f"holidays: {len(NYSE_HOLIDAYS)} years match the published NYSE lists")
+
+    # 2) Parity with day-by-day loops
+    ref = _Loop(calendar.holidays.tolist())
+    for _ in range(args.queries):
+        a, b = sorted((_random_day(rng), _random_day(rng)))
+        b = min(b, a + timedelta(days=int(rng.integers(0, 800))))
+        n = int(rng.integers(1, 600))
+        if calendar.sessions_between(a, b) != ref.between(a, b):
+            raise SystemExit(f"sessions_between({a}, {b}) mismatch")
+        if calendar.count_sessions(a, b) != len(ref.between(a, b)):
+            raise SystemExit(f"count_sessions({a}, {b}) mismatch")
+        if calendar.last_n_sessions(b, n) != ref.last_n(b, n):
+            raise SystemExit(f"last_n_sessions({b}, {n}) mismatch")
+        if calendar.previous_session(b) != ref.last_n(b - timedelta(days=1), 1)[0]:
+            raise SystemExit(f"previous_session({b}) mismatch")
+    probe = [_random_day(rng) for _ in range(args.queries)]
+    got = calendar.is_session_array(np.array(probe, dtype="datetime64[D]"))
+    if got.tolist() != [ref.is_session(d) for d in probe]:
+        raise SystemExit("is_session_array mismatch")
+    for _ in range(200):
+        start = _random_day(rng, hi=date(2040, 1, 1))
+        days = sorted(set(ref.between(start, start + timedelta(days=60))))
+        keep = [d for d in days if rng.random() < 0.8]
+        after = start - timedelta(days=int(rng.integers(0, 10))) if rng.random() < 0.7 else None
+        base = np.array([after], dtype="datetime64[D]")
+        mine = calendar.session_gaps(np.array(keep, dtype="datetime64[D]"), None, base).tolist()
+        if mine != ref.gaps(keep, after):
+            raise SystemExit(f"session_gaps mismatch from {start} (after={after})")
+    print(f"parity: {args.queries} random range/last-n/count queries identical to the loops")
+
+    # 3) A bar on a holiday is quarantined, the session next to it is not
+    bar = {"symbol": "AAPL", "open": 10.0, "high": 11.0, "low": 9.0, "close": 10.5}
+    verdict = validate_ohlc_daily_rows([dict(bar, date="2026-01-16"), dict(bar, date="2026-01-19")])
+    if verdict.mask.tolist() != [True, False] or verdict.reasons != {1: ["trading_session:date"]}:
+        raise SystemExit(f"holiday bar not quarantined: {verdict.reasons}")
+    print("guard: holiday bar quarantined as trading_session:date")
+
+    # Cost: old loops vs bisect queries
+    ends = [_random_day(rng, lo=date(2010, 1, 1)) for _ in range(args.queries)]
+    t0 = time.perf_counter()
+    for end in ends:
+        _weekdays_between(end - timedelta(days=730), end)
+        _last_n_weekdays(end, 252)
+    t_loop = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for end in ends:
+        calendar.sessions_between(end - timedelta(days=730), end)
+        calendar.last_n_sessions(end, 252)
+    t_cal = time.perf_counter() - t0
+    print(
+        f"calendar built in {t_build * 1000:.1f} ms ({len(calendar)} sessions); "
+        f"2y range + last 252: loops {t_loop / args.queries * 1e6:.0f} us, "
+        f"calendar {t_cal / args.queries * 1e6:.0f} us ({t_loop / t_cal:.1f}x)"
+    )
+
+    symbols = _symbols(args.symbols)
+    end = date(2026, 3, 13)
+    watermarks = {s: end - timedelta(days=int(rng.integers(1, 30))) for s in symbols}
+    t0 = time.perf_counter()
+    plan = missing_trading_days(symbols, watermarks, end, 10)
+    t_plan = time.perf_counter() - t0
+    print(
+        f"missing_trading_days: {args.symbols} symbols -> {sum(map(len, plan.values()))} "
+        f"symbol-days in {t_plan * 1000:.1f} ms"
+    )
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Compare the compiled validation engine against the per-call Great Expectations path.
+The rows_s column is the row-level variant (pass mask + reasons); its verdict must agree.
+
+    python scripts/bench_validation.py --sizes 10 10000 1000000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add repo root to PYTHONPATH so imports work when running scripts directly
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from pipelines.batch.ohlc_daily.provider import fetch_daily_prices_stub  # noqa: E402
+from pipelines.batch.ohlc_daily.quality import OHLC_DAILY_SUITE  # noqa: E402
+from pipelines.batch.ohlc_daily.transform import to_curated_prices_daily  # noqa: E402
+from pipelines.common.validation import compile_suite, run_with_ge  # noqa: E402
+from pipelines.streaming.ingest_lambda.quality import CURATED_PRICES_SUITE  # noqa: E402
+
+
+def _price_events(n: int):
+    symbols = ["AAPL", "MSFT", "TSLA", "AMZN", "NVDA"]
+    return [
+        {
+            "symbol": symbols[i % len(symbols)],
+            "price": 100.0 + (i % 500) * 0.25,
+            "currency": "USD",
+            "ts_market": "2026-01-19T14:30:00Z",
+            "ts_ingest": f"2026-01-19T14:{(i // 60) % 60:02d}:{i % 60:02d}Z",
+            "source": "bench",
+        }
+        for i in range(n)
+    ]
+
+
+def _ticker(i: int) -> str:
+    # Regex-safe synthetic tickers: AAAA, AAAB, ...
+    out = ""
+    for _ in range(4):
+        i, r = divmod(i, 26)
+        out = chr(65 + r) + out
+    return out
+
+
+def _ohlc_rows(n: int):
+    days = 250
+    symbols = [_ticker(i) for i in range(max(1, n // days))]
+    rows = to_curated_prices_daily(fetch_daily_prices_stub(symbols, days=min(days, max(2, n))))
+    return rows[:n]
+
+
+def _time(fn, records, repeat: int):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(records)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 10_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--ge-max-rows", type=int, default=1_000_000, help="skip GE above this")
+    args = parser.parse_args()
+
+    cases = [
+        ("curated_prices", CURATED_PRICES_SUITE, _price_events),
+        ("ohlc_daily", OHLC_DAILY_SUITE, _ohlc_rows),
+    ]
+
+    print(
+        f"{'suite':<16}{'rows':>10}{'compiled_s':>14}{'rows_s':>10}{'ge_s':>12}{'speedup':>10}"
+        "  result"
+    )
+    for name, suite, make in cases:
+        compiled = compile_suite(suite)
+        for n in args.sizes:
+            records = make(n)
+            c_s, c_res = _time(compiled.validate, records, args.repeat)
+            r_s, r_res = _time(compiled.validate_rows, records, args.repeat)
+            if r_res.ok != c_res[0]:
+                raise SystemExit(f"ROW MISMATCH {name} n={n}: batch={c_res} rows={r_res.message}")
+
+            if n <= args.ge_max_rows:
+                g_s, g_res = _time(lambda r, s=suite: run_with_ge(s, r), records, 1)
+                if g_res != c_res:
+                    raise SystemExit(f"MISMATCH {name} n={n}: compiled={c_res} ge={g_res}")
+                speedup = f"{g_s / c_s:>9.1f}x"
+                ge_col = f"{g_s:>12.4f}"
+            else:
+                speedup, ge_col = f"{'-':>10}", f"{'skipped':>12}"
+
+            print(f"{name:<16}{n:>10}{c_s:>14.4f}{r_s:>10.4f}{ge_col}{speedup}  {c_res[1]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Offline check of the Alpha Vantage daily provider and its response cache.
+
+Runs fetch_daily_prices(source="alphavantage") against the local FakeAlphaVantage, which
+serves the recorded-format payloads in pipelines/local/fixtures/alphavantage (other symbols
+get a generated series). Checks, with a fresh cache directory:
+  1. a cold backfill makes one TIME_SERIES_DAILY call per symbol
+  2. rerunning it makes no calls and returns the same bars
+  3. an incremental window (with and without watermarks) is served from the cache
+  4. fixture bars come through unchanged, and an erroring symbol doesn't sink the rest
+
+    python scripts/check_alphavantage_daily.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+from dataclasses import replace
+from datetime import date
+from pathlib import Path
+
+# Add repo root to PYTHONPATH so imports work when running scripts directly
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+CACHE_DIR = tempfile.mkdtemp(prefix="av-cache-")
+os.environ.update(
+    AV_CACHE_DIR=CACHE_DIR,
+    ALPHAVANTAGE_API_KEY="offline",
+    PROVIDER_SECRET_ID="",
+    PROVIDER_RATE_PER_MINUTE="100000",
+)
+
+from pipelines.batch.ohlc_daily import alphavantage  # noqa: E402
+from pipelines.batch.ohlc_daily.provider import DailyPricesRequest, fetch_daily_prices  # noqa: E402
+from pipelines.local.fake_alphavantage import FIXTURES_DIR, FakeAlphaVantage  # noqa: E402
+
+AS_OF = date(2026, 1, 16)
+SYMBOLS = ["AAPL", "MSFT", "IBM", "NVDA"]
+
+
+def _bars(rows):
+    return [{k: v for k, v in r.items() if k != "ts_ingest"} for r in rows]
+
+
+def _step(name, fake, req):
+    before = fake.requests
+    rows = fetch_daily_prices(req)
+    calls = fake.requests - before
+    print(f"{name:<34}{len(rows):>6} rows{calls:>4} api calls")
+    return rows, calls
+
+
+def main():
+    with FakeAlphaVantage(fixtures_dir=str(FIXTURES_DIR), error_symbols=["BAD"]) as fake:
+        alphavantage.ALPHAVANTAGE_BASE_URL = fake.url
+        backfill = DailyPricesRequest(
+            mode="backfill", symbols=SYMBOLS, source="alphavantage", backfill_days=60, as_of=AS_OF
+        )
+
+        cold, calls = _step("backfill 60d (cold cache)", fake, backfill)
+        assert calls == len(SYMBOLS), calls
+        warm, calls = _step("backfill 60d (rerun)", fake, backfill)
+        assert calls == 0 and _bars(warm) == _bars(cold), calls
+
+        inc = DailyPricesRequest(
+            mode="incremental", symbols=SYMBOLS, source="alphavantage", as_of=AS_OF
+        )
+        _, calls = _step("incremental lookback 10d", fake, inc)
+        assert calls == 0, calls
+        wm = {"AAPL": date(2026, 1, 9), "MSFT": AS_OF}
+        rows, calls = _step("incremental with watermarks", fake, replace(inc, watermarks=wm))
+        assert calls == 0 and {r["symbol"] for r in rows} == {"AAPL", "IBM", "NVDA"}, calls
+        assert min(r["date"] for r in rows if r["symbol"] == "AAPL") == "2026-01-12"
+
+        fixture = json.loads((FIXTURES_DIR / "TIME_SERIES_DAILY_AAPL.json").read_text())
+        bar = fixture["Time Series (Daily)"]["2026-01-16"]
+        landed = next(r for r in cold if r["symbol"] == "AAPL" and r["date"] == "2026-01-16")
+        assert landed["close"] == float(bar["4. close"]) and landed["volume"] == int(
+            bar["5. volume"]
+        )
+        # Fixture holiday: no bar, no row
+        assert not any(r["date"] == "2026-01-01" for r in cold if r["symbol"] == "AAPL")
+
+        rows, calls = _step(
+            "backfill with an erroring symbol", fake, replace(backfill, symbols=SYMBOLS + ["BAD"])
+        )
+        assert calls == 1 and {r["symbol"] for r in rows} == set(SYMBOLS), calls
+
+    objects = list(Path(CACHE_DIR, "objects").rglob("*.json.gz"))
+    refs = list(Path(CACHE_DIR, "refs").rglob("*.json"))
+    print(f"cache: {len(refs)} refs -> {len(objects)} payload objects in {CACHE_DIR}")
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Offline check of the small-file compaction job against a local directory and the S3 stand-in.
+
+Lands Lambda-style `prices_<ts>.jsonl[.gz]` objects (5-minute ticks, some re-delivered
+by a fan-out shard as `prices_<ts>_<shard_id>` so records repeat) under raw/prices and
+curated/prices, then checks:
+  1. hourly compaction leaves one object + one manifest per closed hour, drops the
+     duplicates, and keeps the still-open hour as small objects
+  2. after every single put/delete the job makes, a reader going through live_keys()
+     still sees every record, and none more often than before (never partial, never twice)
+  3. rerunning is a no-op; a late object re-merges its hour; a daily run rolls the
+     hourly files up; an interrupted run is finished by the next one
+  4. curated/prices converts to Parquet with the price_event columns
+Reports objects before/after and tracemalloc peak per zone.
+
+    python scripts/check_compaction.py --hours 4 --symbols 100
+"""
+
+import argparse
+import io
+import sys
+import tempfile
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add repo root to PYTHONPATH so imports work when running scripts directly
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from pipelines.batch.compaction.compactor import (  # noqa: E402
+    DEDUPE_KEY,
+    LocalStore,
+    S3Store,
+    _pyarrow,
+    compact_zone,
+    iter_zone_records,
+    live_keys,
+)
+from pipelines.common.schema import load_schema  # noqa: E402
+from pipelines.common.storage import jsonl_key, write_jsonl_local, write_jsonl_s3  # noqa: E402
+from pipelines.local.aws import FakeS3Client  # noqa: E402
+
+START = datetime(2026, 1, 16, 14, 0, tzinfo=timezone.utc)
+BUCKET = "mdp-local"
+
+
+def _symbols(n: int):
+    out = []
+    for i in range(n):
+        s = ""
+        for _ in range(4):
+            i, r = divmod(i, 26)
+            s = chr(65 + r) + s
+        out.append(s)
+    return out
+
+
+def _tick(symbols, at: datetime):
+    ts = at.isoformat().replace("+00:00", "Z")
+    return [
+        {
+            "symbol": s,
+            "price": round(100 + (i % 50) + at.minute / 100, 2),
+            "currency": "USD",
+            "ts_market": f"{at.date().isoformat()}T00:00:00Z",
+            "ts_ingest": ts,
+            "source": "alphavantage",
+        }
+        for i, s in enumerate(symbols)
+    ]
+
+
+def _land(store, zone, at, records, compression, shard=""):
+    key = jsonl_key(zone, f"prices_{at.strftime('%Y%m%dT%H%M%SZ')}{shard}", compression)
+    if isinstance(store, LocalStore):
+        write_jsonl_local(store.root / key, records, compression=compression)
+    else:
+        write_jsonl_s3(store.client, store.bucket, key, records, compression=compression)
+
+
+def _view(store, zone):
+    return Counter(tuple(r.get(f) for f in DEDUPE_KEY) for r in iter_zone_records(store, zone))
+
+
+class _Watched:
+    """Store wrapper asserting the reader view after every mutation the job makes."""
+
+    def __init__(self, store, zone, expected):
+        self.store, self.zone, self.expected, self.checks = store, zone, expected, 0
+
+    def __getattr__(self, name):
+        return getattr(self.store, name)
+
+    def _assert(self):
+        # Every record still visible (nothing partial), none more often than before
+        self.checks += 1
+        view = _view(self.store, self.zone)
+        assert (
+            view.keys() == self.expected.keys() and not view - self.expected
+        ), f"reader view broken after {self.checks} mutations"
+
+    def put(self, key, data):
+        self.store.put(key, data)
+        self._assert()
+
+    def delete(self, keys):
+        for k in keys:  # one at a time, like a run interrupted between any two deletes
+            self.store.delete([k])
+            self._assert()
+
+    def sink(self, key):
+        sink, watched = self.store.sink(key), self
+
+        class _Sink:
+            def write(self, data):
+                sink.write(data)
+
+            def close(self):
+                sink.close()
+                watched._assert()
+
+            def abort(self):
+                sink.abort()
+
+        return _Sink()
+
+
+def _interrupted(keys):
+    if keys:
+        raise RuntimeError("interrupted before deleting inputs")
+
+
+def _populate(store, symbols, hours):
+    n = 0
+    for zone in ("raw/prices", "curated/prices"):
+        for i in range(hours * 12 + 3):  # 3 ticks into the open hour
+            at = START + timedelta(minutes=5 * i)
+            records = _tick(symbols, at)
+            _land(store, zone, at, records, "gzip" if i % 2 else "none")
+            n += 1
+            if i % 7 == 0 and i < hours * 12:  # re-delivered in a closed hour, 1s later
+                shard = "_shard-0001-of-0002"
+                _land(store, zone, at + timedelta(seconds=1), records, "none", shard)
+                n += 1
+    return n
+
+
+def _run(store, symbols, hours, label):
+    objects = _populate(store, symbols, hours)
+    now = START + timedelta(hours=hours, minutes=15)
+    print(f"[{label}] landed {objects} objects over {hours}h + an open hour")
+
+    for zone, fmt in (("raw/prices", "jsonl"), ("curated/prices", "parquet")):
+        before = len(live_keys(store, zone))
+        expected = Counter(dict.fromkeys(_view(store, zone), 1))  # each record once
+        result = compact_zone(store, zone, fmt=fmt, now=now, run_id="run1")
+        assert _view(store, zone) == expected
+        assert len(result.manifests) == hours and result.duplicates > 0, result
+        keys = live_keys(store, zone)
+        assert len(keys) == hours + 3, len(keys)  # one file per closed hour + open-hour ticks
+        assert all(
+            k.endswith(".parquet" if fmt == "parquet" else ".jsonl.gz") for k in keys[:hours]
+        )
+
+        watched = _Watched(store, zone, expected)
+        assert not compact_zone(watched, zone, fmt=fmt, now=now, run_id="run2").manifests
+
+        late = START + timedelta(minutes=17, seconds=30)
+        late_records = _tick(symbols[:5], late)
+        _land(store, zone, late, late_records, "none")
+        expected.update(Counter(tuple(r.get(f) for f in DEDUPE_KEY) for r in late_records))
+        result = compact_zone(watched, zone, fmt=fmt, now=now, run_id="run3")
+        assert [m.period for m in result.manifests] == [START.strftime("%Y%m%d%H")]
+
+        tracemalloc.start()
+        result = compact_zone(
+            watched, zone, granularity="day", fmt=fmt, now=now + timedelta(days=1), run_id="run4"
+        )
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert [m.granularity for m in result.manifests] == ["day"]
+        assert len(live_keys(store, zone)) == 1
+
+        # Interrupted run: output written, manifest committed, inputs not yet deleted
+        _land(store, zone, START + timedelta(minutes=1), _tick(symbols[:1], START), "none")
+        failing = _Watched(store, zone, _view(store, zone))  # the re-landed tick shows twice
+        failing.delete = _interrupted
+        try:
+            compact_zone(
+                failing,
+                zone,
+                granularity="day",
+                fmt=fmt,
+                now=now + timedelta(days=1),
+                run_id="run5",
+            )
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("expected the run to be interrupted")
+        assert _view(store, zone) == expected
+        result = compact_zone(
+            watched, zone, granularity="day", fmt=fmt, now=now + timedelta(days=1), run_id="run6"
+        )
+        assert (
+            result.cleaned and len(live_keys(store, zone)) == 1 and _view(store, zone) == expected
+        )
+        after = len(store.list(zone))
+        print(
+            f"  {zone:<15} {fmt:<8} {before:>4} live objects -> {after} stored "
+            f"(1 file + 1 manifest)  checked after {watched.checks} mutations  "
+            f"peak {peak / 1e6:.1f} MB"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hours", type=int, default=4)
+    parser.add_argument("--symbols", type=int, default=100)
+    args = parser.parse_args()
+    symbols = _symbols(args.symbols)
+
+    with tempfile.TemporaryDirectory(prefix="compaction-") as root:
+        _run(LocalStore(root), symbols, args.hours, "local")
+
+    # Small list pages so the listing follows continuation tokens
+    store = S3Store(FakeS3Client(), BUCKET, max_keys=50)
+    _run(store, symbols, args.hours, "s3")
+
+    _, pq = _pyarrow()
+    (key,) = live_keys(store, "curated/prices")
+    with store.open(key) as body:
+        columns = pq.read_schema(io.BytesIO(body.read())).names
+    assert tuple(columns) == load_schema("price_event").field_names, columns
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()